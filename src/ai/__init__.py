@@ -8,6 +8,7 @@ from .ai_matcher import AIMatcher
 from .ai_matcher_manager import AIMatcherManager
 from .ai_cache import AIResponseCache
 from .ai_metrics import AIMetricsCollector, AICallMetrics
+from .ai_batcher import AIBatchDispatcher
 
 __all__ = [
     "AIMatcher",
@@ -15,5 +16,6 @@ __all__ = [
     "AIResponseCache",
     "AIMetricsCollector",
     "AICallMetrics",
+    "AIBatchDispatcher",
 ]
 
@@ -0,0 +1,59 @@
+"""
+本地假 AI 客户端 — 不发起任何网络请求，记录所有调用
+
+模拟 OpenAI 兼容接口(client.chat.completions.create)，用于在本地验证微批调度:
+
+    matcher = AIMatcher({..., "ai_batch_enabled": True}, client=FakeAIClient())
+    await asyncio.gather(*(matcher.recognize_title(t) for t in titles))
+    matcher.client.calls  # 每次调用的请求体
+
+此文件以 `_` 开头，不属于 src.ai 的公开接口。
+"""
+
+import json
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+from .ai_batcher import estimate_tokens
+
+
+class FakeAIClient:
+    """
+    标题识别原样返回标题,别名验证返回前 3 个别名。
+    输入为 {"items": [...]} 时按批量格式返回 {"results": [...]}。
+    所有调用记录在 calls 中。
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls: List[Dict[str, Any]] = []
+        self.chat = self
+        self.completions = self
+
+    @staticmethod
+    def _answer(item: Dict[str, Any]) -> Dict[str, Any]:
+        if "aliases" in item:
+            return {"nameEn": None, "nameJp": None, "nameRomaji": None, "aliasesCn": list(item["aliases"])[:3]}
+        return {
+            "search_title": item.get("title", ""),
+            "season": None,
+            "type": item.get("type", "tv_series"),
+            "year": item.get("year"),
+        }
+
+    def create(self, model: str = "", messages: Optional[List[Dict[str, str]]] = None, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        user_content = next((m["content"] for m in reversed(messages or []) if m["role"] == "user"), "{}")
+        data = json.loads(user_content)
+        self.calls.append(data)
+        if isinstance(data, dict) and isinstance(data.get("items"), list):
+            body = {"results": [{"id": item.get("id"), **self._answer(item)} for item in data["items"]]}
+        else:
+            body = self._answer(data)
+        content = json.dumps(body, ensure_ascii=False)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content, reasoning_content=None))],
+            usage=SimpleNamespace(total_tokens=estimate_tokens(user_content) + estimate_tokens(content)),
+        )
@@ -0,0 +1,212 @@
+"""
+AI 请求微批调度模块
+
+把短时间窗口内来自不同调用方(TMDB 自动刮削、自动导入、Webhook 等任务)的
+同类 AI 请求(标题识别、别名验证)合并为一次多条目请求发送,
+再把结果按条目分发回各自等待的调用方,减少 LLM 往返次数。
+"""
+
+import asyncio
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from itertools import zip_longest
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(payload: Any) -> int:
+    """
+    粗略估算一个条目序列化后占用的 tokens
+
+    非 ASCII 字符(中日文)按每字 1 token 计,ASCII 按每 4 字符 1 token 计,
+    只用于控制单批大小,不追求精确。
+    """
+    text = payload if isinstance(payload, str) else json.dumps(payload, ensure_ascii=False, default=str)
+    non_ascii = sum(1 for ch in text if ord(ch) > 127)
+    return non_ascii + (len(text) - non_ascii) // 4 + 8
+
+
+class _RateLimiter:
+    """按固定间隔放行请求的简单限速器,rate_per_minute <= 0 表示不限速"""
+
+    def __init__(self, rate_per_minute: int):
+        self.rate_per_minute = rate_per_minute
+        self._next_allowed = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if self.rate_per_minute <= 0:
+            return
+        interval = 60.0 / self.rate_per_minute
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next_allowed - now
+            self._next_allowed = max(now, self._next_allowed) + interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+@dataclass
+class _PendingBatch:
+    """正在收集中的一批请求"""
+    payloads: List[Any] = field(default_factory=list)
+    futures: List[asyncio.Future] = field(default_factory=list)
+    tokens: int = 0
+    timer: Optional[asyncio.TimerHandle] = None
+
+
+class AIBatchDispatcher:
+    """
+    AI 请求微批调度器
+
+    submit() 提交的请求按 kind 分组,在 window_ms 时间窗口内收集,
+    达到条目数或 token 预算上限时立即发送。每批通过 send_batch(kind, payloads)
+    发送,它必须返回与 payloads 等长、顺序对应的结果列表。
+
+    同时发送中的批次数受 max_concurrency 限制,批次发送频率受
+    rate_limit_per_minute 限制(针对当前提供商)。
+    """
+
+    def __init__(
+        self,
+        send_batch: Callable[[Hashable, List[Any]], Awaitable[List[Any]]],
+        window_ms: int = 50,
+        max_batch_size: int = 20,
+        max_batch_tokens: int = 4000,
+        max_concurrency: int = 2,
+        rate_limit_per_minute: int = 0,
+        estimate: Callable[[Any], int] = estimate_tokens,
+    ):
+        self._send_batch = send_batch
+        self._estimate = estimate
+        self._pending: Dict[Hashable, _PendingBatch] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._stats = {"requests": 0, "batches": 0, "batched_items": 0, "max_batch": 0, "failures": 0}
+        self.configure(
+            window_ms=window_ms,
+            max_batch_size=max_batch_size,
+            max_batch_tokens=max_batch_tokens,
+            max_concurrency=max_concurrency,
+            rate_limit_per_minute=rate_limit_per_minute,
+        )
+
+    def configure(
+        self,
+        window_ms: Optional[int] = None,
+        max_batch_size: Optional[int] = None,
+        max_batch_tokens: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        rate_limit_per_minute: Optional[int] = None,
+    ) -> None:
+        """更新调度参数(热更新),只影响之后发送的批次"""
+        if window_ms is not None:
+            self.window_ms = max(0, int(window_ms))
+        if max_batch_size is not None:
+            self.max_batch_size = max(1, int(max_batch_size))
+        if max_batch_tokens is not None:
+            self.max_batch_tokens = max(1, int(max_batch_tokens))
+        if max_concurrency is not None and max_concurrency != getattr(self, "max_concurrency", None):
+            self.max_concurrency = max(1, int(max_concurrency))
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        if rate_limit_per_minute is not None:
+            self._rate_limiter = _RateLimiter(int(rate_limit_per_minute))
+
+    async def submit(self, kind: Hashable, payload: Any) -> Any:
+        """
+        提交一个请求并等待其结果
+
+        Args:
+            kind: 请求分组键,只有相同 kind 的请求会被合并到同一批
+            payload: 单个条目的输入数据
+
+        Returns:
+            send_batch 为该条目返回的结果
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        cost = self._estimate(payload)
+        self._stats["requests"] += 1
+
+        batch = self._pending.get(kind)
+        if batch is not None and batch.payloads and batch.tokens + cost > self.max_batch_tokens:
+            # 加入后会超出 token 预算,先把已收集的发出去
+            self._flush(kind)
+            batch = None
+        if batch is None:
+            batch = _PendingBatch()
+            self._pending[kind] = batch
+            batch.timer = loop.call_later(self.window_ms / 1000, self._flush, kind)
+
+        batch.payloads.append(payload)
+        batch.futures.append(future)
+        batch.tokens += cost
+        if len(batch.payloads) >= self.max_batch_size:
+            self._flush(kind)
+
+        return await future
+
+    def _flush(self, kind: Hashable) -> None:
+        batch = self._pending.pop(kind, None)
+        if batch is None:
+            return
+        if batch.timer is not None:
+            batch.timer.cancel()
+        task = asyncio.create_task(self._run_batch(kind, batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, kind: Hashable, batch: _PendingBatch) -> None:
+        async with self._semaphore:
+            # 排队期间已取消的调用方不再发送
+            entries = [(p, f) for p, f in zip(batch.payloads, batch.futures) if not f.done()]
+            if not entries:
+                return
+            await self._rate_limiter.acquire()
+
+            self._stats["batches"] += 1
+            self._stats["batched_items"] += len(entries)
+            self._stats["max_batch"] = max(self._stats["max_batch"], len(entries))
+            logger.debug(f"AI微批: 发送 {kind[0] if isinstance(kind, tuple) else kind} 批次, {len(entries)} 个条目")
+
+            try:
+                results = await self._send_batch(kind, [p for p, _ in entries])
+            except Exception as e:
+                self._stats["failures"] += 1
+                for _, future in entries:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            except asyncio.CancelledError:
+                for _, future in entries:
+                    future.cancel()
+                raise
+
+        for (_, future), result in zip_longest(entries, results or []):
+            if future is not None and not future.done():
+                future.set_result(result)
+
+    async def flush_all(self) -> None:
+        """立即发送所有收集中的批次并等待发送完成"""
+        for kind in list(self._pending):
+            self._flush(kind)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取调度统计"""
+        batches = self._stats["batches"]
+        return {
+            **self._stats,
+            "avg_batch": self._stats["batched_items"] / batches if batches else 0,
+            "pending": sum(len(b.payloads) for b in self._pending.values()),
+            "in_flight": len(self._tasks),
+            "window_ms": self.window_ms,
+            "max_batch_size": self.max_batch_size,
+            "max_batch_tokens": self.max_batch_tokens,
+            "max_concurrency": self.max_concurrency,
+            "rate_limit_per_minute": self._rate_limiter.rate_per_minute,
+        }
+
@@ -2,158 +2,356 @@
 AI 响应缓存模块
 
 提供 AI 调用结果的缓存功能,减少重复调用,降低成本
+
+- L1: 进程内 LRU(有界、带过期时间)
+- L2: 共享缓存后端(src.core.cache,hybrid/redis/database),重启后仍然有效
+- 缓存键基于规范化后的输入(Unicode/空白/大小写归一、字典键排序、忽略 None 字段)
+- 相同输入的并发调用合并为一次 AI 请求
+- 命中时按方法统计节省的 tokens 与耗时,并通过 AIMetricsCollector 上报
 """
 
+import dataclasses
 import hashlib
 import json
 import logging
-from datetime import datetime, timedelta
-from typing import Any, Optional, Dict
+import re
+import time
+import unicodedata
+from collections import OrderedDict, defaultdict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from src.utils.shared_call import SharedCalls
+from .ai_metrics import AICallMetrics, track_tokens
 
 logger = logging.getLogger(__name__)
 
+# 共享缓存后端中的区域名
+CACHE_REGION = "ai_cache"
+# 缓存键格式版本,规范化规则变化时递增以避免读到旧键
+_KEY_VERSION = "v2"
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def _normalize_text(text: str) -> str:
+    """文本归一化: NFKC、去首尾空白、合并连续空白、大小写折叠"""
+    text = unicodedata.normalize("NFKC", text)
+    return _WHITESPACE_RE.sub(" ", text).strip().casefold()
+
+
+def canonicalize(value: Any) -> Any:
+    """
+    将参数递归转换为可稳定序列化的规范形式
+
+    对象优先使用 model_dump / to_dict / dataclass 字段展开,而不是 str(),
+    列表保持顺序(顺序对 index 类结果有意义),集合排序。
+    """
+    if hasattr(value, "model_dump"):
+        value = value.model_dump()
+    elif hasattr(value, "to_dict"):
+        value = value.to_dict()
+    elif dataclasses.is_dataclass(value) and not isinstance(value, type):
+        value = dataclasses.asdict(value)
+
+    if value is None or isinstance(value, (bool, int)):
+        return value
+    if isinstance(value, float):
+        return int(value) if value.is_integer() else round(value, 6)
+    if isinstance(value, str):
+        return _normalize_text(value)
+    if isinstance(value, dict):
+        return {str(k): canonicalize(v) for k, v in value.items() if v is not None}
+    if isinstance(value, (list, tuple)):
+        return [canonicalize(v) for v in value]
+    if isinstance(value, (set, frozenset)):
+        items = [canonicalize(v) for v in value]
+        return sorted(items, key=lambda v: json.dumps(v, sort_keys=True, ensure_ascii=False))
+    return _normalize_text(str(value))
+
 
 class AIResponseCache:
-    """AI 响应缓存"""
-    
-    def __init__(self, ttl_seconds: int = 3600, max_size: int = 1000):
+    """AI 响应缓存(L1 LRU + L2 共享缓存后端)"""
+
+    def __init__(
+        self,
+        ttl_seconds: int = 3600,
+        max_size: int = 1000,
+        metrics=None,
+        model: str = "",
+        persistent: bool = True,
+    ):
         """
         初始化缓存
-        
+
         Args:
             ttl_seconds: 缓存过期时间(秒),默认1小时
-            max_size: 最大缓存条目数
+            max_size: L1 最大缓存条目数
+            metrics: AIMetricsCollector,用于上报命中与节省量(可选)
+            model: 模型名称,参与缓存键计算并记录到指标中
+            persistent: 是否使用共享缓存后端作为 L2
         """
-        self._cache: Dict[str, tuple[Any, datetime]] = {}
+        self._cache: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
         self.ttl_seconds = ttl_seconds
         self.max_size = max_size
+        self.metrics = metrics
+        self.model = model or ""
+        self.persistent = persistent
         self.logger = logging.getLogger(self.__class__.__name__)
-        
-        # 统计信息
-        self._hits = 0
-        self._misses = 0
-    
-    def _generate_cache_key(self, method: str, **kwargs) -> str:
+
+        # 进行中的调用: 缓存键 -> Future(条目)
+        self._inflight = SharedCalls()
+
+        # 统计信息(按方法)
+        self._stats: Dict[str, Dict[str, float]] = defaultdict(lambda: {
+            "l1_hits": 0, "l2_hits": 0, "coalesced": 0, "misses": 0,
+            "saved_tokens": 0, "saved_ms": 0,
+        })
+
+    # ------------------------------------------------------------------
+    # 缓存键
+    # ------------------------------------------------------------------
+
+    def make_key(self, method: str, **kwargs) -> str:
         """
         生成缓存键
-        
+
         Args:
             method: 方法名
-            **kwargs: 方法参数
-        
+            **kwargs: 方法参数(值为 None 的参数会被忽略)
+
         Returns:
-            缓存键(MD5哈希)
+            缓存键(SHA-256)
         """
-        # 构建缓存数据
-        cache_data = {"method": method}
-        
-        # 添加参数,确保可序列化
-        for key, value in kwargs.items():
-            if hasattr(value, 'to_dict'):
-                # 如果对象有 to_dict 方法,使用它
-                cache_data[key] = value.to_dict()
-            elif isinstance(value, (list, tuple)):
-                # 列表/元组,尝试转换每个元素
-                cache_data[key] = [
-                    item.to_dict() if hasattr(item, 'to_dict') else str(item)
-                    for item in value
-                ]
-            elif isinstance(value, dict):
-                cache_data[key] = value
-            else:
-                # 其他类型转为字符串
-                cache_data[key] = str(value)
-        
-        # 生成 JSON 字符串并计算 MD5
-        cache_str = json.dumps(cache_data, sort_keys=True, ensure_ascii=False)
-        return hashlib.md5(cache_str.encode()).hexdigest()
-    
-    def get(self, method: str, **kwargs) -> Optional[Any]:
+        cache_data = {
+            "v": _KEY_VERSION,
+            "method": method,
+            "model": self.model,
+            "args": canonicalize({k: v for k, v in kwargs.items() if v is not None}),
+        }
+        cache_str = json.dumps(cache_data, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+        return f"{method}:{hashlib.sha256(cache_str.encode('utf-8')).hexdigest()}"
+
+    # ------------------------------------------------------------------
+    # L1 / L2
+    # ------------------------------------------------------------------
+
+    def _l1_get(self, key: str) -> Optional[Dict[str, Any]]:
+        item = self._cache.get(key)
+        if item is None:
+            return None
+        entry, expire_at = item
+        if time.monotonic() >= expire_at:
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return entry
+
+    def _l1_set(self, key: str, entry: Dict[str, Any], ttl: Optional[float] = None) -> None:
+        self._cache[key] = (entry, time.monotonic() + (ttl if ttl is not None else self.ttl_seconds))
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+
+    @staticmethod
+    def _get_backend():
+        try:
+            from src.core.cache import get_cache_backend
+            return get_cache_backend()
+        except RuntimeError:
+            # 全局缓存后端未初始化(例如独立脚本),只使用 L1
+            return None
+
+    async def _l2_get(self, key: str) -> Optional[Dict[str, Any]]:
+        if not self.persistent:
+            return None
+        backend = self._get_backend()
+        if backend is None:
+            return None
+        try:
+            entry = await backend.get(key, region=CACHE_REGION)
+        except Exception as e:
+            self.logger.debug(f"AI缓存 L2 读取失败: {e}")
+            return None
+        if not isinstance(entry, dict) or "v" not in entry:
+            return None
+        return entry
+
+    async def _l2_set(self, key: str, entry: Dict[str, Any]) -> None:
+        if not self.persistent:
+            return
+        backend = self._get_backend()
+        if backend is None:
+            return
+        try:
+            await backend.set(key, entry, ttl=self.ttl_seconds, region=CACHE_REGION)
+        except Exception as e:
+            self.logger.debug(f"AI缓存 L2 写入失败: {e}")
+
+    async def _lookup(self, key: str) -> Tuple[Optional[Dict[str, Any]], str]:
+        entry = self._l1_get(key)
+        if entry is not None:
+            return entry, "l1"
+        entry = await self._l2_get(key)
+        if entry is not None:
+            # L2 无法得知剩余 TTL,回填 L1 时使用完整 TTL
+            self._l1_set(key, entry)
+            return entry, "l2"
+        return None, "miss"
+
+    # ------------------------------------------------------------------
+    # 公开接口
+    # ------------------------------------------------------------------
+
+    async def get(self, method: str, **kwargs) -> Optional[Any]:
         """
         从缓存获取结果
-        
-        Args:
-            method: 方法名
-            **kwargs: 方法参数
-        
+
         Returns:
             缓存的结果,如果不存在或已过期则返回 None
         """
-        cache_key = self._generate_cache_key(method, **kwargs)
-        
-        if cache_key in self._cache:
-            result, timestamp = self._cache[cache_key]
-            
-            # 检查是否过期
-            if datetime.now() - timestamp < timedelta(seconds=self.ttl_seconds):
-                self._hits += 1
-                self.logger.debug(f"AI缓存命中: {method} | key={cache_key[:8]}...")
-                return result
-            else:
-                # 过期,删除
-                del self._cache[cache_key]
-                self.logger.debug(f"AI缓存过期: {method} | key={cache_key[:8]}...")
-        
-        self._misses += 1
-        return None
-    
-    def set(self, result: Any, method: str, **kwargs):
+        entry, source = await self._lookup(self.make_key(method, **kwargs))
+        if entry is None:
+            self._stats[method]["misses"] += 1
+            return None
+        self._record_hit(method, source, entry, 0.0)
+        return entry["v"]
+
+    async def set(self, result: Any, method: str, tokens_used: int = 0, duration_ms: float = 0, **kwargs):
         """
         设置缓存
-        
+
         Args:
-            result: 要缓存的结果
+            result: 要缓存的结果(需可 JSON 序列化)
             method: 方法名
+            tokens_used / duration_ms: 产生该结果的原始成本,命中时计入节省量
             **kwargs: 方法参数
         """
-        cache_key = self._generate_cache_key(method, **kwargs)
-        
-        # 如果缓存已满,删除最旧的条目
-        if len(self._cache) >= self.max_size:
-            oldest_key = min(self._cache.keys(), key=lambda k: self._cache[k][1])
-            del self._cache[oldest_key]
-            self.logger.debug(f"AI缓存已满,删除最旧条目: {oldest_key[:8]}...")
-        
-        self._cache[cache_key] = (result, datetime.now())
-        self.logger.debug(f"AI缓存设置: {method} | key={cache_key[:8]}...")
-    
-    def clear(self):
-        """清空缓存"""
+        key = self.make_key(method, **kwargs)
+        entry = {"v": result, "t": int(tokens_used), "ms": int(duration_ms)}
+        self._l1_set(key, entry)
+        await self._l2_set(key, entry)
+        self.logger.debug(f"AI缓存设置: {method} | key={key[-8:]}...")
+
+    async def get_or_compute(
+        self,
+        method: str,
+        compute: Callable[[], Awaitable[Any]],
+        cacheable: Optional[Callable[[Any], bool]] = None,
+        **kwargs,
+    ) -> Any:
+        """
+        查询缓存,未命中时执行 compute 并缓存结果
+
+        相同缓存键的并发调用只会执行一次 compute,其余调用等待并共享结果。
+        compute 在独立任务中执行,某个调用方被取消不会影响其余调用方,全部取消时才取消 compute。
+
+        Args:
+            method: 方法名
+            compute: 实际执行 AI 调用的协程函数
+            cacheable: 判断结果是否可缓存,默认非 None 即缓存
+            **kwargs: 参与缓存键计算的参数
+        """
+        key = self.make_key(method, **kwargs)
+        start = time.perf_counter()
+
+        entry, source = await self._lookup(key)
+        if entry is not None:
+            self._record_hit(method, source, entry, (time.perf_counter() - start) * 1000)
+            return entry["v"]
+
+        async def compute_and_store() -> Dict[str, Any]:
+            with track_tokens() as meter:
+                result = await compute()
+            entry = {"v": result, "t": meter[0], "ms": int((time.perf_counter() - start) * 1000)}
+            if result is not None and (cacheable is None or cacheable(result)):
+                self._l1_set(key, entry)
+                await self._l2_set(key, entry)
+                self.logger.debug(f"AI缓存设置: {method} | key={key[-8:]}...")
+            return entry
+
+        # 计算在独立任务中进行：发起者被取消不会影响仍在等待的其它调用
+        if key not in self._inflight:
+            self._stats[method]["misses"] += 1
+        entry, coalesced = await self._inflight.run(key, compute_and_store)
+        if coalesced:
+            self._record_hit(method, "coalesced", entry, (time.perf_counter() - start) * 1000)
+        return entry["v"]
+
+    def _record_hit(self, method: str, source: str, entry: Dict[str, Any], duration_ms: float) -> None:
+        stats = self._stats[method]
+        stats["coalesced" if source == "coalesced" else f"{source}_hits"] += 1
+        saved_tokens = int(entry.get("t", 0) or 0)
+        saved_ms = max(0, int(entry.get("ms", 0) or 0) - int(duration_ms))
+        stats["saved_tokens"] += saved_tokens
+        stats["saved_ms"] += saved_ms
+        self.logger.debug(f"AI缓存命中({source}): {method}")
+        if self.metrics is not None:
+            self.metrics.record(AICallMetrics(
+                timestamp=datetime.now(),
+                method=method,
+                success=True,
+                duration_ms=int(duration_ms),
+                tokens_used=0,
+                model=self.model,
+                cache_hit=True,
+                saved_tokens=saved_tokens,
+                saved_ms=saved_ms,
+            ))
+
+    async def clear(self):
+        """清空缓存(L1 与共享后端中的 AI 区域)"""
         self._cache.clear()
-        self._hits = 0
-        self._misses = 0
+        self._stats.clear()
+        if self.persistent:
+            backend = self._get_backend()
+            if backend is not None:
+                try:
+                    await backend.clear(region=CACHE_REGION)
+                except Exception as e:
+                    self.logger.warning(f"清空AI缓存 L2 失败: {e}")
         self.logger.info("AI缓存已清空")
-    
+
     def get_stats(self) -> Dict:
         """
         获取缓存统计信息
-        
+
         Returns:
             统计信息字典
         """
-        total_requests = self._hits + self._misses
-        hit_rate = self._hits / total_requests if total_requests > 0 else 0.0
-        
+        totals = {"l1_hits": 0, "l2_hits": 0, "coalesced": 0, "misses": 0, "saved_tokens": 0, "saved_ms": 0}
+        by_method = {}
+        for method, stats in self._stats.items():
+            for k in totals:
+                totals[k] += stats[k]
+            hits = stats["l1_hits"] + stats["l2_hits"] + stats["coalesced"]
+            requests = hits + stats["misses"]
+            by_method[method] = {**stats, "hit_rate": hits / requests if requests else 0.0}
+
+        hits = totals["l1_hits"] + totals["l2_hits"] + totals["coalesced"]
+        total_requests = hits + totals["misses"]
         return {
             "size": len(self._cache),
             "max_size": self.max_size,
             "ttl_seconds": self.ttl_seconds,
-            "hits": self._hits,
-            "misses": self._misses,
-            "hit_rate": hit_rate
+            "persistent": self.persistent and self._get_backend() is not None,
+            "hits": hits,
+            "misses": totals["misses"],
+            "hit_rate": hits / total_requests if total_requests > 0 else 0.0,
+            "l1_hits": totals["l1_hits"],
+            "l2_hits": totals["l2_hits"],
+            "coalesced": totals["coalesced"],
+            "saved_tokens": totals["saved_tokens"],
+            "saved_ms": totals["saved_ms"],
+            "by_method": by_method,
         }
-    
+
     def cleanup_expired(self):
-        """清理过期的缓存条目"""
-        now = datetime.now()
-        expired_keys = [
-            key for key, (_, timestamp) in self._cache.items()
-            if now - timestamp >= timedelta(seconds=self.ttl_seconds)
-        ]
-        
+        """清理 L1 中过期的缓存条目(L2 由共享后端自行过期)"""
+        now = time.monotonic()
+        expired_keys = [key for key, (_, expire_at) in self._cache.items() if now >= expire_at]
+
         for key in expired_keys:
             del self._cache[key]
-        
+
         if expired_keys:
             self.logger.info(f"清理了 {len(expired_keys)} 个过期的AI缓存条目")
-
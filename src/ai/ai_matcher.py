@@ -9,8 +9,9 @@ import httpx
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 from src.db import models
-from .ai_metrics import AIMetricsCollector, AICallMetrics
+from .ai_metrics import AIMetricsCollector, AICallMetrics, track_tokens, add_metered_tokens
 from .ai_cache import AIResponseCache
+from .ai_batcher import AIBatchDispatcher
 from .ai_providers import get_provider_config, is_provider_supported
 
 # 从 models 导入需要的类
@@ -40,6 +41,7 @@ from .ai_prompts import (
     DEFAULT_AI_ALIAS_EXPANSION_PROMPT,
     DEFAULT_AI_ALIAS_VALIDATION_PROMPT,
     DEFAULT_AI_EPISODE_GROUP_SELECT_PROMPT,
+    AI_BATCH_PROMPT_SUFFIX,
 )
 
 
@@ -129,11 +131,12 @@ except ImportError:
 class AIMatcher:
     """AI智能匹配器"""
 
-    def __init__(self, config: Dict[str, Any]):
+    def __init__(self, config: Dict[str, Any], client: Any = None):
         """
         初始化AI匹配器
 
         Args:
+            client: 预先构造的客户端 (可选,如 src.ai._fake.FakeAIClient),传入时跳过SDK初始化
             config: 配置字典,包含:
                 - ai_match_provider: AI提供商 (deepseek/siliconflow/openai/gemini)
                 - ai_match_api_key: API密钥
@@ -145,6 +148,9 @@ class AIMatcher:
                 - ai_log_raw_response: 是否记录原始AI响应 (可选,默认False)
                 - ai_cache_enabled: 是否启用缓存 (可选,默认True)
                 - ai_cache_ttl: 缓存过期时间(秒) (可选,默认3600)
+                - ai_batch_enabled: 是否合并并发的识别/别名验证请求 (可选,默认False)
+                - ai_batch_window_ms / ai_batch_max_size / ai_batch_max_tokens /
+                  ai_batch_concurrency / ai_batch_rate_limit: 微批调度参数 (可选)
         """
         # 保存完整配置以供后续使用
         self.config = config
@@ -174,10 +180,43 @@ class AIMatcher:
 
         cache_enabled = config.get("ai_cache_enabled", True)
         cache_ttl = config.get("ai_cache_ttl", 3600)
-        self.cache = AIResponseCache(ttl_seconds=cache_ttl) if cache_enabled else None
+        self.cache = AIResponseCache(
+            ttl_seconds=cache_ttl, metrics=self.metrics, model=f"{self.provider}/{self.model}"
+        ) if cache_enabled else None
 
-        self.client = None
-        self._initialize_client()
+        self.batcher: Optional[AIBatchDispatcher] = None
+        self.update_batch_settings(config)
+
+        self.client = client
+        if self.client is None:
+            self._initialize_client()
+
+    def update_batch_settings(self, config: Dict[str, Any]):
+        """
+        按配置创建或更新微批调度器(热更新)
+
+        Args:
+            config: 配置字典
+        """
+        if not config.get("ai_batch_enabled", False):
+            self.batcher = None
+            return
+
+        rate_limit = int(config.get("ai_batch_rate_limit", 0) or 0)
+        if rate_limit <= 0:
+            # 未单独配置时使用提供商的默认限速
+            rate_limit = (get_provider_config(self.provider) or {}).get("batchRateLimit", 0)
+        settings = {
+            "window_ms": int(config.get("ai_batch_window_ms", 50)),
+            "max_batch_size": int(config.get("ai_batch_max_size", 20)),
+            "max_batch_tokens": int(config.get("ai_batch_max_tokens", 4000)),
+            "max_concurrency": int(config.get("ai_batch_concurrency", 2)),
+            "rate_limit_per_minute": rate_limit,
+        }
+        if self.batcher is None:
+            self.batcher = AIBatchDispatcher(self._send_batch, **settings)
+        else:
+            self.batcher.configure(**settings)
 
     def update_prompts(self, prompt_config: Dict[str, str]):
         """
@@ -412,30 +451,6 @@ class AIMatcher:
                     "isFavorited": is_favorited
                 })
 
-            # 尝试从缓存获取
-            if self.cache:
-                cached_result = self.cache.get(
-                    "select_best_match",
-                    query=query,
-                    results=results_data
-                )
-                if cached_result is not None:
-                    cache_hit = True
-                    duration = (datetime.now() - start_time).total_seconds() * 1000
-
-                    # 记录缓存命中
-                    self.metrics.record(AICallMetrics(
-                        timestamp=datetime.now(),
-                        method="select_best_match",
-                        success=True,
-                        duration_ms=int(duration),
-                        tokens_used=0,
-                        model=self.model,
-                        cache_hit=True
-                    ))
-
-                    return cached_result.get("index", -1) if isinstance(cached_result, dict) else cached_result
-
             input_data = {
                 "query": query,
                 "results": results_data
@@ -454,15 +469,26 @@ class AIMatcher:
                     f"该季度共{total}集。请优先选择集数接近{total}集或标题包含第{cs}季相关信息的弹幕源。"
                 )
 
-            logger.info(f"AI匹配: 开始分析 {len(results)} 个搜索结果")
-            logger.debug(f"查询信息: {query}")
+            async def _call():
+                logger.info(f"AI匹配: 开始分析 {len(results)} 个搜索结果")
+                logger.debug(f"查询信息: {query}")
 
-            # 根据提供商选择不同的调用方法
-            if self.provider == "gemini":
-                response_data = await self._match_gemini(input_data)
-            else:
+                # 根据提供商选择不同的调用方法
+                if self.provider == "gemini":
+                    return await self._match_gemini(input_data)
                 # OpenAI 兼容接口 (deepseek, siliconflow, openai)
-                response_data = await self._match_openai(input_data)
+                return await self._match_openai(input_data)
+
+            if self.cache:
+                # 正负结果都缓存(index < 0 表示没有合适的匹配)
+                response_data = await self.cache.get_or_compute(
+                    "select_best_match", _call,
+                    cacheable=lambda r: isinstance(r, dict),
+                    input=input_data,
+                    prompt=self.match_prompt
+                )
+            else:
+                response_data = await _call()
 
             if not response_data:
                 logger.warning("AI匹配: 未能获取有效响应")
@@ -480,28 +506,11 @@ class AIMatcher:
 
             if index < 0 or index >= len(results):
                 logger.info(f"AI匹配: 未找到合适的匹配 (reason: {reason})")
-                # 缓存负结果
-                if self.cache:
-                    self.cache.set(
-                        response_data,
-                        "select_best_match",
-                        query=query,
-                        results=results_data
-                    )
                 return None
 
             selected = results[index]
             logger.info(f"AI匹配: 选择结果 #{index} - {selected.provider}:{selected.title} (置信度: {confidence}%, 理由: {reason})")
 
-            # 缓存结果
-            if self.cache:
-                self.cache.set(
-                    response_data,
-                    "select_best_match",
-                    query=query,
-                    results=results_data
-                )
-
             return index
 
         except Exception as e:
@@ -665,44 +674,27 @@ class AIMatcher:
         cache_hit = False
 
         try:
-            # 尝试从缓存获取
-            if self.cache:
-                cached_result = self.cache.get(
-                    "recognize_title",
-                    title=title,
-                    year=year,
-                    anime_type=anime_type
-                )
-                if cached_result is not None:
-                    cache_hit = True
-                    duration = (datetime.now() - start_time).total_seconds() * 1000
-
-                    # 记录缓存命中
-                    self.metrics.record(AICallMetrics(
-                        timestamp=datetime.now(),
-                        method="recognize_title",
-                        success=True,
-                        duration_ms=int(duration),
-                        tokens_used=0,
-                        model=self.model,
-                        cache_hit=True
-                    ))
-
-                    return cached_result
-
             input_data = {
                 "title": title,
                 "year": year,
                 "type": anime_type
             }
-            logger.info(f"AI识别: 开始标准化标题 - {input_data}")
 
-            # 根据提供商选择不同的调用方法
-            if self.provider == "gemini":
-                response_data = await self._recognize_gemini(input_data)
+            async def _call():
+                logger.info(f"AI识别: 开始标准化标题 - {input_data}")
+                if self.batcher:
+                    return await self._submit_batched("recognize_title", self.recognition_prompt, input_data)
+                return await self._recognize_single(input_data)
+
+            if self.cache:
+                response_data = await self.cache.get_or_compute(
+                    "recognize_title", _call,
+                    cacheable=lambda r: isinstance(r, dict) and "search_title" in r,
+                    input=input_data,
+                    prompt=self.recognition_prompt
+                )
             else:
-                # OpenAI 兼容接口 (deepseek, siliconflow, openai)
-                response_data = await self._recognize_openai(input_data)
+                response_data = await _call()
 
             if not response_data:
                 logger.warning("AI识别: 未能获取有效响应")
@@ -719,17 +711,6 @@ class AIMatcher:
                 return None
 
             logger.info(f"AI识别: 标准化成功 - {response_data}")
-
-            # 缓存结果
-            if self.cache:
-                self.cache.set(
-                    response_data,
-                    "recognize_title",
-                    title=title,
-                    year=year,
-                    anime_type=anime_type
-                )
-
             return response_data
 
         except Exception as e:
@@ -750,6 +731,14 @@ class AIMatcher:
             logger.error(f"AI识别过程中发生错误: {e}", exc_info=True)
             return None
 
+    async def _recognize_single(self, input_data: Dict[str, Any]) -> Optional[Dict]:
+        """单条标题识别"""
+        # 根据提供商选择不同的调用方法
+        if self.provider == "gemini":
+            return await self._recognize_gemini(input_data)
+        # OpenAI 兼容接口 (deepseek, siliconflow, openai)
+        return await self._recognize_openai(input_data)
+
     async def _recognize_openai(self, input_data: Dict[str, Any]) -> Optional[Dict]:
         """使用OpenAI兼容接口进行识别"""
         if not self.client:
@@ -910,14 +899,25 @@ class AIMatcher:
                 "existing_aliases": existing_aliases
             }
 
-            logger.info(f"AI别名扩展: 开始生成别名 - {input_data}")
+            async def _call():
+                logger.info(f"AI别名扩展: 开始生成别名 - {input_data}")
 
-            # 根据提供商选择不同的调用方法
-            if self.provider == "gemini":
-                response_data = await self._expand_aliases_gemini(input_data)
-            else:
+                # 根据提供商选择不同的调用方法
+                if self.provider == "gemini":
+                    return await self._expand_aliases_gemini(input_data)
                 # OpenAI 兼容接口 (deepseek, siliconflow, openai)
-                response_data = await self._expand_aliases_openai(input_data)
+                return await self._expand_aliases_openai(input_data)
+
+            if self.cache:
+                response_data = await self.cache.get_or_compute(
+                    "expand_aliases", _call,
+                    cacheable=lambda r: isinstance(r, dict) and isinstance(r.get("aliases"), list),
+                    # 已有别名的顺序不影响结果
+                    input={**input_data, "existing_aliases": set(existing_aliases or [])},
+                    prompt=self.config.get("ai_alias_expansion_prompt", "")
+                )
+            else:
+                response_data = await _call()
 
             if not response_data:
                 logger.warning("AI别名扩展: 未获取到有效响应")
@@ -1073,15 +1073,118 @@ class AIMatcher:
             logger.info(f"正在使用AI验证别名: title='{title}', aliases={len(aliases)}个")
             logger.debug(f"AI别名验证输入: {input_data}")
 
-            user_prompt = json.dumps(input_data, ensure_ascii=False, indent=2)
+            if self.batcher:
+                parsed_data = await self._submit_batched("validate_aliases", validation_prompt, input_data)
+            else:
+                parsed_data = await self._validate_aliases_single(input_data, validation_prompt)
+
+            if parsed_data:
+                logger.info(f"AI别名验证成功: nameEn={parsed_data.get('nameEn')}, nameJp={parsed_data.get('nameJp')}, nameRomaji={parsed_data.get('nameRomaji')}, aliasesCn={len(parsed_data.get('aliasesCn', []))}个")
+                logger.debug(f"解析后的数据: {parsed_data}")
+
+            return parsed_data
+
+        except Exception as e:
+            logger.error(f"AI别名验证失败: {e}")
+            return None
+
+    async def _validate_aliases_single(self, input_data: Dict[str, Any], validation_prompt: str) -> Optional[Dict]:
+        """单条别名验证"""
+        user_prompt = json.dumps(input_data, ensure_ascii=False, indent=2)
+
+        # 根据提供商选择不同的调用方法
+        if self.provider == "gemini":
+            full_prompt = f"{validation_prompt}\n\n{user_prompt}"
+            response = await asyncio.to_thread(
+                self.client.models.generate_content,
+                model=self.model,
+                contents=full_prompt,
+                config={
+                    "temperature": 0.0,
+                    "response_mime_type": "application/json"
+                }
+            )
+            content = response.text
+        else:
+            # OpenAI 兼容接口 (deepseek, siliconflow, openai)
+            response = await asyncio.to_thread(
+                self.client.chat.completions.create,
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": validation_prompt},
+                    {"role": "user", "content": user_prompt}
+                ],
+                temperature=0.0,
+                response_format={"type": "json_object"},
+                timeout=30,
+                **self._get_deepseek_thinking_extra()
+            )
+            self._log_reasoning_content(response, "validate_aliases")
+            content = _extract_openai_content(response)
+            if content is None:
+                return None
+
+        logger.debug(f"AI别名验证原始响应: {content}")
+        return _safe_json_loads(content, log_raw_response=self.log_raw_response)
 
+    async def _submit_batched(self, method: str, prompt: str, input_data: Dict[str, Any]) -> Optional[Dict]:
+        """通过微批调度器提交单条请求,并把分摊到本条的 tokens 计入当前上下文"""
+        result, tokens = await self.batcher.submit((method, prompt), input_data)
+        add_metered_tokens(tokens)
+        return result
+
+    async def _send_batch(self, kind, items: List[Dict[str, Any]]) -> List[Any]:
+        """
+        微批调度器的发送函数: 把同类请求合并为一次多条目调用,再按 id 拆分结果
+
+        返回与 items 对应的 (结果, 分摊 tokens) 列表。批量响应中缺失的条目
+        (或整批失败时的全部条目)会退回单条调用。
+        """
+        method, prompt = kind
+
+        async def call_single(item: Dict[str, Any]) -> Optional[Dict]:
+            if method == "recognize_title":
+                return await self._recognize_single(item)
+            return await self._validate_aliases_single(item, prompt)
+
+        # 批调度任务运行在触发它的调用方的上下文副本中,这里重新计量避免 tokens 记到该调用方名下
+        with track_tokens() as meter:
+            if len(items) == 1:
+                result = await call_single(items[0])
+                return [(result, meter[0])]
+
+            results = await self._call_batch_provider(method, prompt, items)
+            batch_tokens = meter[0]
+            missing = [i for i, r in enumerate(results) if r is None]
+            if missing:
+                logger.warning(f"AI微批: {method} 批量响应缺少 {len(missing)}/{len(items)} 个条目,改为单条调用")
+                retried = await asyncio.gather(*(call_single(items[i]) for i in missing), return_exceptions=True)
+                for i, r in zip(missing, retried):
+                    results[i] = None if isinstance(r, BaseException) else r
+
+        share = batch_tokens // len(items)
+        return [(r, share) for r in results]
+
+    async def _call_batch_provider(self, method: str, prompt: str, items: List[Dict[str, Any]]) -> List[Optional[Dict]]:
+        """发送一次多条目请求,返回按输入顺序排列的结果(无法解析的条目为 None)"""
+        if not self.client:
+            return [None] * len(items)
+
+        start_time = datetime.now()
+        system_prompt = f"{prompt}{AI_BATCH_PROMPT_SUFFIX}"
+        user_prompt = json.dumps(
+            {"items": [{"id": idx, **item} for idx, item in enumerate(items)]},
+            ensure_ascii=False
+        )
+        tokens_used = 0
+
+        try:
             # 根据提供商选择不同的调用方法
             if self.provider == "gemini":
-                full_prompt = f"{validation_prompt}\n\n{user_prompt}"
                 response = await asyncio.to_thread(
                     self.client.models.generate_content,
                     model=self.model,
-                    contents=full_prompt,
+                    contents=f"{system_prompt}\n\n{user_prompt}",
                     config={
                         "temperature": 0.0,
                         "response_mime_type": "application/json"
@@ -1094,31 +1197,59 @@ class AIMatcher:
                     self.client.chat.completions.create,
                     model=self.model,
                     messages=[
-                        {"role": "system", "content": validation_prompt},
+                        {"role": "system", "content": system_prompt},
                         {"role": "user", "content": user_prompt}
                     ],
                     temperature=0.0,
                     response_format={"type": "json_object"},
-                    timeout=30,
+                    timeout=30 + 5 * len(items),
                     **self._get_deepseek_thinking_extra()
                 )
-                self._log_reasoning_content(response, "validate_aliases")
+                self._log_reasoning_content(response, f"{method}_batch")
                 content = _extract_openai_content(response)
-                if content is None:
-                    return None
-
-            logger.debug(f"AI别名验证原始响应: {content}")
+                usage = getattr(response, "usage", None)
+                tokens_used = getattr(usage, "total_tokens", 0) or 0
 
-            parsed_data = _safe_json_loads(content, log_raw_response=self.log_raw_response)
-            if parsed_data:
-                logger.info(f"AI别名验证成功: nameEn={parsed_data.get('nameEn')}, nameJp={parsed_data.get('nameJp')}, nameRomaji={parsed_data.get('nameRomaji')}, aliasesCn={len(parsed_data.get('aliasesCn', []))}个")
-                logger.debug(f"解析后的数据: {parsed_data}")
+            if self.log_raw_response:
+                ai_responses_logger.info(f"[{method} 批量 {len(items)} 条] 原始响应: {content}")
+
+            parsed_data = _safe_json_loads(content, log_raw_response=self.log_raw_response) if content else None
+            results: List[Optional[Dict]] = [None] * len(items)
+            entries = parsed_data.get("results") if isinstance(parsed_data, dict) else None
+            for entry in entries if isinstance(entries, list) else []:
+                if not isinstance(entry, dict):
+                    continue
+                idx = entry.pop("id", None)
+                if isinstance(idx, str) and idx.isdigit():
+                    idx = int(idx)
+                if isinstance(idx, int) and 0 <= idx < len(items) and results[idx] is None:
+                    results[idx] = entry
 
-            return parsed_data
+            self.metrics.record(AICallMetrics(
+                timestamp=datetime.now(),
+                method=f"{method}_batch",
+                success=entries is not None,
+                duration_ms=int((datetime.now() - start_time).total_seconds() * 1000),
+                tokens_used=tokens_used,
+                model=self.model,
+                error=None if entries is not None else "批量响应格式异常",
+                cache_hit=False
+            ))
+            return results
 
         except Exception as e:
-            logger.error(f"AI别名验证失败: {e}")
-            return None
+            self.metrics.record(AICallMetrics(
+                timestamp=datetime.now(),
+                method=f"{method}_batch",
+                success=False,
+                duration_ms=int((datetime.now() - start_time).total_seconds() * 1000),
+                tokens_used=tokens_used,
+                model=self.model,
+                error=str(e),
+                cache_hit=False
+            ))
+            logger.error(f"AI微批: {method} 批量调用失败: {e}")
+            return [None] * len(items)
 
     async def batch_recognize_titles(
         self,
@@ -1137,6 +1268,9 @@ class AIMatcher:
         """
         import asyncio
 
+        if self.batcher:
+            # 并发请求由微批调度器合并发送,这里不再限制并发
+            max_concurrent = max(1, len(items))
         semaphore = asyncio.Semaphore(max_concurrent)
 
         async def recognize_with_limit(item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
@@ -1231,7 +1365,15 @@ class AIMatcher:
             )
 
             # 调用AI
-            response_data = await self._season_match_universal({"title": title, "options": season_options})
+            season_input = {"title": title, "options": season_options}
+            if self.cache:
+                response_data = await self.cache.get_or_compute(
+                    "select_best_season", lambda: self._season_match_universal(season_input),
+                    input=season_input,
+                    prompt=DEFAULT_AI_SEASON_MATCH_PROMPT
+                )
+            else:
+                response_data = await self._season_match_universal(season_input)
 
             if not response_data:
                 return None
@@ -1331,42 +1473,53 @@ class AIMatcher:
 
             logger.info(f"AI元数据匹配: 开始分析 {len(candidates)} 个候选结果")
 
-            user_prompt = json.dumps(input_data, ensure_ascii=False, indent=2)
+            async def _call():
+                user_prompt = json.dumps(input_data, ensure_ascii=False, indent=2)
 
-            # 根据提供商选择不同的调用方法
-            if self.provider == "gemini":
-                full_prompt = f"{system_prompt}\n\n{user_prompt}"
-                response = await asyncio.to_thread(
-                    self.client.models.generate_content,
-                    model=self.model,
-                    contents=full_prompt,
-                    config={
-                        "temperature": 0.0,
-                        "response_mime_type": "application/json"
-                    }
-                )
-                content = response.text
-            else:
-                # OpenAI 兼容接口 (deepseek, siliconflow, openai)
-                response = await asyncio.to_thread(
-                    self.client.chat.completions.create,
-                    model=self.model,
-                    messages=[
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": user_prompt}
-                    ],
-                    temperature=0.0,
-                    response_format={"type": "json_object"},
-                    timeout=30,
-                    **self._get_deepseek_thinking_extra()
-                )
-                self._log_reasoning_content(response, "metadata_match")
-                content = _extract_openai_content(response)
+                # 根据提供商选择不同的调用方法
+                if self.provider == "gemini":
+                    full_prompt = f"{system_prompt}\n\n{user_prompt}"
+                    response = await asyncio.to_thread(
+                        self.client.models.generate_content,
+                        model=self.model,
+                        contents=full_prompt,
+                        config={
+                            "temperature": 0.0,
+                            "response_mime_type": "application/json"
+                        }
+                    )
+                    content = response.text
+                else:
+                    # OpenAI 兼容接口 (deepseek, siliconflow, openai)
+                    response = await asyncio.to_thread(
+                        self.client.chat.completions.create,
+                        model=self.model,
+                        messages=[
+                            {"role": "system", "content": system_prompt},
+                            {"role": "user", "content": user_prompt}
+                        ],
+                        temperature=0.0,
+                        response_format={"type": "json_object"},
+                        timeout=30,
+                        **self._get_deepseek_thinking_extra()
+                    )
+                    self._log_reasoning_content(response, "metadata_match")
+                    content = _extract_openai_content(response)
 
-            if self.log_raw_response:
-                ai_responses_logger.info(f"[元数据匹配] 原始响应: {content}")
+                if self.log_raw_response:
+                    ai_responses_logger.info(f"[元数据匹配] 原始响应: {content}")
 
-            parsed_data = _safe_json_loads(content, log_raw_response=self.log_raw_response)
+                return _safe_json_loads(content, log_raw_response=self.log_raw_response)
+
+            if self.cache:
+                parsed_data = await self.cache.get_or_compute(
+                    "select_metadata_result", _call,
+                    cacheable=lambda r: isinstance(r, dict),
+                    input=input_data,
+                    prompt=system_prompt
+                )
+            else:
+                parsed_data = await _call()
 
             if not parsed_data:
                 logger.warning("AI元数据匹配: 未能解析响应")
@@ -64,7 +64,13 @@ class AIMatcherManager:
             "ai_log_raw_response": (await self.config_manager.get("aiLogRawResponse", "false")).lower() == "true",
             "ai_thinking_enabled": (await self.config_manager.get("aiThinkingEnabled", "false")).lower() == "true",
             "ai_cache_enabled": (await self.config_manager.get("aiCacheEnabled", "true")).lower() == "true",
-            "ai_cache_ttl": int(await self.config_manager.get("aiCacheTtl", "3600"))
+            "ai_cache_ttl": int(await self.config_manager.get("aiCacheTtl", "3600")),
+            "ai_batch_enabled": (await self.config_manager.get("aiBatchEnabled", "false")).lower() == "true",
+            "ai_batch_window_ms": int(await self.config_manager.get("aiBatchWindowMs", "50")),
+            "ai_batch_max_size": int(await self.config_manager.get("aiBatchMaxSize", "20")),
+            "ai_batch_max_tokens": int(await self.config_manager.get("aiBatchMaxTokens", "4000")),
+            "ai_batch_concurrency": int(await self.config_manager.get("aiBatchConcurrency", "2")),
+            "ai_batch_rate_limit": int(await self.config_manager.get("aiBatchRateLimit", "0"))
         }
 
     def _get_core_config(self, config: Dict[str, Any]) -> Dict[str, Any]:
@@ -154,6 +160,7 @@ class AIMatcherManager:
                     if self._last_config_hash != config_hash:
                         self.logger.info("提示词配置已变化,热更新提示词")
                         self._matcher_cache.update_prompts(prompt_config)
+                        self._matcher_cache.update_batch_settings(config)
                         self._last_config_hash = config_hash
                     else:
                         self.logger.debug("使用缓存的AI匹配器实例")
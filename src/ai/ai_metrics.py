@@ -7,6 +7,8 @@ AI 调用监控和统计模块
 
 import logging
 import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
 from dataclasses import dataclass, asdict
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Callable, Any
@@ -14,6 +16,34 @@ from collections import defaultdict
 
 logger = logging.getLogger(__name__)
 
+# 当前上下文中累计的 token 用量(由 track_tokens 开启),用于计算缓存命中节省的 tokens
+_token_meter: ContextVar[Optional[List[int]]] = ContextVar("ai_token_meter", default=None)
+
+
+@contextmanager
+def track_tokens():
+    """
+    统计上下文内所有非缓存 AI 调用消耗的 tokens
+
+    用法:
+        with track_tokens() as meter:
+            await matcher.recognize_title(...)
+        tokens = meter[0]
+    """
+    meter = [0]
+    token = _token_meter.set(meter)
+    try:
+        yield meter
+    finally:
+        _token_meter.reset(token)
+
+
+def add_metered_tokens(tokens: int) -> None:
+    """把在其他上下文中产生的 tokens(如微批请求分摊的用量)计入当前上下文的计量"""
+    meter = _token_meter.get()
+    if meter is not None:
+        meter[0] += tokens
+
 
 @dataclass
 class AICallMetrics:
@@ -26,6 +56,8 @@ class AICallMetrics:
     model: str
     error: Optional[str] = None
     cache_hit: bool = False
+    saved_tokens: int = 0  # 缓存命中时节省的 tokens(原始调用的用量)
+    saved_ms: int = 0      # 缓存命中时节省的耗时
 
 
 class AIMetricsCollector:
@@ -57,6 +89,12 @@ class AIMetricsCollector:
         Args:
             metric: AI 调用指标
         """
+        # 累计到当前上下文的 token 计量(缓存用于记录结果的原始成本)
+        if not metric.cache_hit:
+            meter = _token_meter.get()
+            if meter is not None:
+                meter[0] += metric.tokens_used
+
         # 添加到内存列表
         self.metrics.append(metric)
 
@@ -133,6 +171,8 @@ class AIMetricsCollector:
                 "total_tokens": 0,
                 "avg_duration_ms": 0.0,
                 "cache_hit_rate": 0.0,
+                "saved_tokens": 0,
+                "saved_ms": 0,
                 "by_method": {},
                 "errors": []
             }
@@ -164,6 +204,8 @@ class AIMetricsCollector:
             "total_tokens": total_tokens,
             "avg_duration_ms": total_duration / total_calls,
             "cache_hit_rate": cache_hits / total_calls,
+            "saved_tokens": sum(m.saved_tokens for m in recent),
+            "saved_ms": sum(m.saved_ms for m in recent),
             "by_method": by_method,
             "errors": errors[-10:]  # 最近10个错误
         }
@@ -175,7 +217,9 @@ class AIMetricsCollector:
             "success": 0,
             "tokens": 0,
             "duration_ms": 0,
-            "cache_hits": 0
+            "cache_hits": 0,
+            "saved_tokens": 0,
+            "saved_ms": 0
         })
         
         for m in metrics:
@@ -187,6 +231,8 @@ class AIMetricsCollector:
             g["duration_ms"] += m.duration_ms
             if m.cache_hit:
                 g["cache_hits"] += 1
+                g["saved_tokens"] += m.saved_tokens
+                g["saved_ms"] += m.saved_ms
         
         # 计算平均值和成功率
         result = {}
@@ -196,7 +242,9 @@ class AIMetricsCollector:
                 "success_rate": stats["success"] / stats["calls"],
                 "total_tokens": stats["tokens"],
                 "avg_duration_ms": stats["duration_ms"] / stats["calls"],
-                "cache_hit_rate": stats["cache_hits"] / stats["calls"]
+                "cache_hit_rate": stats["cache_hits"] / stats["calls"],
+                "saved_tokens": stats["saved_tokens"],
+                "saved_ms": stats["saved_ms"]
             }
         
         return result
@@ -621,4 +621,15 @@ DEFAULT_AI_EPISODE_GROUP_SELECT_PROMPT = """你是一个专业的影视剧集组
 如果没有合适的剧集组，返回:
 ```json
 {"index": -1, "confidence": 0, "reason": "理由"}
-```"""
\ No newline at end of file
+```"""
+
+# 微批模式附加说明: 拼接在单项提示词之后,用于一次请求处理多个条目
+AI_BATCH_PROMPT_SUFFIX = """
+
+**批量模式**:
+本次输入不是单个对象，而是 {"items": [...]} 形式的列表。每一项都带有唯一的 "id" 字段，其余字段与上文的单项输入格式相同。
+请对每一项独立按上述规则处理，返回:
+```json
+{"results": [{"id": 对应输入项的id, ...该项按上文输出格式得到的全部字段}]}
+```
+results 必须包含每一个输入项，id 原样返回。不要返回任何解释或其他文本。"""
@@ -23,6 +23,7 @@ AI_PROVIDERS = {
         "modelsApiPath": "/models",  # 模型列表API路径
         "apiKeyPrefix": "sk-",
         "website": "https://platform.deepseek.com",
+        "batchRateLimit": 60,  # 微批调度默认每分钟批次数上限
         "order": 1
     },
     "siliconflow": {
@@ -41,6 +42,7 @@ AI_PROVIDERS = {
         "modelsApiPath": "/models",  # 模型列表API路径
         "apiKeyPrefix": "sk-",
         "website": "https://siliconflow.cn",
+        "batchRateLimit": 60,  # 微批调度默认每分钟批次数上限
         "order": 2
     },
     "openai": {
@@ -57,6 +59,7 @@ AI_PROVIDERS = {
         "modelsApiPath": "/models",  # 模型列表API路径
         "apiKeyPrefix": "sk-",
         "website": "https://platform.openai.com",
+        "batchRateLimit": 60,  # 微批调度默认每分钟批次数上限
         "order": 3
     },
     "gemini": {
@@ -73,6 +76,7 @@ AI_PROVIDERS = {
         "modelsApiPath": "https://generativelanguage.googleapis.com/v1/models",  # Gemini 使用完整URL
         "apiKeyPrefix": "AI",  # Gemini API Key 通常以 AI 开头
         "website": "https://ai.google.dev",
+        "batchRateLimit": 15,  # 微批调度默认每分钟批次数上限
         "order": 4
     }
 }
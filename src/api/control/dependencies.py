@@ -17,6 +17,7 @@ from src.services import ScraperManager, TaskManager, SchedulerManager, Metadata
 from src.rate_limiter import RateLimiter
 from src.ai import AIMatcherManager
 from src.api.middleware import normalize_ip
+from src.api.dependencies import wait_for_subsystem
 
 logger = logging.getLogger(__name__)
 
@@ -36,13 +37,15 @@ def _normalize_for_filtering(title: str) -> str:
 
 # --- 依赖项函数 ---
 
-def get_scraper_manager(request: Request) -> ScraperManager:
-    """依赖项：从应用状态获取 Scraper 管理器"""
+async def get_scraper_manager(request: Request) -> ScraperManager:
+    """依赖项：从应用状态获取 Scraper 管理器（等待弹幕源加载完成）"""
+    await wait_for_subsystem(request, "scrapers")
     return request.app.state.scraper_manager
 
 
-def get_metadata_manager(request: Request) -> MetadataSourceManager:
-    """依赖项：从应用状态获取元数据源管理器"""
+async def get_metadata_manager(request: Request) -> MetadataSourceManager:
+    """依赖项：从应用状态获取元数据源管理器（等待元数据源加载完成）"""
+    await wait_for_subsystem(request, "metadata_sources")
     return request.app.state.metadata_manager
 
 
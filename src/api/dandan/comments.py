@@ -17,6 +17,7 @@ from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request
 from src.db import crud, orm_models, models, get_db_session, sync_postgres_sequence, ConfigManager
 from src.core import get_now
 from src.core.cache import get_cache_backend
+from src.core.coordination import get_coordinator
 from src.services import ScraperManager, TaskManager, TaskSuccess
 from src.utils import parse_search_keyword, sample_comments_evenly, record_play_history, handle_danmaku_likes, strip_danmaku_likes
 from src.utils import restyle_danmaku_likes
@@ -51,7 +52,9 @@ from .dependencies import (
     get_task_manager,
     get_rate_limiter,
     get_scraper_manager,
+    get_scraper_manager_nowait,
 )
+from src.api.dependencies import wait_for_subsystem
 from src.api.control.dependencies import get_title_recognition_manager
 
 # 从主文件导入预下载和刷新等待函数（这些函数依赖较多，暂时保留在主文件中）
@@ -78,8 +81,23 @@ comments_router = APIRouter(route_class=DandanApiRoute)
 # ============ 请求合并（Request Coalescing）============
 # 同一个 episodeId 同一时间只允许一个刷新/下载任务，
 # 其他并发请求（无论来自哪个 token）都等同一个 Event。
+# 多工作进程时还需在协调器上认领 episodeId，其它进程的请求等待认领释放后从 DB 读取。
 _episode_inflight: dict[int, asyncio.Event] = {}
 _episode_inflight_lock = asyncio.Lock()
+_peer_waiters: set[asyncio.Task] = set()
+COALESCE_WAIT_TIMEOUT = 60.0
+
+
+def _coalesce_claim_key(episode_id: int) -> str:
+    return f"episode-fetch:{episode_id}"
+
+
+async def _wait_peer_release(episode_id: int):
+    """另一个进程在处理该 episodeId：等它释放认领后唤醒本进程的所有等待者"""
+    try:
+        await get_coordinator().wait_released(_coalesce_claim_key(episode_id), timeout=COALESCE_WAIT_TIMEOUT)
+    finally:
+        await _release_coalesce(episode_id)
 
 
 async def _coalesce_or_own(episode_id: int) -> tuple[bool, asyncio.Event]:
@@ -96,13 +114,21 @@ async def _coalesce_or_own(episode_id: int) -> tuple[bool, asyncio.Event]:
             return False, _episode_inflight[episode_id]
         event = asyncio.Event()
         _episode_inflight[episode_id] = event
+
+    coordinator = get_coordinator()
+    if not coordinator.multi_worker or await coordinator.claim(_coalesce_claim_key(episode_id)):
         return True, event
+    waiter = asyncio.create_task(_wait_peer_release(episode_id))
+    _peer_waiters.add(waiter)
+    waiter.add_done_callback(_peer_waiters.discard)
+    return False, event
 
 
 async def _release_coalesce(episode_id: int):
     """任务完成后释放 episodeId 的处理权并唤醒所有等待者。"""
     async with _episode_inflight_lock:
         event = _episode_inflight.pop(episode_id, None)
+    await get_coordinator().release(_coalesce_claim_key(episode_id))
     if event:
         event.set()
 
@@ -244,7 +270,7 @@ async def get_comments_for_dandan(
     token: str = Depends(get_token_from_path),
     session: AsyncSession = Depends(get_db_session),
     config_manager: ConfigManager = Depends(get_config_manager),
-    scraper_manager: ScraperManager = Depends(get_scraper_manager),
+    scraper_manager: ScraperManager = Depends(get_scraper_manager_nowait),
     task_manager: TaskManager = Depends(get_task_manager),
     rate_limiter: RateLimiter = Depends(get_rate_limiter),
     title_recognition_manager = Depends(get_title_recognition_manager),
@@ -260,7 +286,15 @@ async def get_comments_for_dandan(
     await wait_for_refresh_task(episodeId, task_manager, max_wait_seconds=15.0)
 
     # 1. 优先从弹幕库获取弹幕
-    comments_data = await crud.fetch_comments(session, episodeId)
+    # 启用合并输出且已有未过期的合并视图时直接使用，不再读取单源文件；没有视图时读取单源
+    merge_output_enabled = await config_manager.get('danmakuMergeOutputEnabled', 'false')
+    comments_data = None
+    served_merged = False
+    if merge_output_enabled.lower() == 'true':
+        comments_data = await crud.fetch_merged_comments(session, episodeId, rebuild=False)
+        served_merged = bool(comments_data)
+    if not served_merged:
+        comments_data = await crud.fetch_comments(session, episodeId)
 
     # 2. 弹幕过期自动刷新检测
     if comments_data:
@@ -304,6 +338,7 @@ async def get_comments_for_dandan(
                     refreshed = await wait_for_refresh_task(episodeId, task_manager, max_wait_seconds=30.0)
                     if refreshed:
                         comments_data = await crud.fetch_comments(session, episodeId)
+                        served_merged = False
                         logger.info(f"[自动刷新] episodeId={episodeId} 刷新完成，重新获取弹幕 {len(comments_data)} 条")
 
     # 预下载下一集弹幕 (异步,不阻塞当前响应)
@@ -330,7 +365,7 @@ async def get_comments_for_dandan(
             # 已有请求在处理这个 episodeId，等它完成后直接从 DB 读取
             logger.info(f"[请求合并] episodeId={episodeId} 已有下载任务在执行，等待结果...")
             try:
-                await asyncio.wait_for(coalesce_event.wait(), timeout=60.0)
+                await asyncio.wait_for(coalesce_event.wait(), timeout=COALESCE_WAIT_TIMEOUT)
             except asyncio.TimeoutError:
                 logger.warning(f"[请求合并] episodeId={episodeId} 等待超时（60秒）")
             comments_data = await crud.fetch_comments(session, episodeId)
@@ -344,6 +379,12 @@ async def get_comments_for_dandan(
     if not comments_data:
         # owner 路径：执行实际下载任务
         logger.info(f"弹幕库中未找到 episodeId={episodeId} 的弹幕，尝试直接从源站获取")
+        # 启动后弹幕源可能仍在后台加载，从源站获取前等待其就绪
+        try:
+            await wait_for_subsystem(request, "scrapers")
+        except HTTPException:
+            await _release_coalesce(episodeId)
+            raise
 
         # 检查是否是后备搜索/匹配后备的episodeId
         # 缓存key格式: fallback_episode_25000166010000 (最后4位为0000表示整部剧)
@@ -1270,10 +1311,8 @@ async def get_comments_for_dandan(
     except (ValueError, TypeError):
         limit = -1
 
-    # 检查是否启用合并输出
-    merge_output_enabled = await config_manager.get('danmakuMergeOutputEnabled', 'false')
-    if merge_output_enabled.lower() == 'true' and comments_data:
-        # 获取合并后的弹幕（包含同一 anime 同一集数的所有源）
+    # 合并输出已启用但没有可用的合并视图时，重建视图（包含同一 anime 同一集数的所有源）
+    if merge_output_enabled.lower() == 'true' and comments_data and not served_merged:
         merged_comments = await crud.fetch_merged_comments(session, episodeId)
         if merged_comments and len(merged_comments) > len(comments_data):
             logger.info(f"合并输出已启用: 原始 {len(comments_data)} 条 -> 合并后 {len(merged_comments)} 条")
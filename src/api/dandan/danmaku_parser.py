@@ -94,7 +94,7 @@ def _normalize_p_attr_to_internal_format(p_attr: str, source_tag: str = "[xml]")
         return f"{core_parts[0]},{core_parts[1]},{core_parts[2]},{core_parts[3]},{final_source}"
 
 
-def parse_dandan_xml_to_comments(xml_content: str, source_tag: str = "[xml]") -> List[Dict]:
+def parse_dandan_xml_to_comments(xml_content: str, source_tag: str = "[xml]", strict: bool = False) -> List[Dict]:
     """
     解析 XML 弹幕内容，并标准化为内部存储格式。
 
@@ -104,6 +104,8 @@ def parse_dandan_xml_to_comments(xml_content: str, source_tag: str = "[xml]") ->
     3. 其他标准 XML 格式
 
     输出的内部存储格式: p="时间,模式,字号,颜色,[来源]"
+
+    strict=True 时 XML 无法解析会抛出 ElementTree.ParseError，而不是返回空列表。
     """
     comments = []
     try:
@@ -144,6 +146,8 @@ def parse_dandan_xml_to_comments(xml_content: str, source_tag: str = "[xml]") ->
                 logger.warning(f"Skipping malformed comment node: {ElementTree.tostring(comment_node, 'unicode')}. Error: {e}")
                 continue
     except ElementTree.ParseError as e:
+        if strict:
+            raise
         logger.error(f"Failed to parse XML content: {e}")
         # Return empty list if XML is invalid
         return []
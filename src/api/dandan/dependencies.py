@@ -12,6 +12,7 @@ from fastapi import Request
 from src.db import ConfigManager
 from src.services import TaskManager, MetadataSourceManager, ScraperManager
 from src.rate_limiter import RateLimiter
+from src.api.dependencies import wait_for_subsystem
 
 
 async def get_config_manager(request: Request) -> ConfigManager:
@@ -25,7 +26,8 @@ async def get_task_manager(request: Request) -> TaskManager:
 
 
 async def get_metadata_manager(request: Request) -> MetadataSourceManager:
-    """依赖项：从应用状态获取元数据源管理器"""
+    """依赖项：从应用状态获取元数据源管理器（等待元数据源加载完成）"""
+    await wait_for_subsystem(request, "metadata_sources")
     return request.app.state.metadata_manager
 
 
@@ -35,6 +37,15 @@ async def get_rate_limiter(request: Request) -> RateLimiter:
 
 
 async def get_scraper_manager(request: Request) -> ScraperManager:
-    """依赖项：从应用状态获取弹幕源管理器"""
+    """依赖项：从应用状态获取弹幕源管理器（等待弹幕源加载完成）"""
+    await wait_for_subsystem(request, "scrapers")
+    return request.app.state.scraper_manager
+
+
+async def get_scraper_manager_nowait(request: Request) -> ScraperManager:
+    """
+    依赖项：获取弹幕源管理器但不等待弹幕源加载。
+    弹幕接口优先从弹幕库返回，只有需要从源站获取时才由调用处等待弹幕源就绪。
+    """
     return request.app.state.scraper_manager
 
@@ -643,6 +643,9 @@ async def get_match_for_item(
                 source_settings = await crud.get_all_scraper_settings(session_inner)
                 source_order_map = {s['providerName']: s['displayOrder'] for s in source_settings}
 
+                # 逐条打分的调试日志只在 DEBUG 级别开启时才格式化
+                debug_enabled = logger.isEnabledFor(logging.DEBUG)
+
                 def calculate_match_score(result):
                     """计算匹配分数，分数越高越优先"""
                     score = 0
@@ -650,22 +653,26 @@ async def get_match_for_item(
                     # 1. 类型匹配 (最高优先级，+1000分)
                     if result.type == target_type:
                         score += 1000
-                        logger.debug(f"  - {result.provider} - {result.title}: 类型匹配 +1000")
+                        if debug_enabled:
+                            logger.debug(f"  - {result.provider} - {result.title}: 类型匹配 +1000")
 
                     # 2. 标题相似度 (0-100分)
                     similarity = fuzz.token_set_ratio(base_title, result.title)
                     score += similarity
-                    logger.debug(f"  - {result.provider} - {result.title}: 相似度{similarity} +{similarity}")
+                    if debug_enabled:
+                        logger.debug(f"  - {result.provider} - {result.title}: 相似度{similarity} +{similarity}")
 
                     # 3. 年份匹配 (如果有年份信息，匹配+50分，不匹配-200分)
                     parsed_year = parsed_info.get("year")
                     if parsed_year and result.year:
                         if str(result.year) == str(parsed_year):
                             score += 50
-                            logger.debug(f"  - {result.provider} - {result.title}: 年份匹配({parsed_year}) +50")
+                            if debug_enabled:
+                                logger.debug(f"  - {result.provider} - {result.title}: 年份匹配({parsed_year}) +50")
                         else:
                             score -= 200
-                            logger.debug(f"  - {result.provider} - {result.title}: 年份不匹配({parsed_year}≠{result.year}) -200")
+                            if debug_enabled:
+                                logger.debug(f"  - {result.provider} - {result.title}: 年份不匹配({parsed_year}≠{result.year}) -200")
 
                     return score
 
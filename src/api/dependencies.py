@@ -3,7 +3,8 @@ API依赖注入函数
 提供FastAPI端点所需的各种管理器和服务
 """
 
-from fastapi import Request
+from fastapi import HTTPException, Request, status
+from src.core.startup import SUBSYSTEM_WAIT_TIMEOUT
 from src.services import (
     ScraperManager, TaskManager, SchedulerManager,
     WebhookManager, MetadataSourceManager
@@ -13,8 +14,24 @@ from src.ai import AIMatcherManager
 from src.rate_limiter import RateLimiter
 
 
+async def wait_for_subsystem(request: Request, name: str) -> None:
+    """
+    等待启动后在后台初始化的子系统就绪（见 src/core/startup.py）。
+    已就绪时立即返回；初始化失败或等待超时返回 503。
+    """
+    startup = getattr(request.app.state, "startup", None)
+    if startup is None or startup.is_ready(name):
+        return
+    if not await startup.wait_ready(name, SUBSYSTEM_WAIT_TIMEOUT):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"服务正在启动，子系统 '{name}' 尚未就绪，请稍后重试",
+        )
+
+
 async def get_scraper_manager(request: Request) -> ScraperManager:
-    """依赖项：从应用状态获取 Scraper 管理器"""
+    """依赖项：从应用状态获取 Scraper 管理器（等待弹幕源加载完成）"""
+    await wait_for_subsystem(request, "scrapers")
     return request.app.state.scraper_manager
 
 
@@ -34,7 +51,8 @@ async def get_webhook_manager(request: Request) -> WebhookManager:
 
 
 async def get_metadata_manager(request: Request) -> MetadataSourceManager:
-    """依赖项：从应用状态获取元数据源管理器"""
+    """依赖项：从应用状态获取元数据源管理器（等待元数据源加载完成）"""
+    await wait_for_subsystem(request, "metadata_sources")
     return request.app.state.metadata_manager
 
 
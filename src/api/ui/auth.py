@@ -201,42 +201,26 @@ async def auto_login(
     注意：此接口不依赖 check_ip_whitelist，避免 session 回滚问题
     """
 
-    # 获取 IP 白名单配置
-    ip_whitelist_str = await config_crud.get_config_value(session, "ipWhitelist", "")
-    if not ip_whitelist_str or not ip_whitelist_str.strip():
+    # 白名单和受信任代理使用与 check_ip_whitelist 相同的已解析快照
+    snapshot = await security._get_auth_snapshot(session)
+    if not snapshot.whitelist_configured:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="IP whitelist is not configured",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    # 获取受信任代理配置并解析真实 IP
-    trusted_proxies_str = await config_crud.get_config_value(session, "trustedProxies", "")
-    client_ip_str = security._get_real_client_ip_sync(request, trusted_proxies_str)
-
-    # 解析白名单网段
-    whitelist_networks = []
-    for entry in ip_whitelist_str.split(','):
-        entry = entry.strip()
-        if not entry:
-            continue
-        try:
-            network = ipaddress.ip_network(entry, strict=False)
-            whitelist_networks.append(network)
-        except ValueError:
-            pass
-
-    if not whitelist_networks:
+    if not snapshot.whitelist:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="IP whitelist is empty",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    # 检查客户端 IP 是否在白名单中
+    # 获取真实 IP 并检查是否在白名单中
+    client_ip_str = security._resolve_client_ip(request, snapshot.trusted_proxies)
     try:
-        client_addr = ipaddress.ip_address(client_ip_str)
-        is_whitelisted = any(client_addr in network for network in whitelist_networks)
+        is_whitelisted = ipaddress.ip_address(client_ip_str) in snapshot.whitelist
     except ValueError:
         is_whitelisted = False
 
@@ -493,10 +493,6 @@ async def update_config_item(
     await crud.update_config_value(session, config_key, value_str)
     config_manager.invalidate(config_key)
 
-    # JWT 有效期变更时，清空白名单会话缓存以实现热加载
-    if config_key == "jwtExpireMinutes":
-        security.clear_whitelist_session_cache()
-
     logger.info(f"用户 '{current_user.username}' 更新了配置项 '{config_key}'。")
 
 
@@ -803,15 +799,19 @@ async def get_ai_metrics(
             }
         stats = matcher.metrics.get_stats(hours)
 
-    # 添加缓存统计
+    # 添加缓存和微批统计
     cache_stats = None
+    batch_stats = None
     matcher = await ai_matcher_manager.get_matcher()
     if matcher and matcher.cache:
         cache_stats = matcher.cache.get_stats()
+    if matcher and matcher.batcher:
+        batch_stats = matcher.batcher.get_stats()
 
     return {
         "ai_stats": stats,
         "cache_stats": cache_stats,
+        "batch_stats": batch_stats,
         "source": source
     }
 
@@ -834,7 +834,7 @@ async def clear_ai_cache(
     if not matcher.cache:
         raise HTTPException(status_code=400, detail="AI缓存未启用")
 
-    matcher.cache.clear()
+    await matcher.cache.clear()
 
     return {
         "success": True,
@@ -33,6 +33,7 @@ logger = logging.getLogger(__name__)
 
 class LocalScanRequest(BaseModel):
     scanPath: str
+    incremental: bool = True  # 增量扫描: 仅处理新增/变更/删除的文件
 
 
 class LocalItemUpdate(BaseModel):
@@ -347,9 +348,10 @@ async def scan_local_danmaku(
 
     扫描逻辑:
     1. 递归查找所有.xml文件
-    2. 尝试从nfo文件读取元数据(TMDB ID等)
-    3. 从文件名和目录结构推断标题、季集信息
-    4. 存入local_danmaku_items表
+    2. 增量模式下根据 (路径, mtime, 大小) 跳过未变更的文件
+    3. 尝试从nfo文件读取元数据(TMDB ID等)
+    4. 从文件名和目录结构推断标题、季集信息
+    5. 批量写入local_danmaku_items表,并移除已不存在的文件
     """
     try:
         # 保存路径以便下次使用
@@ -359,8 +361,8 @@ async def scan_local_danmaku(
         session_factory = request.app.state.db_session_factory
         scanner = LocalDanmakuScanner(session_factory)
 
-        # 执行扫描(同步执行,因为通常不会太慢)
-        result = await scanner.scan_directory(payload.scanPath)
+        # 执行扫描(文件遍历与解析在线程中进行,不阻塞事件循环)
+        result = await scanner.scan_directory(payload.scanPath, incremental=payload.incremental)
 
         logger.info(f"用户 '{current_user.username}' 扫描了本地目录: {payload.scanPath}, 结果: {result}")
 
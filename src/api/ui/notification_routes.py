@@ -13,6 +13,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.db import crud, get_db_session
 from src import security
+from src.core.coordination import get_coordinator
 from src.services import apply_tunnel_from_notification_manager
 
 logger = logging.getLogger(__name__)
@@ -53,6 +54,9 @@ def _get_notification_manager(request: Request):
 async def _reevaluate_tunnel(request: Request):
     """渠道配置变更后重新评估 VPS 隧道是否需要启停"""
     from src.core import settings as _settings
+    # 隧道只在领导者进程运行；跟随者修改渠道时由领导者在重载渠道后重新评估
+    if not get_coordinator().is_leader:
+        return
     tunnel_service = getattr(request.app.state, "tunnel_service", None)
     notification_manager = getattr(request.app.state, "notification_manager", None)
     config_manager = getattr(request.app.state, "config_manager", None)
@@ -106,6 +110,17 @@ async def list_channels(
     return channels
 
 
+@router.get("/notification/tunnel/status", summary="获取 VPS 隧道状态及吞吐/延迟统计")
+async def get_tunnel_status(
+    request: Request,
+    current_user=Depends(security.get_current_user),
+):
+    tunnel_service = getattr(request.app.state, "tunnel_service", None)
+    if not tunnel_service:
+        return {"status": "disabled"}
+    return tunnel_service.get_stats()
+
+
 @router.post("/notification/channels", status_code=201, summary="新增通知渠道")
 async def create_channel(
     payload: ChannelCreate,
@@ -12,6 +12,7 @@ from pydantic import BaseModel
 from src.db import crud, models, get_db_session, ConfigManager
 from src import security
 from src.services import ScraperManager
+from src.utils import get_download_concurrency
 from src.api.dependencies import get_scraper_manager, get_config_manager
 
 router = APIRouter()
@@ -58,6 +59,10 @@ async def get_scraper_settings(
             full_setting_data['actions'] = getattr(scraper_class, 'actions', [])
             # 从 ScraperManager 获取版本号
             full_setting_data['version'] = manager.get_scraper_version(provider_name)
+            # 当前进程中的自适应并发窗口优先于上次保存的值
+            controller = get_download_concurrency().peek(provider_name)
+            if controller is not None:
+                full_setting_data['downloadConcurrency'] = controller.current
         else:
             # Provide defaults if scraper_class is not found to prevent validation errors
             full_setting_data['isLoggable'] = False
@@ -16,7 +16,10 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from src import security
 from src.db import crud, models, get_db_session, ConfigManager
 from src.core import get_now
-from src.services import ScraperManager, get_logs, subscribe_to_logs, unsubscribe_from_logs, list_log_files, read_log_file
+from src.services import (
+    ScraperManager, get_logs, subscribe_to_logs, unsubscribe_from_logs, list_log_files, read_log_file,
+    iter_log_matches, stream_log_search,
+)
 from src.rate_limiter import RateLimiter, RateLimitExceededError
 from src._version import APP_VERSION, DOCS_URL, GITHUB_OWNER, GITHUB_REPO
 
@@ -365,7 +368,7 @@ async def get_log_file_content(
 ):
     """读取指定日志文件的最后N行内容。"""
     try:
-        lines = read_log_file(filename, tail=tail)
+        lines = await asyncio.to_thread(read_log_file, filename, tail)
         return lines
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -375,6 +378,39 @@ async def get_log_file_content(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/logs/search", summary="检索日志（含轮转文件）")
+async def search_logs(
+    q: Optional[str] = Query(None, description="检索内容，默认按子串匹配（不区分大小写）"),
+    regex: bool = Query(False, description="将检索内容作为正则表达式"),
+    level: Optional[str] = Query(None, description="最低日志级别，如 WARNING"),
+    start: Optional[datetime] = Query(None, description="起始时间（含）"),
+    end: Optional[datetime] = Query(None, description="结束时间（含）"),
+    loggerName: Optional[str] = Query(None, description="logger 名称前缀"),
+    files: List[str] = Query(["app.log"], description="要检索的日志文件，自动包含其轮转文件"),
+    limit: int = Query(1000, ge=1, le=20000, description="最多返回的条目数"),
+    useIndex: bool = Query(True, description="时间范围查询时使用时间戳偏移索引"),
+    current_user: models.User = Depends(security.get_current_user),
+):
+    """
+    按时间从旧到新检索日志条目，以 NDJSON 流式返回。
+    每行一个条目：{"file", "timestamp", "level", "logger", "text"}。
+    """
+    try:
+        # 参数在此处校验，避免错误在响应开始后才暴露
+        matches = await asyncio.to_thread(
+            iter_log_matches, files, query=q, use_regex=regex, level=level,
+            start_time=start, end_time=end, logger_name=loggerName, use_index=useIndex,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def ndjson_generator():
+        async for entry in stream_log_search(matches, limit=limit):
+            yield json.dumps(entry, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(ndjson_generator(), media_type="application/x-ndjson")
+
+
 class ParseFilenameRequest(BaseModel):
     """文件名解析请求"""
     fileName: str = Field(..., description="要解析的文件名")
@@ -1174,6 +1210,41 @@ async def get_cache_stats(
     return {"total": total, "regions": stats}
 
 
+# ==================== 数据库查询统计 API ====================
+
+@router.get("/db/metrics", summary="获取数据库查询统计")
+async def get_db_query_metrics(
+    kind: Optional[str] = Query(None, description="作用域类型: request 或 task，为空表示全部"),
+    limit: int = Query(50, ge=1, le=500, description="最多返回的作用域 / 慢查询条数"),
+    sort: str = Query("dbMs", description="排序字段: dbMs, avgDbMs, statements, avgStatements, calls, nPlusOne, poolWaitMs"),
+    current_user: models.User = Depends(security.get_current_user),
+):
+    """
+    按请求路由和后台任务类型汇总的查询次数、数据库耗时、连接池等待时间、最慢语句及慢查询日志。
+    需要在 config.yml 中开启 database.query_metrics。
+    """
+    from src.db.query_metrics import query_metrics
+    return query_metrics.snapshot(kind=kind, limit=limit, sort=sort)
+
+
+@router.post("/db/metrics/reset", status_code=status.HTTP_204_NO_CONTENT, summary="清空数据库查询统计")
+async def reset_db_query_metrics(
+    current_user: models.User = Depends(security.get_current_user),
+):
+    from src.db.query_metrics import query_metrics
+    query_metrics.reset()
+    logger.info(f"用户 '{current_user.username}' 清空了数据库查询统计")
+
+
+@router.get("/coordination", summary="获取多工作进程协调状态")
+async def get_coordination_status(
+    current_user: models.User = Depends(security.get_current_user),
+):
+    """当前处理请求的工作进程的协调器状态（后端、是否为领导者、认领与消息计数）"""
+    from src.core.coordination import get_coordinator
+    return get_coordinator().get_stats()
+
+
 @router.get("/cache/list", summary="获取缓存条目列表")
 async def get_cache_list(
     region: str = Query("all", description="缓存区域，all 表示全部"),
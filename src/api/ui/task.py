@@ -1,10 +1,13 @@
 """
 Task相关的API端点
 """
+import asyncio
+import json
 import logging
 from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src import security
@@ -21,6 +24,7 @@ router = APIRouter()
 async def get_all_tasks(
     current_user: models.User = Depends(security.get_current_user),
     session: AsyncSession = Depends(get_db_session),
+    task_manager: TaskManager = Depends(get_task_manager),
     search: Optional[str] = Query(None, description="按标题搜索"),
     status: Optional[str] = Query("all", description="按状态过滤: all, in_progress, completed"),
     queueType: Optional[str] = Query("all", description="按队列类型过滤: all, download, management, fallback"),
@@ -29,6 +33,12 @@ async def get_all_tasks(
 ):
     """获取后台任务的列表和状态，支持搜索和过滤。"""
     paginated_result = await crud.get_tasks_from_history(session, search, status, queueType, page, pageSize)
+    # 运行中任务的进度以内存中的实时值为准（数据库按周期批量落库，可能落后几秒）
+    for item in paginated_result["list"]:
+        live = task_manager.progress_hub.get_live(item["taskId"])
+        if live:
+            item["progress"] = live["progress"]
+            item["description"] = live["description"]
     return models.PaginatedTasksResponse(
         total=paginated_result["total"],
         list=[models.TaskInfo.model_validate(t) for t in paginated_result["list"]]
@@ -36,6 +46,42 @@ async def get_all_tasks(
 
 
 
+@router.get("/tasks/stream", summary="SSE实时任务进度推送")
+async def stream_task_progress(
+    current_user: models.User = Depends(security.get_current_user),
+    task_manager: TaskManager = Depends(get_task_manager),
+):
+    """使用Server-Sent Events实时推送运行中任务的进度，连接建立时先推送当前所有运行中任务。"""
+    hub = task_manager.progress_hub
+
+    async def event_generator():
+        subscriber = hub.subscribe()
+        try:
+            for state in hub.snapshot():
+                yield f"data: {json.dumps(state, ensure_ascii=False, default=str)}\n\n"
+            while True:
+                # 设置超时以便定期发送心跳
+                states = await subscriber.get(timeout=30.0)
+                if not states:
+                    yield ": heartbeat\n\n"
+                    continue
+                for state in states:
+                    yield f"data: {json.dumps(state, ensure_ascii=False, default=str)}\n\n"
+        except asyncio.CancelledError:
+            logger.debug("SSE任务进度连接被客户端关闭")
+        finally:
+            hub.unsubscribe(subscriber)
+
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",  # 禁用nginx缓冲
+        }
+    )
+
 
 @router.post("/tasks/{task_id}/pause", status_code=status.HTTP_204_NO_CONTENT, summary="暂停一个正在运行的任务")
 async def pause_task_endpoint(
@@ -12,6 +12,8 @@
     from src.core.config import settings
     from src.core.timezone import get_now
     from src.core.cache import cached, get_cache_backend, init_cache_backend
+    from src.core.coordination import get_coordinator
+    from src.core.startup import StartupTracker
 """
 
 # 配置相关（纯静态配置，无数据库依赖）
@@ -36,6 +38,17 @@ from .cache import (
     create_cache_backend,
 )
 
+# 多工作进程协调
+from .coordination import (
+    Coordinator,
+    get_coordinator,
+    init_coordinator,
+    close_coordinator,
+)
+
+# 启动阶段计时与延迟子系统
+from .startup import StartupTracker, SUBSYSTEM_WAIT_TIMEOUT
+
 __all__ = [
     # 配置
     'settings',
@@ -58,5 +71,13 @@ __all__ = [
     'init_cache_backend',
     'close_cache_backend',
     'create_cache_backend',
+    # 多进程协调
+    'Coordinator',
+    'get_coordinator',
+    'init_coordinator',
+    'close_coordinator',
+    # 启动
+    'StartupTracker',
+    'SUBSYSTEM_WAIT_TIMEOUT',
 ]
 
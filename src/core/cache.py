@@ -166,6 +166,15 @@ class MemoryBackend(AsyncCacheBackend):
 
 # ==================== Redis 后端 ====================
 
+def normalize_redis_url(redis_url: str) -> str:
+    """兼容 Valkey: 将 valkey:// / valkeys:// 转换为 redis:// / rediss://"""
+    if redis_url.startswith("valkey://"):
+        return redis_url.replace("valkey://", "redis://", 1)
+    if redis_url.startswith("valkeys://"):
+        return redis_url.replace("valkeys://", "rediss://", 1)
+    return redis_url
+
+
 class RedisBackend(AsyncCacheBackend):
     """
     基于 Redis 的缓存后端
@@ -177,12 +186,9 @@ class RedisBackend(AsyncCacheBackend):
         # 兼容 Valkey: 自动将 valkey:// / valkeys:// 转换为 redis:// / rediss://
         from urllib.parse import urlparse
         parsed = urlparse(redis_url)
-        if parsed.scheme == "valkey":
-            redis_url = redis_url.replace("valkey://", "redis://", 1)
-            logger.info("检测到 Valkey URL，已自动转换为 redis:// 协议")
-        elif parsed.scheme == "valkeys":
-            redis_url = redis_url.replace("valkeys://", "rediss://", 1)
-            logger.info("检测到 Valkey TLS URL，已自动转换为 rediss:// 协议")
+        if parsed.scheme in ("valkey", "valkeys"):
+            redis_url = normalize_redis_url(redis_url)
+            logger.info(f"检测到 Valkey URL，已自动转换为 {urlparse(redis_url).scheme}:// 协议")
 
         self._redis_url = redis_url
         self._max_memory = max_memory
@@ -375,11 +381,25 @@ class HybridBackend(AsyncCacheBackend):
     - get: 先查内存，miss 则查数据库并回填内存
     - set: 同时写入内存和数据库
     - 重启后内存缓存丢失，但数据库缓存仍在，自动回填
+    - 多工作进程时通过 peer_invalidate 通知其它进程丢弃各自的 L1 条目
     """
 
     def __init__(self, memory: MemoryBackend, database: DatabaseBackend):
         self._memory = memory
         self._database = database
+        # (key, region) -> None；key 为 None 表示清空 region（region 为 None 表示全部）
+        self.peer_invalidate: Optional[Callable[[Optional[str], Optional[str]], None]] = None
+
+    def _notify_peers(self, key: Optional[str], region: Optional[str]) -> None:
+        if self.peer_invalidate is not None:
+            self.peer_invalidate(key, region)
+
+    async def invalidate_local(self, key: Optional[str], region: Optional[str]) -> None:
+        """只丢弃本进程的 L1 条目（收到其它进程的失效通知时调用）"""
+        if key is None:
+            await self._memory.clear(region)
+        else:
+            await self._memory.delete(key, region or "default")
 
     async def get(self, key: str, region: str = "default") -> Optional[Any]:
         # L1: 内存
@@ -397,10 +417,12 @@ class HybridBackend(AsyncCacheBackend):
         # 同时写入两层
         await self._memory.set(key, value, ttl=ttl, region=region)
         await self._database.set(key, value, ttl=ttl, region=region)
+        self._notify_peers(key, region)
 
     async def delete(self, key: str, region: str = "default") -> bool:
         mem_ok = await self._memory.delete(key, region)
         db_ok = await self._database.delete(key, region)
+        self._notify_peers(key, region)
         return mem_ok or db_ok
 
     async def exists(self, key: str, region: str = "default") -> bool:
@@ -409,6 +431,7 @@ class HybridBackend(AsyncCacheBackend):
     async def clear(self, region: Optional[str] = None) -> int:
         mem_count = await self._memory.clear(region)
         db_count = await self._database.clear(region)
+        self._notify_peers(None, region)
         return mem_count + db_count
 
     async def keys(self, pattern: str = "*", region: str = "default") -> List[str]:
@@ -11,6 +11,8 @@ class ServerConfig(BaseModel):
     host: str = "0.0.0.0"
     port: int = 7768
     ipv6: bool = True  # 是否同时启用 IPv6 监听（dual-stack）
+    workers: int = 1   # 工作进程数，大于 1 时启用多进程协调（开发模式热重载时固定为 1）
+    coordination_file: str = ""  # 未配置 Redis 时多进程协调使用的 SQLite 文件，默认 config/coordination.db
 
 # 新增：前端客户端配置模型
 class ClientConfig(BaseModel):
@@ -32,6 +34,8 @@ class DatabaseConfig(BaseModel):
     pool_timeout: int = 30              # 从池中获取连接的等待超时（秒）
     pool_pre_ping: bool = True          # 取连接前先 ping 检测是否存活
     echo: bool = False                  # 是否在控制台输出 SQL 语句
+    query_metrics: bool = False         # 是否统计每个请求/任务的查询次数与耗时（系统设置中查看）
+    slow_query_ms: int = 500            # 慢查询日志阈值（毫秒），需开启 query_metrics
 
 class JWTConfig(BaseModel):
     secret_key: str = "a_very_secret_key_that_should_be_changed"
@@ -64,6 +68,8 @@ server:
   host: "0.0.0.0"      # IPv4 监听地址，0.0.0.0 表示所有网卡
   port: 7768            # 监听端口
   ipv6: true            # 是否同时监听 IPv6（双栈）
+  workers: 1            # 工作进程数；大于 1 时由一个领导者进程运行定时任务和任务队列，
+                        # 进程间通过 Redis（配置了 cache.redis_url 时）或本地 SQLite 文件协调
 
 # 数据库配置（支持 mysql / postgresql / sqlite）
 database:
@@ -81,6 +87,8 @@ database:
   pool_timeout: 30
   pool_pre_ping: true
   echo: false
+  query_metrics: false   # 统计每个请求/后台任务的查询次数、耗时和慢查询
+  slow_query_ms: 500     # 慢查询阈值（毫秒）
 
 # JWT 鉴权配置
 jwt:
@@ -154,6 +154,12 @@ CONFIG_SCHEMA = [
                 "description": "保留最近多少个备份文件，超出的旧备份将被自动删除。",
                 "placeholder": "5",
             },
+            {
+                "key": "backupExcludeLogTables",
+                "label": "备份时排除日志表",
+                "type": "boolean",
+                "description": "备份时跳过访问日志、外部API日志、AI调用日志和任务历史等日志类表，可显著减小备份体积和耗时。还原后这些表为空。",
+            },
         ],
         "customComponent": "DatabaseBackupManager",
     },
@@ -0,0 +1,632 @@
+"""
+多工作进程协调器
+
+server.workers > 1 时 uvicorn 会启动多个进程，进程内的状态不再共享。
+协调器为这些进程提供三种共享原语:
+
+- 认领 (claim): 带有效期的互斥键，持有期间由心跳自动续期，进程退出后自动过期。
+  用于请求合并、任务唯一键和启动阶段的互斥（lock）
+- 领导者选举: 各进程竞争同一个认领键，持有者负责定时任务、任务队列恢复、
+  内置轮询和通知渠道；领导者退出后由其它进程接替，认领过期的原领导者通过
+  on_demoted 回调停止这些服务
+- 广播 (publish / subscribe): 配置变更、缓存失效、任务转发等消息，
+  发送方不会收到自己的消息；消息先进入发件箱，由后台批量发送
+
+后端:
+- RedisCoordinator: 配置了 cache.redis_url 时使用（SET NX PX + Pub/Sub）
+- SqliteCoordinator: 否则使用配置目录下的 SQLite 文件（WAL），仅适用于同一台主机上的进程
+- LocalCoordinator: 单进程（默认），全部为进程内实现，没有额外开销
+
+使用方式:
+    coordinator = get_coordinator()
+    if await coordinator.claim("episode-fetch:123"):
+        try: ...
+        finally: await coordinator.release("episode-fetch:123")
+
+    async with coordinator.lock("startup:db-init"):
+        ...
+
+    coordinator.subscribe("config", handler)   # async def handler(message: dict)
+    coordinator.publish("config", {"op": "invalidate", "key": "proxyUrl"})
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from uuid import uuid4
+
+logger = logging.getLogger(__name__)
+
+# 认领的默认有效期（秒），持有期间每个心跳周期续期一次
+DEFAULT_CLAIM_TTL = 30
+# 领导者认领的有效期（秒），领导者退出后最长这么久由其它进程接替
+LEADER_TTL = 15
+# 心跳周期（秒）: 续期认领、竞选领导者、清理过期数据
+HEARTBEAT_INTERVAL = 5
+# 轮询间隔（秒）: SQLite 消息拉取、wait_released / lock 的重试
+POLL_INTERVAL = 0.5
+# SQLite 协调器的消息保留时间（秒）
+MESSAGE_RETENTION = 120
+# 发件箱单批最多发送的消息数
+OUTBOX_BATCH = 200
+
+LEADER_KEY = "__leader__"
+
+MessageHandler = Callable[[Dict[str, Any]], Awaitable[None]]
+LeaderCallback = Callable[[], Awaitable[None]]
+
+
+class Coordinator(ABC):
+    """协调器基类: 心跳、发件箱、消息分发和领导者回调，后端只需实现存储原语"""
+
+    backend_name = "base"
+    multi_worker = True
+
+    def __init__(self):
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:6]}"
+        self.is_leader = False
+        self._owned: Set[str] = set()
+        self._handlers: Dict[str, List[MessageHandler]] = defaultdict(list)
+        self._leader_callbacks: List[LeaderCallback] = []
+        self._demoted_callbacks: List[LeaderCallback] = []
+        self._outbox: List[Tuple[str, Dict[str, Any]]] = []
+        self._outbox_event: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        self._handler_tasks: Set[asyncio.Task] = set()
+        self._stats = {"published": 0, "received": 0, "claims": 0, "claimConflicts": 0, "leaderChanges": 0}
+
+    # ---------- 后端原语 ----------
+
+    @abstractmethod
+    async def _open(self) -> None: ...
+
+    @abstractmethod
+    async def _close(self) -> None: ...
+
+    @abstractmethod
+    async def _try_claim(self, key: str, ttl: float) -> bool:
+        """键未被持有（或已过期）时由本进程持有，返回是否成功"""
+
+    @abstractmethod
+    async def _renew(self, keys: List[str], ttl: float) -> Set[str]:
+        """续期本进程持有的键，返回仍由本进程持有的键"""
+
+    @abstractmethod
+    async def _release(self, key: str) -> None:
+        """释放本进程持有的键（不是本进程持有时不做任何事）"""
+
+    @abstractmethod
+    async def _is_claimed(self, key: str) -> bool: ...
+
+    @abstractmethod
+    async def _send(self, messages: List[Tuple[str, Dict[str, Any]]]) -> None: ...
+
+    @abstractmethod
+    async def _receive_loop(self) -> None:
+        """持续接收其它进程的消息并调用 _deliver"""
+
+    async def _maintenance(self) -> None:
+        """领导者在每个心跳周期执行的清理（按需覆盖）"""
+
+    # ---------- 生命周期 ----------
+
+    async def start(self) -> None:
+        await self._open()
+        self._outbox_event = asyncio.Event()
+        await self._try_become_leader()
+        self._tasks = [
+            asyncio.create_task(self._heartbeat_loop()),
+            asyncio.create_task(self._outbox_loop()),
+            asyncio.create_task(self._receive_loop()),
+        ]
+        role = "领导者" if self.is_leader else "跟随者"
+        logger.info(f"多进程协调器已启动: {self.backend_name}，进程 {self.worker_id} 为{role}")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        try:
+            await self._flush_outbox()
+            for key in list(self._owned):
+                await self._release(key)
+            if self.is_leader:
+                await self._release(LEADER_KEY)
+        except Exception as e:
+            logger.warning(f"关闭协调器时释放认领失败: {e}")
+        self._owned.clear()
+        self.is_leader = False
+        await self._close()
+
+    # ---------- 认领 ----------
+
+    async def claim(self, key: str, ttl: float = DEFAULT_CLAIM_TTL) -> bool:
+        """尝试持有 key；成功后由心跳续期，直到 release 或进程退出"""
+        if key in self._owned:
+            self._stats["claimConflicts"] += 1
+            return False
+        if await self._try_claim(key, ttl):
+            self._owned.add(key)
+            self._stats["claims"] += 1
+            return True
+        self._stats["claimConflicts"] += 1
+        return False
+
+    async def release(self, key: str) -> None:
+        if key not in self._owned:
+            return
+        self._owned.discard(key)
+        try:
+            await self._release(key)
+        except Exception as e:
+            logger.warning(f"释放认领 '{key}' 失败（将在过期后自动释放）: {e}")
+
+    async def is_claimed(self, key: str) -> bool:
+        return key in self._owned or await self._is_claimed(key)
+
+    async def wait_released(self, key: str, timeout: float) -> bool:
+        """等待其它进程释放 key，超时返回 False"""
+        deadline = time.monotonic() + timeout
+        while await self.is_claimed(key):
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(POLL_INTERVAL)
+        return True
+
+    @asynccontextmanager
+    async def lock(self, key: str, timeout: Optional[float] = None):
+        """跨进程互斥锁；timeout 为 None 时一直等待"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not await self.claim(key):
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f"等待跨进程锁 '{key}' 超时")
+            await asyncio.sleep(POLL_INTERVAL)
+        try:
+            yield
+        finally:
+            await self.release(key)
+
+    # ---------- 广播 ----------
+
+    def publish(self, channel: str, message: Dict[str, Any]) -> None:
+        """把消息放入发件箱，由后台批量发送给其它进程（不等待）"""
+        self._outbox.append((channel, message))
+        if self._outbox_event is not None:
+            self._outbox_event.set()
+
+    def subscribe(self, channel: str, handler: MessageHandler) -> None:
+        self._handlers[channel].append(handler)
+
+    def _deliver(self, channel: str, message: Dict[str, Any]) -> None:
+        handlers = self._handlers.get(channel)
+        if not handlers:
+            return
+        self._stats["received"] += 1
+        for handler in handlers:
+            task = asyncio.create_task(self._run_handler(channel, handler, message))
+            self._handler_tasks.add(task)
+            task.add_done_callback(self._handler_tasks.discard)
+
+    @staticmethod
+    async def _run_handler(channel: str, handler: MessageHandler, message: Dict[str, Any]) -> None:
+        try:
+            await handler(message)
+        except Exception as e:
+            logger.error(f"处理协调消息失败 [{channel}]: {e}", exc_info=True)
+
+    async def _flush_outbox(self) -> None:
+        while self._outbox:
+            batch, self._outbox = self._outbox[:OUTBOX_BATCH], self._outbox[OUTBOX_BATCH:]
+            await self._send(batch)
+            self._stats["published"] += len(batch)
+
+    async def _outbox_loop(self) -> None:
+        while True:
+            await self._outbox_event.wait()
+            self._outbox_event.clear()
+            try:
+                await self._flush_outbox()
+            except Exception as e:
+                logger.warning(f"发送协调消息失败: {e}")
+                await asyncio.sleep(POLL_INTERVAL)
+                self._outbox_event.set()
+
+    # ---------- 领导者 ----------
+
+    def on_leader(self, callback: LeaderCallback) -> None:
+        """注册成为领导者时的回调；当前已是领导者时立即执行"""
+        self._leader_callbacks.append(callback)
+        if self.is_leader:
+            asyncio.create_task(self._run_leader_callback(callback))
+
+    def on_demoted(self, callback: LeaderCallback) -> None:
+        """注册失去领导者身份时的回调（认领过期被其它进程接替），用于停止只在领导者运行的服务"""
+        self._demoted_callbacks.append(callback)
+
+    @staticmethod
+    async def _run_leader_callback(callback: LeaderCallback) -> None:
+        try:
+            await callback()
+        except Exception as e:
+            logger.error(f"执行领导者回调失败: {e}", exc_info=True)
+
+    async def _try_become_leader(self) -> None:
+        if self.is_leader or not await self._try_claim(LEADER_KEY, LEADER_TTL):
+            return
+        self.is_leader = True
+        self._stats["leaderChanges"] += 1
+        logger.info(f"进程 {self.worker_id} 成为领导者")
+        for callback in list(self._leader_callbacks):
+            asyncio.create_task(self._run_leader_callback(callback))
+
+    async def _heartbeat_loop(self) -> None:
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            try:
+                if self._owned:
+                    alive = await self._renew(list(self._owned), DEFAULT_CLAIM_TTL)
+                    lost = self._owned - alive
+                    if lost:
+                        logger.warning(f"以下认领已过期并被其它进程持有: {sorted(lost)}")
+                        self._owned &= alive
+                if self.is_leader:
+                    if not await self._renew([LEADER_KEY], LEADER_TTL):
+                        self.is_leader = False
+                        self._stats["leaderChanges"] += 1
+                        logger.error(f"进程 {self.worker_id} 的领导者认领已过期（事件循环可能长时间阻塞），"
+                                     f"已由其它进程接替，停止本进程的领导者服务")
+                        # 依次等待执行，确保本进程的服务停止后才可能再次成为领导者
+                        for callback in list(self._demoted_callbacks):
+                            await self._run_leader_callback(callback)
+                    else:
+                        await self._maintenance()
+                else:
+                    await self._try_become_leader()
+            except Exception as e:
+                logger.warning(f"协调器心跳失败: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.backend_name,
+            "workerId": self.worker_id,
+            "isLeader": self.is_leader,
+            "owned": len(self._owned),
+            "outbox": len(self._outbox),
+            **self._stats,
+        }
+
+
+class LocalCoordinator(Coordinator):
+    """单进程协调器: 始终是领导者，认领只在进程内互斥，广播不发送"""
+
+    backend_name = "local"
+    multi_worker = False
+
+    def __init__(self):
+        super().__init__()
+        self.is_leader = True
+
+    async def start(self) -> None:
+        self.is_leader = True
+
+    async def stop(self) -> None:
+        self._owned.clear()
+
+    def publish(self, channel: str, message: Dict[str, Any]) -> None:
+        pass
+
+    async def _open(self) -> None:
+        pass
+
+    async def _close(self) -> None:
+        pass
+
+    async def _try_claim(self, key: str, ttl: float) -> bool:
+        return key not in self._owned
+
+    async def _renew(self, keys: List[str], ttl: float) -> Set[str]:
+        return set(keys)
+
+    async def _release(self, key: str) -> None:
+        pass
+
+    async def _is_claimed(self, key: str) -> bool:
+        return False
+
+    async def _send(self, messages: List[Tuple[str, Dict[str, Any]]]) -> None:
+        pass
+
+    async def _receive_loop(self) -> None:
+        pass
+
+
+class SqliteCoordinator(Coordinator):
+    """基于本地 SQLite 文件的协调器（同一主机上的多个进程）"""
+
+    backend_name = "sqlite"
+
+    def __init__(self, path: Path):
+        super().__init__()
+        self.path = Path(path)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_lock = threading.Lock()
+        self._last_message_id = 0
+
+    def _execute(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        with self._conn_lock:
+            return fn(self._conn)
+
+    async def _run(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        return await asyncio.to_thread(self._execute, fn)
+
+    async def _open(self) -> None:
+        def _connect():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=10, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS claims "
+                         "(key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS messages "
+                         "(id INTEGER PRIMARY KEY AUTOINCREMENT, channel TEXT NOT NULL, sender TEXT NOT NULL, "
+                         "payload TEXT NOT NULL, created_at REAL NOT NULL)")
+            row = conn.execute("SELECT COALESCE(MAX(id), 0) FROM messages").fetchone()
+            return conn, row[0]
+
+        self._conn, self._last_message_id = await asyncio.to_thread(_connect)
+
+    async def _close(self) -> None:
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            await asyncio.to_thread(conn.close)
+
+    async def _try_claim(self, key: str, ttl: float) -> bool:
+        def _claim(conn):
+            now = time.time()
+            cursor = conn.execute(
+                "INSERT INTO claims (key, owner, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+                "WHERE claims.expires_at < ?",
+                (key, self.worker_id, now + ttl, now),
+            )
+            return cursor.rowcount == 1
+
+        return await self._run(_claim)
+
+    async def _renew(self, keys: List[str], ttl: float) -> Set[str]:
+        def _renew_all(conn):
+            expires_at = time.time() + ttl
+            alive = set()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for key in keys:
+                    cursor = conn.execute("UPDATE claims SET expires_at = ? WHERE key = ? AND owner = ?",
+                                          (expires_at, key, self.worker_id))
+                    if cursor.rowcount == 1:
+                        alive.add(key)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            return alive
+
+        return await self._run(_renew_all)
+
+    async def _release(self, key: str) -> None:
+        await self._run(lambda conn: conn.execute("DELETE FROM claims WHERE key = ? AND owner = ?",
+                                                  (key, self.worker_id)))
+
+    async def _is_claimed(self, key: str) -> bool:
+        row = await self._run(lambda conn: conn.execute(
+            "SELECT 1 FROM claims WHERE key = ? AND expires_at >= ?", (key, time.time())).fetchone())
+        return row is not None
+
+    async def _send(self, messages: List[Tuple[str, Dict[str, Any]]]) -> None:
+        now = time.time()
+        rows = [(channel, self.worker_id, json.dumps(message, ensure_ascii=False, default=str), now)
+                for channel, message in messages]
+        await self._run(lambda conn: conn.executemany(
+            "INSERT INTO messages (channel, sender, payload, created_at) VALUES (?, ?, ?, ?)", rows))
+
+    async def _receive_loop(self) -> None:
+        while True:
+            await asyncio.sleep(POLL_INTERVAL)
+            try:
+                rows = await self._run(lambda conn: conn.execute(
+                    "SELECT id, channel, sender, payload FROM messages WHERE id > ? ORDER BY id LIMIT 500",
+                    (self._last_message_id,)).fetchall())
+            except Exception as e:
+                logger.warning(f"读取协调消息失败: {e}")
+                continue
+            for message_id, channel, sender, payload in rows:
+                self._last_message_id = message_id
+                if sender != self.worker_id:
+                    self._deliver(channel, json.loads(payload))
+
+    async def _maintenance(self) -> None:
+        def _cleanup(conn):
+            now = time.time()
+            conn.execute("DELETE FROM messages WHERE created_at < ?", (now - MESSAGE_RETENTION,))
+            conn.execute("DELETE FROM claims WHERE expires_at < ?", (now - MESSAGE_RETENTION,))
+
+        await self._run(_cleanup)
+
+
+class RedisCoordinator(Coordinator):
+    """基于 Redis 的协调器（可跨主机）"""
+
+    backend_name = "redis"
+
+    # 仅当值仍为本进程时续期 / 删除
+    _RENEW_SCRIPT = ("if redis.call('get', KEYS[1]) == ARGV[1] then "
+                     "return redis.call('pexpire', KEYS[1], ARGV[2]) else return 0 end")
+    _RELEASE_SCRIPT = ("if redis.call('get', KEYS[1]) == ARGV[1] then "
+                       "return redis.call('del', KEYS[1]) else return 0 end")
+
+    def __init__(self, redis_url: str, namespace: str, socket_connect_timeout: int = 5):
+        super().__init__()
+        from src.core.cache import normalize_redis_url
+        self._redis_url = normalize_redis_url(redis_url)
+        self._prefix = f"misaka:{namespace}:coord:"
+        self._socket_connect_timeout = socket_connect_timeout
+        self._client = None
+
+    def _key(self, key: str) -> str:
+        return f"{self._prefix}claim:{key}"
+
+    async def _open(self) -> None:
+        try:
+            import redis.asyncio as aioredis
+        except ImportError:
+            raise ImportError("使用 Redis 协调器需要安装 redis 包: pip install redis")
+        self._client = aioredis.from_url(
+            self._redis_url,
+            socket_connect_timeout=self._socket_connect_timeout,
+            decode_responses=True,
+            health_check_interval=30,
+        )
+        await self._client.ping()
+
+    async def _close(self) -> None:
+        if self._client is not None:
+            client, self._client = self._client, None
+            await client.aclose()
+
+    async def _try_claim(self, key: str, ttl: float) -> bool:
+        return bool(await self._client.set(self._key(key), self.worker_id, nx=True, px=int(ttl * 1000)))
+
+    async def _renew(self, keys: List[str], ttl: float) -> Set[str]:
+        async with self._client.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.eval(self._RENEW_SCRIPT, 1, self._key(key), self.worker_id, int(ttl * 1000))
+            results = await pipe.execute()
+        return {key for key, ok in zip(keys, results) if ok}
+
+    async def _release(self, key: str) -> None:
+        await self._client.eval(self._RELEASE_SCRIPT, 1, self._key(key), self.worker_id)
+
+    async def _is_claimed(self, key: str) -> bool:
+        return bool(await self._client.exists(self._key(key)))
+
+    async def _send(self, messages: List[Tuple[str, Dict[str, Any]]]) -> None:
+        async with self._client.pipeline(transaction=False) as pipe:
+            for channel, message in messages:
+                payload = json.dumps({"s": self.worker_id, "d": message}, ensure_ascii=False, default=str)
+                pipe.publish(f"{self._prefix}msg:{channel}", payload)
+            await pipe.execute()
+
+    async def _receive_loop(self) -> None:
+        channel_prefix = f"{self._prefix}msg:"
+        while True:
+            pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.psubscribe(f"{channel_prefix}*")
+                while True:
+                    raw = await pubsub.get_message(timeout=1.0)
+                    if raw is None:
+                        continue
+                    envelope = json.loads(raw["data"])
+                    if envelope.get("s") != self.worker_id:
+                        self._deliver(raw["channel"][len(channel_prefix):], envelope.get("d") or {})
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Redis 协调消息订阅中断，稍后重连: {e}")
+                await asyncio.sleep(HEARTBEAT_INTERVAL)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+
+# ==================== 全局实例 ====================
+
+_coordinator: Coordinator = LocalCoordinator()
+
+
+def get_coordinator() -> Coordinator:
+    """获取进程内的协调器（未初始化时为单进程实现）"""
+    return _coordinator
+
+
+def _default_coordination_file() -> Path:
+    """配置目录下的 coordination.db，与 config.yml 放在一起"""
+    if Path("/.dockerenv").exists() or os.getenv("DOCKER_CONTAINER") == "true" or Path.cwd() == Path("/app"):
+        return Path("/app/config/coordination.db")
+    return Path("config/coordination.db")
+
+
+async def init_coordinator(settings) -> Coordinator:
+    """
+    根据配置初始化协调器（应用启动时每个工作进程调用一次）
+
+    - server.workers <= 1: 单进程实现
+    - 配置了 cache.redis_url: Redis，连接失败时降级到 SQLite 文件
+    - 否则: SQLite 文件（server.coordination_file，默认配置目录下的 coordination.db）
+    """
+    global _coordinator
+    if settings.server.workers <= 1:
+        _coordinator = LocalCoordinator()
+        await _coordinator.start()
+        return _coordinator
+
+    coordinator: Optional[Coordinator] = None
+    if settings.cache.redis_url:
+        coordinator = RedisCoordinator(settings.cache.redis_url, namespace=settings.database.name,
+                                       socket_connect_timeout=settings.cache.redis_socket_connect_timeout)
+        try:
+            await coordinator.start()
+        except Exception as e:
+            logger.warning(f"Redis 协调器启动失败，降级到本地 SQLite 文件: {e}")
+            try:
+                await coordinator._close()
+            except Exception:
+                pass
+            coordinator = None
+
+    if coordinator is None:
+        path = Path(settings.server.coordination_file) if settings.server.coordination_file \
+            else _default_coordination_file()
+        coordinator = SqliteCoordinator(path)
+        await coordinator.start()
+
+    _coordinator = coordinator
+    return _coordinator
+
+
+def share_cache_invalidation(coordinator: Coordinator, backend) -> None:
+    """多进程时让 Hybrid 缓存的写入和删除使其它进程的 L1 条目失效"""
+    from src.core.cache import HybridBackend, MemoryBackend
+    if not coordinator.multi_worker:
+        return
+    if isinstance(backend, HybridBackend):
+        async def _on_invalidate(message: Dict[str, Any]) -> None:
+            await backend.invalidate_local(message.get("key"), message.get("region"))
+
+        backend.peer_invalidate = lambda key, region: coordinator.publish("cache", {"key": key, "region": region})
+        coordinator.subscribe("cache", _on_invalidate)
+    elif isinstance(backend, MemoryBackend):
+        logger.warning("memory 缓存后端在多工作进程下互不共享，建议使用 hybrid 或 redis 后端")
+
+
+async def close_coordinator() -> None:
+    """关闭协调器并释放持有的认领（应用关闭时调用）"""
+    global _coordinator
+    await _coordinator.stop()
+    _coordinator = LocalCoordinator()
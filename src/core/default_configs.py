@@ -32,6 +32,7 @@ def get_default_configs(settings=None, ai_prompts=None):
         'webhookDelayedImportHours': ('24', 'Webhook 延时导入的小时数。'),
         'webhookFilterMode': ('blacklist', 'Webhook 标题过滤模式 (blacklist/whitelist)。'),
         'webhookFilterRegex': ('', '用于过滤 Webhook 标题的正则表达式。'),
+        'webhookCoalesceSeconds': ('10', 'Webhook 合并窗口（秒）。同一剧集同一季在窗口内的多个入库请求合并为一个搜索任务，0 表示不合并。'),
         'webhookLogRawRequest': ('false', '是否记录 Webhook 的原始请求体。'),
         'externalApiKey': ('', '用于外部API调用的安全密钥。'),
         'externalApiDuplicateTaskThresholdHours': (3, '（外部API）重复任务提交阈值（小时）。在此时长内，不允许为同一媒体提交重复的自动导入任务。0为禁用。'),
@@ -80,6 +81,10 @@ def get_default_configs(settings=None, ai_prompts=None):
         'matchFallbackEnabled': ('false', '是否为匹配接口启用后备机制（自动搜索导入）。'),
         'matchFallbackBlacklist': ('', '匹配后备黑名单，使用正则表达式过滤文件名，匹配的文件不会触发后备机制。'),
         'searchFallbackEnabled': ('false', '是否为搜索接口启用后备搜索功能（全网搜索）。'),
+        'downloadConcurrencyMin': ('1', '分集弹幕并发下载时每个弹幕源的最小并发数。'),
+        'downloadConcurrencyMax': ('8', '分集弹幕并发下载时每个弹幕源的最大并发数。实际并发数会在最小值和最大值之间按源的响应情况自动调整。'),
+        'outboundRateLimits': ('', '对外请求的令牌桶限速参数(JSON)，按源名称配置，如 {"bilibili": {"rate": 2, "burst": 6}, "default": {"rate": 5, "burst": 10}}。rate 为每秒请求数，0 表示不限速。留空使用内置默认值。'),
+        'notificationDigestSeconds': ('5', '通知合并窗口（秒）。同一渠道在窗口内的同类事件通知合并为一条摘要发送，0 表示不合并。'),
 
         # 弹幕文件路径配置
         'customDanmakuPathEnabled': ('false', '是否启用自定义弹幕文件保存路径。'),
@@ -161,6 +166,12 @@ def get_default_configs(settings=None, ai_prompts=None):
             'aiEpisodeGroupPrompt': (ai_prompts.get('DEFAULT_AI_EPISODE_GROUP_SELECT_PROMPT', ''), 'AI剧集组选择提示词。用于指导AI从TMDB剧集组列表中选择最佳匹配。'),
             'aiCacheEnabled': ('true', '是否启用AI响应缓存。启用后，相同查询将直接返回缓存结果，降低API调用成本。'),
             'aiCacheTtl': ('3600', 'AI缓存过期时间(秒)。默认3600秒(1小时)。'),
+            'aiBatchEnabled': ('false', '是否启用AI请求微批合并（默认关闭）。启用后，短时间窗口内多个任务发起的标题识别、别名验证请求会合并为一次AI调用。'),
+            'aiBatchWindowMs': ('50', 'AI微批收集窗口(毫秒)。窗口内到达的同类请求合并发送。'),
+            'aiBatchMaxSize': ('20', 'AI微批单批最多条目数。'),
+            'aiBatchMaxTokens': ('4000', 'AI微批单批输入的估算token上限，超出时拆分为多批。'),
+            'aiBatchConcurrency': ('2', 'AI微批同时发送中的最大批次数。'),
+            'aiBatchRateLimit': ('0', 'AI微批每分钟最多发送的批次数。0表示使用当前提供商的默认限速。'),
             # 名称转换功能配置
             'nameConversionEnabled': ('false', '是否启用名称转换功能。启用后，搜索时自动将非中文名称转换为中文。'),
             'nameConversionT2SEnabled': ('false', '是否启用繁体自动转简体。启用后，搜索时自动将繁体中文标题转换为简体。'),
@@ -0,0 +1,168 @@
+"""
+启动阶段计时与延迟初始化的子系统
+
+启动分为两部分:
+- 关键路径: 数据库、配置、缓存、鉴权和弹幕服务所需的对象，在 lifespan 中按阶段执行，
+  每个阶段记录耗时，完成后应用即开始接受请求
+- 延迟子系统: 弹幕源（.so 加载）、元数据源、媒体服务器、通知渠道、定时任务等，
+  在应用开始接受请求后于后台并发初始化，按声明的依赖顺序启动
+
+就绪状态通过 /api/health/ready 查看；依赖某个子系统的接口用 wait_ready() 等待其就绪。
+
+使用方式:
+    startup = StartupTracker()
+    with startup.phase("database"):
+        await init_db_tables(app)
+    startup.defer("scrapers", scraper_manager.initialize)
+    startup.defer("scheduler", scheduler_manager.start, depends_on=("scrapers",))
+    startup.mark_serving()
+"""
+
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 接口等待子系统就绪的默认超时（秒）
+SUBSYSTEM_WAIT_TIMEOUT = 60.0
+
+PENDING = "pending"
+STARTING = "starting"
+READY = "ready"
+FAILED = "failed"
+
+
+class _Subsystem:
+    __slots__ = ("name", "depends_on", "status", "started_at", "seconds", "error", "event", "task")
+
+    def __init__(self, name: str, depends_on: Iterable[str]):
+        self.name = name
+        self.depends_on = tuple(depends_on)
+        self.status = PENDING
+        self.started_at: Optional[float] = None
+        self.seconds: Optional[float] = None
+        self.error: Optional[str] = None
+        # 就绪或失败时置位
+        self.event = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+
+class StartupTracker:
+    """记录启动各阶段耗时，并在后台按依赖顺序初始化延迟子系统"""
+
+    def __init__(self):
+        self._started_at = time.monotonic()
+        self._phases: Dict[str, float] = {}
+        self._subsystems: Dict[str, _Subsystem] = {}
+        self._serving_after: Optional[float] = None
+
+    # ---------- 关键路径 ----------
+
+    @contextmanager
+    def phase(self, name: str):
+        """记录关键路径上一个阶段的耗时"""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            seconds = time.monotonic() - start
+            self._phases[name] = seconds
+            logger.info(f"启动阶段 '{name}' 完成，耗时 {seconds:.2f} 秒")
+
+    def mark_serving(self) -> None:
+        """关键路径完成，应用开始接受请求"""
+        self._serving_after = time.monotonic() - self._started_at
+        pending = [s.name for s in self._subsystems.values() if s.status != READY]
+        logger.info(f"关键路径启动完成，耗时 {self._serving_after:.2f} 秒；"
+                    f"后台初始化中的子系统: {', '.join(pending) or '无'}")
+
+    # ---------- 延迟子系统 ----------
+
+    def defer(self, name: str, init: Callable[[], Awaitable[Any]], depends_on: Iterable[str] = ()) -> None:
+        """
+        在后台初始化子系统；depends_on 中的子系统全部就绪后才开始。
+        依赖初始化失败时本子系统也标记为失败，不再执行。
+        """
+        subsystem = _Subsystem(name, depends_on)
+        self._subsystems[name] = subsystem
+        subsystem.task = asyncio.create_task(self._run(subsystem, init))
+
+    async def _run(self, subsystem: _Subsystem, init: Callable[[], Awaitable[Any]]) -> None:
+        try:
+            for dependency in subsystem.depends_on:
+                if not await self.wait_ready(dependency):
+                    subsystem.status = FAILED
+                    subsystem.error = f"依赖的子系统 '{dependency}' 初始化失败"
+                    logger.error(f"子系统 '{subsystem.name}' 未初始化: {subsystem.error}")
+                    return
+            subsystem.status = STARTING
+            subsystem.started_at = time.monotonic()
+            await init()
+            subsystem.status = READY
+            subsystem.seconds = time.monotonic() - subsystem.started_at
+            logger.info(f"子系统 '{subsystem.name}' 已就绪，初始化耗时 {subsystem.seconds:.2f} 秒")
+        except asyncio.CancelledError:
+            subsystem.status = FAILED
+            subsystem.error = "已取消"
+            raise
+        except Exception as e:
+            subsystem.status = FAILED
+            subsystem.error = str(e)
+            logger.error(f"子系统 '{subsystem.name}' 初始化失败: {e}", exc_info=True)
+        finally:
+            subsystem.event.set()
+            if self._subsystems and all(s.event.is_set() for s in self._subsystems.values()):
+                total = time.monotonic() - self._started_at
+                logger.info(f"所有子系统初始化结束，启动总耗时 {total:.2f} 秒")
+
+    def is_ready(self, name: str) -> bool:
+        """未登记为延迟子系统的名称视为已就绪"""
+        subsystem = self._subsystems.get(name)
+        return subsystem is None or subsystem.status == READY
+
+    async def wait_ready(self, name: str, timeout: Optional[float] = None) -> bool:
+        """等待子系统初始化结束，返回是否就绪（失败或超时返回 False）"""
+        subsystem = self._subsystems.get(name)
+        if subsystem is None:
+            return True
+        if not subsystem.event.is_set():
+            try:
+                await asyncio.wait_for(subsystem.event.wait(), timeout)
+            except asyncio.TimeoutError:
+                return False
+        return subsystem.status == READY
+
+    async def cancel(self) -> None:
+        """取消仍在初始化的子系统（应用关闭时调用）"""
+        tasks = [s.task for s in self._subsystems.values() if s.task is not None and not s.task.done()]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    # ---------- 查询 ----------
+
+    def snapshot(self) -> Dict[str, Any]:
+        subsystems: List[Dict[str, Any]] = []
+        for s in self._subsystems.values():
+            seconds = s.seconds
+            if seconds is None and s.status == STARTING and s.started_at is not None:
+                seconds = time.monotonic() - s.started_at
+            subsystems.append({
+                "name": s.name,
+                "status": s.status,
+                "seconds": round(seconds, 2) if seconds is not None else None,
+                "dependsOn": list(s.depends_on),
+                "error": s.error,
+            })
+        return {
+            "ready": all(s.status == READY for s in self._subsystems.values()),
+            "serving": self._serving_after is not None,
+            "uptime": round(time.monotonic() - self._started_at, 2),
+            "criticalPathSeconds": round(self._serving_after, 2) if self._serving_after is not None else None,
+            "phases": [{"name": name, "seconds": round(seconds, 2)} for name, seconds in self._phases.items()],
+            "subsystems": subsystems,
+        }
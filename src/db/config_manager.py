@@ -23,6 +23,22 @@ class ConfigManager:
         self._cache: Dict[str, Any] = {}
         self._lock = asyncio.Lock()
         self.logger = logging.getLogger(self.__class__.__name__)
+        # 多工作进程时用于通知其它进程丢弃缓存，见 attach_coordinator
+        self._coordinator = None
+
+    def attach_coordinator(self, coordinator):
+        """多工作进程时，本进程的配置失效会广播给其它进程，其它进程的失效也会应用到本进程"""
+        if not coordinator.multi_worker:
+            return
+        self._coordinator = coordinator
+        coordinator.subscribe("config", self._on_peer_invalidate)
+
+    async def _on_peer_invalidate(self, message: Dict[str, Any]):
+        key = message.get("key")
+        if key is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(key, None)
 
     async def get(self, key: str, default: Optional[Any] = None) -> Any:
         """
@@ -63,9 +79,13 @@ class ConfigManager:
         """从缓存中移除一个特定的键，以便下次获取时能从数据库重新加载。"""
         if key in self._cache:
             del self._cache[key]
+        if self._coordinator is not None:
+            self._coordinator.publish("config", {"key": key})
 
     def clear_cache(self):
         """清空内存中的配置缓存，以便下次获取时能从数据库重新加载。"""
         self._cache.clear()
+        if self._coordinator is not None:
+            self._coordinator.publish("config", {"key": None})
         self.logger.info("所有配置缓存已清空。")
 
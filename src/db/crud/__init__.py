@@ -40,6 +40,7 @@ from .task import (
     get_last_run_result_for_scheduled_task,
     create_task_in_history,
     update_task_progress_in_history,
+    bulk_update_task_progress,
     finalize_task_in_history,
     update_task_status,
     get_tasks_from_history,
@@ -57,6 +58,9 @@ from .task import (
     get_webhook_tasks,
     delete_webhook_tasks,
     get_due_webhook_tasks,
+    claim_due_webhook_tasks,
+    release_stale_webhook_claims,
+    set_webhook_tasks_status,
     update_webhook_task_status,
     save_task_state_cache,
     get_task_state_cache,
@@ -92,6 +96,7 @@ from .scraper import (
     get_scraper_setting_by_name,
     get_all_scraper_settings,
     update_scraper_proxy,
+    update_scraper_download_concurrency,
     update_scrapers_settings,
     remove_stale_scrapers,
 )
@@ -142,6 +147,7 @@ from .anime import (
     get_anime_id_by_imdb_id,
     get_anime_id_by_douban_id,
     update_anime_tmdb_group_id,
+    set_tmdb_mapping_state,
     update_anime_aliases_if_empty,
     get_animes_with_tmdb_id,
     get_anime_details_for_dandan,
@@ -209,8 +215,15 @@ from .source import (
 # Danmaku模块
 from .danmaku import (
     save_danmaku_for_episode,
+    save_danmaku_stream_for_episode,
+    load_merged_view,
+    remove_merged_views,
+    sweep_orphan_merged_views,
+    merge_danmaku_for_episode,
     _generate_danmaku_path,
     _generate_xml_from_comments,
+    write_danmaku_xml,
+    episode_write_lock,
     _get_fs_path_from_web_path,
     update_metadata_if_empty,
 )
@@ -352,6 +365,7 @@ __all__ = [
     'update_scheduled_task_run_times',
     'get_last_run_result_for_scheduled_task',
     'create_task_in_history',
+    'bulk_update_task_progress',
     'update_task_progress_in_history',
     'finalize_task_in_history',
     'update_task_status',
@@ -368,6 +382,9 @@ __all__ = [
     'get_webhook_tasks',
     'delete_webhook_tasks',
     'get_due_webhook_tasks',
+    'claim_due_webhook_tasks',
+    'release_stale_webhook_claims',
+    'set_webhook_tasks_status',
     'update_webhook_task_status',
     'save_task_state_cache',
     'get_task_state_cache',
@@ -391,6 +408,7 @@ __all__ = [
     'get_scraper_setting_by_name',
     'get_all_scraper_settings',
     'update_scraper_proxy',
+    'update_scraper_download_concurrency',
     'update_scrapers_settings',
     'remove_stale_scrapers',
     # MetadataSource
@@ -432,6 +450,7 @@ __all__ = [
     'get_anime_id_by_imdb_id',
     'get_anime_id_by_douban_id',
     'update_anime_tmdb_group_id',
+    'set_tmdb_mapping_state',
     'update_anime_aliases_if_empty',
     'get_animes_with_tmdb_id',
     'get_anime_details_for_dandan',
@@ -482,8 +501,15 @@ __all__ = [
     'get_source_episode_list',
     # Danmaku
     'save_danmaku_for_episode',
+    'save_danmaku_stream_for_episode',
+    'load_merged_view',
+    'remove_merged_views',
+    'sweep_orphan_merged_views',
+    'merge_danmaku_for_episode',
     '_generate_danmaku_path',
     '_generate_xml_from_comments',
+    'write_danmaku_xml',
+    'episode_write_lock',
     '_get_fs_path_from_web_path',
     'update_metadata_if_empty',
     # Reassociation
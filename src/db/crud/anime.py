@@ -974,6 +974,18 @@ async def update_anime_tmdb_group_id(session: AsyncSession, anime_id: int, group
     await session.commit()
 
 
+async def set_tmdb_mapping_state(session: AsyncSession, anime_id: int, mapping_hash: str):
+    """记录 TMDB 自动刮削的完成时间和 TMDB 数据指纹(元数据记录不存在时创建)"""
+    result = await session.execute(
+        update(AnimeMetadata)
+        .where(AnimeMetadata.animeId == anime_id)
+        .values(tmdbMappedAt=get_now(), tmdbMappingHash=mapping_hash)
+    )
+    if result.rowcount == 0:
+        session.add(AnimeMetadata(animeId=anime_id, tmdbMappedAt=get_now(), tmdbMappingHash=mapping_hash))
+    await session.commit()
+
+
 async def update_anime_aliases_if_empty(session: AsyncSession, anime_id: int, aliases: Dict[str, Any], force_update: bool = False):
     """
     更新作品别名,如果字段为空则填充
@@ -2,19 +2,27 @@
 Danmaku相关的CRUD操作
 """
 
+import asyncio
+import json
 import logging
-from typing import Optional, Dict, Any, List
+import os
+import shutil
+import re
+import uuid
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional, Dict, Any, List, Set, Tuple
 from pathlib import Path
-import xml.etree.ElementTree as ET
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, distinct, case, or_, and_, update, delete
 from sqlalchemy.orm import selectinload
 from datetime import datetime, timedelta
+from xml.etree import ElementTree
 
 from ..orm_models import Anime, Episode, AnimeMetadata, AnimeSource
 from .. import models
 from src.core.timezone import get_now
-from src.utils.common import handle_danmaku_likes
+from src.utils.common import handle_danmaku_likes, danmaku_dedup_key
+from .danmaku_index import DanmakuIndex, extend_danmaku_index, get_danmaku_index, read_comments_at
 
 logger = logging.getLogger(__name__)
 
@@ -61,9 +69,43 @@ async def save_danmaku_for_episode(
     - 如果episode已有danmakuFilePath，使用原有路径（刷新场景）
     - 如果episode没有danmakuFilePath，生成新路径（首次下载场景，支持自定义路径）
     - 比较新旧弹幕数量，只有新的更多才替换
+
+    文件在工作线程中流式生成并原子替换，同一分集的并发写入通过分集写锁串行化。
     """
     if not comments:
         return 0
+    async with episode_write_lock(episode_id):
+        return await _save_danmaku_locked(session, episode_id, comments, config_manager, fire_threshold)
+
+
+# 原始弹幕服务器信息
+_CHAT_SERVER_MAP = {
+    "bilibili": "comment.bilibili.com"
+}
+
+
+async def _resolve_danmaku_path(session: AsyncSession, episode: Episode, config_manager) -> tuple:
+    """确定弹幕文件路径：刷新使用原有路径，首次下载生成新路径（支持自定义路径）。返回 (web_path, absolute_path)。"""
+    if episode.danmakuFilePath:
+        web_path = episode.danmakuFilePath
+        absolute_path = _get_fs_path_from_web_path(web_path)
+        if absolute_path is not None:
+            logger.info(f"刷新弹幕：使用原有路径 {absolute_path}")
+            return web_path, absolute_path
+        logger.error(f"无法解析原有弹幕路径: {web_path}，尝试生成新路径")
+    web_path, absolute_path = await _generate_danmaku_path(session, episode, config_manager)
+    logger.info(f"首次下载：生成新路径 {absolute_path}")
+    return web_path, absolute_path
+
+
+async def _save_danmaku_locked(
+    session: AsyncSession,
+    episode_id: int,
+    comments: List[Dict[str, Any]],
+    config_manager,
+    fire_threshold: int
+) -> int:
+    """save_danmaku_for_episode 的实际实现，调用方需已持有分集写锁。"""
 
     episode_stmt = select(Episode).where(Episode.id == episode_id).options(
         selectinload(Episode.source).selectinload(AnimeSource.anime).selectinload(Anime.metadataRecord)
@@ -89,31 +131,14 @@ async def save_danmaku_for_episode(
         logger.info(f"分集 {episode_id} 弹幕数量未增加 (新:{new_comment_count} <= 旧:{old_comment_count})，跳过刷新")
         return 0
 
-    # 获取原始弹幕服务器信息
     provider_name = episode.source.providerName
-    chat_server_map = {
-        "bilibili": "comment.bilibili.com"
-    }
-    xml_content = _generate_xml_from_comments(comments, episode_id, provider_name, chat_server_map.get(provider_name, "danmaku.misaka.org"))
-
-    # 判断路径：刷新使用原有路径，首次下载生成新路径
-    if episode.danmakuFilePath:
-        # 刷新场景：使用原有路径
-        web_path = episode.danmakuFilePath
-        absolute_path = _get_fs_path_from_web_path(web_path)
-        if absolute_path is None:
-            logger.error(f"无法解析原有弹幕路径: {web_path}，尝试生成新路径")
-            web_path, absolute_path = await _generate_danmaku_path(session, episode, config_manager)
-        else:
-            logger.info(f"刷新弹幕：使用原有路径 {absolute_path} (新:{new_comment_count} > 旧:{old_comment_count})")
-    else:
-        # 首次下载场景：生成新路径（支持自定义路径）
-        web_path, absolute_path = await _generate_danmaku_path(session, episode, config_manager)
-        logger.info(f"首次下载：生成新路径 {absolute_path}")
+    web_path, absolute_path = await _resolve_danmaku_path(session, episode, config_manager)
 
     try:
-        absolute_path.parent.mkdir(parents=True, exist_ok=True)
-        absolute_path.write_text(xml_content, encoding='utf-8')
+        await write_danmaku_xml(
+            absolute_path, comments, episode_id, provider_name,
+            _CHAT_SERVER_MAP.get(provider_name, "danmaku.misaka.org")
+        )
         logger.info(f"弹幕已成功写入文件: {absolute_path} (共 {new_comment_count} 条)")
     except OSError as e:
         logger.error(f"写入弹幕文件失败: {absolute_path}。错误: {e}")
@@ -125,6 +150,330 @@ async def save_danmaku_for_episode(
     return new_comment_count
 
 
+async def save_danmaku_stream_for_episode(
+    session: AsyncSession,
+    episode_id: int,
+    batches: AsyncIterator[List[Dict[str, Any]]],
+    config_manager = None,
+    fire_threshold: int = 1000,
+    dedup: bool = True,
+) -> int:
+    """
+    以流水线方式消费分段弹幕批次并写入 XML 文件，返回写入的弹幕数量（未写入时为 0）。
+
+    每个批次依次完成点赞处理、去重和 XML 片段生成，片段在工作线程中写入临时文件，
+    与下一批次的网络拉取重叠进行。内存中只保留当前批次和去重键，不会持有整集弹幕。
+    刷新规则与 save_danmaku_for_episode 一致：已有文件且新数量不多于旧数量时不替换。
+    """
+    async with episode_write_lock(episode_id):
+        return await _save_danmaku_stream_locked(session, episode_id, batches, config_manager, fire_threshold, dedup)
+
+
+async def _save_danmaku_stream_locked(
+    session: AsyncSession,
+    episode_id: int,
+    batches: AsyncIterator[List[Dict[str, Any]]],
+    config_manager,
+    fire_threshold: int,
+    dedup: bool,
+) -> int:
+    """save_danmaku_stream_for_episode 的实际实现，调用方需已持有分集写锁。"""
+    episode_stmt = select(Episode).where(Episode.id == episode_id).options(
+        selectinload(Episode.source).selectinload(AnimeSource.anime).selectinload(Anime.metadataRecord)
+    )
+    episode = (await session.execute(episode_stmt)).scalar_one_or_none()
+    if not episode:
+        raise ValueError(f"找不到ID为 {episode_id} 的分集")
+
+    likes_fetch_enabled = True
+    if config_manager is not None:
+        try:
+            likes_fetch_enabled = (await config_manager.get('danmakuLikesFetchEnabled', 'true')).lower() == 'true'
+        except Exception:
+            pass
+
+    provider_name = episode.source.providerName
+    old_comment_count = episode.commentCount or 0
+    web_path, absolute_path = await _resolve_danmaku_path(session, episode, config_manager)
+    writer = _StreamingDanmakuWriter(
+        absolute_path, episode_id, provider_name, _CHAT_SERVER_MAP.get(provider_name, "danmaku.misaka.org")
+    )
+    seen_keys = set()
+    pending_write: Optional[asyncio.Future] = None
+    committed = False
+    try:
+        async for batch in batches:
+            if not batch:
+                continue
+            batch = handle_danmaku_likes(batch, fire_threshold, enabled=likes_fetch_enabled)
+            if dedup:
+                unique = []
+                for comment in batch:
+                    key = danmaku_dedup_key(comment)
+                    if key not in seen_keys:
+                        seen_keys.add(key)
+                        unique.append(comment)
+                batch = unique
+            if not batch:
+                continue
+            # 上一批写完前不再提交新的写入，最多一个批次在途
+            if pending_write is not None:
+                await pending_write
+            pending_write = asyncio.ensure_future(asyncio.to_thread(writer.write_batch, batch))
+        if pending_write is not None:
+            await pending_write
+            pending_write = None
+
+        new_comment_count = writer.count
+        if new_comment_count == 0:
+            return 0
+        if episode.danmakuFilePath and new_comment_count <= old_comment_count:
+            logger.info(f"分集 {episode_id} 弹幕数量未增加 (新:{new_comment_count} <= 旧:{old_comment_count})，跳过刷新")
+            return 0
+
+        try:
+            await asyncio.to_thread(writer.commit)
+            committed = True
+        except OSError as e:
+            logger.error(f"写入弹幕文件失败: {absolute_path}。错误: {e}")
+            raise
+        logger.info(f"弹幕已流式写入文件: {absolute_path} (共 {new_comment_count} 条)")
+    finally:
+        if pending_write is not None:
+            # 出错或被取消时等在途写入结束再清理临时文件
+            await asyncio.gather(pending_write, return_exceptions=True)
+        if not committed:
+            await asyncio.to_thread(writer.discard)
+
+    from .episode import update_episode_danmaku_info
+    await update_episode_danmaku_info(session, episode_id, web_path, new_comment_count)
+    return new_comment_count
+
+
+
+# 追加段超过该数量或超过基础文件的一定比例时，整体重写（按时间排序并更新 datasize）
+COMPACT_MIN_APPENDED = 2000
+COMPACT_APPENDED_RATIO = 0.5
+_DATASIZE_RE = re.compile(r'<datasize>(\d+)</datasize>')
+
+
+def _build_comment_elements(comments: List[Dict[str, Any]], provider_name: Optional[str]) -> str:
+    """生成一组 <d> 元素的 XML 片段，用于追加到现有弹幕文件末尾。"""
+    return ''.join(
+        _xml_text_element('d', comment.get('m', ''), _normalize_p_attr(str(comment.get('p', '')), provider_name))
+        for comment in comments
+    )
+
+
+def _append_to_danmaku_file(path: Path, fragment: str) -> Optional[int]:
+    """
+    在弹幕文件的 </i> 之前原地追加 <d> 片段，返回片段写入位置（原 </i> 的字节偏移）。
+
+    只读取文件尾部定位 </i>，从该位置写入片段和新的 </i> 后截断并 fsync，
+    写入量与片段大小成正比，与文件大小无关；已有元素的字节位置不变，索引只需补充片段。
+    写入中途崩溃会留下缺少 </i> 的文件，读取时按最后一条完整的 <d> 恢复，
+    下一次合并检测到后整体重写。
+    文件尾部不是 </i>（例如空文档 <i/> 或损坏的文件）时返回 None，由调用方改为整体重写。
+    """
+    closing = b'</i>'
+    with open(path, 'r+b') as f:
+        f.seek(0, 2)
+        size = f.tell()
+        tail_len = min(size, 64)
+        f.seek(size - tail_len)
+        tail = f.read(tail_len)
+        pos = tail.rfind(closing)
+        if pos == -1 or tail[pos + len(closing):].strip():
+            return None
+        base_offset = size - tail_len + pos
+        f.seek(base_offset)
+        f.write(fragment.encode('utf-8') + closing)
+        f.truncate()
+        f.flush()
+        os.fsync(f.fileno())
+    return base_offset
+
+
+def _repair_torn_xml(xml_content: str) -> Optional[str]:
+    """
+    文件末尾缺少 </i>（追加写入中途崩溃或正在追加）时，截断到最后一条完整的 <d> 并补全根节点；
+    内容完整时原样返回，无法恢复时返回 None。
+    """
+    if xml_content.rstrip().endswith(('</i>', '<i />', '<i/>')):
+        return xml_content
+    last_d = xml_content.rfind('</d>')
+    if last_d != -1:
+        return xml_content[:last_d + len('</d>')] + '</i>'
+    datasize_end = xml_content.find('</datasize>')
+    if datasize_end != -1:
+        return xml_content[:datasize_end + len('</datasize>')] + '</i>'
+    return None
+
+
+def _load_danmaku_comments(path: Path) -> List[Dict[str, Any]]:
+    """读取并解析弹幕文件（同步，供 asyncio.to_thread 调用）；正在追加的文件按最后一条完整弹幕读取。"""
+    # 延迟导入避免循环依赖
+    from src.api.dandan.danmaku_parser import parse_dandan_xml_to_comments
+    xml_content = path.read_text(encoding='utf-8')
+    return parse_dandan_xml_to_comments(_repair_torn_xml(xml_content) or xml_content)
+
+
+def _read_stored_meta(path: Path) -> Tuple[int, bool]:
+    """
+    只读取文件头和文件尾：返回上次整体写入时记录的 datasize，以及文件末尾是否缺少 </i>
+    （追加写入中途崩溃留下的损坏文件，调用方应整体重写）。
+    """
+    with open(path, 'rb') as f:
+        head = f.read(2048)
+        f.seek(0, 2)
+        size = f.tell()
+        f.seek(max(0, size - 64))
+        tail = f.read()
+    match = _DATASIZE_RE.search(head.decode('utf-8', errors='replace'))
+    datasize = int(match.group(1)) if match else 0
+    torn = not tail.rstrip().endswith((b'</i>', b'<i />', b'<i/>'))
+    return datasize, torn
+
+
+def _read_stored_danmaku(path: Path) -> List[Dict[str, Any]]:
+    """
+    完整读取已存储的弹幕，用于整体重写（压缩或修复）。
+
+    文件末尾缺少 </i> 时截断到最后一条完整的 <d> 并补全根节点后再解析；
+    XML 无法解析时抛出 ElementTree.ParseError，调用方不应覆盖原文件。
+    """
+    # 延迟导入避免循环依赖
+    from src.api.dandan.danmaku_parser import parse_dandan_xml_to_comments
+    xml_content = path.read_text(encoding='utf-8')
+    repaired = _repair_torn_xml(xml_content)
+    if repaired is None:
+        return []
+    if repaired is not xml_content:
+        logger.warning(f"弹幕文件 {path} 末尾不完整，已按最后一条完整弹幕恢复")
+    xml_content = repaired
+    return parse_dandan_xml_to_comments(xml_content, strict=True)
+
+
+def _find_stored_keys(index: DanmakuIndex, keys: List[tuple]) -> set:
+    """
+    返回 keys 中已存在于弹幕文件的去重键（同步，供 asyncio.to_thread 调用）。
+
+    按时间在索引中二分，只读取与新弹幕时间相同的已存储元素，不解析整个文件。
+    """
+    positions = set()
+    for time_key, _ in keys:
+        # 去重键的时间保留两位小数，取略宽的区间再按完整去重键比较
+        lo, hi = index.time_range(time_key - 0.006, time_key + 0.006)
+        positions.update(range(lo, hi))
+    if not positions:
+        return set()
+    stored = {danmaku_dedup_key(c) for c in read_comments_at(index, positions)}
+    return stored.intersection(keys)
+
+
+async def merge_danmaku_for_episode(
+    session: AsyncSession,
+    episode_id: int,
+    comments: List[Dict[str, Any]],
+    config_manager = None,
+    fire_threshold: int = 1000
+) -> int:
+    """
+    将重新下载的弹幕与已存储的弹幕做增量合并，返回新增数量。
+
+    - 以 (时间, 规范化文本) 为键计算增量，上游删除的弹幕不会影响已存储的内容
+    - 去重借助按时间排序的弹幕索引，只读取与新弹幕同一时间的已存储元素，不解析整个文件
+    - 新增弹幕原地追加到文件末尾，写入量与新增量成正比，索引只补充追加的片段
+    - 追加段累积到一定规模时整体重写一次（压缩）；此时原文件无法解析则放弃合并，文件保持不变
+    - commentCount 更新为合并后的总数，fetchedAt 更新为当前时间
+    - 分集尚无弹幕文件时退化为 save_danmaku_for_episode 的首次写入
+    - 与 save_danmaku_for_episode 共用分集写锁，整体重写为原子替换
+    """
+    if not comments:
+        return 0
+    async with episode_write_lock(episode_id):
+        return await _merge_danmaku_locked(session, episode_id, comments, config_manager, fire_threshold)
+
+
+async def _merge_danmaku_locked(
+    session: AsyncSession,
+    episode_id: int,
+    comments: List[Dict[str, Any]],
+    config_manager,
+    fire_threshold: int
+) -> int:
+    """merge_danmaku_for_episode 的实际实现，调用方需已持有分集写锁。"""
+
+    episode_stmt = select(Episode).where(Episode.id == episode_id).options(selectinload(Episode.source))
+    episode = (await session.execute(episode_stmt)).scalar_one_or_none()
+    if not episode:
+        raise ValueError(f"找不到ID为 {episode_id} 的分集")
+
+    absolute_path = _get_fs_path_from_web_path(episode.danmakuFilePath) if episode.danmakuFilePath else None
+    if absolute_path is None or not await asyncio.to_thread(absolute_path.is_file):
+        if episode.danmakuFilePath:
+            logger.warning(f"分集 {episode_id} 的弹幕文件不存在或路径无法解析，将重新完整写入")
+            # 清空记录的数量，确保 save_danmaku_for_episode 不会因数量比较而跳过
+            episode.commentCount = 0
+            await session.flush()
+        return await _save_danmaku_locked(session, episode_id, comments, config_manager, fire_threshold)
+
+    index = await get_danmaku_index(absolute_path)
+    datasize, torn = await asyncio.to_thread(_read_stored_meta, absolute_path)
+
+    incoming: Dict[tuple, Dict[str, Any]] = {}
+    for comment in comments:
+        incoming.setdefault(danmaku_dedup_key(comment), comment)
+    stored_keys = await asyncio.to_thread(_find_stored_keys, index, list(incoming))
+    new_comments = [dict(comment) for key, comment in incoming.items() if key not in stored_keys]
+
+    from .episode import update_episode_danmaku_info
+    union_count = index.total + len(new_comments)
+
+    if not new_comments and not torn:
+        logger.info(f"分集 {episode_id} 没有新增弹幕 (已存储 {index.total} 条)")
+        await update_episode_danmaku_info(session, episode_id, episode.danmakuFilePath, union_count)
+        return 0
+
+    likes_fetch_enabled = True
+    if config_manager is not None:
+        try:
+            likes_fetch_enabled = (await config_manager.get('danmakuLikesFetchEnabled', 'true')).lower() == 'true'
+        except Exception:
+            pass
+    new_comments = handle_danmaku_likes(new_comments, fire_threshold, enabled=likes_fetch_enabled)
+
+    provider_name = episode.source.providerName
+    appended_total = union_count - datasize
+    needs_compaction = torn or appended_total > max(COMPACT_MIN_APPENDED, int(datasize * COMPACT_APPENDED_RATIO))
+
+    appended = False
+    if not needs_compaction:
+        fragment = _build_comment_elements(new_comments, provider_name)
+        base_offset = await asyncio.to_thread(_append_to_danmaku_file, absolute_path, fragment)
+        if base_offset is not None:
+            appended = True
+            await extend_danmaku_index(index, base_offset, fragment.encode('utf-8'))
+            logger.info(f"分集 {episode_id} 追加 {len(new_comments)} 条新弹幕 (合计 {union_count} 条)")
+
+    if not appended:
+        try:
+            stored_comments = await asyncio.to_thread(_read_stored_danmaku, absolute_path)
+        except ElementTree.ParseError as e:
+            logger.error(f"分集 {episode_id} 的弹幕文件 {absolute_path} 无法解析，放弃本次合并，文件保持不变: {e}")
+            return 0
+        merged = stored_comments + new_comments
+        merged.sort(key=lambda c: danmaku_dedup_key(c)[0])
+        union_count = len(merged)
+        await write_danmaku_xml(
+            absolute_path, merged, episode_id, provider_name,
+            _CHAT_SERVER_MAP.get(provider_name, "danmaku.misaka.org")
+        )
+        logger.info(f"分集 {episode_id} 弹幕文件已整体重写 (新增 {len(new_comments)} 条, 合计 {union_count} 条)")
+
+    await update_episode_danmaku_info(session, episode_id, episode.danmakuFilePath, union_count)
+    return len(new_comments)
+
 
 async def _generate_danmaku_path(session: AsyncSession, episode, config_manager=None) -> tuple[str, Path]:
     """
@@ -220,6 +569,74 @@ def _normalize_p_attr(p_attr: str, provider_name: Optional[str] = None) -> str:
     return ','.join(core_parts + optional_parts)
 
 
+def _escape_xml_text(text: str) -> str:
+    """与 ElementTree 一致的文本节点转义"""
+    if '&' in text:
+        text = text.replace('&', '&amp;')
+    if '<' in text:
+        text = text.replace('<', '&lt;')
+    if '>' in text:
+        text = text.replace('>', '&gt;')
+    return text
+
+
+def _escape_xml_attr(value: str) -> str:
+    """与 ElementTree 一致的属性值转义"""
+    value = _escape_xml_text(value)
+    if '"' in value:
+        value = value.replace('"', '&quot;')
+    if '\r' in value:
+        value = value.replace('\r', '&#13;')
+    if '\n' in value:
+        value = value.replace('\n', '&#10;')
+    if '\t' in value:
+        value = value.replace('\t', '&#09;')
+    return value
+
+
+def _xml_text_element(tag: str, text: Optional[str], p_attr: Optional[str] = None) -> str:
+    attr = f' p="{_escape_xml_attr(p_attr)}"' if p_attr is not None else ''
+    if text:
+        return f'<{tag}{attr}>{_escape_xml_text(text)}</{tag}>'
+    return f'<{tag}{attr} />'
+
+
+def _xml_header(episode_id: int, provider_name: Optional[str], chat_server: Optional[str], datasize: int) -> str:
+    """生成弹幕 XML 的文档头和元信息元素（到第一条 <d> 之前）。"""
+    return "<?xml version='1.0' encoding='utf-8'?>\n<i>" + ''.join((
+        _xml_text_element('chatserver', chat_server),
+        _xml_text_element('chatid', str(episode_id)),
+        _xml_text_element('mission', '0'),
+        _xml_text_element('maxlimit', '2000'),
+        _xml_text_element('source', 'k-v'),  # 保持与官方格式一致
+        # 新增字段
+        _xml_text_element('sourceprovider', provider_name),
+        _xml_text_element('datasize', str(datasize)),
+    ))
+
+
+def _iter_xml_from_comments(
+    comments: List[Dict[str, Any]],
+    episode_id: int,
+    provider_name: Optional[str] = "misaka",
+    chat_server: Optional[str] = "danmaku.misaka.org",
+    chunk_size: int = 1000
+):
+    """
+    以分块字符串的形式逐段生成弹幕 XML，输出与 _generate_xml_from_comments 完全一致。
+
+    供写文件时流式消费，避免先拼出一个巨大的字符串。
+    """
+    yield _xml_header(episode_id, provider_name, chat_server, len(comments))
+    for start in range(0, len(comments), chunk_size):
+        # 规范化 p 属性，确保是标准的 4 位格式，并补全来源标签
+        yield ''.join(
+            _xml_text_element('d', comment.get('m', ''), _normalize_p_attr(str(comment.get('p', '')), provider_name))
+            for comment in comments[start:start + chunk_size]
+        )
+    yield '</i>'
+
+
 def _generate_xml_from_comments(
     comments: List[Dict[str, Any]],
     episode_id: int,
@@ -227,22 +644,293 @@ def _generate_xml_from_comments(
     chat_server: Optional[str] = "danmaku.misaka.org"
 ) -> str:
     """根据弹幕字典列表生成符合dandanplay标准的XML字符串。"""
-    root = ET.Element('i')
-    ET.SubElement(root, 'chatserver').text = chat_server
-    ET.SubElement(root, 'chatid').text = str(episode_id)
-    ET.SubElement(root, 'mission').text = '0'
-    ET.SubElement(root, 'maxlimit').text = '2000'
-    ET.SubElement(root, 'source').text = 'k-v' # 保持与官方格式一致
-    # 新增字段
-    ET.SubElement(root, 'sourceprovider').text = provider_name
-    ET.SubElement(root, 'datasize').text = str(len(comments))
+    return ''.join(_iter_xml_from_comments(comments, episode_id, provider_name, chat_server))
 
-    for comment in comments:
-        # 规范化 p 属性，确保是标准的 4 位格式，并补全来源标签
-        p_attr = _normalize_p_attr(str(comment.get('p', '')), provider_name)
-        d = ET.SubElement(root, 'd', p=p_attr)
-        d.text = comment.get('m', '')
-    return ET.tostring(root, encoding='unicode', xml_declaration=True)
+
+def _write_file_atomic(path: Path, chunks) -> None:
+    """
+    将字符串分块写入同目录下的临时文件，fsync 后原子替换目标文件。
+
+    读取方要么看到旧文件，要么看到完整的新文件；进程崩溃也不会留下写了一半的弹幕文件。
+    该函数是同步的，应通过 asyncio.to_thread 调用。
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for chunk in chunks:
+                f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+async def write_danmaku_xml(
+    path: Path,
+    comments: List[Dict[str, Any]],
+    episode_id: int,
+    provider_name: Optional[str] = "misaka",
+    chat_server: Optional[str] = "danmaku.misaka.org"
+) -> None:
+    """在工作线程中流式生成并原子写入弹幕 XML 文件。"""
+    await asyncio.to_thread(
+        _write_file_atomic, path,
+        _iter_xml_from_comments(comments, episode_id, provider_name, chat_server)
+    )
+
+
+class _StreamingDanmakuWriter:
+    """
+    分批写入弹幕 XML。
+
+    <d> 元素先追加到同目录的临时正文文件；全部批次结束后才知道 datasize，
+    此时生成文档头并与正文拼接为最终文件，再原子替换目标文件。
+    所有方法都是同步的，应通过 asyncio.to_thread 调用。
+    """
+
+    def __init__(self, path: Path, episode_id: int, provider_name: Optional[str], chat_server: Optional[str]):
+        self.path = path
+        self.episode_id = episode_id
+        self.provider_name = provider_name
+        self.chat_server = chat_server
+        self.count = 0
+        self._body_path = path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}.body.tmp")
+        self._body = None
+
+    def write_batch(self, comments: List[Dict[str, Any]]) -> None:
+        if self._body is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._body = open(self._body_path, 'w', encoding='utf-8')
+        self._body.write(_build_comment_elements(comments, self.provider_name))
+        self.count += len(comments)
+
+    def commit(self) -> None:
+        self._body.close()
+
+        def chunks():
+            yield _xml_header(self.episode_id, self.provider_name, self.chat_server, self.count)
+            with open(self._body_path, 'r', encoding='utf-8') as body:
+                while True:
+                    block = body.read(1024 * 1024)
+                    if not block:
+                        break
+                    yield block
+            yield '</i>'
+
+        try:
+            _write_file_atomic(self.path, chunks())
+        finally:
+            self._body_path.unlink(missing_ok=True)
+
+    def discard(self) -> None:
+        if self._body is not None:
+            self._body.close()
+        self._body_path.unlink(missing_ok=True)
+
+
+# ---- 合并输出物化视图 ----
+# 同一 anime 同一集数的多源合并结果按 (anime_id, episode_index) 物化到 .merged 目录，
+# 旁边的 .json 清单记录成员文件签名（分集ID、路径、mtime、大小）和各源贡献数量。
+# 只有成员文件变化时才重建，其余请求只读一个文件，开销与读取单源相同。
+
+MERGED_DANMAKU_DIR = DANMAKU_BASE_DIR / ".merged"
+# 去重时的时间分桶（秒）：同一文本在同一时间桶内视为重复
+MERGE_TIME_BUCKET = 0.5
+
+_merged_manifests: Dict[Tuple[int, int], Dict[str, Any]] = {}
+_merge_locks: Dict[Tuple[int, int], asyncio.Lock] = {}
+
+
+def _merge_dedup_hash(comment: Dict[str, Any]) -> int:
+    """合并去重键：时间分桶 + 规范化文本的哈希值。"""
+    time_key, text = danmaku_dedup_key(comment)
+    return hash((int(time_key / MERGE_TIME_BUCKET), text))
+
+
+def _merged_paths(anime_id: int, episode_index: int) -> Tuple[Path, Path]:
+    base = MERGED_DANMAKU_DIR / str(anime_id)
+    return base / f"{episode_index}.xml", base / f"{episode_index}.json"
+
+
+def _member_signature(members: List[Tuple[int, str, str]]) -> List[list]:
+    """为合并成员生成签名 [[分集ID, 源, 路径, mtime_ns, 大小], ...]，文件缺失的成员被忽略。"""
+    signature = []
+    for episode_id, provider_name, web_path in members:
+        path = _get_fs_path_from_web_path(web_path)
+        try:
+            stat = path.stat() if path else None
+        except OSError:
+            stat = None
+        if stat is None:
+            continue
+        signature.append([episode_id, provider_name, str(path), stat.st_mtime_ns, stat.st_size])
+    return sorted(signature)
+
+
+def _build_merged_view(signature: List[list], xml_path: Path, manifest_path: Path) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """读取所有成员文件，按哈希键去重合并后写入物化文件及清单（同步，供 asyncio.to_thread 调用）。"""
+    merged: List[Dict[str, Any]] = []
+    seen = set()
+    contributions: Dict[str, int] = {}
+    for episode_id, provider_name, path, _, _ in signature:
+        try:
+            comments = _load_danmaku_comments(Path(path))
+        except Exception as e:
+            logger.error(f"合并输出: 读取弹幕文件失败: {path}。错误: {e}")
+            continue
+        added = 0
+        for comment in comments:
+            key = _merge_dedup_hash(comment)
+            if key not in seen:
+                seen.add(key)
+                merged.append(comment)
+                added += 1
+        contributions[provider_name] = contributions.get(provider_name, 0) + added
+
+    manifest = {"signature": signature, "count": len(merged), "sources": contributions}
+    chat_id = signature[0][0] if signature else 0
+    _write_file_atomic(xml_path, _iter_xml_from_comments(merged, chat_id, None, "danmaku.misaka.org"))
+    _write_file_atomic(manifest_path, iter([json.dumps(manifest, ensure_ascii=False)]))
+    return merged, manifest
+
+
+def _read_merged_manifest(manifest_path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads(manifest_path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+
+
+def _remove_merged_view(xml_path: Path, manifest_path: Path) -> None:
+    xml_path.unlink(missing_ok=True)
+    manifest_path.unlink(missing_ok=True)
+
+
+async def load_merged_view(anime_id: int, episode_index: int, members: List[Tuple[int, str, str]],
+                           rebuild: bool = True) -> Optional[List[Dict[str, Any]]]:
+    """
+    获取 (anime_id, episode_index) 的合并弹幕，成员文件未变化时直接读取物化文件。
+
+    Args:
+        members: [(分集ID, 源名称, 弹幕文件Web路径), ...]
+        rebuild: 物化文件不存在或已过期时是否重建；为 False 时返回 None
+    """
+    key = (anime_id, episode_index)
+    xml_path, manifest_path = _merged_paths(anime_id, episode_index)
+    if len(_merge_locks) >= 4096:
+        for stale_key in [k for k, v in _merge_locks.items() if not v.locked()]:
+            _merge_locks.pop(stale_key, None)
+    lock = _merge_locks.setdefault(key, asyncio.Lock())
+    async with lock:
+        signature = await asyncio.to_thread(_member_signature, members)
+        if len(signature) < 2:
+            # 不足两个源时没有可合并的内容，清理过期的物化文件
+            _merged_manifests.pop(key, None)
+            await asyncio.to_thread(_remove_merged_view, xml_path, manifest_path)
+            return []
+
+        manifest = _merged_manifests.get(key)
+        if manifest is None:
+            manifest = await asyncio.to_thread(_read_merged_manifest, manifest_path)
+        if manifest and manifest.get("signature") == signature and xml_path.exists():
+            _merged_manifests[key] = manifest
+            return await asyncio.to_thread(_load_danmaku_comments, xml_path)
+        if not rebuild:
+            return None
+
+        merged, manifest = await asyncio.to_thread(_build_merged_view, signature, xml_path, manifest_path)
+        if len(_merged_manifests) >= 4096:
+            _merged_manifests.clear()
+        _merged_manifests[key] = manifest
+        logger.info(
+            f"合并输出: 重建 anime={anime_id} 集数={episode_index} 的合并视图，"
+            f"成员 {len(signature)} 个，合并后 {manifest['count']} 条，各源贡献 {manifest['sources']}"
+        )
+        return merged
+
+
+def remove_merged_views(anime_id: int) -> None:
+    """删除作品的全部合并物化文件及清单缓存（作品或源被删除时调用，同步）。"""
+    for key in [k for k in _merged_manifests if k[0] == anime_id]:
+        _merged_manifests.pop(key, None)
+    merged_dir = MERGED_DANMAKU_DIR / str(anime_id)
+    if merged_dir.is_dir():
+        shutil.rmtree(merged_dir, ignore_errors=True)
+        logger.info(f"已删除作品 {anime_id} 的合并弹幕视图: {merged_dir}")
+
+
+def _sweep_merged_dir(live_keys: Set[Tuple[int, int]], busy_keys: Set[Tuple[int, int]]) -> int:
+    """删除不在 live_keys 中的合并物化文件，返回删除的视图数量（同步，供 asyncio.to_thread 调用）。"""
+    if not MERGED_DANMAKU_DIR.is_dir():
+        return 0
+    live_animes = {anime_id for anime_id, _ in live_keys}
+    removed = 0
+    for anime_dir in MERGED_DANMAKU_DIR.iterdir():
+        if not anime_dir.is_dir() or not anime_dir.name.isdigit():
+            continue
+        anime_id = int(anime_dir.name)
+        if anime_id not in live_animes and not any(k[0] == anime_id for k in busy_keys):
+            removed += len({p.stem for p in anime_dir.iterdir()})
+            shutil.rmtree(anime_dir, ignore_errors=True)
+            continue
+        for episode_index in {p.stem for p in anime_dir.iterdir() if p.stem.lstrip('-').isdigit()}:
+            key = (anime_id, int(episode_index))
+            if key in live_keys or key in busy_keys:
+                continue
+            _remove_merged_view(*_merged_paths(*key))
+            removed += 1
+    return removed
+
+
+async def sweep_orphan_merged_views(session: AsyncSession) -> int:
+    """
+    清理孤立的合并物化视图：成员源已不足两个（源、分集或作品以任何方式被删除）的视图文件。
+
+    Returns:
+        删除的视图数量
+    """
+    live_keys = set((await session.execute(
+        select(AnimeSource.animeId, Episode.episodeIndex)
+        .join(AnimeSource, Episode.sourceId == AnimeSource.id)
+        .where(Episode.danmakuFilePath.isnot(None))
+        .group_by(AnimeSource.animeId, Episode.episodeIndex)
+        .having(func.count(Episode.id) >= 2)
+    )).tuples().all())
+    # 正在重建的视图由 load_merged_view 自行维护，不与其竞争
+    busy_keys = {k for k, lock in _merge_locks.items() if lock.locked()}
+    for key in [k for k in _merged_manifests if k not in live_keys]:
+        _merged_manifests.pop(key, None)
+    removed = await asyncio.to_thread(_sweep_merged_dir, live_keys, busy_keys)
+    if removed:
+        logger.info(f"已清理 {removed} 个孤立的合并弹幕视图")
+    return removed
+
+
+# 同一分集的写入（导入、刷新、编辑）在进程内串行执行
+_episode_write_locks: Dict[int, asyncio.Lock] = {}
+_episode_write_users: Dict[int, int] = {}
+
+
+@asynccontextmanager
+async def episode_write_lock(episode_id: int):
+    """获取分集级写锁，无人使用时自动回收。"""
+    lock = _episode_write_locks.get(episode_id)
+    if lock is None:
+        lock = _episode_write_locks[episode_id] = asyncio.Lock()
+    _episode_write_users[episode_id] = _episode_write_users.get(episode_id, 0) + 1
+    try:
+        async with lock:
+            yield
+    finally:
+        remaining = _episode_write_users[episode_id] - 1
+        if remaining:
+            _episode_write_users[episode_id] = remaining
+        else:
+            _episode_write_users.pop(episode_id, None)
+            _episode_write_locks.pop(episode_id, None)
 
 
 def _get_fs_path_from_web_path(web_path: Optional[str]) -> Optional[Path]:
@@ -4,18 +4,24 @@
 - 时间偏移调整
 - 分集拆分
 - 分集合并
+
+读取走按时间排序的弹幕索引（danmaku_index），翻页只读取当前页；
+偏移、拆分、合并按窗口流式读取并通过 _StreamingDanmakuWriter 写出，不在内存中保留整集弹幕。
 """
 
+import asyncio
+import heapq
+from bisect import bisect_left
 import logging
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Iterable, Callable
 from pathlib import Path
-from collections import defaultdict
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
 
 from ..orm_models import Episode, AnimeSource
-from .danmaku import _get_fs_path_from_web_path, _generate_xml_from_comments
+from .danmaku import _get_fs_path_from_web_path, _StreamingDanmakuWriter, episode_write_lock
+from .danmaku_index import get_danmaku_index, iter_comments, read_page, source_of
 from .episode import update_episode_danmaku_info
 
 logger = logging.getLogger(__name__)
@@ -25,8 +31,6 @@ async def get_danmaku_detail(session: AsyncSession, episode_id: int) -> Optional
     """
     获取指定分集的弹幕详情，包括统计信息、时间分布和弹幕预览
     """
-    from src.api.dandan.danmaku_parser import parse_dandan_xml_to_comments
-    
     # 获取分集信息
     stmt = select(Episode).where(Episode.id == episode_id).options(
         selectinload(Episode.source)
@@ -37,19 +41,19 @@ async def get_danmaku_detail(session: AsyncSession, episode_id: int) -> Optional
     if not episode or not episode.danmakuFilePath:
         return None
     
-    # 读取弹幕文件
+    # 读取弹幕索引
     absolute_path = _get_fs_path_from_web_path(episode.danmakuFilePath)
     if not absolute_path or not absolute_path.exists():
         return None
-    
+
     try:
-        xml_content = absolute_path.read_text(encoding='utf-8')
-        comments = parse_dandan_xml_to_comments(xml_content)
+        # 弹幕预览（前100条，按时间排序）
+        index, preview = await read_page(absolute_path, lambda idx: (0, min(100, idx.total)))
     except Exception as e:
         logger.error(f"读取弹幕文件失败: {e}")
         return None
-    
-    if not comments:
+
+    if not index.total:
         return {
             "episodeId": episode_id,
             "totalCount": 0,
@@ -58,58 +62,74 @@ async def get_danmaku_detail(session: AsyncSession, episode_id: int) -> Optional
             "distribution": [],
             "comments": []
         }
-    
-    # 统计来源分布
-    source_counts = defaultdict(int)
-    for comment in comments:
-        p_attr = comment.get('p', '')
-        # 提取来源标签 [xxx]
-        if '[' in p_attr and ']' in p_attr:
-            source_tag = p_attr[p_attr.rfind('[') + 1:p_attr.rfind(']')]
-            source_counts[source_tag] += 1
-        else:
-            source_counts['unknown'] += 1
-    
-    sources = [{"name": name, "count": count} for name, count in source_counts.items()]
-    
-    # 计算时间范围
-    times = [comment.get('t', 0) for comment in comments]
-    time_start = min(times) if times else 0
-    time_end = max(times) if times else 0
-    
-    # 计算每分钟弹幕分布
-    distribution = defaultdict(int)
-    for comment in comments:
-        minute = int(comment.get('t', 0) // 60)
-        distribution[minute] += 1
-    
+
+    # 来源分布、时间范围和每分钟分布在建立索引时已统计
+    sources = [{"name": name, "count": count} for name, count in index.sources.items()]
+    time_start = index.times[0]
+    time_end = index.times[-1]
     max_minute = int(time_end // 60) + 1
-    distribution_list = [{"minute": m, "count": distribution.get(m, 0)} for m in range(max_minute)]
-    
-    # 弹幕预览（前100条，按时间排序）
-    sorted_comments = sorted(comments, key=lambda x: x.get('t', 0))
-    preview_comments = []
-    for comment in sorted_comments[:100]:
-        p_attr = comment.get('p', '')
-        source = 'unknown'
-        if '[' in p_attr and ']' in p_attr:
-            source = p_attr[p_attr.rfind('[') + 1:p_attr.rfind(']')]
-        preview_comments.append({
-            "time": comment.get('t', 0),
-            "content": comment.get('m', ''),
-            "source": source
-        })
-    
+    distribution_list = [{"minute": m, "count": index.distribution.get(m, 0)} for m in range(max_minute)]
+
     return {
         "episodeId": episode_id,
-        "totalCount": len(comments),
+        "totalCount": index.total,
         "timeRange": {"start": time_start, "end": time_end},
         "sources": sources,
         "distribution": distribution_list,
-        "comments": preview_comments
+        "comments": [_format_comment(c) for c in preview]
     }
 
 
+def _format_comment(comment: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "time": comment.get('t', 0),
+        "content": comment.get('m', ''),
+        "source": source_of(comment.get('p', ''))
+    }
+
+
+
+
+def _shift_comment(comment: Dict[str, Any], offset_seconds: float, clamp: bool = False) -> Dict[str, Any]:
+    """平移单条弹幕的时间（同时更新 p 属性和 t）"""
+    p_parts = comment.get('p', '').split(',')
+    if p_parts:
+        try:
+            new_time = float(p_parts[0]) + offset_seconds
+            if clamp:
+                new_time = max(0, new_time)  # 确保时间不为负
+            p_parts[0] = f"{new_time:.3f}"
+            comment['p'] = ','.join(p_parts)
+            comment['t'] = new_time
+        except ValueError:
+            pass
+    return comment
+
+
+def _write_stream(writer: _StreamingDanmakuWriter, comments: Iterable[Dict[str, Any]],
+                  transform: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+                  batch_size: int = 1000) -> int:
+    """
+    把弹幕流分批写入 writer 并提交，返回写入条数（同步，供 asyncio.to_thread 调用）
+
+    任一批次失败时丢弃已写入的临时文件，目标文件保持不变。
+    """
+    try:
+        batch = []
+        for comment in comments:
+            batch.append(transform(comment) if transform else comment)
+            if len(batch) >= batch_size:
+                writer.write_batch(batch)
+                batch = []
+        if batch or writer.count == 0:
+            writer.write_batch(batch)
+        writer.commit()
+    except BaseException:
+        writer.discard()
+        raise
+    return writer.count
+
+
 async def get_danmaku_comments_page(
     session: AsyncSession, 
     episode_id: int, 
@@ -120,9 +140,9 @@ async def get_danmaku_comments_page(
 ) -> Dict[str, Any]:
     """
     分页获取弹幕列表，支持时间范围筛选
+
+    通过索引二分定位时间范围，只读取当前页的弹幕。
     """
-    from src.api.dandan.danmaku_parser import parse_dandan_xml_to_comments
-    
     # 获取分集信息
     stmt = select(Episode).where(Episode.id == episode_id)
     result = await session.execute(stmt)
@@ -131,53 +151,26 @@ async def get_danmaku_comments_page(
     if not episode or not episode.danmakuFilePath:
         return {"total": 0, "comments": [], "page": page, "pageSize": page_size}
     
-    # 读取弹幕文件
+    # 读取弹幕索引
     absolute_path = _get_fs_path_from_web_path(episode.danmakuFilePath)
     if not absolute_path or not absolute_path.exists():
         return {"total": 0, "comments": [], "page": page, "pageSize": page_size}
     
     try:
-        xml_content = absolute_path.read_text(encoding='utf-8')
-        comments = parse_dandan_xml_to_comments(xml_content)
+        # 时间范围筛选 + 分页
+        def select_page(idx):
+            lo, hi = idx.time_range(start_time, end_time)
+            start_idx = min(hi, lo + (page - 1) * page_size)
+            return start_idx, min(hi, start_idx + page_size)
+
+        index, page_comments = await read_page(absolute_path, select_page)
+        lo, hi = index.time_range(start_time, end_time)
     except Exception as e:
         logger.error(f"读取弹幕文件失败: {e}")
         return {"total": 0, "comments": [], "page": page, "pageSize": page_size}
-    
-    # 时间范围筛选
-    if start_time is not None or end_time is not None:
-        filtered = []
-        for c in comments:
-            t = c.get('t', 0)
-            if start_time is not None and t < start_time:
-                continue
-            if end_time is not None and t > end_time:
-                continue
-            filtered.append(c)
-        comments = filtered
-    
-    # 按时间排序
-    comments = sorted(comments, key=lambda x: x.get('t', 0))
-    total = len(comments)
-    
-    # 分页
-    start_idx = (page - 1) * page_size
-    end_idx = start_idx + page_size
-    page_comments = comments[start_idx:end_idx]
-    
-    # 格式化输出
-    result_comments = []
-    for comment in page_comments:
-        p_attr = comment.get('p', '')
-        source = 'unknown'
-        if '[' in p_attr and ']' in p_attr:
-            source = p_attr[p_attr.rfind('[') + 1:p_attr.rfind(']')]
-        result_comments.append({
-            "time": comment.get('t', 0),
-            "content": comment.get('m', ''),
-            "source": source
-        })
-    
-    return {"total": total, "comments": result_comments, "page": page, "pageSize": page_size}
+
+    result_comments = [_format_comment(c) for c in page_comments]
+    return {"total": hi - lo, "comments": result_comments, "page": page, "pageSize": page_size}
 
 
 async def apply_time_offset(
@@ -188,7 +181,6 @@ async def apply_time_offset(
     """
     对指定分集的弹幕应用时间偏移
     """
-    from src.api.dandan.danmaku_parser import parse_dandan_xml_to_comments
 
     modified_count = 0
     total_comments = 0
@@ -208,41 +200,29 @@ async def apply_time_offset(
         if not absolute_path or not absolute_path.exists():
             continue
 
-        try:
-            xml_content = absolute_path.read_text(encoding='utf-8')
-            comments = parse_dandan_xml_to_comments(xml_content)
-        except Exception as e:
-            logger.error(f"读取弹幕文件失败 episode_id={episode_id}: {e}")
-            continue
+        async with episode_write_lock(episode_id):
+            try:
+                index = await get_danmaku_index(absolute_path)
+            except Exception as e:
+                logger.error(f"读取弹幕文件失败 episode_id={episode_id}: {e}")
+                continue
 
-        if not comments:
-            continue
+            if not index.total:
+                continue
 
-        # 应用时间偏移
-        for comment in comments:
-            p_attr = comment.get('p', '')
-            p_parts = p_attr.split(',')
-            if p_parts:
-                try:
-                    old_time = float(p_parts[0])
-                    new_time = max(0, old_time + offset_seconds)  # 确保时间不为负
-                    p_parts[0] = f"{new_time:.3f}"
-                    comment['p'] = ','.join(p_parts)
-                    comment['t'] = new_time
-                except ValueError:
-                    pass
-
-        # 生成新的XML并写入
-        provider_name = episode.source.providerName if episode.source else "misaka"
-        xml_content = _generate_xml_from_comments(comments, episode_id, provider_name)
-
-        try:
-            absolute_path.write_text(xml_content, encoding='utf-8')
-            modified_count += 1
-            total_comments += len(comments)
-            logger.info(f"分集 {episode_id} 弹幕时间偏移 {offset_seconds}s 完成，共 {len(comments)} 条")
-        except Exception as e:
-            logger.error(f"写入弹幕文件失败 episode_id={episode_id}: {e}")
+            # 按时间顺序流式读取、偏移并原子写回
+            provider_name = episode.source.providerName if episode.source else "misaka"
+            writer = _StreamingDanmakuWriter(absolute_path, episode_id, provider_name, "danmaku.misaka.org")
+            try:
+                written = await asyncio.to_thread(
+                    _write_stream, writer, iter_comments(index),
+                    lambda c: _shift_comment(c, offset_seconds, clamp=True)
+                )
+                modified_count += 1
+                total_comments += written
+                logger.info(f"分集 {episode_id} 弹幕时间偏移 {offset_seconds}s 完成，共 {written} 条")
+            except Exception as e:
+                logger.error(f"写入弹幕文件失败 episode_id={episode_id}: {e}")
 
     return {"success": True, "modifiedCount": modified_count, "totalComments": total_comments}
 
@@ -263,7 +243,6 @@ async def split_episode_danmaku(
         {"episodeIndex": 2, "startTime": 750, "endTime": 1500, "title": "第二部分"}
     ]
     """
-    from src.api.dandan.danmaku_parser import parse_dandan_xml_to_comments
     from .danmaku import _generate_danmaku_path
 
     # 获取源分集信息
@@ -281,12 +260,11 @@ async def split_episode_danmaku(
         return {"success": False, "error": "弹幕文件不存在"}
 
     try:
-        xml_content = absolute_path.read_text(encoding='utf-8')
-        comments = parse_dandan_xml_to_comments(xml_content)
+        index = await get_danmaku_index(absolute_path)
     except Exception as e:
         return {"success": False, "error": f"读取弹幕文件失败: {e}"}
 
-    if not comments:
+    if not index.total:
         return {"success": False, "error": "弹幕文件为空"}
 
     source_id = source_episode.sourceId
@@ -315,23 +293,10 @@ async def split_episode_danmaku(
         end_time = split_config["endTime"]
         title = split_config.get("title", f"第{episode_index}集")
 
-        # 筛选时间范围内的弹幕
-        split_comments = []
-        for c in comments:
-            t = c.get('t', 0)
-            if start_time <= t < end_time:
-                new_comment = c.copy()
-                if reset_time:
-                    # 重置时间，从0开始
-                    new_time = t - start_time
-                    p_parts = new_comment.get('p', '').split(',')
-                    if p_parts:
-                        p_parts[0] = f"{new_time:.3f}"
-                        new_comment['p'] = ','.join(p_parts)
-                        new_comment['t'] = new_time
-                split_comments.append(new_comment)
-
-        if not split_comments:
+        # 通过索引定位时间范围 [start_time, end_time) 内的弹幕
+        lo = bisect_left(index.times, start_time)
+        hi = max(lo, bisect_left(index.times, end_time))
+        if hi == lo:
             continue
 
         # 创建新分集
@@ -339,7 +304,7 @@ async def split_episode_danmaku(
             sourceId=source_id,
             episodeIndex=episode_index,
             title=title,
-            commentCount=len(split_comments)
+            commentCount=hi - lo
         )
         session.add(new_episode)
         await session.flush()
@@ -347,21 +312,21 @@ async def split_episode_danmaku(
         # 生成弹幕文件路径
         web_path, file_path = await _generate_danmaku_path(session, new_episode, config_manager)
 
-        # 生成并写入XML
-        xml_content = _generate_xml_from_comments(split_comments, new_episode.id, provider_name)
-        file_path.parent.mkdir(parents=True, exist_ok=True)
-        file_path.write_text(xml_content, encoding='utf-8')
+        # 流式读取该时间段并写入XML（重置时间时从0开始）
+        writer = _StreamingDanmakuWriter(file_path, new_episode.id, provider_name, "danmaku.misaka.org")
+        transform = (lambda c, offset=-start_time: _shift_comment(c, offset)) if reset_time else None
+        written = await asyncio.to_thread(_write_stream, writer, iter_comments(index, lo, hi), transform)
 
         # 更新分集信息
-        await update_episode_danmaku_info(session, new_episode.id, web_path, len(split_comments))
+        await update_episode_danmaku_info(session, new_episode.id, web_path, written)
 
         new_episodes.append({
             "episodeId": new_episode.id,
             "episodeIndex": episode_index,
-            "commentCount": len(split_comments)
+            "commentCount": written
         })
 
-        logger.info(f"拆分创建新分集: episode_id={new_episode.id}, index={episode_index}, comments={len(split_comments)}")
+        logger.info(f"拆分创建新分集: episode_id={new_episode.id}, index={episode_index}, comments={written}")
 
     # 删除源分集
     if delete_source and new_episodes:
@@ -377,6 +342,32 @@ async def split_episode_danmaku(
     return {"success": True, "newEpisodes": new_episodes}
 
 
+def _iter_merged_comments(sources: List[tuple], deduplicate: bool):
+    """
+    按时间归并多个分集的弹幕流（各自已按时间排序并应用偏移）
+
+    去重键为 "时间(0.1秒)_内容"，同一键的弹幕在有序流中必然相邻，
+    因此只需保留当前 0.1 秒内已出现的内容。
+    """
+    streams = [
+        (_shift_comment(c, offset) for c in iter_comments(index))
+        for index, offset in sources
+    ]
+    merged = heapq.merge(*streams, key=lambda c: c.get('t', 0))
+    if not deduplicate:
+        yield from merged
+        return
+    bucket, seen = None, set()
+    for c in merged:
+        label = f"{c.get('t', 0):.1f}"
+        if label != bucket:
+            bucket, seen = label, set()
+        if c.get('m', '') in seen:
+            continue
+        seen.add(c.get('m', ''))
+        yield c
+
+
 async def merge_episodes_danmaku(
     session: AsyncSession,
     source_episodes: List[Dict[str, Any]],
@@ -395,7 +386,6 @@ async def merge_episodes_danmaku(
         {"episodeId": 3, "offsetSeconds": 3000}
     ]
     """
-    from src.api.dandan.danmaku_parser import parse_dandan_xml_to_comments
     from .danmaku import _generate_danmaku_path
 
     if not source_episodes:
@@ -415,8 +405,8 @@ async def merge_episodes_danmaku(
     source_id = first_episode.sourceId
     provider_name = first_episode.source.providerName if first_episode.source else "misaka"
 
-    # 收集所有弹幕
-    all_comments = []
+    # 收集所有源分集的索引（弹幕内容在写入时才流式读取）
+    indexed_sources: List[tuple] = []
     episodes_to_delete = []
 
     for source_config in source_episodes:
@@ -435,48 +425,19 @@ async def merge_episodes_danmaku(
             continue
 
         try:
-            xml_content = absolute_path.read_text(encoding='utf-8')
-            comments = parse_dandan_xml_to_comments(xml_content)
+            index = await get_danmaku_index(absolute_path)
         except Exception as e:
             logger.error(f"读取弹幕文件失败 episode_id={episode_id}: {e}")
             continue
 
-        # 应用时间偏移
-        for comment in comments:
-            new_comment = comment.copy()
-            p_parts = new_comment.get('p', '').split(',')
-            if p_parts:
-                try:
-                    old_time = float(p_parts[0])
-                    new_time = old_time + offset_seconds
-                    p_parts[0] = f"{new_time:.3f}"
-                    new_comment['p'] = ','.join(p_parts)
-                    new_comment['t'] = new_time
-                except ValueError:
-                    pass
-            all_comments.append(new_comment)
-
+        if index.total:
+            indexed_sources.append((index, offset_seconds))
         episodes_to_delete.append((episode, absolute_path))
-        logger.info(f"收集分集 {episode_id} 弹幕 {len(comments)} 条，偏移 {offset_seconds}s")
+        logger.info(f"收集分集 {episode_id} 弹幕 {index.total} 条，偏移 {offset_seconds}s")
 
-    if not all_comments:
+    if not indexed_sources:
         return {"success": False, "error": "没有收集到任何弹幕"}
 
-    # 去重
-    if deduplicate:
-        seen = set()
-        unique_comments = []
-        for c in all_comments:
-            key = f"{c.get('t', 0):.1f}_{c.get('m', '')}"
-            if key not in seen:
-                seen.add(key)
-                unique_comments.append(c)
-        all_comments = unique_comments
-        logger.info(f"去重后弹幕数: {len(all_comments)}")
-
-    # 按时间排序
-    all_comments.sort(key=lambda x: x.get('t', 0))
-
     # 检查目标集数是否与某个源分集的集数相同（可以复用）
     reuse_episode = None
     if delete_sources:
@@ -489,7 +450,6 @@ async def merge_episodes_danmaku(
         # 复用已有分集，更新其信息
         new_episode = reuse_episode
         new_episode.title = target_title
-        new_episode.commentCount = len(all_comments)
 
         # 从删除列表中移除（因为要复用）
         episodes_to_delete = [(e, p) for e, p in episodes_to_delete if e.id != reuse_episode.id]
@@ -514,7 +474,7 @@ async def merge_episodes_danmaku(
             sourceId=source_id,
             episodeIndex=target_episode_index,
             title=target_title,
-            commentCount=len(all_comments)
+            commentCount=0
         )
         session.add(new_episode)
         await session.flush()
@@ -524,13 +484,17 @@ async def merge_episodes_danmaku(
     # 生成弹幕文件路径
     web_path, file_path = await _generate_danmaku_path(session, new_episode, config_manager)
 
-    # 生成并写入XML
-    xml_content = _generate_xml_from_comments(all_comments, new_episode.id, provider_name)
-    file_path.parent.mkdir(parents=True, exist_ok=True)
-    file_path.write_text(xml_content, encoding='utf-8')
+    # 按时间归并各源分集并流式写入XML（写入完成前源文件保持不变）
+    writer = _StreamingDanmakuWriter(file_path, new_episode.id, provider_name, "danmaku.misaka.org")
+    comment_count = await asyncio.to_thread(
+        _write_stream, writer, _iter_merged_comments(indexed_sources, deduplicate)
+    )
+    if deduplicate:
+        logger.info(f"去重后弹幕数: {comment_count}")
 
     # 更新分集信息
-    await update_episode_danmaku_info(session, new_episode.id, web_path, len(all_comments))
+    new_episode.commentCount = comment_count
+    await update_episode_danmaku_info(session, new_episode.id, web_path, comment_count)
 
     # 删除源分集
     if delete_sources:
@@ -545,5 +509,5 @@ async def merge_episodes_danmaku(
     return {
         "success": True,
         "newEpisodeId": new_episode.id,
-        "commentCount": len(all_comments)
-    }
\ No newline at end of file
+        "commentCount": comment_count
+    }
@@ -0,0 +1,285 @@
+"""
+弹幕文件的按时间排序索引
+
+弹幕编辑器翻页时不再整体解析 XML：首次访问时扫描一遍文件，记录每条 <d> 元素的
+时间和字节位置（按时间排序），同时统计总数、来源分布和每分钟分布。之后:
+- 翻页 = 二分查找时间范围 + 切片 + 按字节位置读取这一页的元素
+- 时间偏移、拆分、合并按索引顺序分块读取元素，内存中只保留一个窗口
+- 增量刷新按时间二分只读取与新弹幕同一时间的已存储元素来去重，追加后只扫描追加的片段
+
+索引按 (路径, inode, mtime, 大小) 缓存在进程内，文件被重写后自动失效。
+读取元素时不持有分集写锁，而是在读取前后核对文件的 inode、mtime 和大小：
+文件在读取期间被替换或追加时抛出 StaleIndexError，read_page 据此重建索引后重试。
+"""
+
+import asyncio
+import html
+import logging
+import mmap
+import os
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from xml.etree import ElementTree
+
+from src.utils.common import clean_xml_string
+
+logger = logging.getLogger(__name__)
+
+# 进程内最多缓存的索引数
+INDEX_CACHE_SIZE = 32
+# 流式读取时每个窗口的弹幕条数
+STREAM_WINDOW = 1000
+# 文件在读取期间变化时重建索引重试的次数
+READ_RETRIES = 3
+
+# 匹配单条 <d> 元素（自闭合或带文本），属性顺序不限；p 属性由 _P_ATTR_RE 从属性串中提取
+_D_ELEMENT_RE = re.compile(rb'<d(?=[\s/>])([^>]*?)(?:/>|>(.*?)</d>)', re.DOTALL)
+# 属性串中的 p 属性，兼容单双引号和等号两侧的空白
+_P_ATTR_RE = re.compile(rb'(?<![\w:.-])p\s*=\s*(["\'])(.*?)\1', re.DOTALL)
+# 缺少 p 属性时的默认值，与 parse_dandan_xml_to_comments 一致
+_DEFAULT_P_ATTR = '0,1,25,16777215'
+
+
+class StaleIndexError(RuntimeError):
+    """索引对应的文件已被替换或追加，索引中的字节位置不再可信"""
+
+
+@dataclass
+class DanmakuIndex:
+    """单个弹幕文件的索引"""
+    path: Path
+    mtime_ns: int
+    size: int
+    ino: int = 0
+    # 以下三个数组按时间升序对齐
+    times: array = field(default_factory=lambda: array('d'))
+    offsets: array = field(default_factory=lambda: array('q'))
+    lengths: array = field(default_factory=lambda: array('l'))
+    sources: Dict[str, int] = field(default_factory=dict)
+    distribution: Dict[int, int] = field(default_factory=dict)
+
+    @property
+    def total(self) -> int:
+        return len(self.times)
+
+    def time_range(self, start_time: Optional[float] = None, end_time: Optional[float] = None) -> Tuple[int, int]:
+        """返回时间范围 [start_time, end_time] 在排序数组中的下标区间 [lo, hi)"""
+        lo = bisect_left(self.times, start_time) if start_time is not None else 0
+        hi = bisect_right(self.times, end_time) if end_time is not None else len(self.times)
+        return lo, max(lo, hi)
+
+
+def source_of(p_attr: str) -> str:
+    """提取 p 属性末尾的来源标签 [xxx]"""
+    if '[' in p_attr and ']' in p_attr:
+        return p_attr[p_attr.rfind('[') + 1:p_attr.rfind(']')]
+    return 'unknown'
+
+
+def _time_of(p_attr: str) -> float:
+    try:
+        return float(p_attr.split(',', 1)[0])
+    except ValueError:
+        return 0.0
+
+
+def _p_attr_of(attrs: bytes) -> str:
+    """从 <d> 的属性串中提取 p 属性（已反转义并清理非法字符）"""
+    match = _P_ATTR_RE.search(attrs)
+    if not match:
+        return _DEFAULT_P_ATTR
+    return clean_xml_string(html.unescape(match.group(2).decode('utf-8', errors='replace')))
+
+
+def _parse_element(raw: bytes) -> Optional[Dict[str, Any]]:
+    """把一条 <d> 元素解析为与 parse_dandan_xml_to_comments 相同结构的字典"""
+    from src.api.dandan.danmaku_parser import _normalize_p_attr_to_internal_format
+    match = _D_ELEMENT_RE.match(raw)
+    if not match:
+        return None
+    p_attr = _p_attr_of(match.group(1))
+    body = match.group(2)
+    if body and b'<' in body:
+        # CDATA 等正则无法还原的内容交给 XML 解析器
+        try:
+            element = ElementTree.fromstring(clean_xml_string(raw.decode('utf-8', errors='replace')))
+        except ElementTree.ParseError as e:
+            logger.warning(f"跳过无法解析的弹幕元素: {raw[:200]!r}。错误: {e}")
+            return None
+        text = element.text or ''
+    else:
+        text = clean_xml_string(html.unescape(body.decode('utf-8', errors='replace'))) if body else ''
+    parts = p_attr.split(',')
+    comment_id = 0
+    if len(parts) > 7:
+        try:
+            comment_id = int(parts[7])
+        except ValueError:
+            pass
+    return {
+        'p': _normalize_p_attr_to_internal_format(p_attr, "[xml]"),
+        'm': text,
+        't': _time_of(p_attr),
+        'cid': comment_id,
+    }
+
+
+def _build_index(path: Path) -> DanmakuIndex:
+    """扫描文件建立索引（同步，供 asyncio.to_thread 调用）"""
+    times, offsets, lengths = array('d'), array('q'), array('l')
+    sources: Dict[str, int] = defaultdict(int)
+    distribution: Dict[int, int] = defaultdict(int)
+    with open(path, 'rb') as f:
+        # 以打开的文件为准记录 inode 等信息，避免与扫描的内容不一致
+        stat = os.fstat(f.fileno())
+        index = DanmakuIndex(path=path, mtime_ns=stat.st_mtime_ns, size=stat.st_size, ino=stat.st_ino)
+        if stat.st_size == 0:
+            return index
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    with mm:
+        for match in _D_ELEMENT_RE.finditer(mm):
+            p_attr = _p_attr_of(match.group(1))
+            t = _time_of(p_attr)
+            times.append(t)
+            offsets.append(match.start())
+            lengths.append(match.end() - match.start())
+            sources[source_of(p_attr)] += 1
+            distribution[int(t // 60)] += 1
+
+    index.times, index.offsets, index.lengths = _sort_by_time(times, offsets, lengths)
+    index.sources = dict(sources)
+    index.distribution = dict(distribution)
+    return index
+
+
+def _sort_by_time(times: array, offsets: array, lengths: array) -> Tuple[array, array, array]:
+    if any(times[i] > times[i + 1] for i in range(len(times) - 1)):
+        order = sorted(range(len(times)), key=times.__getitem__)
+        times = array('d', (times[i] for i in order))
+        offsets = array('q', (offsets[i] for i in order))
+        lengths = array('l', (lengths[i] for i in order))
+    return times, offsets, lengths
+
+
+def _extend_index(index: DanmakuIndex, base_offset: int, fragment: bytes) -> DanmakuIndex:
+    """在旧索引基础上补充从 base_offset 处追加的 fragment 中的元素（同步，供 asyncio.to_thread 调用）"""
+    stat = index.path.stat()
+    times, offsets, lengths = array('d', index.times), array('q', index.offsets), array('l', index.lengths)
+    sources = defaultdict(int, index.sources)
+    distribution = defaultdict(int, index.distribution)
+    for match in _D_ELEMENT_RE.finditer(fragment):
+        p_attr = _p_attr_of(match.group(1))
+        t = _time_of(p_attr)
+        times.append(t)
+        offsets.append(base_offset + match.start())
+        lengths.append(match.end() - match.start())
+        sources[source_of(p_attr)] += 1
+        distribution[int(t // 60)] += 1
+    extended = DanmakuIndex(path=index.path, mtime_ns=stat.st_mtime_ns, size=stat.st_size, ino=stat.st_ino)
+    extended.times, extended.offsets, extended.lengths = _sort_by_time(times, offsets, lengths)
+    extended.sources = dict(sources)
+    extended.distribution = dict(distribution)
+    return extended
+
+
+_index_cache: "OrderedDict[str, DanmakuIndex]" = OrderedDict()
+
+
+def _cache_index(index: DanmakuIndex) -> None:
+    key = str(index.path)
+    _index_cache[key] = index
+    _index_cache.move_to_end(key)
+    while len(_index_cache) > INDEX_CACHE_SIZE:
+        _index_cache.popitem(last=False)
+
+
+async def get_danmaku_index(path: Path) -> DanmakuIndex:
+    """获取弹幕文件的索引，文件未变化时直接使用缓存"""
+    key = str(path)
+    stat = await asyncio.to_thread(path.stat)
+    cached = _index_cache.get(key)
+    if cached is not None and _matches(cached, stat):
+        _index_cache.move_to_end(key)
+        return cached
+    index = await asyncio.to_thread(_build_index, path)
+    _cache_index(index)
+    return index
+
+
+async def extend_danmaku_index(index: DanmakuIndex, base_offset: int, fragment: bytes) -> DanmakuIndex:
+    """
+    文件在 base_offset 处追加了 fragment（调用方持有分集写锁）后更新缓存的索引，
+    只扫描追加的片段，下一次访问不必重新扫描整个文件
+    """
+    extended = await asyncio.to_thread(_extend_index, index, base_offset, fragment)
+    _cache_index(extended)
+    return extended
+
+
+def _matches(index: DanmakuIndex, stat) -> bool:
+    return index.ino == stat.st_ino and index.mtime_ns == stat.st_mtime_ns and index.size == stat.st_size
+
+
+def _read_elements(index: DanmakuIndex, positions, buffering: int = -1) -> List[Dict[str, Any]]:
+    """
+    按给定顺序读取索引中若干位置的元素；打开后和读完后分别核对文件与索引是否一致，
+    不一致时抛出 StaleIndexError
+    """
+    comments = []
+    with open(index.path, 'rb', buffering=buffering) as f:
+        if not _matches(index, os.fstat(f.fileno())):
+            raise StaleIndexError(f"弹幕文件已变化: {index.path}")
+        for i in positions:
+            f.seek(index.offsets[i])
+            comment = _parse_element(f.read(index.lengths[i]))
+            if comment is not None:
+                comments.append(comment)
+        if not _matches(index, os.fstat(f.fileno())):
+            raise StaleIndexError(f"弹幕文件在读取期间发生变化: {index.path}")
+    return comments
+
+
+def read_comments(index: DanmakuIndex, lo: int, hi: int) -> List[Dict[str, Any]]:
+    """按索引顺序读取 [lo, hi) 范围内的弹幕（同步，供 asyncio.to_thread 调用）"""
+    return _read_elements(index, range(lo, hi))
+
+
+def read_comments_at(index: DanmakuIndex, positions) -> List[Dict[str, Any]]:
+    """读取索引中若干位置的弹幕，按文件偏移顺序读取（同步，供 asyncio.to_thread 调用）"""
+    return _read_elements(index, sorted(positions, key=index.offsets.__getitem__), buffering=1024 * 1024)
+
+
+async def read_page(path: Path, select: Callable[[DanmakuIndex], Tuple[int, int]]
+                    ) -> Tuple[DanmakuIndex, List[Dict[str, Any]]]:
+    """
+    获取索引并读取 select(index) 给出的 [lo, hi) 范围，返回 (索引, 弹幕)。
+    读取期间文件被替换或追加时重建索引重试，最多 READ_RETRIES 次。
+    """
+    for attempt in range(READ_RETRIES):
+        index = await get_danmaku_index(path)
+        lo, hi = select(index)
+        try:
+            return index, await asyncio.to_thread(read_comments, index, lo, hi)
+        except StaleIndexError:
+            if attempt == READ_RETRIES - 1:
+                raise
+            logger.debug(f"弹幕文件 {path} 在读取期间发生变化，重建索引后重试")
+
+
+def iter_comment_windows(index: DanmakuIndex, lo: int = 0, hi: Optional[int] = None,
+                         window: int = STREAM_WINDOW) -> Iterator[List[Dict[str, Any]]]:
+    """按时间顺序分块产出 [lo, hi) 范围内的弹幕，每块最多 window 条（同步迭代器）"""
+    hi = index.total if hi is None else hi
+    for start in range(lo, hi, window):
+        yield read_comments(index, start, min(start + window, hi))
+
+
+def iter_comments(index: DanmakuIndex, lo: int = 0, hi: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """按时间顺序逐条产出弹幕，内部按窗口读取"""
+    for chunk in iter_comment_windows(index, lo, hi):
+        yield from chunk
@@ -2,6 +2,7 @@
 Episode相关的CRUD操作
 """
 
+import asyncio
 import logging
 from typing import Optional, Dict, Any, List
 from pathlib import Path
@@ -562,7 +563,7 @@ async def fetch_comments(session: AsyncSession, episode_id: int) -> List[Dict[st
     """从XML文件获取弹幕。"""
     episode_stmt = select(Episode).where(Episode.id == episode_id)
     episode_result = await session.execute(episode_stmt)
-    from .danmaku import _get_fs_path_from_web_path
+    from .danmaku import _get_fs_path_from_web_path, _load_danmaku_comments
 
     episode = episode_result.scalar_one_or_none()
     if not episode or not episode.danmakuFilePath:
@@ -577,21 +578,22 @@ async def fetch_comments(session: AsyncSession, episode_id: int) -> List[Dict[st
             logger.warning(f"数据库记录了弹幕文件路径，但文件不存在: {absolute_path}")
             return []
 
-        xml_content = absolute_path.read_text(encoding='utf-8')
-        # 延迟导入避免循环依赖
-        from src.api.dandan.danmaku_parser import parse_dandan_xml_to_comments
-        return parse_dandan_xml_to_comments(xml_content)
+        return await asyncio.to_thread(_load_danmaku_comments, absolute_path)
     except Exception as e:
         logger.error(f"读取或解析弹幕文件失败: {episode.danmakuFilePath}。错误: {e}", exc_info=True)
         return []
 
 
-async def fetch_merged_comments(session: AsyncSession, episode_id: int) -> List[Dict[str, Any]]:
+async def fetch_merged_comments(session: AsyncSession, episode_id: int,
+                                rebuild: bool = True) -> Optional[List[Dict[str, Any]]]:
     """
     获取合并后的弹幕：查找同一 anime 同一集数的所有源的弹幕并合并。
     用于合并输出功能。
+
+    合并结果按 (anime, 集数) 物化，成员文件未变化时只读取物化文件；只有一个源时返回空列表。
+    rebuild=False 时只读取未过期的物化文件，没有可用的物化文件时返回 None。
     """
-    from .danmaku import _get_fs_path_from_web_path
+    from .danmaku import load_merged_view
 
     # 1. 获取当前 episode 的信息
     episode_stmt = select(Episode).options(
@@ -608,7 +610,7 @@ async def fetch_merged_comments(session: AsyncSession, episode_id: int) -> List[
 
     # 2. 查找同一 anime 同一集数的所有 episode
     related_episodes_stmt = (
-        select(Episode)
+        select(Episode.id, AnimeSource.providerName, Episode.danmakuFilePath)
         .join(AnimeSource, Episode.sourceId == AnimeSource.id)
         .where(
             AnimeSource.animeId == anime_id,
@@ -617,41 +619,23 @@ async def fetch_merged_comments(session: AsyncSession, episode_id: int) -> List[
         )
     )
     related_result = await session.execute(related_episodes_stmt)
-    related_episodes = related_result.scalars().all()
+    members = [tuple(row) for row in related_result.all()]
 
-    if not related_episodes:
+    # 只有一个源时合并结果就是单源本身，调用方直接使用单源弹幕
+    if len(members) < 2:
         return []
 
-    # 3. 合并所有源的弹幕
-    all_comments = []
-    seen_cids = set()  # 用于去重（基于弹幕内容和时间）
-
-    for ep in related_episodes:
-        try:
-            absolute_path = _get_fs_path_from_web_path(ep.danmakuFilePath)
-            if not absolute_path or not absolute_path.exists():
-                continue
-
-            xml_content = absolute_path.read_text(encoding='utf-8')
-            # 延迟导入避免循环依赖
-            from src.api.dandan.danmaku_parser import parse_dandan_xml_to_comments
-            comments = parse_dandan_xml_to_comments(xml_content)
-
-            for comment in comments:
-                # 使用 p 属性（时间+类型+颜色）和 m（内容）作为去重键
-                dedup_key = f"{comment.get('p', '')}_{comment.get('m', '')}"
-                if dedup_key not in seen_cids:
-                    seen_cids.add(dedup_key)
-                    all_comments.append(comment)
-
-        except Exception as e:
-            logger.error(f"读取弹幕文件失败: {ep.danmakuFilePath}。错误: {e}")
-            continue
-
-    logger.info(f"合并输出: episodeId={episode_id}, 集数={episode_index}, "
-                f"源数量={len(related_episodes)}, 合并后弹幕数={len(all_comments)}")
+    # 当前分集尚无弹幕文件时由调用方先下载，不直接返回其它源的合并结果
+    if not rebuild and all(member[0] != episode_id for member in members):
+        return None
 
-    return all_comments
+    # 3. 读取（必要时重建）物化的合并视图
+    merged = await load_merged_view(anime_id, episode_index, members, rebuild=rebuild)
+    if merged is None:
+        return None
+    logger.debug(f"合并输出: episodeId={episode_id}, 集数={episode_index}, "
+                 f"源数量={len(members)}, 合并后弹幕数={len(merged)}")
+    return merged
 
 
 async def add_comments_from_xml(session: AsyncSession, episode_id: int, xml_content: str) -> int:
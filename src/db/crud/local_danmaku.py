@@ -1,9 +1,9 @@
 """
 本地弹幕扫描相关的数据库操作
 """
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete, update, func, and_, or_, cast, String
+from sqlalchemy import select, delete, update, insert, func, and_, or_, cast, String
 from sqlalchemy.orm import selectinload
 
 from ..orm_models import LocalDanmakuItem
@@ -413,6 +413,50 @@ async def delete_local_items_by_season(
     return result.rowcount
 
 
+async def get_local_file_states(
+    session: AsyncSession,
+    path_prefix: str
+) -> Dict[str, Tuple[int, Optional[int], Optional[int]]]:
+    """
+    获取指定目录下已入库文件的扫描状态,用于增量扫描
+
+    Returns:
+        {file_path: (id, file_mtime, file_size)}
+    """
+    stmt = select(
+        LocalDanmakuItem.id,
+        LocalDanmakuItem.filePath,
+        LocalDanmakuItem.fileMtime,
+        LocalDanmakuItem.fileSize
+    ).where(LocalDanmakuItem.filePath.startswith(path_prefix, autoescape=True))
+    result = await session.execute(stmt)
+    return {row.filePath: (row.id, row.fileMtime, row.fileSize) for row in result.all()}
+
+
+async def bulk_upsert_local_items(
+    session: AsyncSession,
+    new_items: List[Dict[str, Any]],
+    changed_items: List[Dict[str, Any]]
+) -> Tuple[int, int]:
+    """
+    批量写入本地弹幕项
+
+    Args:
+        new_items: 新增项(ORM属性名为键)
+        changed_items: 需更新的已有项(必须包含id),保留原有的导入状态
+
+    Returns:
+        (新增数量, 更新数量)
+    """
+    if new_items:
+        await session.execute(insert(LocalDanmakuItem), new_items)
+    if changed_items:
+        # ORM 批量按主键更新,每行一条参数,由驱动以 executemany 执行
+        await session.execute(update(LocalDanmakuItem), changed_items)
+    await session.commit()
+    return len(new_items), len(changed_items)
+
+
 async def clear_all_local_items(session: AsyncSession) -> int:
     """清空所有本地弹幕项"""
     stmt = delete(LocalDanmakuItem)
@@ -76,10 +76,10 @@ async def reset_all_rate_limit_states(session: AsyncSession):
     # The commit will be handled by the calling function (e.g., RateLimiter.check)
 
 
-async def increment_rate_limit_count(session: AsyncSession, provider_name: str):
+async def increment_rate_limit_count(session: AsyncSession, provider_name: str, amount: int = 1):
     """为指定的提供商增加请求计数。如果状态不存在，则会创建它。"""
     state = await get_or_create_rate_limit_state(session, provider_name)
-    state.requestCount += 1
+    state.requestCount += amount
 
 # --- Database Maintenance ---
 
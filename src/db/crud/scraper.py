@@ -43,7 +43,8 @@ async def get_scraper_setting_by_name(session: AsyncSession, provider_name: str)
             "providerName": scraper.providerName,
             "isEnabled": scraper.isEnabled,
             "displayOrder": scraper.displayOrder,
-            "useProxy": scraper.useProxy
+            "useProxy": scraper.useProxy,
+            "downloadConcurrency": scraper.downloadConcurrency
         }
     return None
 
@@ -57,7 +58,8 @@ async def get_all_scraper_settings(session: AsyncSession) -> List[Dict[str, Any]
             "providerName": s.providerName,
             "isEnabled": s.isEnabled,
             "displayOrder": s.displayOrder,
-            "useProxy": s.useProxy
+            "useProxy": s.useProxy,
+            "downloadConcurrency": s.downloadConcurrency
         }
         for s in result.scalars()
     ]
@@ -70,6 +72,13 @@ async def update_scraper_proxy(session: AsyncSession, provider_name: str, use_pr
     return result.rowcount > 0
 
 
+async def update_scraper_download_concurrency(session: AsyncSession, provider_name: str, concurrency: int) -> bool:
+    """更新单个搜索源学到的分集弹幕下载并发数"""
+    stmt = update(Scraper).where(Scraper.providerName == provider_name).values(downloadConcurrency=concurrency)
+    result = await session.execute(stmt)
+    return result.rowcount > 0
+
+
 async def update_scrapers_settings(session: AsyncSession, settings: List[models.ScraperSetting]):
     """批量更新搜索源设置"""
     for s in settings:
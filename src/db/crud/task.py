@@ -271,6 +271,40 @@ async def update_task_progress_in_history(
     await session.commit()
 
 
+async def bulk_update_task_progress(session: AsyncSession, updates: List[Dict[str, Any]]) -> int:
+    """批量写入多个任务的进度（一次事务）
+
+    Args:
+        updates: [{"taskId", "progress", "description", "status"(可选)}]，
+            未包含 status 的条目不修改任务状态
+
+    Returns:
+        写入的条目数
+    """
+    if not updates:
+        return 0
+    now = get_now()
+    with_status, without_status = [], []
+    for item in updates:
+        row = {
+            "taskId": item["taskId"],
+            "progress": item["progress"],
+            "description": item["description"],
+            "updatedAt": now,
+        }
+        if item.get("status") is not None:
+            row["status"] = item["status"]
+            with_status.append(row)
+        else:
+            without_status.append(row)
+    # 按主键的 ORM 批量 UPDATE，同一组参数键相同才能合并为 executemany
+    for rows in (with_status, without_status):
+        if rows:
+            await session.execute(update(TaskHistory), rows)
+    await session.commit()
+    return len(updates)
+
+
 async def update_task_title_in_history(session: AsyncSession, task_id: str, new_title: str):
     """更新任务历史记录的标题（用于在任务运行中动态反映匹配结果）"""
     await session.execute(
@@ -656,6 +690,73 @@ async def get_due_webhook_tasks(session: AsyncSession) -> List[WebhookTask]:
     return result.scalars().all()
 
 
+# 认领后超过该时间仍为 processing 的 Webhook 任务视为认领进程已退出，放回待处理
+WEBHOOK_CLAIM_LEASE = timedelta(minutes=10)
+
+
+async def release_stale_webhook_claims(session: AsyncSession, lease: timedelta = WEBHOOK_CLAIM_LEASE) -> int:
+    """
+    把认领时间早于 lease 之前、仍为 processing 的 Webhook 任务放回 pending，返回放回的行数
+
+    认领时 executeTime 会被改写为认领时间，作为租约的起点。
+    启动时（lease=0）放回全部 processing 的行，它们的认领进程已经不在了。
+    """
+    cutoff = get_now() - lease
+    result = await session.execute(
+        update(WebhookTask)
+        .where(WebhookTask.status == "processing", WebhookTask.executeTime <= cutoff)
+        .values(status="pending")
+    )
+    await session.commit()
+    if result.rowcount:
+        logger.warning(f"已将 {result.rowcount} 个认领后未完成的 Webhook 任务放回待处理状态")
+    return result.rowcount
+
+
+async def claim_due_webhook_tasks(session: AsyncSession, limit: int = 100) -> List[WebhookTask]:
+    """
+    认领一批已到执行时间的待处理任务
+
+    先放回租约已过期的 processing 行，再用一条 UPDATE 把选中的行置为 processing 并提交，
+    返回认领成功的行（已被其它进程认领的行不会返回）。
+    认领时 executeTime 改写为认领时间（到期任务的执行时间已不再需要），作为认领租约的起点。
+    """
+    await release_stale_webhook_claims(session)
+    now = get_now()
+    id_stmt = (
+        select(WebhookTask.id)
+        .where(WebhookTask.status == "pending", WebhookTask.executeTime <= now)
+        .order_by(WebhookTask.executeTime)
+        .limit(limit)
+    )
+    ids = list((await session.execute(id_stmt)).scalars().all())
+    if not ids:
+        return []
+    await session.execute(
+        update(WebhookTask)
+        .where(WebhookTask.id.in_(ids), WebhookTask.status == "pending")
+        .values(status="processing", executeTime=now)
+    )
+    await session.commit()
+    result = await session.execute(
+        select(WebhookTask)
+        .where(WebhookTask.id.in_(ids), WebhookTask.status == "processing")
+        .order_by(WebhookTask.executeTime)
+    )
+    return list(result.scalars().all())
+
+
+async def set_webhook_tasks_status(session: AsyncSession, task_ids: List[int], status: str) -> int:
+    """批量更新 Webhook 任务的状态"""
+    if not task_ids:
+        return 0
+    result = await session.execute(
+        update(WebhookTask).where(WebhookTask.id.in_(task_ids)).values(status=status)
+    )
+    await session.commit()
+    return result.rowcount
+
+
 async def update_webhook_task_status(session: AsyncSession, task_id: int, status: str):
     """更新 Webhook 任务的状态"""
     await session.execute(
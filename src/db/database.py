@@ -12,6 +12,7 @@ from src.core.config import settings
 from .orm_models import Base # type: ignore
 from src.core.timezone import get_app_timezone, get_timezone_offset_str, get_now
 from .migrations import run_migrations
+from .query_metrics import instrument_engine, instrumented_pool_class
 # 使用模块级日志记录器
 logger = logging.getLogger(__name__)
 
@@ -176,8 +177,13 @@ async def create_db_engine_and_session(app: FastAPI):
                 "pool_timeout": db_cfg.pool_timeout,
             })
 
+        if db_cfg.query_metrics:
+            engine_args["poolclass"] = instrumented_pool_class(pool_class)
+
         engine = create_async_engine(db_url, **engine_args)
         _patch_aiomysql_pre_ping(engine)
+        if db_cfg.query_metrics:
+            instrument_engine(engine, db_cfg.slow_query_ms)
         session_factory = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
 
         app.state.db_engine = engine
@@ -302,7 +308,10 @@ async def _is_fresh_database(engine) -> bool:
 async def init_db_tables(app: FastAPI):
     """初始化数据库和表"""
     from .db_maintainer import sync_database_schema
-    from .migrations import run_migrations, mark_all_migrations_done
+    from .migrations import (
+        run_migrations, mark_all_migrations_done,
+        compute_schema_stamp, read_schema_stamp, write_schema_stamp,
+    )
 
     # 1. 确保数据库存在
     await _create_db_if_not_exists()
@@ -311,6 +320,15 @@ async def init_db_tables(app: FastAPI):
     await create_db_engine_and_session(app)
 
     engine = app.state.db_engine
+    db_type = settings.database.type.lower()
+
+    # 结构版本戳未变化时（常见的重启场景）跳过建表、结构同步和迁移检查
+    stamp = compute_schema_stamp(db_type)
+    async with engine.connect() as conn:
+        current_stamp = await read_schema_stamp(conn)
+    if current_stamp == stamp:
+        logger.info(f"数据库结构版本未变化 ({stamp})，跳过建表、结构同步和迁移检查。")
+        return
 
     # 3. 检测是否为全新数据库（在 create_all 之前检查）
     is_fresh = await _is_fresh_database(engine)
@@ -329,8 +347,12 @@ async def init_db_tables(app: FastAPI):
         # 已有数据库：执行正常的同步和迁移流程
         # 5. 同步数据库结构（自动检测并补充缺失的字段）
         async with engine.begin() as conn:
-            await sync_database_schema(conn, settings.database.type.lower())
+            await sync_database_schema(conn, db_type)
 
         # 6. 执行数据库迁移任务
         async with engine.begin() as conn:
-            await run_migrations(conn, settings.database.type.lower(), settings.database.name)
+            await run_migrations(conn, db_type, settings.database.name)
+
+    async with engine.begin() as conn:
+        await write_schema_stamp(conn, stamp)
+    logger.info(f"已记录数据库结构版本 ({stamp})")
@@ -8,7 +8,10 @@
 此模块仅用于需要数据转换、重命名、填充等复杂操作的迁移。
 """
 
+import hashlib
 import logging
+from typing import Optional
+
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncConnection
 
@@ -745,6 +748,46 @@ async def mark_all_migrations_done(conn: AsyncConnection):
     logger.info(f"全新数据库：已标记 {len(ALL_MIGRATION_IDS)} 个迁移为已完成，跳过实际执行。")
 
 
+# 数据库结构版本戳：ORM 模型与迁移列表的指纹。
+# 与数据库中记录的一致时，启动跳过建表、结构同步和迁移检查。
+SCHEMA_STAMP_KEY = "schemaVersionStamp"
+
+
+def compute_schema_stamp(db_type: str) -> str:
+    """根据 ORM 表结构（字段、类型、索引、外键）和迁移 ID 列表计算结构版本戳"""
+    from .orm_models import Base
+    parts = [db_type, *ALL_MIGRATION_IDS]
+    for table in sorted(Base.metadata.tables.values(), key=lambda t: t.name):
+        parts.append(f"T:{table.name}")
+        for col in table.columns:
+            fks = ",".join(sorted(fk.target_fullname for fk in col.foreign_keys))
+            parts.append(f"C:{col.name}:{col.type!r}:{col.nullable}:{col.primary_key}:{fks}")
+        for index in sorted(table.indexes, key=lambda i: i.name or ""):
+            parts.append(f"I:{index.name}:{index.unique}:{','.join(c.name for c in index.columns)}")
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+async def read_schema_stamp(conn: AsyncConnection) -> Optional[str]:
+    """读取数据库中记录的结构版本戳；config 表不存在等情况返回 None"""
+    try:
+        result = await conn.execute(text("SELECT config_value FROM config WHERE config_key = :key"),
+                                    {"key": SCHEMA_STAMP_KEY})
+        return result.scalar_one_or_none()
+    except Exception as e:
+        logger.debug(f"读取数据库结构版本戳失败: {e}")
+        return None
+
+
+async def write_schema_stamp(conn: AsyncConnection, stamp: str):
+    """记录结构同步和迁移完成后的结构版本戳"""
+    description = "数据库结构版本戳，与当前版本一致时启动跳过结构同步和迁移检查"
+    if conn.dialect.name == 'mysql':
+        stmt = text("INSERT INTO config (config_key, config_value, description) VALUES (:key, :value, :desc) ON DUPLICATE KEY UPDATE config_value = :value")
+    else:  # postgresql
+        stmt = text("INSERT INTO config (config_key, config_value, description) VALUES (:key, :value, :desc) ON CONFLICT (config_key) DO UPDATE SET config_value = :value")
+    await conn.execute(stmt, {"key": SCHEMA_STAMP_KEY, "value": stamp, "desc": description})
+
+
 async def run_migrations(conn: AsyncConnection, db_type: str, db_name: str):
     """
     按顺序执行所有数据库架构迁移。
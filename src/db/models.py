@@ -514,6 +514,7 @@ class ScraperSettingWithConfig(ScraperSetting):
     isLoggable: bool
     logRawResponses: bool = False
     version: Optional[str] = None  # 弹幕源版本号
+    downloadConcurrency: Optional[int] = None  # 自适应学到的分集弹幕下载并发数
     displayName: Optional[str] = None  # UI 友好显示名称，优先于 providerName
 
 class ProxySettingsResponse(BaseModel):
@@ -166,6 +166,7 @@ class Scraper(Base):
     isEnabled: Mapped[bool] = mapped_column("is_enabled", Boolean, default=True)
     displayOrder: Mapped[int] = mapped_column("display_order", Integer, default=0)
     useProxy: Mapped[bool] = mapped_column("use_proxy", Boolean, default=False)
+    downloadConcurrency: Mapped[Optional[int]] = mapped_column("download_concurrency", Integer, nullable=True)
 
 class MetadataSource(Base):
     __tablename__ = "metadata_sources"
@@ -190,6 +191,9 @@ class AnimeMetadata(Base):
     mediaServerType: Mapped[Optional[str]] = mapped_column("media_server_type", String(50))
     mediaServerSeriesId: Mapped[Optional[str]] = mapped_column("media_server_series_id", String(500))
     mediaServerSeasonId: Mapped[Optional[str]] = mapped_column("media_server_season_id", String(500))
+    # TMDB 自动刮削任务上次完成处理的时间及当时 TMDB 数据的指纹,用于增量跳过未变化的作品
+    tmdbMappedAt: Mapped[Optional[datetime]] = mapped_column("tmdb_mapped_at", NaiveDateTime, nullable=True)
+    tmdbMappingHash: Mapped[Optional[str]] = mapped_column("tmdb_mapping_hash", String(64), nullable=True)
 
     anime: Mapped["Anime"] = relationship(back_populates="metadataRecord")
 
@@ -453,6 +457,8 @@ class LocalDanmakuItem(Base):
     imdbId: Mapped[Optional[str]] = mapped_column("imdb_id", String(500))
     posterUrl: Mapped[Optional[str]] = mapped_column("poster_url", String(1024))
     nfoPath: Mapped[Optional[str]] = mapped_column("nfo_path", String(1024))  # nfo文件路径
+    fileMtime: Mapped[Optional[int]] = mapped_column("file_mtime", BigInteger)  # 扫描时文件的 mtime(纳秒),用于增量扫描
+    fileSize: Mapped[Optional[int]] = mapped_column("file_size", BigInteger)  # 扫描时文件大小(字节),用于增量扫描
     isImported: Mapped[bool] = mapped_column("is_imported", Boolean, default=False)
     createdAt: Mapped[datetime] = mapped_column("created_at", NaiveDateTime, default=get_now)
     updatedAt: Mapped[datetime] = mapped_column("updated_at", NaiveDateTime, default=get_now, onupdate=get_now)
@@ -0,0 +1,301 @@
+"""
+数据库查询统计（可选，database.query_metrics 开启后生效）
+
+通过 SQLAlchemy 引擎事件记录每条语句的耗时，并按作用域汇总:
+- 作用域: 一次 HTTP 请求（按 "方法 路由模板" 归类）或一个后台任务（按任务类型归类）
+- 每个作用域统计语句数、数据库总耗时、连接池等待时间和最慢的几条语句（规范化 SQL）
+- 同一作用域内同一条规范化语句执行次数达到 N_PLUS_ONE_THRESHOLD 时记为疑似 N+1
+- 超过 database.slow_query_ms 的语句写入慢查询日志并保留最近 SLOW_LOG_SIZE 条
+
+结果通过 /api/ui/system/db/metrics 查看。未开启时不注册任何事件，没有额外开销。
+"""
+
+import logging
+import re
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from functools import lru_cache
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+logger = logging.getLogger(__name__)
+
+# 每个作用域 / 每个路由保留的最慢语句数
+TOP_STATEMENTS = 5
+# 慢查询日志保留条数
+SLOW_LOG_SIZE = 200
+# 同一作用域内同一语句执行多少次视为疑似 N+1
+N_PLUS_ONE_THRESHOLD = 20
+# 规范化 SQL 的最大长度
+MAX_SQL_LENGTH = 500
+
+_STRING_LITERAL_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\(\s*(?:\?|%\(\w+\)s|:\w+|\$\d+|%s)(?:\s*,\s*(?:\?|%\(\w+\)s|:\w+|\$\d+|%s))*\s*\)")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def normalize_sql(statement: str) -> str:
+    """把语句中的字面量和 IN 列表替换为占位符，使同一查询的不同参数归为一类"""
+    sql = _WHITESPACE_RE.sub(" ", statement).strip()
+    sql = _STRING_LITERAL_RE.sub("?", sql)
+    sql = _NUMBER_LITERAL_RE.sub("?", sql)
+    sql = _IN_LIST_RE.sub("(...)", sql)
+    return sql[:MAX_SQL_LENGTH]
+
+
+class QueryScope:
+    """一次请求或一个后台任务内的查询统计"""
+
+    __slots__ = ("kind", "name", "statements", "db_ms", "pool_wait_ms", "slowest", "counts")
+
+    def __init__(self, kind: str, name: str):
+        self.kind = kind
+        self.name = name
+        self.statements = 0
+        self.db_ms = 0.0
+        self.pool_wait_ms = 0.0
+        self.slowest: List[Tuple[float, str]] = []
+        self.counts: Counter = Counter()
+
+    def record(self, sql: str, ms: float) -> None:
+        self.statements += 1
+        self.db_ms += ms
+        self.counts[sql] += 1
+        if len(self.slowest) < TOP_STATEMENTS or ms > self.slowest[-1][0]:
+            self.slowest.append((ms, sql))
+            self.slowest.sort(key=lambda item: -item[0])
+            del self.slowest[TOP_STATEMENTS:]
+
+    def repeated(self) -> List[Tuple[str, int]]:
+        """疑似 N+1 的语句及其执行次数"""
+        return [(sql, n) for sql, n in self.counts.most_common(3) if n >= N_PLUS_ONE_THRESHOLD]
+
+
+class _ScopeStats:
+    """同一路由 / 任务类型的累计统计"""
+
+    __slots__ = ("calls", "statements", "db_ms", "pool_wait_ms", "max_statements", "max_db_ms",
+                 "n_plus_one", "slowest", "repeated")
+
+    def __init__(self):
+        self.calls = 0
+        self.statements = 0
+        self.db_ms = 0.0
+        self.pool_wait_ms = 0.0
+        self.max_statements = 0
+        self.max_db_ms = 0.0
+        self.n_plus_one = 0
+        self.slowest: List[Tuple[float, str]] = []
+        self.repeated: Dict[str, int] = {}
+
+    def merge(self, scope: QueryScope) -> None:
+        self.calls += 1
+        self.statements += scope.statements
+        self.db_ms += scope.db_ms
+        self.pool_wait_ms += scope.pool_wait_ms
+        self.max_statements = max(self.max_statements, scope.statements)
+        self.max_db_ms = max(self.max_db_ms, scope.db_ms)
+        repeated = scope.repeated()
+        if repeated:
+            self.n_plus_one += 1
+            for sql, n in repeated:
+                self.repeated[sql] = max(self.repeated.get(sql, 0), n)
+        merged = {sql: ms for ms, sql in self.slowest}
+        for ms, sql in scope.slowest:
+            if ms > merged.get(sql, 0.0):
+                merged[sql] = ms
+        self.slowest = sorted(((ms, sql) for sql, ms in merged.items()), key=lambda item: -item[0])[:TOP_STATEMENTS]
+
+    def to_dict(self, kind: str, name: str) -> Dict[str, Any]:
+        return {
+            "kind": kind,
+            "name": name,
+            "calls": self.calls,
+            "statements": self.statements,
+            "avgStatements": round(self.statements / self.calls, 1) if self.calls else 0,
+            "maxStatements": self.max_statements,
+            "dbMs": round(self.db_ms, 1),
+            "avgDbMs": round(self.db_ms / self.calls, 1) if self.calls else 0,
+            "maxDbMs": round(self.max_db_ms, 1),
+            "poolWaitMs": round(self.pool_wait_ms, 1),
+            "nPlusOne": self.n_plus_one,
+            "repeatedStatements": [{"sql": sql, "count": n} for sql, n in
+                                   sorted(self.repeated.items(), key=lambda item: -item[1])[:TOP_STATEMENTS]],
+            "slowest": [{"sql": sql, "ms": round(ms, 1)} for ms, sql in self.slowest],
+        }
+
+
+_current_scope: ContextVar[Optional[QueryScope]] = ContextVar("db_query_scope", default=None)
+
+
+class QueryMetricsCollector:
+    """进程内的查询统计汇总"""
+
+    def __init__(self):
+        self.enabled = False
+        self.slow_query_ms = 500.0
+        self._engine = None
+        self.reset()
+
+    def reset(self) -> None:
+        self._scopes: Dict[Tuple[str, str], _ScopeStats] = {}
+        self._slow_log: Deque[Dict[str, Any]] = deque(maxlen=SLOW_LOG_SIZE)
+        self._totals = {"statements": 0, "dbMs": 0.0, "unscopedStatements": 0,
+                        "poolCheckouts": 0, "poolWaitMs": 0.0, "maxPoolWaitMs": 0.0, "poolTimeouts": 0}
+        self._started_at = time.time()
+
+    # ---------- 引擎事件 ----------
+
+    def on_statement(self, statement: str, ms: float) -> None:
+        sql = normalize_sql(statement)
+        self._totals["statements"] += 1
+        self._totals["dbMs"] += ms
+        scope = _current_scope.get()
+        if scope is not None:
+            scope.record(sql, ms)
+        else:
+            self._totals["unscopedStatements"] += 1
+        if ms >= self.slow_query_ms:
+            where = f"{scope.kind}:{scope.name}" if scope is not None else "-"
+            logger.warning(f"慢查询 {ms:.0f}ms [{where}]: {sql}")
+            self._slow_log.append({"at": time.time(), "ms": round(ms, 1), "scope": where, "sql": sql})
+
+    def on_pool_wait(self, ms: float, timed_out: bool = False) -> None:
+        self._totals["poolCheckouts"] += 1
+        self._totals["poolWaitMs"] += ms
+        self._totals["maxPoolWaitMs"] = max(self._totals["maxPoolWaitMs"], ms)
+        if timed_out:
+            self._totals["poolTimeouts"] += 1
+        scope = _current_scope.get()
+        if scope is not None:
+            scope.pool_wait_ms += ms
+
+    # ---------- 作用域 ----------
+
+    def begin_scope(self, kind: str, name: str) -> Optional[Token]:
+        if not self.enabled:
+            return None
+        return _current_scope.set(QueryScope(kind, name))
+
+    def end_scope(self, token: Optional[Token]) -> None:
+        if token is None:
+            return
+        scope = _current_scope.get()
+        _current_scope.reset(token)
+        if scope is None or scope.statements == 0:
+            return
+        stats = self._scopes.get((scope.kind, scope.name))
+        if stats is None:
+            stats = self._scopes[(scope.kind, scope.name)] = _ScopeStats()
+        stats.merge(scope)
+        for sql, n in scope.repeated():
+            logger.info(f"疑似 N+1 查询 [{scope.kind}:{scope.name}] 同一语句执行 {n} 次: {sql}")
+
+    # ---------- 查询 ----------
+
+    def _pool_status(self) -> Optional[Dict[str, Any]]:
+        if self._engine is None:
+            return None
+        pool = self._engine.pool
+        status = {"type": type(pool).__name__, "status": pool.status()}
+        for attr in ("size", "checkedout", "overflow", "checkedin"):
+            fn = getattr(pool, attr, None)
+            if callable(fn):
+                status[attr] = fn()
+        return status
+
+    def snapshot(self, kind: Optional[str] = None, limit: int = 50, sort: str = "dbMs") -> Dict[str, Any]:
+        scopes = [stats.to_dict(k, name) for (k, name), stats in self._scopes.items() if kind in (None, k)]
+        scopes.sort(key=lambda item: -(item.get(sort) or 0))
+        return {
+            "enabled": self.enabled,
+            "slowQueryMs": self.slow_query_ms,
+            "since": self._started_at,
+            "totals": {k: round(v, 1) if isinstance(v, float) else v for k, v in self._totals.items()},
+            "pool": self._pool_status(),
+            "scopes": scopes[:limit],
+            "slowQueries": list(reversed(self._slow_log))[:limit],
+        }
+
+
+query_metrics = QueryMetricsCollector()
+
+
+@contextmanager
+def track_queries(kind: str, name: str):
+    """在上下文内统计数据库查询（未开启时不做任何事）"""
+    token = query_metrics.begin_scope(kind, name)
+    try:
+        yield
+    finally:
+        query_metrics.end_scope(token)
+
+
+async def track_request_queries(request, call_next):
+    """HTTP 中间件: 按路由模板统计每个请求的查询"""
+    if not query_metrics.enabled:
+        return await call_next(request)
+    token = query_metrics.begin_scope("request", request.url.path)
+    try:
+        return await call_next(request)
+    finally:
+        # 路由匹配后才能拿到路由模板，用它归类，避免每个 ID 各占一行
+        scope = _current_scope.get()
+        route = request.scope.get("route")
+        if scope is not None:
+            scope.name = f"{request.method} {getattr(route, 'path', request.url.path)}"
+        query_metrics.end_scope(token)
+
+
+# ---------- 引擎挂载 ----------
+
+class _PoolWaitMixin:
+    """统计从连接池取得连接的等待时间"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            query_metrics.on_pool_wait((time.perf_counter() - start) * 1000, timed_out=True)
+            raise
+        query_metrics.on_pool_wait((time.perf_counter() - start) * 1000)
+        return conn
+
+
+def instrumented_pool_class(pool_class):
+    """返回记录等待时间的连接池子类"""
+    return type(f"Instrumented{pool_class.__name__}", (_PoolWaitMixin, pool_class), {})
+
+
+def instrument_engine(engine, slow_query_ms: float) -> None:
+    """在异步引擎上注册语句计时事件，并开启统计"""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("query_start_time")
+        if starts:
+            query_metrics.on_statement(statement, (time.perf_counter() - starts.pop()) * 1000)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _handle_error(exception_context):
+        conn = exception_context.connection
+        starts = conn.info.get("query_start_time") if conn is not None else None
+        if starts:
+            starts.pop()
+
+    query_metrics.enabled = True
+    query_metrics.slow_query_ms = float(slow_query_ms)
+    query_metrics._engine = sync_engine
+    logger.info(f"数据库查询统计已开启 (慢查询阈值 {slow_query_ms}ms)")
@@ -6,12 +6,12 @@
 import asyncio
 import logging
 from datetime import timedelta
-from typing import Callable, List, Optional
+from typing import Callable, Set, Tuple
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, delete, func
 
-from src.db import orm_models
+from src.db import crud, orm_models
 from src.core import get_now
 from src.tasks.delete import delete_danmaku_files_batch
 from src.services import TaskSuccess
@@ -20,6 +20,10 @@ from .base import BaseJob
 logger = logging.getLogger(__name__)
 
 DEFAULT_RETENTION_DAYS = 7
+# 每批处理的分集数量
+CHUNK_SIZE = 500
+# 并行删除弹幕文件的线程数
+FILE_DELETE_WORKERS = 8
 
 
 class DanmakuCleanupJob(BaseJob):
@@ -60,104 +64,76 @@ class DanmakuCleanupJob(BaseJob):
         now = get_now()
         cutoff = now - timedelta(days=retention_days)
 
-        # 查询所有 fetchedAt 不为 None 且早于截止时间的分集
-        stmt = select(orm_models.Episode).where(
+        # fetchedAt 不为 None 且早于截止时间的分集视为过期
+        expired_filter = (
             orm_models.Episode.fetchedAt.isnot(None),
-            orm_models.Episode.fetchedAt < cutoff
+            orm_models.Episode.fetchedAt < cutoff,
         )
-        result = await session.execute(stmt)
-        expired_episodes = result.scalars().all()
+        total = (await session.execute(
+            select(func.count(orm_models.Episode.id)).where(*expired_filter)
+        )).scalar_one()
 
-        total = len(expired_episodes)
         if total == 0:
+            merged_removed = await self._sweep_merged_views(session)
             self.logger.info("[定时删除弹幕] 没有发现过期的弹幕，任务结束。")
-            raise TaskSuccess("没有发现过期的弹幕，任务结束。")
+            message = "没有发现过期的弹幕"
+            if merged_removed > 0:
+                message += f"，清理 {merged_removed} 个孤立的合并视图"
+            raise TaskSuccess(message + "，任务结束。")
 
-        self.logger.info(f"[定时删除弹幕] 发现 {total} 个过期分集，开始删除...")
-        await progress_callback(10, f"发现 {total} 个过期分集，正在删除弹幕文件...")
+        self.logger.info(f"[定时删除弹幕] 发现 {total} 个过期分集，开始分批删除...")
+        await progress_callback(5, f"发现 {total} 个过期分集，开始分批删除...")
 
-        # 收集受影响的 sourceId，用于后续级联检查
-        affected_source_ids: set = set()
-        file_paths: List[Optional[str]] = []
-
-        for episode in expired_episodes:
-            affected_source_ids.add(episode.sourceId)
-            if episode.danmakuFilePath:
-                file_paths.append(episode.danmakuFilePath)
-
-        # 批量删除弹幕文件
-        if file_paths:
-            await asyncio.to_thread(delete_danmaku_files_batch, file_paths)
-            self.logger.info(f"[定时删除弹幕] 已删除 {len(file_paths)} 个弹幕文件")
-
-        await progress_callback(40, "正在删除数据库中的过期分集记录...")
-
-        # 删除所有过期分集的数据库记录
         deleted_episode_count = 0
-        for episode in expired_episodes:
-            await session.delete(episode)
-            deleted_episode_count += 1
-
-        await session.commit()
-        self.logger.info(f"[定时删除弹幕] 已删除 {deleted_episode_count} 条分集记录")
-
-        await progress_callback(60, "正在检查并清理空源...")
-
-        # 级联：检查受影响的源，若无剩余分集则删除
-        affected_anime_ids: set = set()
         deleted_source_count = 0
-
-        for source_id in affected_source_ids:
-            try:
-                count_stmt = select(func.count(orm_models.Episode.id)).where(
-                    orm_models.Episode.sourceId == source_id
-                )
-                count_result = await session.execute(count_stmt)
-                episode_count = count_result.scalar_one()
-
-                if episode_count == 0:
-                    source = await session.get(orm_models.AnimeSource, source_id)
-                    if source:
-                        affected_anime_ids.add(source.animeId)
-                        await session.delete(source)
-                        await session.commit()
-                        deleted_source_count += 1
-                        self.logger.info(f"[定时删除弹幕] 已删除空源 (ID: {source_id})")
-                else:
-                    # 源还有分集，记录其 animeId 但不删除源
-                    source = await session.get(orm_models.AnimeSource, source_id)
-                    if source:
-                        affected_anime_ids.add(source.animeId)
-            except Exception as e:
-                self.logger.error(f"[定时删除弹幕] 检查源 (ID: {source_id}) 时出错: {e}", exc_info=True)
-
-            await asyncio.sleep(0.05)
-
-        await progress_callback(80, "正在检查并清理空条目...")
-
-        # 级联：检查受影响的条目，若无剩余源则删除
         deleted_anime_count = 0
 
-        for anime_id in affected_anime_ids:
-            try:
-                count_stmt = select(func.count(orm_models.AnimeSource.id)).where(
-                    orm_models.AnimeSource.animeId == anime_id
-                )
-                count_result = await session.execute(count_stmt)
-                source_count = count_result.scalar_one()
-
-                if source_count == 0:
-                    anime = await session.get(orm_models.Anime, anime_id)
-                    if anime:
-                        await session.delete(anime)
-                        await session.commit()
-                        deleted_anime_count += 1
-                        self.logger.info(f"[定时删除弹幕] 已删除空条目 (ID: {anime_id})")
-            except Exception as e:
-                self.logger.error(f"[定时删除弹幕] 检查条目 (ID: {anime_id}) 时出错: {e}", exc_info=True)
-
-            await asyncio.sleep(0.05)
-
+        # 每批独立提交：先删文件、再删记录并级联清理空源/空条目。
+        # 任务中断后再次执行时，未提交的分集会被重新选中（文件删除是幂等的），
+        # 已提交的批次其空源/空条目也已清理，因此可以直接续跑。
+        while True:
+            rows = (await session.execute(
+                select(
+                    orm_models.Episode.id,
+                    orm_models.Episode.sourceId,
+                    orm_models.Episode.danmakuFilePath
+                ).where(*expired_filter).order_by(orm_models.Episode.id).limit(CHUNK_SIZE)
+            )).all()
+            if not rows:
+                break
+
+            episode_ids = [row.id for row in rows]
+            affected_source_ids = {row.sourceId for row in rows}
+            file_paths = [row.danmakuFilePath for row in rows if row.danmakuFilePath]
+
+            if file_paths:
+                await asyncio.to_thread(delete_danmaku_files_batch, file_paths, FILE_DELETE_WORKERS)
+
+            await session.execute(
+                delete(orm_models.Episode)
+                .where(orm_models.Episode.id.in_(episode_ids))
+                .execution_options(synchronize_session=False)
+            )
+            sources_removed, animes_removed = await self._delete_empty_parents(session, affected_source_ids)
+            await session.commit()
+
+            deleted_episode_count += len(episode_ids)
+            deleted_source_count += sources_removed
+            deleted_anime_count += animes_removed
+
+            progress = 5 + int(min(deleted_episode_count / total, 1) * 90)
+            await progress_callback(
+                progress,
+                f"已删除 {deleted_episode_count}/{total} 个过期分集"
+                f"（空源 {deleted_source_count}，空条目 {deleted_anime_count}）..."
+            )
+
+        self.logger.info(
+            f"[定时删除弹幕] 已删除 {deleted_episode_count} 条分集记录、"
+            f"{deleted_source_count} 个空源、{deleted_anime_count} 个空条目"
+        )
+        await progress_callback(96, "正在清理孤立的合并弹幕视图...")
+        merged_removed = await self._sweep_merged_views(session)
         await progress_callback(100, "清理完成")
 
         summary_parts = [f"共删除 {deleted_episode_count} 个过期分集"]
@@ -165,8 +141,80 @@ class DanmakuCleanupJob(BaseJob):
             summary_parts.append(f"清理 {deleted_source_count} 个空源")
         if deleted_anime_count > 0:
             summary_parts.append(f"清理 {deleted_anime_count} 个空条目")
+        if merged_removed > 0:
+            summary_parts.append(f"清理 {merged_removed} 个孤立的合并视图")
 
         final_message = "、".join(summary_parts) + "。"
         self.logger.info(f"[定时删除弹幕] 任务完成：{final_message}")
         raise TaskSuccess(final_message)
 
+    async def _sweep_merged_views(self, session: AsyncSession) -> int:
+        """
+        清理成员源已不足两个的合并物化视图。
+
+        覆盖本任务删除的分集，以及通过其它途径（手动删除分集、数据库维护等）失去成员的视图。
+        清理失败不影响任务结果。
+        """
+        try:
+            return await crud.sweep_orphan_merged_views(session)
+        except Exception as e:
+            self.logger.error(f"[定时删除弹幕] 清理孤立的合并视图失败: {e}", exc_info=True)
+            return 0
+
+    async def _delete_empty_parents(self, session: AsyncSession, source_ids: Set[int]) -> Tuple[int, int]:
+        """
+        级联清理：删除已无分集的源，以及因此失去所有源的条目。
+
+        Returns:
+            (删除的源数量, 删除的条目数量)
+        """
+        if not source_ids:
+            return 0, 0
+
+        # 一次分组查询找出仍有分集的源
+        non_empty_sources = set((await session.execute(
+            select(orm_models.Episode.sourceId)
+            .where(orm_models.Episode.sourceId.in_(source_ids))
+            .group_by(orm_models.Episode.sourceId)
+        )).scalars().all())
+        empty_source_ids = source_ids - non_empty_sources
+        if not empty_source_ids:
+            return 0, 0
+
+        anime_ids = set((await session.execute(
+            select(orm_models.AnimeSource.animeId).where(orm_models.AnimeSource.id.in_(empty_source_ids))
+        )).scalars().all())
+        source_result = await session.execute(
+            delete(orm_models.AnimeSource)
+            .where(orm_models.AnimeSource.id.in_(empty_source_ids))
+            .execution_options(synchronize_session=False)
+        )
+        self.logger.info(f"[定时删除弹幕] 已删除空源 (ID: {sorted(empty_source_ids)})")
+
+        if not anime_ids:
+            return source_result.rowcount, 0
+
+        non_empty_animes = set((await session.execute(
+            select(orm_models.AnimeSource.animeId)
+            .where(orm_models.AnimeSource.animeId.in_(anime_ids))
+            .group_by(orm_models.AnimeSource.animeId)
+        )).scalars().all())
+        empty_anime_ids = anime_ids - non_empty_animes
+        if not empty_anime_ids:
+            return source_result.rowcount, 0
+
+        # 批量删除不会触发 ORM 级联，显式删除一对一的关联记录
+        for model in (orm_models.AnimeMetadata, orm_models.AnimeAlias):
+            await session.execute(
+                delete(model)
+                .where(model.animeId.in_(empty_anime_ids))
+                .execution_options(synchronize_session=False)
+            )
+        anime_result = await session.execute(
+            delete(orm_models.Anime)
+            .where(orm_models.Anime.id.in_(empty_anime_ids))
+            .execution_options(synchronize_session=False)
+        )
+        self.logger.info(f"[定时删除弹幕] 已删除空条目 (ID: {sorted(empty_anime_ids)})")
+
+        return source_result.rowcount, anime_result.rowcount
@@ -1,17 +1,25 @@
 """
 数据库备份定时任务
 使用 JSON 格式导出数据，支持跨数据库（MySQL/PostgreSQL）兼容
+
+备份文件为 gzip 压缩的 NDJSON 流：
+  第 1 行: {"metadata": {...}}
+  每个表: {"__table__": "<表名>"} 之后每行一条记录（数据库列名为键）
+导出使用服务端游标分批读取，序列化与压缩在工作线程中进行，内存占用与数据库大小无关。
+还原同时兼容旧版（1.0）的单个 JSON 文档格式。
 """
+import asyncio
 import gzip
 import json
 import logging
-from datetime import datetime
+import os
+from datetime import date, datetime
+from decimal import Decimal
 from pathlib import Path
-from typing import Callable, List, Dict, Any, Optional
+from typing import Callable, List, Dict, Any, Optional, Set
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, inspect
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select, insert, inspect
 
 from src.db import crud, orm_models
 from src.core import settings, get_now
@@ -24,6 +32,14 @@ logger = logging.getLogger(__name__)
 DEFAULT_BACKUP_PATH = "/app/config/sql_backup"
 DEFAULT_RETENTION_COUNT = 5
 
+# 备份格式版本（2.0 = NDJSON 流式格式）
+BACKUP_FORMAT_VERSION = "2.0"
+# 流式读写时每批处理的记录数
+STREAM_BATCH_SIZE = 1000
+# 日志类表：数据量大且可再生，可通过 backupExcludeLogTables 排除
+LOG_TABLES = {"token_access_logs", "external_api_logs", "ai_metrics_log", "task_history"}
+TABLE_MARKER_KEY = "__table__"
+
 
 def _build_backup_tables() -> List[tuple]:
     """
@@ -85,6 +101,76 @@ def model_to_dict(obj) -> Dict[str, Any]:
     return result
 
 
+def _json_default(value: Any) -> Any:
+    """json.dumps 的兜底序列化"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode("utf-8", errors="replace")
+    raise TypeError(f"无法序列化的类型: {type(value).__name__}")
+
+
+class _BackupWriter:
+    """NDJSON 备份写入器，所有方法都在工作线程中调用"""
+
+    def __init__(self, filepath: Path):
+        # compresslevel=6 在体积与速度之间取平衡，默认的 9 对大表过慢
+        self._file = gzip.open(filepath, "wt", encoding="utf-8", compresslevel=6)
+
+    def _dumps(self, obj: Dict[str, Any]) -> str:
+        return json.dumps(obj, ensure_ascii=False, default=_json_default, separators=(",", ":"))
+
+    def write_line(self, obj: Dict[str, Any]):
+        self._file.write(self._dumps(obj))
+        self._file.write("\n")
+
+    def write_rows(self, rows) -> int:
+        self._file.write("".join(self._dumps(dict(row)) + "\n" for row in rows))
+        return len(rows)
+
+    def close(self):
+        self._file.close()
+
+
+class _BackupReader:
+    """NDJSON 备份读取器，所有方法都在工作线程中调用"""
+
+    def __init__(self, filepath: Path):
+        self._file = gzip.open(filepath, "rt", encoding="utf-8")
+
+    def read_metadata(self) -> Optional[Dict[str, Any]]:
+        """读取首行元数据；旧版单文档格式返回 None"""
+        first_line = self._file.readline()
+        try:
+            header = json.loads(first_line)
+        except ValueError:
+            return None
+        if isinstance(header, dict) and isinstance(header.get("metadata"), dict):
+            return header["metadata"]
+        return None
+
+    def read_lines(self, max_lines: int) -> List[Dict[str, Any]]:
+        lines = []
+        for line in self._file:
+            line = line.strip()
+            if line:
+                lines.append(json.loads(line))
+                if len(lines) >= max_lines:
+                    break
+        return lines
+
+    def close(self):
+        self._file.close()
+
+
+def _load_legacy_backup(filepath: Path) -> Dict[str, Any]:
+    """读取 1.0 版单个 JSON 文档格式的备份"""
+    with gzip.open(filepath, "rt", encoding="utf-8") as f:
+        return json.load(f)
+
+
 async def get_backup_path(session: AsyncSession) -> Path:
     """获取备份路径"""
     path_str = await crud.get_config_value(session, "backupPath", DEFAULT_BACKUP_PATH)
@@ -104,6 +190,12 @@ async def get_retention_count(session: AsyncSession) -> int:
         return DEFAULT_RETENTION_COUNT
 
 
+async def get_exclude_log_tables(session: AsyncSession) -> bool:
+    """是否在备份中排除日志类表"""
+    value = await crud.get_config_value(session, "backupExcludeLogTables", "false")
+    return str(value).lower() == "true"
+
+
 async def create_backup(session: AsyncSession, progress_callback: Optional[Callable] = None) -> Dict[str, Any]:
     """
     创建数据库备份
@@ -120,55 +212,69 @@ async def create_backup(session: AsyncSession, progress_callback: Optional[Calla
     # 获取保留数量配置
     retention_count = await get_retention_count(session)
 
+    exclude_log_tables = await get_exclude_log_tables(session)
+    tables = [
+        (name, cls) for name, cls in BACKUP_TABLES
+        if not (exclude_log_tables and name in LOG_TABLES)
+    ]
+    excluded = [name for name, _ in BACKUP_TABLES if exclude_log_tables and name in LOG_TABLES]
+
     # 记录备份信息
-    logger.info(f"开始创建备份: 路径={backup_path}, 保留数量={retention_count}")
-    
-    # 构建备份数据
-    backup_data = {
-        "metadata": {
-            "version": "1.0",
-            "source_db_type": settings.database.type.lower(),
-            "created_at": get_now().isoformat(),
-            "tables": [name for name, _ in BACKUP_TABLES],
-        },
-        "data": {}
+    logger.info(f"开始创建备份: 路径={backup_path}, 保留数量={retention_count}, 排除日志表={exclude_log_tables}")
+
+    metadata = {
+        "version": BACKUP_FORMAT_VERSION,
+        "format": "ndjson",
+        "source_db_type": settings.database.type.lower(),
+        "created_at": get_now().isoformat(),
+        "tables": [name for name, _ in tables],
+        "excluded_tables": excluded,
     }
-    
-    total_tables = len(BACKUP_TABLES)
+
+    total_tables = len(tables)
     total_records = 0
-    
+
     # 收集每个表的导出信息，最后统一打印
     export_summary = []
 
-    for idx, (table_name, model_class) in enumerate(BACKUP_TABLES):
-        if progress_callback:
-            progress = int((idx / total_tables) * 80)
-            await progress_callback(progress, f"正在导出表: {table_name}...")
+    # 先写入临时文件，完成后再原子替换，避免备份列表中出现写了一半的文件
+    tmp_path = filepath.with_name(filename + ".tmp")
+    writer = await asyncio.to_thread(_BackupWriter, tmp_path)
+    try:
+        await asyncio.to_thread(writer.write_line, {"metadata": metadata})
 
-        try:
-            stmt = select(model_class)
-            result = await session.execute(stmt)
-            records = result.scalars().all()
+        for idx, (table_name, model_class) in enumerate(tables):
+            if progress_callback:
+                progress = int((idx / total_tables) * 90)
+                await progress_callback(progress, f"正在导出表: {table_name}...")
 
-            backup_data["data"][table_name] = [model_to_dict(r) for r in records]
-            total_records += len(records)
-            export_summary.append(f"{table_name}: {len(records)}条")
-        except Exception as e:
-            logger.warning(f"导出表 {table_name} 失败: {e}")
-            backup_data["data"][table_name] = []
-            export_summary.append(f"{table_name}: 失败")
+            await asyncio.to_thread(writer.write_line, {TABLE_MARKER_KEY: table_name})
+            table_count = 0
+            try:
+                # 使用服务端游标按批读取，按数据库列名输出
+                stmt = select(model_class.__table__).execution_options(yield_per=STREAM_BATCH_SIZE)
+                result = await session.stream(stmt)
+                async for partition in result.mappings().partitions():
+                    table_count += await asyncio.to_thread(writer.write_rows, partition)
+                total_records += table_count
+                export_summary.append(f"{table_name}: {table_count}条")
+            except Exception as e:
+                logger.warning(f"导出表 {table_name} 失败: {e}")
+                total_records += table_count
+                export_summary.append(f"{table_name}: 失败 (已导出{table_count}条)")
+
+        await asyncio.to_thread(writer.close)
+    except BaseException:
+        await asyncio.to_thread(writer.close)
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    os.replace(tmp_path, filepath)
 
     # 一次性打印所有表的导出摘要（多行格式）
     summary_lines = "\n".join(f"  - {item}" for item in export_summary)
-    logger.info(f"导出完成 ({len(BACKUP_TABLES)}个表, 共{total_records}条记录):\n{summary_lines}")
-    
-    # 写入压缩文件
-    if progress_callback:
-        await progress_callback(85, "正在压缩备份文件...")
-    
-    with gzip.open(filepath, 'wt', encoding='utf-8') as f:
-        json.dump(backup_data, f, ensure_ascii=False, indent=2)
-    
+    logger.info(f"导出完成 ({total_tables}个表, 共{total_records}条记录):\n{summary_lines}")
+
     file_size = filepath.stat().st_size
     
     # 清理旧备份
@@ -265,49 +371,209 @@ async def delete_backup(session: AsyncSession, filename: str) -> bool:
     return True
 
 
-async def restore_backup(session: AsyncSession, filename: str, progress_callback: Optional[Callable] = None) -> Dict[str, Any]:
-    """
-    从备份还原数据库
-    警告：此操作会清空现有数据！
-    """
-    from sqlalchemy import delete
-
-    backup_path = await get_backup_path(session)
-    filepath = backup_path / filename
-
-    if not filepath.exists():
-        raise FileNotFoundError(f"备份文件不存在: {filename}")
-
-    # 读取备份数据
-    if progress_callback:
-        await progress_callback(5, "正在读取备份文件...")
+class _RecordConverter:
+    """将备份记录（数据库列名为键）转换为可插入的 ORM 属性字典"""
+
+    def __init__(self, table_name: str, model_class, now: datetime):
+        self.table_name = table_name
+        self.now = now
+        # 获取数据库列名到 Python 属性名的映射
+        self.column_mapping = get_column_mapping(model_class)
+        self.valid_attrs = set(self.column_mapping.values())
+
+        # 存储 NOT NULL 字段信息
+        # not_null_datetime_attrs: {Python属性名: 数据库列名} - 日期时间类型
+        # not_null_string_attrs: {Python属性名: 数据库列名} - 字符串类型
+        # not_null_required_attrs: {Python属性名: 数据库列名} - 必须有值的字段（如外键）
+        self.not_null_datetime_attrs: Dict[str, str] = {}
+        self.not_null_string_attrs: Dict[str, str] = {}
+        self.not_null_required_attrs: Dict[str, str] = {}  # 无法提供默认值的 NOT NULL 字段
+        self.primary_key_attrs: Set[str] = set()
+        self.datetime_attrs: Set[str] = set()
+        self.string_attrs: Set[str] = set()
+
+        # 遍历 column_attrs 获取正确的属性名和列信息
+        mapper = inspect(model_class)
+        for attr_name, column_prop in mapper.column_attrs.items():
+            for column in column_prop.columns:
+                col_type_class = type(column.type).__name__.upper()
+                col_type = str(column.type).upper()
+                is_datetime = 'DATETIME' in col_type or 'TIMESTAMP' in col_type or 'NAIVEDATETIME' in col_type_class
+                is_string = 'VARCHAR' in col_type or 'STRING' in col_type or 'TEXT' in col_type
+                if is_datetime:
+                    self.datetime_attrs.add(attr_name)
+                elif is_string:
+                    self.string_attrs.add(attr_name)
+
+                # 获取主键字段
+                if column.primary_key:
+                    self.primary_key_attrs.add(attr_name)
+                    continue
 
-    with gzip.open(filepath, 'rt', encoding='utf-8') as f:
-        backup_data = json.load(f)
+                # 检查是否为 NOT NULL 字段（非主键）
+                if not column.nullable:
+                    # 检查是否有外键约束
+                    has_foreign_key = len(column.foreign_keys) > 0
+
+                    if is_datetime:
+                        self.not_null_datetime_attrs[attr_name] = column.name
+                    elif is_string:
+                        self.not_null_string_attrs[attr_name] = column.name
+                    elif has_foreign_key or 'INT' in col_type or 'BIGINT' in col_type:
+                        # 外键或整数类型的 NOT NULL 字段，无法提供默认值
+                        self.not_null_required_attrs[attr_name] = column.name
+
+        if self.not_null_datetime_attrs:
+            logger.debug(f"表 {table_name} 的 NOT NULL 日期时间属性: {self.not_null_datetime_attrs}")
+        if self.not_null_string_attrs:
+            logger.debug(f"表 {table_name} 的 NOT NULL 字符串属性: {self.not_null_string_attrs}")
+        if self.not_null_required_attrs:
+            logger.debug(f"表 {table_name} 的 NOT NULL 必需属性: {self.not_null_required_attrs}")
+
+    def convert(self, record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """转换单条记录，记录无效时返回 None"""
+        table_name = self.table_name
+        converted_record = {}
+        for db_col_name, value in record.items():
+            # 获取对应的 Python 属性名
+            attr_name = self.column_mapping.get(db_col_name, db_col_name)
+
+            # 只添加模型中存在的属性，忽略无效字段
+            if attr_name not in self.valid_attrs:
+                logger.debug(f"忽略无效字段: {db_col_name} -> {attr_name}")
+                continue
 
-    metadata = backup_data.get("metadata", {})
-    data = backup_data.get("data", {})
+            # 处理 datetime 字段 - 将 ISO 格式字符串转换为 datetime 对象
+            if isinstance(value, str) and attr_name in self.datetime_attrs:
+                try:
+                    value = datetime.fromisoformat(value)
+                except ValueError:
+                    pass
+            # 目标字段是字符串类型时保持字符串
+            elif isinstance(value, datetime) and attr_name in self.string_attrs:
+                value = value.isoformat()
+
+            converted_record[attr_name] = value
+
+        # 为 NOT NULL 的日期时间字段提供默认值
+        # 这样可以处理从 MySQL 备份还原到 PostgreSQL 时的 NOT NULL 约束问题
+        for attr_name, db_col_name in self.not_null_datetime_attrs.items():
+            if converted_record.get(attr_name) is None:
+                converted_record[attr_name] = self.now
+                logger.info(f"为 {table_name}.{attr_name} (db: {db_col_name}) 设置默认时间: {self.now}")
+
+        # 为 NOT NULL 的字符串字段提供默认值
+        for attr_name, db_col_name in self.not_null_string_attrs.items():
+            if converted_record.get(attr_name) is None:
+                # 尝试从字段名推断默认值
+                default_value = ""
+                if 'provider' in attr_name.lower():
+                    # 对于 provider 类型字段，尝试从其他字段推断
+                    name_val = converted_record.get('name', '')
+                    if name_val:
+                        default_value = str(name_val).lower()
+                converted_record[attr_name] = default_value
+                logger.info(f"为 {table_name}.{attr_name} (db: {db_col_name}) 设置默认值: '{default_value}'")
+
+        # 检查主键字段是否为空，如果为空则跳过该记录
+        for pk_attr in self.primary_key_attrs:
+            if converted_record.get(pk_attr) is None:
+                logger.warning(f"跳过记录: {table_name} 主键字段 {pk_attr} 为空")
+                return None
+
+        # 检查必需字段（如外键）是否为空，如果为空则跳过该记录
+        for req_attr, db_col_name in self.not_null_required_attrs.items():
+            if converted_record.get(req_attr) is None:
+                logger.warning(f"跳过记录: {table_name} 必需字段 {req_attr} (db: {db_col_name}) 为空")
+                return None
+
+        return converted_record
+
+
+async def _insert_batch(session: AsyncSession, table_name: str, model_class, rows: List[Dict[str, Any]]):
+    """批量插入一批记录"""
+    if not rows:
+        return
+    try:
+        await session.execute(insert(model_class), rows)
+    except Exception as e:
+        logger.error(f"还原表 {table_name} 失败: {e}")
+        raise
+
+
+async def _restore_stream_tables(
+    session: AsyncSession,
+    reader: "_BackupReader",
+    metadata: Dict[str, Any],
+    progress_callback: Optional[Callable]
+) -> int:
+    """从 NDJSON 流中逐批读取并插入数据"""
+    model_by_table = dict(BACKUP_TABLES)
+    backup_tables = metadata.get("tables") or [name for name, _ in BACKUP_TABLES]
+    total_tables = max(len(backup_tables), 1)
+    now = get_now()
 
-    if progress_callback:
-        await progress_callback(10, "正在验证备份数据...")
+    total_records = 0
+    table_index = 0
+    current_table: Optional[str] = None
+    model_class = None
+    converter: Optional[_RecordConverter] = None
+    table_count = 0
+    buffer: List[Dict[str, Any]] = []
+
+    async def finish_table():
+        nonlocal buffer
+        if current_table is None:
+            return
+        if model_class is not None:
+            await _insert_batch(session, current_table, model_class, buffer)
+            logger.info(f"还原表 {current_table}: {table_count} 条记录")
+        buffer = []
+
+    while True:
+        lines = await asyncio.to_thread(reader.read_lines, STREAM_BATCH_SIZE)
+        if not lines:
+            break
+        for obj in lines:
+            marker = obj.get(TABLE_MARKER_KEY)
+            if isinstance(marker, str) and len(obj) == 1:
+                await finish_table()
+                current_table = marker
+                model_class = model_by_table.get(marker)
+                converter = _RecordConverter(marker, model_class, now) if model_class is not None else None
+                table_count = 0
+                if model_class is None:
+                    logger.warning(f"备份中的表 {marker} 在当前版本中不存在，已跳过")
+                if progress_callback:
+                    progress = 50 + int((table_index / total_tables) * 45)
+                    await progress_callback(progress, f"正在还原表: {marker}...")
+                table_index += 1
+                continue
 
-    # 按依赖关系的逆序删除数据（先删除有外键依赖的表）
-    tables_reversed = list(reversed(BACKUP_TABLES))
-    total_tables = len(tables_reversed)
+            if converter is None:
+                continue
+            converted = converter.convert(obj)
+            if converted is None:
+                continue
+            buffer.append(converted)
+            table_count += 1
+            total_records += 1
 
-    for idx, (table_name, model_class) in enumerate(tables_reversed):
-        if progress_callback:
-            progress = 10 + int((idx / total_tables) * 40)
-            await progress_callback(progress, f"正在清空表: {table_name}...")
+        if len(buffer) >= STREAM_BATCH_SIZE and model_class is not None:
+            await _insert_batch(session, current_table, model_class, buffer)
+            buffer = []
 
-        try:
-            await session.execute(delete(model_class))
-        except Exception as e:
-            logger.warning(f"清空表 {table_name} 失败: {e}")
+    await finish_table()
+    return total_records
 
-    await session.flush()
 
-    # 按依赖顺序插入数据
+async def _restore_legacy_tables(
+    session: AsyncSession,
+    data: Dict[str, List[Dict[str, Any]]],
+    progress_callback: Optional[Callable]
+) -> int:
+    """还原旧版单文档格式的数据"""
+    total_tables = len(BACKUP_TABLES)
     total_records = 0
     now = get_now()
 
@@ -320,147 +586,75 @@ async def restore_backup(session: AsyncSession, filename: str, progress_callback
         if not records:
             continue
 
-        try:
-            # 获取数据库列名到 Python 属性名的映射
-            column_mapping = get_column_mapping(model_class)
-
-            # 获取模型的所有有效 Python 属性名
-            mapper = inspect(model_class)
-            valid_attrs = set(column_mapping.values())
-
-            # 存储 NOT NULL 字段信息
-            # not_null_datetime_attrs: {Python属性名: 数据库列名} - 日期时间类型
-            # not_null_string_attrs: {Python属性名: 数据库列名} - 字符串类型
-            # not_null_required_attrs: {Python属性名: 数据库列名} - 必须有值的字段（如外键）
-            not_null_datetime_attrs = {}
-            not_null_string_attrs = {}
-            not_null_required_attrs = {}  # 无法提供默认值的 NOT NULL 字段
-            primary_key_attrs = set()
-
-            # 遍历 column_attrs 获取正确的属性名和列信息
-            for attr_name, column_prop in mapper.column_attrs.items():
-                for column in column_prop.columns:
-                    # 获取主键字段
-                    if column.primary_key:
-                        primary_key_attrs.add(attr_name)
-                        continue
-
-                    # 检查是否为 NOT NULL 字段（非主键）
-                    if not column.nullable:
-                        col_type_class = type(column.type).__name__.upper()
-                        col_type = str(column.type).upper()
-
-                        # 检查是否有外键约束
-                        has_foreign_key = len(column.foreign_keys) > 0
-
-                        if 'DATETIME' in col_type or 'TIMESTAMP' in col_type or 'NAIVEDATETIME' in col_type_class:
-                            not_null_datetime_attrs[attr_name] = column.name
-                        elif 'VARCHAR' in col_type or 'STRING' in col_type or 'TEXT' in col_type:
-                            not_null_string_attrs[attr_name] = column.name
-                        elif has_foreign_key or 'INT' in col_type or 'BIGINT' in col_type:
-                            # 外键或整数类型的 NOT NULL 字段，无法提供默认值
-                            not_null_required_attrs[attr_name] = column.name
-
-            if not_null_datetime_attrs:
-                logger.debug(f"表 {table_name} 的 NOT NULL 日期时间属性: {not_null_datetime_attrs}")
-            if not_null_string_attrs:
-                logger.debug(f"表 {table_name} 的 NOT NULL 字符串属性: {not_null_string_attrs}")
-            if not_null_required_attrs:
-                logger.debug(f"表 {table_name} 的 NOT NULL 必需属性: {not_null_required_attrs}")
-
-            for record in records:
-                # 将数据库列名转换为 Python 属性名
-                converted_record = {}
-                for db_col_name, value in record.items():
-                    # 获取对应的 Python 属性名
-                    attr_name = column_mapping.get(db_col_name, db_col_name)
-
-                    # 只添加模型中存在的属性，忽略无效字段
-                    if attr_name not in valid_attrs:
-                        logger.debug(f"忽略无效字段: {db_col_name} -> {attr_name}")
-                        continue
-
-                    # 处理 datetime 字段 - 将 ISO 格式字符串转换为 datetime 对象
-                    if isinstance(value, str) and 'T' in value:
-                        try:
-                            value = datetime.fromisoformat(value)
-                        except:
-                            pass
-
-                    # 处理 datetime 对象 - 如果目标字段是字符串类型，转换为字符串
-                    if isinstance(value, datetime):
-                        # 检查目标字段是否为字符串类型
-                        if attr_name in not_null_string_attrs or attr_name not in not_null_datetime_attrs:
-                            # 检查该属性对应的列类型
-                            is_string_field = False
-                            for a_name, col_prop in mapper.column_attrs.items():
-                                if a_name == attr_name:
-                                    for col in col_prop.columns:
-                                        col_type = str(col.type).upper()
-                                        if 'VARCHAR' in col_type or 'STRING' in col_type or 'TEXT' in col_type:
-                                            is_string_field = True
-                                            break
-                                    break
-                            if is_string_field:
-                                value = value.isoformat()
-
-                    converted_record[attr_name] = value
-
-                # 为 NOT NULL 的日期时间字段提供默认值
-                # 这样可以处理从 MySQL 备份还原到 PostgreSQL 时的 NOT NULL 约束问题
-                for attr_name, db_col_name in not_null_datetime_attrs.items():
-                    current_value = converted_record.get(attr_name)
-                    if current_value is None:
-                        converted_record[attr_name] = now
-                        logger.info(f"为 {table_name}.{attr_name} (db: {db_col_name}) 设置默认时间: {now}")
-
-                # 为 NOT NULL 的字符串字段提供默认值
-                for attr_name, db_col_name in not_null_string_attrs.items():
-                    current_value = converted_record.get(attr_name)
-                    if current_value is None:
-                        # 尝试从字段名推断默认值
-                        default_value = ""
-                        attr_lower = attr_name.lower()
-                        if 'provider' in attr_lower:
-                            # 对于 provider 类型字段，尝试从其他字段推断
-                            if 'name' in converted_record:
-                                name_val = converted_record.get('name', '')
-                                if name_val:
-                                    default_value = str(name_val).lower()
-                        converted_record[attr_name] = default_value
-                        logger.info(f"为 {table_name}.{attr_name} (db: {db_col_name}) 设置默认值: '{default_value}'")
-
-                # 检查主键字段是否为空，如果为空则跳过该记录
-                skip_record = False
-                for pk_attr in primary_key_attrs:
-                    if pk_attr not in converted_record or converted_record.get(pk_attr) is None:
-                        logger.warning(f"跳过记录: {table_name} 主键字段 {pk_attr} 为空")
-                        skip_record = True
-                        break
-
-                if skip_record:
-                    continue
+        converter = _RecordConverter(table_name, model_class, now)
+        table_count = 0
+        for i in range(0, len(records), STREAM_BATCH_SIZE):
+            batch = [r for r in (converter.convert(rec) for rec in records[i:i + STREAM_BATCH_SIZE]) if r is not None]
+            await _insert_batch(session, table_name, model_class, batch)
+            table_count += len(batch)
 
-                # 检查必需字段（如外键）是否为空，如果为空则跳过该记录
-                for req_attr, db_col_name in not_null_required_attrs.items():
-                    if req_attr not in converted_record or converted_record.get(req_attr) is None:
-                        logger.warning(f"跳过记录: {table_name} 必需字段 {req_attr} (db: {db_col_name}) 为空")
-                        skip_record = True
-                        break
+        total_records += table_count
+        logger.info(f"还原表 {table_name}: {table_count} 条记录")
 
-                if skip_record:
-                    continue
+    return total_records
 
-                obj = model_class(**converted_record)
-                session.add(obj)
 
-            total_records += len(records)
-            logger.info(f"还原表 {table_name}: {len(records)} 条记录")
-        except Exception as e:
-            logger.error(f"还原表 {table_name} 失败: {e}")
-            raise
+async def restore_backup(session: AsyncSession, filename: str, progress_callback: Optional[Callable] = None) -> Dict[str, Any]:
+    """
+    从备份还原数据库
+    警告：此操作会清空现有数据！
+    """
+    from sqlalchemy import delete
+
+    backup_path = await get_backup_path(session)
+    filepath = backup_path / filename
+
+    if not filepath.exists():
+        raise FileNotFoundError(f"备份文件不存在: {filename}")
+
+    # 读取备份元数据
+    if progress_callback:
+        await progress_callback(5, "正在读取备份文件...")
+
+    reader = await asyncio.to_thread(_BackupReader, filepath)
+    try:
+        metadata = await asyncio.to_thread(reader.read_metadata)
+        legacy_data = None
+        if metadata is None:
+            # 旧版单文档格式，只能整体加载
+            await asyncio.to_thread(reader.close)
+            logger.info("检测到旧版备份格式，将整体加载后还原")
+            backup_data = await asyncio.to_thread(_load_legacy_backup, filepath)
+            metadata = backup_data.get("metadata", {})
+            legacy_data = backup_data.get("data", {})
+            del backup_data
+
+        if progress_callback:
+            await progress_callback(10, "正在验证备份数据...")
+
+        # 按依赖关系的逆序删除数据（先删除有外键依赖的表）
+        tables_reversed = list(reversed(BACKUP_TABLES))
+        total_tables = len(tables_reversed)
+
+        for idx, (table_name, model_class) in enumerate(tables_reversed):
+            if progress_callback:
+                progress = 10 + int((idx / total_tables) * 40)
+                await progress_callback(progress, f"正在清空表: {table_name}...")
+
+            try:
+                await session.execute(delete(model_class))
+            except Exception as e:
+                logger.warning(f"清空表 {table_name} 失败: {e}")
+
+        await session.flush()
 
-    await session.flush()
+        # 按依赖顺序分批插入数据
+        if legacy_data is not None:
+            total_records = await _restore_legacy_tables(session, legacy_data, progress_callback)
+        else:
+            total_records = await _restore_stream_tables(session, reader, metadata, progress_callback)
+    finally:
+        await asyncio.to_thread(reader.close)
 
     # 重置 PostgreSQL 自增序列
     # 这是必要的，因为还原数据时插入了带有 id 的记录，
@@ -5,10 +5,14 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.db import crud
 from src.tasks import webhook_search_and_dispatch_task
+from src.webhook._ingest import WebhookEvent, coalesce_webhook_events
 from .base import BaseJob
 
 logger = logging.getLogger(__name__)
 
+# 每批认领的到期任务数
+CLAIM_BATCH_SIZE = 100
+
 class WebhookProcessorJob(BaseJob):
     job_type = "webhookProcessor"
     job_name = "Webhook 延时任务处理器"
@@ -17,55 +21,78 @@ class WebhookProcessorJob(BaseJob):
     async def run(self, session: AsyncSession, progress_callback: Callable):
         """
         执行 Webhook 延时任务处理。
+
+        每次认领一批到期任务（一条 UPDATE 置为 processing），同一剧集同一季的多条任务
+        合并为一个搜索任务提交，最后批量删除已提交的行、批量标记失败的行。
         """
         await progress_callback(0, "开始检查待处理的 Webhook 任务...")
-        
-        due_tasks = await crud.get_due_webhook_tasks(session)
-        if not due_tasks:
-            await progress_callback(100, "没有需要处理的 Webhook 任务。")
-            return
-
-        total_tasks = len(due_tasks)
-        logger.info(f"找到 {total_tasks} 个待处理的 Webhook 任务，开始执行...")
 
-        for i, task in enumerate(due_tasks):
-            progress = int(((i + 1) / total_tasks) * 100)
-            await progress_callback(progress, f"正在处理任务 {i+1}/{total_tasks}: {task.taskTitle}")
+        submitted_total = failed_total = rows_total = 0
+        while True:
+            claimed = await crud.claim_due_webhook_tasks(session, limit=CLAIM_BATCH_SIZE)
+            if not claimed:
+                break
+            rows_total += len(claimed)
+            logger.info(f"认领了 {len(claimed)} 个待处理的 Webhook 任务，开始执行...")
 
-            try:
-                # 解析 payload 并提交到 TaskManager
-                payload = task.payload
+            events = []
+            row_ids = {}
+            for row in claimed:
+                payload = row.payload
                 if isinstance(payload, str):
                     payload = json.loads(payload)
+                event = WebhookEvent(row.taskTitle, row.uniqueKey, payload, row.webhookSource)
+                events.append(event)
+                row_ids[id(event)] = row.id
 
-                # 使用 webhook_search_and_dispatch_task 的逻辑
-                # 使用默认参数 t=task, p=payload 捕获当前循环变量的值,避免闭包问题
-                task_coro = lambda s, cb, t=task, p=payload: webhook_search_and_dispatch_task(
-                    webhookSource=t.webhookSource,
-                    progress_callback=cb,
-                    session=s,
-                    manager=self.scraper_manager,
-                    task_manager=self.task_manager,
-                    metadata_manager=self.metadata_manager,
-                    config_manager=self.config_manager,
-                    ai_matcher_manager=self.ai_matcher_manager,
-                    rate_limiter=self.rate_limiter,
-                    title_recognition_manager=self.title_recognition_manager,
-                    **p
-                )
-                # 修正：不使用 run_immediately，让任务正常进入队列
-                # 这样任务可以正确处理流控暂停和恢复
-                task_id, _ = await self.task_manager.submit_task(
-                    task_coro, task.taskTitle, unique_key=task.uniqueKey
+            done_ids, failed_ids = [], []
+            groups = coalesce_webhook_events(events)
+            try:
+                for i, (merged, members) in enumerate(groups):
+                    member_ids = [row_ids[id(e)] for e in members]
+                    await progress_callback(
+                        min(99, int((i + 1) / len(groups) * 100)),
+                        f"正在处理任务 {i + 1}/{len(groups)}: {merged.task_title}"
+                    )
+                    try:
+                        # 使用默认参数 m=merged 捕获当前循环变量的值,避免闭包问题
+                        task_coro = lambda s, cb, m=merged: webhook_search_and_dispatch_task(
+                            webhookSource=m.webhook_source,
+                            progress_callback=cb,
+                            session=s,
+                            manager=self.scraper_manager,
+                            task_manager=self.task_manager,
+                            metadata_manager=self.metadata_manager,
+                            config_manager=self.config_manager,
+                            ai_matcher_manager=self.ai_matcher_manager,
+                            rate_limiter=self.rate_limiter,
+                            title_recognition_manager=self.title_recognition_manager,
+                            **m.payload
+                        )
+                        # 不使用 run_immediately，让任务正常进入队列，以便正确处理流控暂停和恢复
+                        task_id, _ = await self.task_manager.submit_task(
+                            task_coro, merged.task_title, unique_key=merged.unique_key
+                        )
+                        # 不等待任务完成，提交成功后即删除 webhook 记录
+                        done_ids.extend(member_ids)
+                        suffix = f"（合并了 {len(members)} 条）" if len(members) > 1 else ""
+                        logger.info(f"Webhook 任务 '{merged.task_title}' 已提交到任务队列 (ID: {task_id}){suffix}")
+                    except Exception as e:
+                        logger.error(f"处理 Webhook 任务 (ID: {member_ids}) 时失败: {e}", exc_info=True)
+                        # 如果提交失败，则将任务标记为失败，以便用户可以手动重试
+                        failed_ids.extend(member_ids)
+            finally:
+                await crud.delete_webhook_tasks(session, done_ids)
+                await crud.set_webhook_tasks_status(session, failed_ids, "failed")
+                # 中途被中断时，把尚未处理的行放回待处理状态
+                handled = set(done_ids) | set(failed_ids)
+                await crud.set_webhook_tasks_status(
+                    session, [row.id for row in claimed if row.id not in handled], "pending"
                 )
-                # 修正：不等待任务完成，直接删除 webhook 记录
-                # 任务会在队列中正常执行，不会因为流控暂停而卡住
-                await session.delete(task)
-                logger.info(f"Webhook 任务 '{task.taskTitle}' 已提交到任务队列 (ID: {task_id})")
+            submitted_total += len(done_ids)
+            failed_total += len(failed_ids)
 
-            except Exception as e:
-                logger.error(f"处理 Webhook 任务 (ID: {task.id}) 时失败: {e}", exc_info=True)
-                # 如果提交失败，则将任务标记为失败，以便用户可以手动重试
-                await crud.update_webhook_task_status(session, task.id, "failed")
-            finally:
-                await session.commit() # 确保状态更新或删除被提交
\ No newline at end of file
+        if not rows_total:
+            await progress_callback(100, "没有需要处理的 Webhook 任务。")
+            return
+        await progress_callback(100, f"处理完成: 提交 {submitted_total} 条，失败 {failed_total} 条。")
@@ -1,4 +1,3 @@
-import time
 import warnings
 warnings.filterwarnings("ignore", message="urllib3.*doesn't match a supported version")
 import uvicorn
@@ -20,6 +19,8 @@ from sqlalchemy import text
 from src.core import settings
 from src.core.default_configs import get_default_configs
 from src.core.cache import init_cache_backend, close_cache_backend
+from src.core.coordination import init_coordinator, close_coordinator, share_cache_invalidation
+from src.core.startup import StartupTracker
 from src.db import crud, orm_models, init_db_tables, close_db_engine, create_initial_admin_user, get_db_type, DatabaseStartupError
 from src.db import ConfigManager, CacheManager  # 管理器从 db 层导入
 from src.services import (
@@ -29,10 +30,11 @@ from src.services import (
     NotificationService, NotificationManager,
     TunnelService, apply_tunnel_from_notification_manager,
 )
-from src.utils import InternalPollingManager, init_proxy_middleware
+from src.utils import InternalPollingManager, init_proxy_middleware, get_outbound_limiter
 from src.api import api_router, control_router
 from src.api.dandan import dandan_router
 from src.api.middleware import log_not_found_requests, capture_api_response
+from src.db.query_metrics import track_request_queries
 from src.api.mcp import setup_mcp
 from src.ai import AIMatcherManager
 from src.ai.ai_prompts import DEFAULT_AI_MATCH_PROMPT, DEFAULT_AI_RECOGNITION_PROMPT, DEFAULT_AI_ALIAS_VALIDATION_PROMPT, DEFAULT_AI_ALIAS_EXPANSION_PROMPT, DEFAULT_AI_SEASON_MAPPING_PROMPT
@@ -94,6 +96,124 @@ async def _apply_tunnel_from_channels(app):
         local_port=settings.server.port,
     )
 
+
+async def _start_leader_services(app):
+    """
+    只在一个进程中运行的后台服务: 内置轮询、定期清理、通知渠道（Bot 轮询）和隧道。
+    单进程时启动即调用；多工作进程时由领导者调用，跟随者在接替领导者后调用。
+    """
+    if getattr(app.state, "leader_services_started", False):
+        return
+    app.state.leader_services_started = True
+    app.state.cleanup_task = asyncio.create_task(cleanup_task(app))
+    # 内置轮询任务管理器（任务在 start() 中自动注册）
+    app.state.internal_polling = InternalPollingManager(app)
+    await app.state.internal_polling.start()
+    await app.state.notification_manager.start_channels()
+    await _apply_tunnel_from_channels(app)
+
+
+async def _stop_leader_services(app):
+    """失去领导者身份（认领过期被其它进程接替）时停止领导者服务，避免与新领导者重复运行"""
+    if not getattr(app.state, "leader_services_started", False):
+        return
+    app.state.leader_services_started = False
+    logger.warning("本进程已不再是领导者，停止定时任务、内置轮询、定期清理、通知渠道和隧道")
+    await app.state.scheduler_manager.pause()
+    if hasattr(app.state, "internal_polling"):
+        await app.state.internal_polling.stop()
+    if hasattr(app.state, "cleanup_task"):
+        app.state.cleanup_task.cancel()
+        try:
+            await app.state.cleanup_task
+        except asyncio.CancelledError:
+            pass
+    await app.state.notification_manager.stop_channels()
+    await app.state.tunnel_service.stop()
+
+
+async def _promote_to_leader(app):
+    """跟随者接替领导者: 处理中断任务、恢复定时任务并启动领导者服务"""
+    if getattr(app.state, "leader_services_started", False):
+        return
+    # 接替可能发生在启动后的后台初始化完成之前
+    for name in ("tasks", "scheduler", "notifications"):
+        await app.state.startup.wait_ready(name)
+    # 等待期间可能已失去领导者身份，或已由其它路径启动
+    if not app.state.coordinator.is_leader or getattr(app.state, "leader_services_started", False):
+        return
+    logger.info("本进程已成为领导者，开始运行后台服务")
+    await app.state.task_manager.recover_interrupted_tasks()
+    await app.state.scheduler_manager.resume()
+    await _start_leader_services(app)
+
+
+def _include_router_before_frontend(app, router, **kwargs):
+    """注册路由并移到前端 SPA 兜底路由之前（用于后台加载完成后才有的元数据源路由）"""
+    before = len(app.router.routes)
+    app.include_router(router, **kwargs)
+    new_routes = app.router.routes[before:]
+    index = getattr(app.state, "frontend_route_index", None)
+    if index is None or index >= before:
+        return
+    del app.router.routes[before:]
+    app.router.routes[index:index] = new_routes
+    app.state.frontend_route_index = index + len(new_routes)
+    app.openapi_schema = None
+
+
+def _defer_subsystems(app, startup, coordinator):
+    """声明在应用开始接受请求后于后台并发初始化的子系统及其依赖"""
+    session_factory = app.state.db_session_factory
+
+    async def _init_scrapers():
+        await app.state.scraper_manager.initialize()
+        # 一次性查询所有 scraper 设置并缓存，避免后续重复查询
+        async with session_factory() as session:
+            scraper_settings = await crud.get_all_scraper_settings(session)
+        app.state.scraper_manager._cached_scraper_settings = {
+            s['providerName']: s for s in scraper_settings
+        }
+
+    async def _init_metadata_sources():
+        await app.state.metadata_manager.initialize()
+        _include_router_before_frontend(app, app.state.metadata_manager.router, prefix="/api/metadata")
+        # Add bangumi specific routes with /bangumi prefix
+        if 'bangumi' in app.state.metadata_manager.sources:
+            bangumi_router = app.state.metadata_manager.sources['bangumi'].api_router
+            _include_router_before_frontend(app, bangumi_router, prefix="/api/bangumi", tags=["Bangumi"])
+
+    async def _start_tasks():
+        # 中断任务的恢复只由领导者处理，避免多个进程重复恢复同一任务
+        app.state.task_manager.start(recover_interrupted=coordinator.is_leader)
+
+    async def _start_scheduler():
+        # 跟随者只加载定时任务，不执行
+        await app.state.scheduler_manager.start(paused=not coordinator.is_leader)
+
+    async def _start_background_services():
+        # 轮询、清理、通知渠道和隧道只在领导者进程运行
+        if coordinator.is_leader:
+            await _start_leader_services(app)
+            # 发射系统启动通知（多工作进程时只由领导者发送一次）
+            try:
+                await app.state.notification_service.emit_event("system_start", {})
+            except Exception as e:
+                logger.error(f"发射 system_start 事件失败: {e}")
+        # 之后每次成为 / 失去领导者时启动 / 停止领导者服务
+        coordinator.on_leader(lambda: _promote_to_leader(app))
+        coordinator.on_demoted(lambda: _stop_leader_services(app))
+
+    startup.defer("scrapers", _init_scrapers)
+    startup.defer("metadata_sources", _init_metadata_sources)
+    startup.defer("media_servers", app.state.media_server_manager.initialize)
+    startup.defer("notifications", app.state.notification_manager.initialize)
+    startup.defer("tasks", _start_tasks, depends_on=("scrapers", "metadata_sources"))
+    startup.defer("scheduler", _start_scheduler, depends_on=("tasks",))
+    startup.defer("background_services", _start_background_services,
+                  depends_on=("scheduler", "notifications", "media_servers"))
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
@@ -107,221 +227,209 @@ async def lifespan(app: FastAPI):
     # 新增：在日志系统初始化后立即打印版本号
     logger.info(f"Misaka Danmaku API 版本 {APP_VERSION} 正在启动...")
 
+    # 关键路径（数据库、配置、鉴权、弹幕服务）按阶段计时；其余子系统在开始接受请求后于后台初始化
+    startup = StartupTracker()
+    app.state.startup = startup
+
     # 创建必要的目录
     _ensure_required_directories()
 
-    # init_db_tables 现在处理数据库创建、引擎和会话工厂的创建
-    try:
-        await init_db_tables(app)
-    except DatabaseStartupError:
-        os._exit(1)
-    session_factory = app.state.db_session_factory
-
-    # 注意：中断任务的处理已移至 TaskManager._handle_interrupted_tasks()
-    # 该方法会在 task_manager.start() 时自动执行，尝试恢复可恢复的任务，
-    # 并将无法恢复的任务标记为失败。不要在此处提前标记，否则会导致任务无法恢复。
+    # 多工作进程协调器（server.workers <= 1 时为单进程实现，不产生任何开销）
+    with startup.phase("coordinator"):
+        coordinator = await init_coordinator(settings)
+        app.state.coordinator = coordinator
 
-    # 新增:PostgreSQL序列自动修复(防止主键冲突)
-    if get_db_type() == "postgresql":
-        async with session_factory() as session:
+    # 建表、迁移和默认配置注册在多工作进程间串行执行
+    with startup.phase("database"):
+        async with coordinator.lock("startup:db-init"):
+            # init_db_tables 处理数据库创建、引擎和会话工厂的创建；结构版本未变化时跳过迁移检查
             try:
-                await session.execute(text(
-                    "SELECT setval('anime_id_seq', (SELECT COALESCE(MAX(id), 0) FROM anime))"
-                ))
-                await session.commit()
-                logger.info("已自动同步PostgreSQL的anime_id_seq序列")
-            except Exception as e:
-                logger.warning(f"同步PostgreSQL序列时出错(可忽略): {e}")
-
-    # 初始化配置管理器
-    app.state.config_manager = ConfigManager(session_factory)
-
-    # 注册默认配置(从default_configs.py导入)
-    ai_prompts = {
-        'DEFAULT_AI_MATCH_PROMPT': DEFAULT_AI_MATCH_PROMPT,
-        'DEFAULT_AI_RECOGNITION_PROMPT': DEFAULT_AI_RECOGNITION_PROMPT,
-        'DEFAULT_AI_ALIAS_VALIDATION_PROMPT': DEFAULT_AI_ALIAS_VALIDATION_PROMPT,
-        'DEFAULT_AI_ALIAS_EXPANSION_PROMPT': DEFAULT_AI_ALIAS_EXPANSION_PROMPT,
-        'DEFAULT_AI_SEASON_MAPPING_PROMPT': DEFAULT_AI_SEASON_MAPPING_PROMPT,
-    }
-    default_configs = get_default_configs(settings=settings, ai_prompts=ai_prompts)
-    # 添加运行时生成的配置
-    default_configs['jwtSecretKey'] = (secrets.token_hex(32), '用于签名JWT令牌的密钥，在首次启动时自动生成。')
-
-    await app.state.config_manager.register_defaults(default_configs)
-
-    # 初始化 TransportManager
-    app.state.transport_manager = TransportManager()
-
-    # 初始化缓存后端（Memory/Redis/Database/Hybrid，Redis 不可用时自动降级）
-    cache_backend = await init_cache_backend(
-        session_factory=session_factory,
-        cache_config=settings.cache,
-    )
-
-    # 初始化 CacheManager（使用新的缓存后端）
-    app.state.cache_manager = CacheManager(session_factory, backend=cache_backend)
-    logger.info("缓存管理器已初始化")
-
-    # 初始化 ProxyMiddleware
-    app.state.proxy_middleware = init_proxy_middleware(app.state.config_manager)
-    logger.info("代理中间件已初始化")
-
-    # 初始化 AIMatcherManager（传入 session_factory 用于 AI 调用统计持久化）
-    app.state.ai_matcher_manager = AIMatcherManager(app.state.config_manager, session_factory)
-    logger.info("AI匹配管理器已初始化")
-
-    # --- 并行优化的初始化顺序 ---
-    startup_start = time.time()
-
-    # 1-3. 创建管理器实例（不阻塞）
-    app.state.metadata_manager = MetadataSourceManager(session_factory, app.state.config_manager, None, app.state.cache_manager)
-    app.state.scraper_manager = ScraperManager(session_factory, app.state.config_manager, app.state.metadata_manager, app.state.transport_manager)
-    app.state.metadata_manager.scraper_manager = app.state.scraper_manager
-
-    # 4. 【并行优化】同时初始化 + 预热
-    logger.info("开始并行初始化...")
-    init_start = time.time()
-
-    # 先并行初始化两个管理器
-    await asyncio.gather(
-        app.state.scraper_manager.initialize(),
-        app.state.metadata_manager.initialize()
-    )
-
-    # 【优化】预加载所有配置到缓存
-    logger.info("预加载配置缓存...")
-    async with session_factory() as session:
-        # 预加载代理相关配置
-        proxy_mode = await crud.get_config_value(session, "proxyMode", "none")
-        proxy_url = await crud.get_config_value(session, "proxyUrl", "")
-        proxy_enabled = await crud.get_config_value(session, "proxyEnabled", "false")
-        accelerate_proxy_url = await crud.get_config_value(session, "accelerateProxyUrl", "")
-        app.state.config_manager._cache["proxyMode"] = proxy_mode
-        app.state.config_manager._cache["proxyUrl"] = proxy_url
-        app.state.config_manager._cache["proxyEnabled"] = proxy_enabled
-        app.state.config_manager._cache["accelerateProxyUrl"] = accelerate_proxy_url
-
-        # 一次性查询所有 scraper 设置并缓存
-        scraper_settings = await crud.get_all_scraper_settings(session)
-        # 存储到 scraper_manager 中供后续使用,避免重复查询
-        app.state.scraper_manager._cached_scraper_settings = {
-            s['providerName']: s for s in scraper_settings
-        }
-
-    # 初始化关键组件（同步执行，确保启动正常）
-    disable_rate_limiter = os.getenv("DISABLE_RATE_LIMITER", "").strip().lower() in {"1", "true", "yes", "on"}
-    if disable_rate_limiter:
-        logger.warning("检测到 DISABLE_RATE_LIMITER 已开启，当前运行在无流控模式。")
-        app.state.rate_limiter = DisabledRateLimiter(session_factory, app.state.scraper_manager)
-    else:
-        app.state.rate_limiter = RateLimiter(session_factory, app.state.scraper_manager)
-    app.include_router(app.state.metadata_manager.router, prefix="/api/metadata")
-
-    # Add bangumi specific routes with /bangumi prefix
-    if 'bangumi' in app.state.metadata_manager.sources:
-        bangumi_router = app.state.metadata_manager.sources['bangumi'].api_router
-        app.include_router(bangumi_router, prefix="/api/bangumi", tags=["Bangumi"])
+                await init_db_tables(app)
+            except DatabaseStartupError:
+                os._exit(1)
+            session_factory = app.state.db_session_factory
+
+            # 注意：中断任务的处理已移至 TaskManager._handle_interrupted_tasks()
+            # 该方法会在 task_manager.start() 时自动执行，尝试恢复可恢复的任务，
+            # 并将无法恢复的任务标记为失败。不要在此处提前标记，否则会导致任务无法恢复。
+
+            # 新增:PostgreSQL序列自动修复(防止主键冲突)
+            if get_db_type() == "postgresql":
+                async with session_factory() as session:
+                    try:
+                        await session.execute(text(
+                            "SELECT setval('anime_id_seq', (SELECT COALESCE(MAX(id), 0) FROM anime))"
+                        ))
+                        await session.commit()
+                        logger.info("已自动同步PostgreSQL的anime_id_seq序列")
+                    except Exception as e:
+                        logger.warning(f"同步PostgreSQL序列时出错(可忽略): {e}")
+
+            # 初始化配置管理器
+            app.state.config_manager = ConfigManager(session_factory)
+
+            # 注册默认配置(从default_configs.py导入)
+            ai_prompts = {
+                'DEFAULT_AI_MATCH_PROMPT': DEFAULT_AI_MATCH_PROMPT,
+                'DEFAULT_AI_RECOGNITION_PROMPT': DEFAULT_AI_RECOGNITION_PROMPT,
+                'DEFAULT_AI_ALIAS_VALIDATION_PROMPT': DEFAULT_AI_ALIAS_VALIDATION_PROMPT,
+                'DEFAULT_AI_ALIAS_EXPANSION_PROMPT': DEFAULT_AI_ALIAS_EXPANSION_PROMPT,
+                'DEFAULT_AI_SEASON_MAPPING_PROMPT': DEFAULT_AI_SEASON_MAPPING_PROMPT,
+            }
+            default_configs = get_default_configs(settings=settings, ai_prompts=ai_prompts)
+            # 添加运行时生成的配置
+            default_configs['jwtSecretKey'] = (secrets.token_hex(32), '用于签名JWT令牌的密钥，在首次启动时自动生成。')
+
+            await app.state.config_manager.register_defaults(default_configs)
+        app.state.config_manager.attach_coordinator(coordinator)
+        # IP 白名单和 JWT 配置通过配置管理器的缓存读取，配置变更时自动重建解析结果
+        security.bind_auth_config(app.state.config_manager)
+
+    with startup.phase("cache"):
+        # 初始化 TransportManager
+        app.state.transport_manager = TransportManager()
+
+        # 初始化缓存后端（Memory/Redis/Database/Hybrid，Redis 不可用时自动降级）
+        cache_backend = await init_cache_backend(
+            session_factory=session_factory,
+            cache_config=settings.cache,
+        )
 
+        share_cache_invalidation(coordinator, cache_backend)
 
+        # 初始化 CacheManager（使用新的缓存后端）
+        app.state.cache_manager = CacheManager(session_factory, backend=cache_backend)
+        logger.info("缓存管理器已初始化")
 
-    app.state.task_manager = TaskManager(session_factory, app.state.config_manager)
+    with startup.phase("managers"):
+        # 初始化 ProxyMiddleware
+        app.state.proxy_middleware = init_proxy_middleware(app.state.config_manager)
+        logger.info("代理中间件已初始化")
 
-    # 初始化识别词管理器
-    app.state.title_recognition_manager = TitleRecognitionManager(session_factory)
+        # 初始化 AIMatcherManager（传入 session_factory 用于 AI 调用统计持久化）
+        app.state.ai_matcher_manager = AIMatcherManager(app.state.config_manager, session_factory)
+        logger.info("AI匹配管理器已初始化")
 
-    # 初始化媒体服务器管理器
-    app.state.media_server_manager = MediaServerManager(session_factory)
-    await app.state.media_server_manager.initialize()
+        # 创建管理器实例（不阻塞）；弹幕源和元数据源的加载在后台进行
+        app.state.metadata_manager = MetadataSourceManager(session_factory, app.state.config_manager, None, app.state.cache_manager)
+        app.state.scraper_manager = ScraperManager(session_factory, app.state.config_manager, app.state.metadata_manager, app.state.transport_manager)
+        app.state.metadata_manager.scraper_manager = app.state.scraper_manager
 
-    app.state.webhook_manager = WebhookManager(
-        session_factory, app.state.task_manager, app.state.scraper_manager,
-        app.state.rate_limiter, app.state.metadata_manager,
-        app.state.config_manager, app.state.title_recognition_manager,
-        app.state.ai_matcher_manager
-    )
+        # 【优化】预加载代理相关配置到缓存
+        async with session_factory() as session:
+            proxy_mode = await crud.get_config_value(session, "proxyMode", "none")
+            proxy_url = await crud.get_config_value(session, "proxyUrl", "")
+            proxy_enabled = await crud.get_config_value(session, "proxyEnabled", "false")
+            accelerate_proxy_url = await crud.get_config_value(session, "accelerateProxyUrl", "")
+            app.state.config_manager._cache["proxyMode"] = proxy_mode
+            app.state.config_manager._cache["proxyUrl"] = proxy_url
+            app.state.config_manager._cache["proxyEnabled"] = proxy_enabled
+            app.state.config_manager._cache["accelerateProxyUrl"] = accelerate_proxy_url
+
+        # 初始化关键组件（同步执行，确保启动正常）
+        disable_rate_limiter = os.getenv("DISABLE_RATE_LIMITER", "").strip().lower() in {"1", "true", "yes", "on"}
+        if disable_rate_limiter:
+            logger.warning("检测到 DISABLE_RATE_LIMITER 已开启，当前运行在无流控模式。")
+            app.state.rate_limiter = DisabledRateLimiter(session_factory, app.state.scraper_manager)
+        else:
+            app.state.rate_limiter = RateLimiter(session_factory, app.state.scraper_manager)
+        # 出站令牌桶限速参数从配置 outboundRateLimits 读取
+        get_outbound_limiter().bind_config(app.state.config_manager)
+
+        # 任务管理器在弹幕源加载完成后才开始执行队列，此前提交的任务只排队
+        app.state.task_manager = TaskManager(session_factory, app.state.config_manager)
+        app.state.task_manager.attach_coordinator(coordinator)
+
+        # 初始化识别词管理器
+        app.state.title_recognition_manager = TitleRecognitionManager(session_factory)
+
+        # 初始化媒体服务器管理器（服务器在后台加载）
+        app.state.media_server_manager = MediaServerManager(session_factory)
+
+        app.state.webhook_manager = WebhookManager(
+            session_factory, app.state.task_manager, app.state.scraper_manager,
+            app.state.rate_limiter, app.state.metadata_manager,
+            app.state.config_manager, app.state.title_recognition_manager,
+            app.state.ai_matcher_manager
+        )
 
-    init_time = time.time() - init_start
-    logger.info(f"并行初始化完成，耗时 {init_time:.2f} 秒")
-
-    # 设置任务恢复所需的依赖，用于重启后恢复排队中的任务
-    app.state.task_manager.set_recovery_dependencies({
-        "scraper_manager": app.state.scraper_manager,
-        "rate_limiter": app.state.rate_limiter,
-        "metadata_manager": app.state.metadata_manager,
-        "ai_matcher_manager": app.state.ai_matcher_manager,
-        "title_recognition_manager": app.state.title_recognition_manager,
-    })
-
-    # 5. 启动服务（必须在上面完成后）
-    app.state.task_manager.start()
-    await create_initial_admin_user(app)
-
-    # 一次性清理：删除旧的 system_token_reset 定时任务（已迁移到内部轮询任务）
-    async with session_factory() as session:
-        old_task = await session.get(orm_models.ScheduledTask, "system_token_reset")
-        if old_task:
-            await session.delete(old_task)
-            await session.commit()
-            logger.info("已清理旧的 system_token_reset 定时任务（已迁移到内部轮询任务）")
+        # 设置任务恢复所需的依赖，用于重启后恢复排队中的任务
+        app.state.task_manager.set_recovery_dependencies({
+            "scraper_manager": app.state.scraper_manager,
+            "rate_limiter": app.state.rate_limiter,
+            "metadata_manager": app.state.metadata_manager,
+            "ai_matcher_manager": app.state.ai_matcher_manager,
+            "title_recognition_manager": app.state.title_recognition_manager,
+        })
+
+        app.state.scheduler_manager = SchedulerManager(
+            session_factory, app.state.task_manager, app.state.scraper_manager,
+            app.state.rate_limiter, app.state.metadata_manager,
+            app.state.config_manager, app.state.ai_matcher_manager,
+            app.state.title_recognition_manager
+        )
+        app.state.scheduler_manager.attach_coordinator(coordinator)
+
+        # 初始化通知服务（渠道在后台加载）
+        app.state.notification_service = NotificationService(session_factory)
+        app.state.notification_service.set_dependencies(
+            scraper_manager=app.state.scraper_manager,
+            metadata_manager=app.state.metadata_manager,
+            task_manager=app.state.task_manager,
+            scheduler_manager=app.state.scheduler_manager,
+            config_manager=app.state.config_manager,
+            rate_limiter=app.state.rate_limiter,
+            title_recognition_manager=app.state.title_recognition_manager,
+            ai_matcher_manager=app.state.ai_matcher_manager,
+        )
+        app.state.notification_manager = NotificationManager(session_factory, app.state.notification_service)
+        app.state.notification_service.notification_manager = app.state.notification_manager
+        app.state.notification_service.attach_coordinator(coordinator)
+        app.state.notification_manager.attach_coordinator(coordinator)
 
-    app.state.cleanup_task = asyncio.create_task(cleanup_task(app))
-    app.state.scheduler_manager = SchedulerManager(
-        session_factory, app.state.task_manager, app.state.scraper_manager,
-        app.state.rate_limiter, app.state.metadata_manager,
-        app.state.config_manager, app.state.ai_matcher_manager,
-        app.state.title_recognition_manager
-    )
-    await app.state.scheduler_manager.start()
+        # 初始化 TunnelService；其它进程修改渠道后由领导者重新评估隧道
+        app.state.tunnel_service = TunnelService()
 
-    # 内置轮询任务管理器（任务在 start() 中自动注册）
-    app.state.internal_polling = InternalPollingManager(app)
-    await app.state.internal_polling.start()
+        async def _reevaluate_tunnel_after_peer_reload():
+            if coordinator.is_leader:
+                await _apply_tunnel_from_channels(app)
 
-    # 初始化通知服务
-    app.state.notification_service = NotificationService(session_factory)
-    app.state.notification_service.set_dependencies(
-        scraper_manager=app.state.scraper_manager,
-        metadata_manager=app.state.metadata_manager,
-        task_manager=app.state.task_manager,
-        scheduler_manager=app.state.scheduler_manager,
-        config_manager=app.state.config_manager,
-        rate_limiter=app.state.rate_limiter,
-        title_recognition_manager=app.state.title_recognition_manager,
-        ai_matcher_manager=app.state.ai_matcher_manager,
-    )
-    app.state.notification_manager = NotificationManager(session_factory, app.state.notification_service)
-    await app.state.notification_manager.initialize()
-    app.state.notification_service.notification_manager = app.state.notification_manager
-    await app.state.notification_manager.start_channels()
+        app.state.notification_manager.after_peer_reload = _reevaluate_tunnel_after_peer_reload
 
-    # 初始化 TunnelService，并根据渠道配置决定是否启动隧道
-    app.state.tunnel_service = TunnelService()
-    await _apply_tunnel_from_channels(app)
-    logger.info("隧道服务已初始化")
+        # 将通知服务注入 TaskManager 和 WebhookManager
+        app.state.task_manager.set_notification_service(app.state.notification_service)
+        app.state.webhook_manager.notification_service = app.state.notification_service
 
-    # 将通知服务注入 TaskManager 和 WebhookManager
-    app.state.task_manager.set_notification_service(app.state.notification_service)
-    app.state.webhook_manager.notification_service = app.state.notification_service
+    with startup.phase("admin"):
+        async with coordinator.lock("startup:admin"):
+            await create_initial_admin_user(app)
 
-    total_time = time.time() - startup_start
-    logger.info(f"应用启动完成，总耗时 {total_time:.2f} 秒")
+            # 一次性清理：删除旧的 system_token_reset 定时任务（已迁移到内部轮询任务）
+            async with session_factory() as session:
+                old_task = await session.get(orm_models.ScheduledTask, "system_token_reset")
+                if old_task:
+                    await session.delete(old_task)
+                    await session.commit()
+                    logger.info("已清理旧的 system_token_reset 定时任务（已迁移到内部轮询任务）")
 
-    # 发射系统启动通知
-    try:
-        await app.state.notification_service.emit_event("system_start", {})
-    except Exception as e:
-        logger.error(f"发射 system_start 事件失败: {e}")
+    # --- 后台并发初始化的子系统 ---
+    _defer_subsystems(app, startup, coordinator)
 
     # --- 前端服务 ---
     # 在所有API路由注册完毕后，再挂载前端服务，以确保API路由优先匹配。
+    # 后台加载的元数据源路由通过 _include_router_before_frontend 插入到前端兜底路由之前。
+    app.state.frontend_route_index = len(app.router.routes)
     mount_frontend(app, settings)
 
+    startup.mark_serving()
     yield
 
     # --- Shutdown Logic ---
     logger.info("应用正在关闭...")
 
+    # 停止仍在后台初始化的子系统
+    await startup.cancel()
+
     if hasattr(app.state, "cleanup_task"):
         app.state.cleanup_task.cancel()
         try:
@@ -329,6 +437,13 @@ async def lifespan(app: FastAPI):
         except asyncio.CancelledError:
             pass
 
+    # 写入限速器中尚未落库的计数
+    if hasattr(app.state, "rate_limiter") and hasattr(app.state.rate_limiter, "close"):
+        try:
+            await app.state.rate_limiter.close()
+        except Exception as e:
+            logger.warning(f"关闭限速器时发生错误: {e}")
+
     # 关闭缓存后端
     await close_cache_backend()
 
@@ -341,12 +456,20 @@ async def lifespan(app: FastAPI):
             await app.state.transport_manager.close_all()
         except Exception as e:
             logger.exception(f"关闭 TransportManager 时发生错误: {e}")
+    # 分发仍在合并窗口中的 Webhook 请求，避免关闭时丢失
+    try:
+        from src.webhook._ingest import get_webhook_ingest_buffer
+        await get_webhook_ingest_buffer().flush()
+    except Exception as e:
+        logger.error(f"分发缓冲中的 Webhook 请求失败: {e}")
     if hasattr(app.state, "task_manager"):
         await app.state.task_manager.stop()
     # 新增：在关闭时也关闭元数据管理器
     if hasattr(app.state, "metadata_manager"):
         await app.state.metadata_manager.close_all()
     if hasattr(app.state, "notification_manager"):
+        # 先尽量发完排队中的通知，再停止渠道
+        await app.state.notification_service.dispatcher.stop()
         await app.state.notification_manager.stop_channels()
     if hasattr(app.state, "tunnel_service"):
         await app.state.tunnel_service.stop()
@@ -356,6 +479,8 @@ async def lifespan(app: FastAPI):
         await app.state.scheduler_manager.stop()
     if hasattr(app.state, "internal_polling"):
         await app.state.internal_polling.stop()
+    # 最后关闭协调器，释放本进程持有的认领，让其它进程尽快接替
+    await close_coordinator()
 
     logger.info("应用已完全关闭")
 
@@ -376,6 +501,19 @@ async def health_check():
     return {"status": "ok"}
 
 
+@app.get("/api/health/ready", include_in_schema=False)
+async def readiness_check():
+    """就绪检查：各启动阶段耗时和后台子系统状态，全部就绪时返回 200，否则 503"""
+    startup = getattr(app.state, "startup", None)
+    if startup is None:
+        return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content={"ready": False})
+    snapshot = startup.snapshot()
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if snapshot["ready"] else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content=snapshot,
+    )
+
+
 # --- 前端 PWA 路由（favicon / manifest / registerSW / sw / workbox）---
 register_pwa_routes(app)
 
@@ -486,6 +624,11 @@ async def _capture_api_response(request: Request, call_next):
     return await capture_api_response(request, call_next)
 
 
+@app.middleware("http")
+async def _track_db_queries(request: Request, call_next):
+    return await track_request_queries(request, call_next)
+
+
 async def cleanup_task(app: FastAPI):
     """定期清理过期缓存和OAuth states的后台任务。"""
     session_factory = app.state.db_session_factory
@@ -551,6 +694,8 @@ if __name__ == "__main__":
     port = settings.server.port
     ipv6_enabled = getattr(settings.server, 'ipv6', True)
     is_reload = settings.environment == "development"
+    # 多工作进程模式（开发热重载时忽略）
+    workers = settings.server.workers if settings.server.workers > 1 and not is_reload else None
 
     if ipv6_enabled:
         # 双栈模式：监听 [::] 并 patch socket 使其同时接受 IPv4
@@ -571,6 +716,7 @@ if __name__ == "__main__":
             host="::",
             port=port,
             reload=is_reload,
+            workers=workers,
         )
     else:
         uvicorn.run(
@@ -578,4 +724,5 @@ if __name__ == "__main__":
             host=settings.server.host,
             port=port,
             reload=is_reload,
+            workers=workers,
         )
@@ -9,6 +9,7 @@ from bs4 import BeautifulSoup # type: ignore
 from pydantic import BaseModel, Field
 
 from src.db import models, ConfigManager, CacheManager
+from src.utils.token_bucket import rate_limited_event_hooks
 from .base import BaseMetadataSource
 from src.scrapers.base import get_season_from_title
 
@@ -119,6 +120,7 @@ class So360MetadataSource(BaseMetadataSource):
             headers=self.headers,
             cookies=self.cookies,
             timeout=20.0,
+            event_hooks=rate_limited_event_hooks(self.provider_name),
         )
 
     async def search(self, keyword: str, user: models.User, mediaType: Optional[str] = None) -> List[models.MetadataDetailsResponse]:
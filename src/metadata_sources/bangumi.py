@@ -18,6 +18,7 @@ from src.core import settings
 from src.core.cache import get_cache_backend
 from src.utils import parse_search_keyword
 from src.utils import clean_movie_title as _clean_movie_title
+from src.utils.token_bucket import rate_limited_event_hooks
 from src.services import ScraperManager
 from .base import BaseMetadataSource
 
@@ -368,7 +369,8 @@ class BangumiMetadataSource(BaseMetadataSource):
             if auth_info and auth_info.get("isAuthenticated") and auth_info.get("accessToken"):
                 self.logger.debug("Bangumi: 正在使用 OAuth Access Token 进行认证。")
                 headers["Authorization"] = f"Bearer {auth_info['accessToken']}"
-        return httpx.AsyncClient(base_url="https://api.bgm.tv", headers=headers, timeout=20.0)
+        return httpx.AsyncClient(base_url="https://api.bgm.tv", headers=headers, timeout=20.0,
+                                 event_hooks=rate_limited_event_hooks(self.provider_name))
 
     async def search(self, keyword: str, user: models.User, mediaType: Optional[str] = None) -> List[models.MetadataDetailsResponse]:
         """
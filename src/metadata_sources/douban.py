@@ -10,6 +10,7 @@ from fastapi import HTTPException, status
 from pydantic import BaseModel, ValidationError, field_validator
 
 from src.db import crud, models
+from src.utils.token_bucket import rate_limited_event_hooks
 from .base import BaseMetadataSource, HTTPStatusError
 
 logger = logging.getLogger(__name__)
@@ -77,7 +78,8 @@ class DoubanMetadataSource(BaseMetadataSource): # type: ignore
 
                 proxy_to_use = proxy_url if use_proxy_for_this_provider else None
 
-        return httpx.AsyncClient(headers=headers, timeout=20.0, follow_redirects=True, proxy=proxy_to_use)
+        return httpx.AsyncClient(headers=headers, timeout=20.0, follow_redirects=True, proxy=proxy_to_use,
+                                 event_hooks=rate_limited_event_hooks(self.provider_name))
 
     async def search(self, keyword: str, user: models.User, mediaType: Optional[str] = None) -> List[models.MetadataDetailsResponse]:
         self.logger.info(f"豆瓣: 正在使用JSON API搜索 '{keyword}'")
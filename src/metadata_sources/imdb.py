@@ -11,6 +11,7 @@ from fastapi import HTTPException, Request
 
 from src.db import models
 from src.db import crud
+from src.utils.token_bucket import rate_limited_event_hooks
 from .base import BaseMetadataSource
 
 logger = logging.getLogger(__name__)
@@ -285,7 +286,8 @@ class ImdbMetadataSource(BaseMetadataSource):
                 headers=headers,
                 timeout=20.0,
                 follow_redirects=True,
-                proxy=proxy_to_use
+                proxy=proxy_to_use,
+                event_hooks=rate_limited_event_hooks(self.provider_name),
             )
 
         return self._html_client
@@ -11,6 +11,7 @@ from src.db import crud, models, ConfigManager
 from src.utils import parse_search_keyword as utils_parse_search_keyword
 from src.utils import clean_movie_title as _clean_movie_title
 from src.utils.common import convert_keys_to_camel
+from src.utils.token_bucket import rate_limited_event_hooks
 from .base import BaseMetadataSource
 
 from fastapi import HTTPException, status
@@ -93,7 +94,8 @@ class TmdbMetadataSource(BaseMetadataSource):
         proxy_to_use = await _get_proxy_for_tmdb(self.config_manager, self._session_factory)
         if proxy_to_use:
             self.logger.debug(f"TMDB: 将使用代理: {proxy_to_use}")
-        return httpx.AsyncClient(base_url=base_url, params=params, timeout=20.0, follow_redirects=True, proxy=proxy_to_use)
+        return httpx.AsyncClient(base_url=base_url, params=params, timeout=20.0, follow_redirects=True, proxy=proxy_to_use,
+                                 event_hooks=rate_limited_event_hooks(self.provider_name))
 
     async def search(self, keyword: str, user: models.User, mediaType: Optional[str] = None) -> List[models.MetadataDetailsResponse]:
         if not mediaType:
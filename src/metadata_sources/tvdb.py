@@ -6,6 +6,7 @@ import httpx
 from fastapi import HTTPException, status
 
 from src.db import crud, models
+from src.utils.token_bucket import rate_limited_event_hooks
 from .base import BaseMetadataSource, HTTPStatusError
 
 logger = logging.getLogger(__name__)
@@ -79,7 +80,8 @@ class TvdbMetadataSource(BaseMetadataSource):
         proxy_to_use = proxy_url if proxy_enabled_globally and use_proxy_for_this_provider and proxy_url else None
 
         # 2. 创建一个基础客户端用于登录
-        base_client = httpx.AsyncClient(base_url="https://api4.thetvdb.com/v4", timeout=20.0, follow_redirects=True, proxy=proxy_to_use)
+        base_client = httpx.AsyncClient(base_url="https://api4.thetvdb.com/v4", timeout=20.0, follow_redirects=True, proxy=proxy_to_use,
+                                        event_hooks=rate_limited_event_hooks(self.provider_name))
 
         # 3. 使用基础客户端获取认证Token
         token = await self._get_tvdb_token(base_client)
@@ -0,0 +1,67 @@
+"""
+本地假通知渠道 — 不发起任何网络请求，记录所有投递的消息
+
+可注入发送延迟和失败次数，用于在本地验证 NotificationDispatcher 的
+排队、限速、合并与重试。失败默认抛出异常；fail_result=True 时像真实渠道一样
+记录错误后返回 False:
+
+    channel = FakeNotificationChannel(1, "fake", {"__events_config": {"import_success": True}}, service,
+                                      latency=0.5, fail_times=2)
+    service.notification_manager.channels[1] = channel
+    await service.emit_event("import_success", {...})
+    await service.dispatcher.flush()
+    channel.deliveries  # [{"title", "text", "kwargs", "at"}]
+
+此文件以 `_` 开头，不会被 NotificationManager 自动加载。
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, List
+
+from src.notification.base import BaseNotificationChannel
+
+
+class FakeNotificationChannel(BaseNotificationChannel):
+    """记录投递结果的本地通知渠道"""
+
+    channel_type = "fake"
+    display_name = "本地测试渠道"
+
+    def __init__(self, channel_id: int, name: str, config: dict, notification_service,
+                 latency: float = 0.0, fail_times: int = 0, rate_limit: tuple = (1000.0, 1000),
+                 fail_result: bool = False):
+        super().__init__(channel_id, name, config, notification_service)
+        self.latency = latency
+        self.fail_times = fail_times
+        self.fail_result = fail_result
+        self.rate_limit = rate_limit
+        self.deliveries: List[Dict[str, Any]] = []
+        self.attempts = 0
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def send_message(self, title: str, text: str, **kwargs):
+        self.attempts += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.fail_times > 0:
+            self.fail_times -= 1
+            if self.fail_result:
+                return False
+            raise ConnectionError("模拟发送失败")
+        msg_id_out = kwargs.get("_msg_id_out")
+        if msg_id_out is not None:
+            msg_id_out.append(len(self.deliveries) + 1)
+        self.deliveries.append({"title": title, "text": text, "kwargs": kwargs, "at": time.monotonic()})
+
+    async def test_connection(self) -> Dict[str, Any]:
+        return {"success": True, "message": "本地测试渠道"}
+
+    @staticmethod
+    def get_config_schema() -> list:
+        return []
@@ -7,7 +7,7 @@
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any, Dict, List, Optional, Set
+from typing import Any, Dict, List, Optional, Set, Tuple
 import logging
 import time
 
@@ -112,6 +112,8 @@ class BaseNotificationChannel(ABC):
 
     channel_type: str = ""       # 渠道标识，如 "telegram"
     display_name: str = ""       # 显示名称，如 "Telegram"
+    # 出站通知限速: (每秒消息数, 突发容量)，由 NotificationDispatcher 按渠道实例使用
+    rate_limit: Tuple[float, float] = (1.0, 3)
 
     def __init__(self, channel_id: int, name: str, config: dict, notification_service):
         self.channel_id = channel_id
@@ -145,8 +147,11 @@ class BaseNotificationChannel(ABC):
         ...
 
     @abstractmethod
-    async def send_message(self, title: str, text: str, **kwargs):
-        """发送消息到默认接收者"""
+    async def send_message(self, title: str, text: str, **kwargs) -> Optional[bool]:
+        """发送消息到默认接收者。
+        发送失败（网络异常、接口返回错误）时返回 False，NotificationDispatcher 据此退避重试；
+        成功或无需发送（未配置接收者等）时返回 True 或 None。
+        """
         ...
 
     @abstractmethod
@@ -47,7 +47,7 @@ class CacheMenuMixin:
             try:
                 matcher = await self.ai_matcher_manager.get_matcher()
                 if matcher and hasattr(matcher, 'cache') and matcher.cache:
-                    matcher.cache.clear()
+                    await matcher.cache.clear()
                     cleared.append("✓ AI 响应缓存")
             except Exception as e:
                 errors.append(f"✗ AI 缓存: {e}")
@@ -36,6 +36,8 @@ class ServerChanChannel(BaseNotificationChannel):
 
     channel_type = "serverchan3"
     display_name = "Server酱³"
+    # Server酱 推送频率较严格，放慢到每 10 秒 1 条
+    rate_limit = (0.1, 2)
 
     # SC3 Bot 渠道能力：仅支持富文本和链接，不支持按钮/回调/编辑
     _CAPABILITIES = ChannelCapabilities(
@@ -340,8 +342,8 @@ class ServerChanChannel(BaseNotificationChannel):
         if result.next_state:
             self.service.update_conversation_message_id(user_id, 0)
 
-    async def _send_text(self, chat_id: int, text: str, silent: bool = False):
-        """通过 Bot API 发送文本消息"""
+    async def _send_text(self, chat_id: int, text: str, silent: bool = False) -> bool:
+        """通过 Bot API 发送文本消息，返回是否发送成功"""
         try:
             client = await self._get_client()
             payload = {
@@ -359,12 +361,15 @@ class ServerChanChannel(BaseNotificationChannel):
             self._log_raw("⬇ sendMessage 响应", data)
             if not data.get("ok", True):
                 self.logger.error(f"发送消息失败: {data}")
+                return False
+            return True
         except Exception as e:
             self.logger.error(f"发送消息异常: {e}")
+            return False
 
     # ─── 消息发送（系统通知） ──────────────────
 
-    async def send_message(self, title: str, text: str, **kwargs):
+    async def send_message(self, title: str, text: str, **kwargs) -> Optional[bool]:
         """通过 Bot API sendMessage 发送系统通知"""
         bot_token = self.config.get("bot_token", "")
         if not bot_token:
@@ -375,9 +380,10 @@ class ServerChanChannel(BaseNotificationChannel):
             return
         content = f"**{title}**\n{text}" if title else text
         try:
-            await self._send_text(int(chat_id), content, silent=False)
+            return await self._send_text(int(chat_id), content, silent=False)
         except Exception as e:
             self.logger.error(f"发送通知失败: {e}")
+            return False
 
     # ─── 命令菜单 ─────────────────────────────
 
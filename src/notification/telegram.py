@@ -35,6 +35,8 @@ class TelegramChannel(BaseNotificationChannel):
 
     channel_type = "telegram"
     display_name = "Telegram"
+    # Bot API 对同一聊天约每秒 1 条消息
+    rate_limit = (1.0, 3)
 
     # Telegram 渠道能力配置
     _CAPABILITIES = ChannelCapabilities(
@@ -538,7 +540,7 @@ class TelegramChannel(BaseNotificationChannel):
         self._bot = None
         self.logger.info("Telegram 渠道已停止")
 
-    async def send_message(self, title: str, text: str, **kwargs):
+    async def send_message(self, title: str, text: str, **kwargs) -> Optional[bool]:
         if not self._bot:
             return
         chat_id = kwargs.get("chat_id") or self.config.get("chat_id", "")
@@ -627,8 +629,10 @@ class TelegramChannel(BaseNotificationChannel):
                 sent = await asyncio.to_thread(self._bot.send_message, chat_id, plain)
                 if msg_id_out is not None and sent:
                     msg_id_out.append(sent.message_id)
-            except Exception:
-                pass
+            except Exception as plain_err:
+                self.logger.error(f"纯文本降级发送也失败: {plain_err}")
+                return False
+        return True
 
     async def send_quick(self, text: str, chat_id=None) -> Optional[int]:
         """发送一条快速消息，返回 message_id 供后续 edit 使用"""
@@ -104,6 +104,8 @@ class WeChatChannel(BaseNotificationChannel):
     channel_type = "wechat"
     display_name = "企业微信"
     hide_proxy = True   # 企业微信使用 wecom_proxy 反代地址，不需要全局 HTTP 代理开关
+    # 应用消息对同一成员每分钟最多 30 条
+    rate_limit = (0.5, 5)
 
     _CAPABILITIES = ChannelCapabilities(
         capabilities={
@@ -231,7 +233,7 @@ class WeChatChannel(BaseNotificationChannel):
             self.logger.error(f"API [{path}] 异常: {e}")
             return None
 
-    async def send_message(self, title: str, text: str, **kwargs):
+    async def send_message(self, title: str, text: str, **kwargs) -> Optional[bool]:
         agent_id = self.config.get("agent_id", "").strip()
         if not agent_id:
             return
@@ -262,8 +264,12 @@ class WeChatChannel(BaseNotificationChannel):
                 "text": {"content": content},
             }
         d = await self._api_post("message/send", payload)
-        if d and d.get("errcode", -1) != 0:
+        if d is None:
+            return False
+        if d.get("errcode", -1) != 0:
             self.logger.error(f"发送消息失败: {d.get('errmsg')}")
+            return False
+        return True
 
     async def _send_text_to(self, to_user: str, text: str):
         """回复消息给指定用户"""
@@ -511,7 +517,8 @@ class WeChatChannel(BaseNotificationChannel):
         if not token:
             return {"success": False, "message": "获取 access_token 失败，请检查 corp_id 和 corp_secret"}
         try:
-            await self.send_message("测试连接", f"✅ Misaka 弹幕服务器 - 企业微信渠道连接测试成功！\n版本：v{APP_VERSION}")
+            if await self.send_message("测试连接", f"✅ Misaka 弹幕服务器 - 企业微信渠道连接测试成功！\n版本：v{APP_VERSION}") is False:
+                return {"success": False, "message": "测试消息发送失败，请查看日志"}
             return {"success": True, "message": "连接成功！测试消息已发送"}
         except Exception as e:
             return {"success": False, "message": f"测试消息发送失败: {e}"}
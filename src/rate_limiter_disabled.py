@@ -1,7 +1,10 @@
+import asyncio
 import logging
-from typing import Tuple
+from collections import Counter
+from typing import Optional, Tuple
 
 from src.db import crud
+from src.utils.token_bucket import get_outbound_limiter
 
 logger = logging.getLogger(__name__)
 
@@ -17,12 +20,16 @@ class RateLimitExceededError(Exception):
 class RateLimiter:
     """
     关闭限速的实现：
-    - check()/check_fallback(): 永远放行；仅确保状态存在。
-    - increment()/increment_fallback(): 只做计数，便于状态页展示；不做限制。
+    - check()/check_fallback(): 永远放行，不访问数据库。
+    - increment()/increment_fallback(): 只在内存中累计，由后台任务每 FLUSH_INTERVAL 秒
+      合并写入一次数据库，便于状态页展示；不做限制。
+    - acquire(): 按出站令牌桶节制对外请求速率（见 src.utils.token_bucket）。
     - get_global_limit_status(): 始终返回未触发限速。
     - 暴露 enabled/global_limit/global_period_seconds/fallback_limit/_verification_failed 以兼容 UI。
     """
 
+    FLUSH_INTERVAL = 30
+
     def __init__(self, session_factory, scraper_manager):
         self._session_factory = session_factory
         self._scraper_manager = scraper_manager
@@ -33,6 +40,10 @@ class RateLimiter:
         self.fallback_limit = 50
         self._verification_failed = False
 
+        self._pending_counts: Counter = Counter()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+
     @staticmethod
     def _get_fallback_key(fallback_type: str) -> str:
         if fallback_type == "match":
@@ -41,42 +52,59 @@ class RateLimiter:
             return "__fallback_search__"
         return f"__fallback_{fallback_type}__"
 
+    def _record(self, *keys: str) -> None:
+        for key in keys:
+            self._pending_counts[key] += 1
+        if self._flush_task is None or self._flush_task.done():
+            try:
+                self._flush_task = asyncio.get_running_loop().create_task(self._flush_loop())
+            except RuntimeError:
+                pass
+
+    async def _flush_loop(self) -> None:
+        while self._pending_counts:
+            await asyncio.sleep(self.FLUSH_INTERVAL)
+            await self.flush()
+
+    async def flush(self) -> None:
+        """把内存中累计的计数一次性写入数据库"""
+        async with self._flush_lock:
+            if not self._pending_counts:
+                return
+            counts, self._pending_counts = self._pending_counts, Counter()
+            try:
+                async with self._session_factory() as session:
+                    for key, amount in counts.items():
+                        await crud.increment_rate_limit_count(session, key, amount)
+                    await session.commit()
+            except Exception as e:
+                logger.debug(f"RateLimiterDisabled.flush() 忽略异常: {e}")
+
+    async def acquire(self, provider_name: str) -> None:
+        """在发起对外请求前调用，令牌不足时等待"""
+        await get_outbound_limiter().acquire(provider_name)
+
     async def check(self, provider_name: str) -> None:
-        try:
-            async with self._session_factory() as session:
-                target = "__global__" if provider_name in ("__control_api_status_check__", "__ui_status_check__") else provider_name
-                await crud.get_or_create_rate_limit_state(session, target)
-                await session.commit()
-        except Exception as e:
-            logger.debug(f"RateLimiterDisabled.check() 忽略异常: {e}")
+        return None
 
     async def increment(self, provider_name: str) -> None:
-        try:
-            async with self._session_factory() as session:
-                await crud.increment_rate_limit_count(session, provider_name)
-                await crud.increment_rate_limit_count(session, "__global__")
-                await session.commit()
-        except Exception as e:
-            logger.debug(f"RateLimiterDisabled.increment() 忽略异常: {e}")
+        self._record(provider_name, "__global__")
 
     async def check_fallback(self, fallback_type: str, provider_name: str) -> None:
-        try:
-            async with self._session_factory() as session:
-                await crud.get_or_create_rate_limit_state(session, self._get_fallback_key(fallback_type))
-                await crud.get_or_create_rate_limit_state(session, provider_name)
-                await session.commit()
-        except Exception as e:
-            logger.debug(f"RateLimiterDisabled.check_fallback() 忽略异常: {e}")
+        return None
 
     async def increment_fallback(self, fallback_type: str, provider_name: str) -> None:
-        try:
-            async with self._session_factory() as session:
-                await crud.increment_rate_limit_count(session, self._get_fallback_key(fallback_type))
-                await crud.increment_rate_limit_count(session, provider_name)
-                await session.commit()
-        except Exception as e:
-            logger.debug(f"RateLimiterDisabled.increment_fallback() 忽略异常: {e}")
+        self._record(self._get_fallback_key(fallback_type), provider_name)
 
     async def get_global_limit_status(self) -> Tuple[bool, float]:
         return False, 0.0
 
+    async def close(self) -> None:
+        """停止后台写入任务，并写入剩余计数"""
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
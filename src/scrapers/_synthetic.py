@@ -0,0 +1,103 @@
+"""
+=================================================================
+合成分段弹幕源 (Synthetic Scraper) — 流式弹幕写入的本地替身
+=================================================================
+
+不发起任何网络请求，按分段生成合成弹幕，模拟B站、腾讯这类
+按 6 分钟分段拉取弹幕的源，用于在本地验证 iter_comments 流水线：
+
+    scraper = SyntheticSegmentScraper(session_factory, config_manager, transport_manager,
+                                      segments=40, comments_per_segment=3000, segment_latency=0.05)
+    added = await crud.save_danmaku_stream_for_episode(
+        session, episode_db_id, scraper.iter_comments("1"), config_manager
+    )
+
+此文件以 `_` 开头，不会被 scraper_manager 自动加载。
+=================================================================
+"""
+
+__version__ = "1.0.0"
+
+import asyncio
+import random
+from typing import Callable, List, Optional
+
+from src.db.models import ProviderEpisodeInfo, ProviderSearchInfo
+from src.scrapers.base import BaseScraper
+
+SEGMENT_SECONDS = 360
+
+
+class SyntheticSegmentScraper(BaseScraper):
+    """按分段产出合成弹幕的本地弹幕源。"""
+
+    provider_name = "synthetic"
+    handled_domains: List[str] = []
+
+    def __init__(self, session_factory, config_manager, transport_manager,
+                 segments: int = 20, comments_per_segment: int = 2000,
+                 segment_latency: float = 0.0, episodes: int = 12, seed: int = 0):
+        super().__init__(session_factory, config_manager, transport_manager)
+        self.segments = segments
+        self.comments_per_segment = comments_per_segment
+        self.segment_latency = segment_latency
+        self.episodes = episodes
+        self.seed = seed
+
+    def _segment(self, episode_id: str, index: int) -> List[dict]:
+        rng = random.Random(f"{self.seed}:{episode_id}:{index}")
+        start = index * SEGMENT_SECONDS
+        comments = []
+        for n in range(self.comments_per_segment):
+            t = start + rng.random() * SEGMENT_SECONDS
+            comments.append({
+                "cid": f"{episode_id}-{index}-{n}",
+                "p": f"{t:.2f},1,25,16777215,[{self.provider_name}]",
+                "m": f"合成弹幕 {index}-{n}",
+                "t": round(t, 2),
+                "like": rng.choice((0, 0, 0, 12, 1500)),
+            })
+        return comments
+
+    async def iter_comments(self, episode_id: str, progress_callback: Optional[Callable] = None):
+        for index in range(self.segments):
+            if self.segment_latency:
+                await asyncio.sleep(self.segment_latency)
+            if progress_callback:
+                await progress_callback(int((index + 1) * 100 / self.segments), f"已获取第 {index + 1}/{self.segments} 段")
+            yield self._segment(episode_id, index)
+
+    async def get_comments(self, episode_id: str, progress_callback: Optional[Callable] = None) -> List[dict]:
+        comments: List[dict] = []
+        async for batch in self.iter_comments(episode_id, progress_callback):
+            comments.extend(batch)
+        return comments
+
+    async def search(self, keyword: str, episode_info=None) -> List[ProviderSearchInfo]:
+        return [ProviderSearchInfo(
+            provider=self.provider_name,
+            mediaId="1",
+            title=keyword,
+            type="tv_series",
+            season=1,
+            episodeCount=self.episodes,
+        )]
+
+    async def get_episodes(self, media_id: str, target_episode_index: Optional[int] = None,
+                           db_media_type: Optional[str] = None) -> List[ProviderEpisodeInfo]:
+        episodes = [
+            ProviderEpisodeInfo(provider=self.provider_name, episodeId=f"{media_id}-{i}", title=f"第{i}集", episodeIndex=i)
+            for i in range(1, self.episodes + 1)
+        ]
+        if target_episode_index is not None:
+            return [ep for ep in episodes if ep.episodeIndex == target_episode_index]
+        return episodes
+
+    async def get_info_from_url(self, url: str) -> Optional[ProviderSearchInfo]:
+        return None
+
+    async def get_id_from_url(self, url: str) -> Optional[str]:
+        return None
+
+    async def close(self):
+        pass
@@ -3,7 +3,7 @@ import asyncio
 import re
 import time
 from abc import ABC, abstractmethod
-from typing import Any, Callable, Dict, List, Optional, Type, Tuple, TYPE_CHECKING
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Type, Tuple, TYPE_CHECKING
 from typing import Union
 from functools import wraps
 import httpx
@@ -14,6 +14,8 @@ from src.db import models
 from src.core.cache import get_cache_backend
 
 from src.utils import TransportManager
+from src.utils.token_bucket import rate_limited_event_hooks
+from src.utils.adaptive_concurrency import THROTTLE_STATUS_CODES, get_download_concurrency
 
 if TYPE_CHECKING:
     from src.db import ConfigManager
@@ -251,9 +253,18 @@ class BaseScraper(ABC):
         # 忽略子类传的 timeout，统一用配置的 _search_timeout
         kwargs.pop("timeout", None)
 
+        # 所有经由此客户端发出的请求都按源名称走共享令牌桶限速
+        kwargs["event_hooks"] = rate_limited_event_hooks(self.provider_name, kwargs.get("event_hooks"))
+        # 源返回 429/412 时通知自适应下载并发控制（即使子类自行吞掉了异常）
+        kwargs["event_hooks"].setdefault("response", []).append(self._note_throttle_response)
+
         client_kwargs = {"proxy": proxy_to_use, "timeout": self._search_timeout, "follow_redirects": True, **kwargs}
         return httpx.AsyncClient(**client_kwargs)
 
+    async def _note_throttle_response(self, response: httpx.Response) -> None:
+        if response.status_code in THROTTLE_STATUS_CODES:
+            get_download_concurrency().note_throttled(self.provider_name)
+
     async def _get_from_cache(self, key: str) -> Optional[Any]:
         """
         从缓存中获取数据。
@@ -434,6 +445,26 @@ class BaseScraper(ABC):
         """
         raise NotImplementedError
 
+    async def iter_comments(self, episode_id: str, progress_callback: Optional[Callable] = None) -> AsyncIterator[List[dict]]:
+        """
+        以分段批次的形式获取弹幕（可选）。
+
+        分段拉取的源（如按 6 分钟分段的B站、腾讯）可覆盖此方法，每拉到一段就 yield 一批，
+        由 crud.save_danmaku_stream_for_episode 边拉取边写文件，避免整集弹幕驻留内存。
+        获取失败时应抛出异常而不是静默结束，以便与"没有弹幕"区分。
+        默认实现一次性产出 get_comments 的结果。
+        """
+        comments = await self.get_comments(episode_id, progress_callback=progress_callback)
+        if comments is None:
+            raise RuntimeError(f"获取分集 {episode_id} 的弹幕失败")
+        if comments:
+            yield comments
+
+    @property
+    def supports_comment_streaming(self) -> bool:
+        """该源是否覆盖了 iter_comments，提供真正的分段流式获取。"""
+        return type(self).iter_comments is not BaseScraper.iter_comments
+
     def format_episode_id_for_comments(self, provider_episode_id: Any) -> str:
         """
         (新增) 将 get_comments 所需的 episode_id 格式化为字符串。
@@ -1,5 +1,6 @@
 from datetime import datetime, timedelta, timezone
-from typing import Optional, Tuple, Dict
+from bisect import bisect_right
+from typing import Optional, Tuple, Dict, List, Union
 import uuid
 import ipaddress
 import logging
@@ -19,6 +20,9 @@ from src.api.middleware import normalize_ip as _normalize_ip
 
 logger = logging.getLogger(__name__)
 
+IPAddress = Union[ipaddress.IPv4Address, ipaddress.IPv6Address]
+IPNetwork = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/ui/auth/token")
 
@@ -75,54 +79,8 @@ async def get_real_client_ip(request: Request, config_manager) -> str:
 _whitelist_session_cache: Dict[Tuple[str, str], Tuple[models.User, float, int, str]] = {}
 _WHITELIST_CACHE_MAX_SIZE = 1000  # 最大缓存条目数，防止内存无限增长
 
-
-def clear_whitelist_session_cache():
-    """清空白名单会话缓存，用于 JWT 有效期等配置热加载时调用。"""
-    global _whitelist_session_cache
-    if _whitelist_session_cache:
-        logger.info(f"JWT 配置变更，清空白名单会话缓存（{len(_whitelist_session_cache)} 条）")
-        _whitelist_session_cache.clear()
-
-
-
-def _get_real_client_ip_sync(request: Request, trusted_proxies_str: str) -> str:
-    """
-    同步获取真实客户端 IP（用于白名单检查）
-    """
-    trusted_networks = []
-    if trusted_proxies_str:
-        for proxy_entry in trusted_proxies_str.split(','):
-            try:
-                trusted_networks.append(ipaddress.ip_network(proxy_entry.strip(), strict=False))
-            except ValueError:
-                pass
-
-    client_ip_str = request.client.host if request.client else "127.0.0.1"
-    client_ip_str = _normalize_ip(client_ip_str)  # ::ffff:x.x.x.x → x.x.x.x
-    original_client_ip = client_ip_str
-
-    if trusted_networks:
-        try:
-            client_addr = ipaddress.ip_address(client_ip_str)
-            is_trusted = any(client_addr in network for network in trusted_networks)
-            if is_trusted:
-                x_forwarded_for = request.headers.get("x-forwarded-for")
-                x_real_ip = request.headers.get("x-real-ip")
-                if x_forwarded_for:
-                    client_ip_str = _normalize_ip(x_forwarded_for.split(',')[0].strip())
-                    logger.debug(f"[IP解析] 原始IP={original_client_ip}, 受信任=True, X-Forwarded-For={x_forwarded_for}, 解析后IP={client_ip_str}")
-                elif x_real_ip:
-                    client_ip_str = _normalize_ip(x_real_ip)
-                    logger.debug(f"[IP解析] 原始IP={original_client_ip}, 受信任=True, X-Real-IP={x_real_ip}, 解析后IP={client_ip_str}")
-                else:
-                    logger.debug(f"[IP解析] 原始IP={original_client_ip}, 受信任=True, 但无X-Forwarded-For或X-Real-IP头")
-            else:
-                logger.debug(f"[IP解析] 原始IP={original_client_ip}, 受信任=False, 配置的受信任网段={[str(n) for n in trusted_networks]}")
-        except ValueError as e:
-            logger.warning(f"[IP解析] 无法解析IP地址: {client_ip_str}, 错误: {e}")
-
-    return client_ip_str
-
+# 鉴权快照中管理员用户的最长缓存时间（秒），兜底感知管理员账户的变化
+_ADMIN_USER_TTL = 300
 
 # 危险的 CIDR 网段（会匹配所有 IP）
 _DANGEROUS_NETWORKS = [
@@ -133,34 +91,31 @@ _DANGEROUS_NETWORKS = [
 ]
 
 
-async def check_ip_whitelist(request: Request, session: AsyncSession) -> Optional[models.User]:
-    """
-    检查客户端 IP 是否在白名单中。
-    如果在白名单中，返回系统管理员用户；否则返回 None。
-    使用内存缓存减少重复检查和日志输出。
+class _NetworkSet:
+    """一组 IP 网段：合并重叠网段后按起始地址排序，成员判断为二分查找 O(log n)"""
 
-    :param request: FastAPI Request 对象
-    :param session: 数据库会话
-    :return: 如果 IP 在白名单中返回管理员用户，否则返回 None
-    """
-    global _whitelist_session_cache
+    __slots__ = ("networks", "_starts", "_ends")
 
-    # 获取 IP 白名单配置
-    ip_whitelist_str = await crud.get_config_value(session, "ipWhitelist", "")
-    if not ip_whitelist_str or not ip_whitelist_str.strip():
-        # 白名单为空，清除所有缓存的白名单会话
-        if _whitelist_session_cache:
-            logger.info("IP 白名单已清空，清除所有缓存的白名单会话")
-            _whitelist_session_cache.clear()
-        return None
+    def __init__(self, networks: List[IPNetwork]):
+        self.networks = networks
+        self._starts: Dict[int, List[int]] = {4: [], 6: []}
+        self._ends: Dict[int, List[int]] = {4: [], 6: []}
+        for version in (4, 6):
+            for network in ipaddress.collapse_addresses(n for n in networks if n.version == version):
+                self._starts[version].append(int(network.network_address))
+                self._ends[version].append(int(network.broadcast_address))
+
+    def __bool__(self) -> bool:
+        return bool(self.networks)
 
-    # 获取受信任代理配置并解析真实 IP
-    trusted_proxies_str = await crud.get_config_value(session, "trustedProxies", "")
-    client_ip_str = _get_real_client_ip_sync(request, trusted_proxies_str)
+    def __contains__(self, addr: IPAddress) -> bool:
+        value = int(addr)
+        index = bisect_right(self._starts[addr.version], value) - 1
+        return index >= 0 and value <= self._ends[addr.version][index]
 
-    logger.debug(f"[IP白名单检查] 客户端IP={client_ip_str}, 白名单配置={ip_whitelist_str}, 受信任代理={trusted_proxies_str}")
 
-    # 解析白名单网段（每次都解析，以便检测配置变更）
+def _parse_whitelist(ip_whitelist_str: str) -> _NetworkSet:
+    """解析白名单网段，阻止会匹配大量 IP 的危险配置"""
     whitelist_networks = []
     for entry in ip_whitelist_str.split(','):
         entry = entry.strip()
@@ -182,31 +137,182 @@ async def check_ip_whitelist(request: Request, session: AsyncSession) -> Optiona
             whitelist_networks.append(network)
         except ValueError:
             logger.warning(f"无效的 IP 白名单条目: '{entry}'，已忽略。")
+    return _NetworkSet(whitelist_networks)
 
-    if not whitelist_networks:
-        logger.debug(f"[IP白名单检查] 解析后白名单网段为空")
-        return None
 
-    logger.debug(f"[IP白名单检查] 解析后白名单网段={[str(n) for n in whitelist_networks]}")
+def _parse_trusted_proxies(trusted_proxies_str: str) -> _NetworkSet:
+    trusted_networks = []
+    for proxy_entry in trusted_proxies_str.split(','):
+        proxy_entry = proxy_entry.strip()
+        if not proxy_entry:
+            continue
+        try:
+            trusted_networks.append(ipaddress.ip_network(proxy_entry, strict=False))
+        except ValueError:
+            logger.warning(f"无效的受信任代理IP或CIDR: '{proxy_entry}'，已忽略。")
+    return _NetworkSet(trusted_networks)
+
+
+def _parse_expire_minutes(expire_minutes_str: str) -> int:
+    """解析 JWT 有效期（分钟，-1 表示永久），无效时回退到默认值"""
+    try:
+        return int(expire_minutes_str.strip())
+    except ValueError:
+        default = settings.jwt.access_token_expire_minutes
+        logger.warning(f"无效的 JWT 有效期配置: '{expire_minutes_str}'，已使用默认值 {default} 分钟。")
+        return default
+
+
+# 快照依赖的配置项及默认值
+_AUTH_CONFIG_KEYS = ("ipWhitelist", "trustedProxies", "jwtSecretKey", "jwtExpireMinutes")
+
+
+class _AuthSnapshot:
+    """鉴权相关配置的解析结果；版本即这些配置的原始值，任一值变化时重建"""
+
+    __slots__ = ("version", "whitelist", "trusted_proxies", "jwt_secret_key", "jwt_expire_minutes",
+                 "admin_user", "admin_loaded_at")
+
+    def __init__(self, version: Tuple[str, str, str, str]):
+        ip_whitelist_str, trusted_proxies_str, jwt_secret_key, jwt_expire_minutes = version
+        self.version = version
+        self.whitelist = _parse_whitelist(ip_whitelist_str)
+        self.trusted_proxies = _parse_trusted_proxies(trusted_proxies_str)
+        self.jwt_secret_key = jwt_secret_key
+        self.jwt_expire_minutes = _parse_expire_minutes(jwt_expire_minutes)
+        self.admin_user: Optional[models.User] = None
+        self.admin_loaded_at = 0.0
+
+    @property
+    def whitelist_configured(self) -> bool:
+        """是否填写了白名单（可能全部条目都无效或被阻止）"""
+        return bool(self.version[0].strip())
+
+
+_auth_config_manager = None
+_auth_snapshot: Optional[_AuthSnapshot] = None
+
+
+def bind_auth_config(config_manager) -> None:
+    """
+    通过配置管理器读取鉴权配置（应用启动时调用）。
+    配置管理器在内存中缓存配置值并在配置变更时失效，快照据此判断是否需要重建；
+    未绑定时每次从数据库读取。
+    """
+    global _auth_config_manager
+    _auth_config_manager = config_manager
+
+
+async def _get_auth_snapshot(session: AsyncSession) -> _AuthSnapshot:
+    """获取当前鉴权配置快照，配置未变化时直接复用解析结果"""
+    global _auth_snapshot
+    defaults = ("", "", settings.jwt.secret_key, str(settings.jwt.access_token_expire_minutes))
+    values = []
+    for key, default in zip(_AUTH_CONFIG_KEYS, defaults):
+        if _auth_config_manager is not None:
+            value = await _auth_config_manager.get(key, default)
+        else:
+            value = await crud.get_config_value(session, key, default)
+        values.append(default if value is None else str(value))
+    version = tuple(values)
+
+    snapshot = _auth_snapshot
+    if snapshot is not None and snapshot.version == version:
+        return snapshot
+
+    new_snapshot = _AuthSnapshot(version)
+    logger.debug(f"[鉴权配置] 已重建快照: 白名单网段={[str(n) for n in new_snapshot.whitelist.networks]}, "
+                 f"受信任代理={[str(n) for n in new_snapshot.trusted_proxies.networks]}")
+    if snapshot is not None and _whitelist_session_cache:
+        if not new_snapshot.whitelist:
+            logger.info("IP 白名单已清空，清除所有缓存的白名单会话")
+            _whitelist_session_cache.clear()
+        elif snapshot.jwt_expire_minutes != new_snapshot.jwt_expire_minutes:
+            logger.info(f"JWT 配置变更，清空白名单会话缓存（{len(_whitelist_session_cache)} 条）")
+            _whitelist_session_cache.clear()
+    _auth_snapshot = new_snapshot
+    return new_snapshot
+
+
+async def _get_whitelist_admin(snapshot: _AuthSnapshot, session: AsyncSession) -> Optional[models.User]:
+    """白名单登录使用的管理员用户，在快照中缓存"""
+    now = time.monotonic()
+    if snapshot.admin_user is None or now - snapshot.admin_loaded_at > _ADMIN_USER_TTL:
+        admin_user = await crud.get_user_by_username(session, "admin")
+        if not admin_user:
+            snapshot.admin_user = None
+            return None
+        snapshot.admin_user = models.User.model_validate(admin_user)
+        snapshot.admin_loaded_at = now
+    return snapshot.admin_user
+
+
+def _resolve_client_ip(request: Request, trusted_proxies: _NetworkSet) -> str:
+    """
+    获取真实客户端 IP（用于白名单检查）
+    """
+    client_ip_str = request.client.host if request.client else "127.0.0.1"
+    client_ip_str = _normalize_ip(client_ip_str)  # ::ffff:x.x.x.x → x.x.x.x
+    if not trusted_proxies:
+        return client_ip_str
+
+    try:
+        is_trusted = ipaddress.ip_address(client_ip_str) in trusted_proxies
+    except ValueError as e:
+        logger.warning(f"[IP解析] 无法解析IP地址: {client_ip_str}, 错误: {e}")
+        return client_ip_str
+
+    if is_trusted:
+        x_forwarded_for = request.headers.get("x-forwarded-for")
+        x_real_ip = request.headers.get("x-real-ip")
+        if x_forwarded_for:
+            resolved = _normalize_ip(x_forwarded_for.split(',')[0].strip())
+            logger.debug(f"[IP解析] 原始IP={client_ip_str}, 受信任=True, X-Forwarded-For={x_forwarded_for}, 解析后IP={resolved}")
+            return resolved
+        if x_real_ip:
+            resolved = _normalize_ip(x_real_ip)
+            logger.debug(f"[IP解析] 原始IP={client_ip_str}, 受信任=True, X-Real-IP={x_real_ip}, 解析后IP={resolved}")
+            return resolved
+        logger.debug(f"[IP解析] 原始IP={client_ip_str}, 受信任=True, 但无X-Forwarded-For或X-Real-IP头")
+    return client_ip_str
+
 
-    # 获取 User-Agent 并生成哈希（用于区分同 IP 不同浏览器）
+def _whitelist_cache_key(request: Request, client_ip_str: str) -> Tuple[Tuple[str, str], str, str]:
+    """返回 (缓存键, User-Agent, UA 哈希)；UA 哈希用于区分同 IP 不同浏览器"""
     user_agent = request.headers.get("user-agent", "")
     ua_hash = hashlib.md5(user_agent.encode()).hexdigest()[:8] if user_agent else "unknown"
-    cache_key = (client_ip_str, ua_hash)
+    return (client_ip_str, ua_hash), user_agent, ua_hash
+
+
+async def _check_ip_whitelist(request: Request, session: AsyncSession) -> Optional[Tuple[models.User, Optional[str]]]:
+    """
+    白名单检查的实现，返回 (管理员用户, 会话 jti)。
+
+    配置解析结果、管理员用户和 JWT 有效期来自鉴权快照；
+    缓存中的白名单会话有效期内不访问数据库。
+    """
+    snapshot = await _get_auth_snapshot(session)
+    if not snapshot.whitelist:
+        return None
+
+    client_ip_str = _resolve_client_ip(request, snapshot.trusted_proxies)
+    try:
+        client_addr = ipaddress.ip_address(client_ip_str)
+    except ValueError:
+        logger.warning(f"无法解析客户端 IP '{client_ip_str}'")
+        return None
+    is_whitelisted = client_addr in snapshot.whitelist
+
+    cache_key, user_agent, ua_hash = _whitelist_cache_key(request, client_ip_str)
 
     # 检查缓存：如果该 IP + UA 已经验证过且未过期
     current_time = time.time()
-    if cache_key in _whitelist_session_cache:
-        cached_user, cached_time, cached_ttl, cached_jti = _whitelist_session_cache[cache_key]
+    cached = _whitelist_session_cache.get(cache_key)
+    if cached is not None:
+        cached_user, cached_time, cached_ttl, cached_jti = cached
 
         # 【安全检查】验证该 IP 是否仍在当前白名单中
-        try:
-            client_addr = ipaddress.ip_address(client_ip_str)
-            still_whitelisted = any(client_addr in network for network in whitelist_networks)
-        except ValueError:
-            still_whitelisted = False
-
-        if not still_whitelisted:
+        if not is_whitelisted:
             # IP 已从白名单移除，立即撤销会话
             logger.warning(f"IP {client_ip_str} 已从白名单移除，撤销其会话")
             del _whitelist_session_cache[cache_key]
@@ -217,99 +323,100 @@ async def check_ip_whitelist(request: Request, session: AsyncSession) -> Optiona
             return None
 
         if current_time - cached_time < cached_ttl:
-            # 缓存有效，直接返回（不打印日志）
-            return cached_user
-        else:
-            # 缓存过期，删除缓存并撤销数据库中的会话
-            del _whitelist_session_cache[cache_key]
-            try:
-                await session_crud.revoke_session_by_jti(session, cached_jti)
-            except Exception as e:
-                logger.warning(f"撤销过期白名单会话失败: {e}")
+            # 缓存有效，直接返回（不查询数据库，不打印日志）
+            return cached_user, cached_jti
+        # 缓存过期，删除缓存并撤销数据库中的会话
+        del _whitelist_session_cache[cache_key]
+        try:
+            await session_crud.revoke_session_by_jti(session, cached_jti)
+        except Exception as e:
+            logger.warning(f"撤销过期白名单会话失败: {e}")
 
-    # 检查客户端 IP 是否在白名单中
+    if not is_whitelisted:
+        return None
+
+    # 获取管理员用户（必须存在，否则不允许白名单登录）
+    user = await _get_whitelist_admin(snapshot, session)
+    if user is None:
+        logger.error("IP 白名单功能需要 admin 用户存在，但未找到 admin 用户")
+        return None
+
+    # JWT 有效期配置（与正常登录一致）
+    expire_minutes = snapshot.jwt_expire_minutes
+    # 如果是 -1（永不过期），使用一个较大的值（7天）
+    if expire_minutes == -1:
+        ttl_seconds = 7 * 24 * 60 * 60  # 7 天
+        db_expire_minutes = None  # 数据库中不设置过期时间
+    else:
+        ttl_seconds = expire_minutes * 60  # 转换为秒
+        db_expire_minutes = expire_minutes
+
+    # 使用 IP + UA哈希 作为会话 ID，区分同 IP 不同浏览器
+    jti = f"whitelist_{client_ip_str}_{ua_hash}"
+
+    # 检查数据库中是否已存在该 jti 的会话
+    existing_session = await session_crud.get_session_by_jti(session, jti)
+    if existing_session:
+        if not existing_session.get("isRevoked"):
+            # 检查是否过期
+            expires_at = existing_session.get("expiresAt")
+            if expires_at is None or expires_at > get_now():
+                # 会话有效，更新最后使用时间并复用
+                await session_crud.update_session_last_used(session, jti)
+                _whitelist_session_cache[cache_key] = (user, current_time, ttl_seconds, jti)
+                logger.debug(f"IP {client_ip_str} 复用已有的白名单会话")
+                return user, jti
+
+        # 会话已过期或被撤销，删除旧会话以便重建
+        await session_crud.delete_session_by_jti(session, jti)
+
+    # 创建新的数据库会话记录
     try:
-        client_addr = ipaddress.ip_address(client_ip_str)
-        is_whitelisted = any(client_addr in network for network in whitelist_networks)
-
-        if is_whitelisted:
-            # 获取管理员用户（必须存在，否则不允许白名单登录）
-            admin_user = await crud.get_user_by_username(session, "admin")
-            if not admin_user:
-                logger.error("IP 白名单功能需要 admin 用户存在，但未找到 admin 用户")
-                return None
-
-            user = models.User.model_validate(admin_user)
-            user_id = admin_user["id"]
-
-            # 获取 JWT 有效期配置（与正常登录一致）
-            expire_minutes_str = await crud.get_config_value(session, 'jwtExpireMinutes', str(settings.jwt.access_token_expire_minutes))
-            expire_minutes = int(expire_minutes_str)
-            # 如果是 -1（永不过期），使用一个较大的值（7天）
-            if expire_minutes == -1:
-                ttl_seconds = 7 * 24 * 60 * 60  # 7 天
-                db_expire_minutes = None  # 数据库中不设置过期时间
-            else:
-                ttl_seconds = expire_minutes * 60  # 转换为秒
-                db_expire_minutes = expire_minutes
-
-            # 使用 IP + UA哈希 作为会话 ID，区分同 IP 不同浏览器
-            jti = f"whitelist_{client_ip_str}_{ua_hash}"
-
-            # 检查数据库中是否已存在该 jti 的会话
-            existing_session = await session_crud.get_session_by_jti(session, jti)
-            if existing_session:
-                if not existing_session.get("isRevoked"):
-                    # 检查是否过期
-                    expires_at = existing_session.get("expiresAt")
-                    if expires_at is None or expires_at > get_now():
-                        # 会话有效，更新最后使用时间并复用
-                        await session_crud.update_session_last_used(session, jti)
-                        _whitelist_session_cache[cache_key] = (user, current_time, ttl_seconds, jti)
-                        logger.debug(f"IP {client_ip_str} 复用已有的白名单会话")
-                        return user
-
-                # 会话已过期或被撤销，删除旧会话以便重建
-                await session_crud.delete_session_by_jti(session, jti)
-
-            # 创建新的数据库会话记录
+        await session_crud.create_user_session(
+            session=session,
+            user_id=user.id,
+            jti=jti,
+            ip_address=client_ip_str,
+            user_agent=user_agent[:500] if user_agent else None,
+            expires_minutes=db_expire_minutes
+        )
+    except Exception as e:
+        # 可能是并发请求导致的重复键错误，尝试复用已存在的会话
+        if "Duplicate entry" in str(e) or "UNIQUE constraint" in str(e):
+            logger.debug(f"白名单会话已被其他请求创建，尝试复用: {jti}")
+            # 更新最后使用时间
             try:
-                await session_crud.create_user_session(
-                    session=session,
-                    user_id=user_id,
-                    jti=jti,
-                    ip_address=client_ip_str,
-                    user_agent=user_agent[:500] if user_agent else None,
-                    expires_minutes=db_expire_minutes
-                )
-            except Exception as e:
-                # 可能是并发请求导致的重复键错误，尝试复用已存在的会话
-                if "Duplicate entry" in str(e) or "UNIQUE constraint" in str(e):
-                    logger.debug(f"白名单会话已被其他请求创建，尝试复用: {jti}")
-                    # 更新最后使用时间
-                    try:
-                        await session_crud.update_session_last_used(session, jti)
-                    except Exception:
-                        pass
-                    _whitelist_session_cache[cache_key] = (user, current_time, ttl_seconds, jti)
-                    return user
-                else:
-                    logger.error(f"创建白名单会话记录失败: {e}")
-                # 即使数据库记录失败，仍然允许访问（但不缓存）
-                return user
-
-            # 缓存结果并打印一次日志（限制缓存大小防止内存增长）
-            if len(_whitelist_session_cache) >= _WHITELIST_CACHE_MAX_SIZE:
-                # 清除最旧的缓存条目
-                oldest_key = min(_whitelist_session_cache, key=lambda k: _whitelist_session_cache[k][1])
-                del _whitelist_session_cache[oldest_key]
+                await session_crud.update_session_last_used(session, jti)
+            except Exception:
+                pass
             _whitelist_session_cache[cache_key] = (user, current_time, ttl_seconds, jti)
-            logger.info(f"IP {client_ip_str} 在白名单中，已建立免登录会话（有效期 {expire_minutes if expire_minutes != -1 else '永久'} 分钟）")
-            return user
-    except ValueError:
-        logger.warning(f"无法解析客户端 IP '{client_ip_str}'")
+            return user, jti
+        logger.error(f"创建白名单会话记录失败: {e}")
+        # 即使数据库记录失败，仍然允许访问（但不缓存）
+        return user, None
+
+    # 缓存结果并打印一次日志（限制缓存大小防止内存增长）
+    if len(_whitelist_session_cache) >= _WHITELIST_CACHE_MAX_SIZE:
+        # 清除最旧的缓存条目
+        oldest_key = min(_whitelist_session_cache, key=lambda k: _whitelist_session_cache[k][1])
+        del _whitelist_session_cache[oldest_key]
+    _whitelist_session_cache[cache_key] = (user, current_time, ttl_seconds, jti)
+    logger.info(f"IP {client_ip_str} 在白名单中，已建立免登录会话（有效期 {expire_minutes if expire_minutes != -1 else '永久'} 分钟）")
+    return user, jti
 
-    return None
+
+async def check_ip_whitelist(request: Request, session: AsyncSession) -> Optional[models.User]:
+    """
+    检查客户端 IP 是否在白名单中。
+    如果在白名单中，返回系统管理员用户；否则返回 None。
+    使用内存缓存减少重复检查和日志输出。
+
+    :param request: FastAPI Request 对象
+    :param session: 数据库会话
+    :return: 如果 IP 在白名单中返回管理员用户，否则返回 None
+    """
+    result = await _check_ip_whitelist(request, session)
+    return result[0] if result else None
 
 
 def clear_whitelist_session_cache(ip: Optional[str] = None):
@@ -337,45 +444,7 @@ async def check_ip_whitelist_with_jti(request: Request, session: AsyncSession) -
     :param session: 数据库会话
     :return: 如果 IP 在白名单中返回 (用户, jti)，否则返回 None
     """
-    global _whitelist_session_cache
-
-    # 获取 IP 白名单配置
-    ip_whitelist_str = await crud.get_config_value(session, "ipWhitelist", "")
-    if not ip_whitelist_str or not ip_whitelist_str.strip():
-        return None
-
-    # 获取受信任代理配置并解析真实 IP
-    trusted_proxies_str = await crud.get_config_value(session, "trustedProxies", "")
-    client_ip_str = _get_real_client_ip_sync(request, trusted_proxies_str)
-
-    # 获取 User-Agent 并生成哈希
-    user_agent = request.headers.get("user-agent", "")
-    ua_hash = hashlib.md5(user_agent.encode()).hexdigest()[:8] if user_agent else "unknown"
-    cache_key = (client_ip_str, ua_hash)
-
-    # 检查缓存
-    current_time = time.time()
-    if cache_key in _whitelist_session_cache:
-        cached_user, cached_time, cached_ttl, cached_jti = _whitelist_session_cache[cache_key]
-        if current_time - cached_time < cached_ttl:
-            return cached_user, cached_jti
-        else:
-            del _whitelist_session_cache[cache_key]
-            try:
-                await session_crud.revoke_session_by_jti(session, cached_jti)
-            except Exception as e:
-                logger.warning(f"撤销过期白名单会话失败: {e}")
-
-    # 调用 check_ip_whitelist 来创建会话（如果在白名单中）
-    user = await check_ip_whitelist(request, session)
-    if user:
-        # 从缓存中获取 jti
-        if cache_key in _whitelist_session_cache:
-            _, _, _, jti = _whitelist_session_cache[cache_key]
-            return user, jti
-        return user, None
-
-    return None
+    return await _check_ip_whitelist(request, session)
 
 
 async def _get_user_from_token(token: str, session: AsyncSession, validate_session: bool = True) -> Tuple[models.User, Optional[str]]:
@@ -396,7 +465,7 @@ async def _get_user_from_token(token: str, session: AsyncSession, validate_sessi
     if not token:
         raise credentials_exception
     try:
-        secret_key = await crud.get_config_value(session, 'jwtSecretKey', settings.jwt.secret_key)
+        secret_key = (await _get_auth_snapshot(session)).jwt_secret_key
         payload = jwt.decode(token, secret_key, algorithms=[settings.jwt.algorithm])
         username: str = payload.get("sub")
         jti: str = payload.get("jti")
@@ -441,9 +510,9 @@ async def create_access_token(data: dict, session: AsyncSession, expires_delta:
         "jti": jti,  # JWT ID: 每个令牌的唯一标识符，可用于防止重放攻击
     })
 
-    secret_key = await crud.get_config_value(session, 'jwtSecretKey', settings.jwt.secret_key) # type: ignore
-    expire_minutes_str = await crud.get_config_value(session, 'jwtExpireMinutes', str(settings.jwt.access_token_expire_minutes)) # type: ignore
-    expire_minutes = int(expire_minutes_str)
+    snapshot = await _get_auth_snapshot(session)
+    secret_key = snapshot.jwt_secret_key
+    expire_minutes = snapshot.jwt_expire_minutes
     # 如果有效期不为-1，则设置过期时间
     if expire_minutes != -1:
         expire = now + timedelta(minutes=expire_minutes)
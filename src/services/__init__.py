@@ -9,6 +9,7 @@
 
 # 任务管理
 from .task_manager import TaskManager, TaskStatus, TaskSuccess, TaskPauseForRateLimit
+from .task_progress_hub import TaskProgressHub
 
 # 弹幕源管理
 from .scraper_manager import ScraperManager
@@ -36,6 +37,7 @@ from .scheduler import SchedulerManager
 
 # 日志管理
 from .log_manager import setup_logging, get_logs, subscribe_to_logs, unsubscribe_from_logs, list_log_files, read_log_file
+from .log_search import iter_log_matches, stream_log_search
 
 # 搜索服务
 from .search import unified_search
@@ -65,6 +67,7 @@ __all__ = [
     'TaskStatus',
     'TaskSuccess',
     'TaskPauseForRateLimit',
+    'TaskProgressHub',
     # 弹幕源管理
     'ScraperManager',
     # 元数据源管理
@@ -89,6 +92,8 @@ __all__ = [
     'get_logs',
     'subscribe_to_logs',
     'unsubscribe_from_logs',
+    'iter_log_matches',
+    'stream_log_search',
     # 搜索服务
     'unified_search',
     # 名称转换
@@ -1,9 +1,11 @@
+import atexit
 import collections
 import logging
 import logging.handlers
 from pathlib import Path
+import queue
 import re
-from typing import List, Set
+from typing import Dict, List, Optional
 import asyncio
 
 from src.core.config import settings
@@ -11,8 +13,21 @@ from src.core.config import settings
 # 这个双端队列将用于在内存中存储最新的日志，以供Web界面展示
 _logs_deque = collections.deque(maxlen=200)
 
-# 用于存储所有订阅日志的队列
-_log_subscribers: Set[asyncio.Queue] = set()
+# 用于存储所有订阅日志的队列，以及订阅时所在的事件循环
+# DequeHandler 运行在日志监听线程中，必须通过 call_soon_threadsafe 投递到各自的事件循环
+_log_subscribers: Dict[asyncio.Queue, asyncio.AbstractEventLoop] = {}
+
+# 当前运行中的日志监听线程
+_log_listener: Optional["LogDispatchListener"] = None
+
+
+def _put_log_nowait(log_queue: asyncio.Queue, log_message: str) -> None:
+    try:
+        log_queue.put_nowait(log_message)
+    except asyncio.QueueFull:
+        # 如果队列满了,跳过这条日志
+        pass
+
 
 # 自定义一个日志处理器，它会将日志记录发送到我们的双端队列中
 class DequeHandler(logging.Handler):
@@ -26,12 +41,75 @@ class DequeHandler(logging.Handler):
         self.deque.appendleft(log_message)
 
         # 通知所有订阅者
-        for queue in _log_subscribers:
+        for subscriber, loop in list(_log_subscribers.items()):
             try:
-                queue.put_nowait(log_message)
-            except asyncio.QueueFull:
-                # 如果队列满了,跳过这条日志
-                pass
+                loop.call_soon_threadsafe(_put_log_nowait, subscriber, log_message)
+            except RuntimeError:
+                # 事件循环已关闭，订阅者已失效
+                _log_subscribers.pop(subscriber, None)
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    只负责把日志记录放入队列的处理器。
+
+    标准 QueueHandler 会在调用线程中完成格式化（包括异常堆栈），
+    这里仅在存在 %-参数时合并消息（防止参数对象在入队后被修改），
+    过滤、格式化和文件 I/O 全部交给监听线程。
+    """
+
+    def prepare(self, record):
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+
+class LogDispatchListener(logging.handlers.QueueListener):
+    """
+    日志监听线程：从队列取出记录，执行根日志过滤器后分发给对应的处理器。
+
+    专用日志（propagate=False）按 logger 名称路由到各自的文件处理器，其余记录交给根处理器。
+    """
+
+    def __init__(self, log_queue, root_handlers, root_filters, routes):
+        super().__init__(log_queue, *root_handlers, respect_handler_level=True)
+        self.root_filters = root_filters
+        self.routes = routes
+
+    def _route(self, name: str):
+        handlers = self.routes.get(name)
+        if handlers is None and '.' in name:
+            handlers = self.routes.get(name.split('.', 1)[0])
+        return handlers
+
+    def handle(self, record):
+        handlers = self._route(record.name)
+        if handlers is None:
+            handlers = self.handlers
+            for f in self.root_filters:
+                if not f.filter(record):
+                    return
+        for handler in handlers:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+
+def stop_logging_listener() -> None:
+    """停止日志监听线程，处理完队列中剩余的记录并关闭处理器。"""
+    global _log_listener
+    listener, _log_listener = _log_listener, None
+    if listener is None:
+        return
+    listener.stop()
+    for handler in [*listener.handlers, *(h for hs in listener.routes.values() for h in hs)]:
+        try:
+            handler.close()
+        except Exception:
+            pass
+
+
+atexit.register(stop_logging_listener)
 
 # 新增：一个过滤器，用于从UI日志中排除 httpx 的日志
 class NoHttpxLogFilter(logging.Filter):
@@ -139,6 +217,9 @@ def setup_logging():
     配置根日志记录器，使其能够将日志输出到控制台、一个可轮转的文件，
     以及一个用于API的内存双端队列。
     此函数应在应用启动时被调用一次。
+
+    所有日志记录器只挂载一个 DeferredQueueHandler，调用方只需入队；
+    过滤、格式化、文件写入与轮转以及 UI 推送都在 LogDispatchListener 线程中完成。
     """
     def _is_docker_environment():
         """检测是否在Docker容器中运行"""
@@ -183,38 +264,44 @@ def setup_logging():
     logger = logging.getLogger()
     logger.setLevel(log_level)
 
-    # 清理已存在的处理器，以避免在热重载时重复添加
+    # 清理已存在的处理器和监听线程，以避免在热重载时重复添加
+    stop_logging_listener()
     if logger.hasHandlers():
         logger.handlers.clear()
 
-    # 添加新的过滤器到根日志记录器，以便翻译所有输出
-    logger.addFilter(ApschedulerLogTranslatorFilter())
-    logger.addFilter(SensitiveInfoFilter())  # 添加敏感信息过滤器到所有处理器
-    logger.addFilter(SQLAlchemyPoolShutdownFilter())  # 压制连接池关闭时的良性噪音
-
-    logger.addHandler(logging.StreamHandler()) # 控制台处理器
-    logger.addHandler(logging.handlers.RotatingFileHandler(log_file, maxBytes=5*1024*1024, backupCount=5, encoding='utf-8')) # 文件处理器
+    # 根日志过滤器在监听线程中执行，以便翻译所有输出
+    root_filters = [
+        ApschedulerLogTranslatorFilter(),
+        SensitiveInfoFilter(),  # 隐藏所有输出中的敏感信息（包括 httpx）
+        SQLAlchemyPoolShutdownFilter(),  # 压制连接池关闭时的良性噪音
+    ]
 
-    # 配置httpx logger,确保其日志也经过敏感信息过滤
-    httpx_logger = logging.getLogger("httpx")
-    httpx_logger.addFilter(SensitiveInfoFilter())
+    root_handlers = [
+        logging.StreamHandler(),  # 控制台处理器
+        logging.handlers.RotatingFileHandler(log_file, maxBytes=5*1024*1024, backupCount=5, encoding='utf-8'),  # 文件处理器
+    ]
 
     # 创建并配置 DequeHandler，以过滤掉不希望在UI上显示的内容
     deque_handler = DequeHandler(_logs_deque)
     deque_handler.addFilter(NoHttpxLogFilter())
     deque_handler.addFilter(BilibiliInfoFilter()) # 添加新的过滤器
-    logger.addHandler(deque_handler)
+    root_handlers.append(deque_handler)
 
     # 为所有处理器设置格式
-    for handler in logger.handlers:
+    for handler in root_handlers:
         if isinstance(handler, DequeHandler):
             handler.setFormatter(ui_formatter)
         else:
             handler.setFormatter(verbose_formatter)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(log_queue)
+    logger.addHandler(queue_handler)
     
     # --- 专用日志记录器配置 ---
     # 定义所有专用日志: (logger名称, 文件名, 描述, 日志级别, 格式, maxBytes)
     _P = "  - "  # 子项缩进前缀
+    routes = {}
     _specialized_loggers = [
         ("scraper_responses", "scraper_responses.log", "搜索源响应",
          logging.DEBUG, '[%(asctime)s] [%(name)s] - %(message)s', 10*1024*1024),
@@ -241,11 +328,17 @@ def setup_logging():
         spec_logger = logging.getLogger(logger_name)
         spec_logger.setLevel(level)
         spec_logger.propagate = False
+        spec_logger.handlers.clear()
         handler = logging.handlers.RotatingFileHandler(
             filepath, maxBytes=max_bytes, backupCount=3, encoding='utf-8'
         )
         handler.setFormatter(logging.Formatter(fmt, datefmt='%Y-%m-%d %H:%M:%S'))
-        spec_logger.addHandler(handler)
+        routes[logger_name] = [handler]
+        spec_logger.addHandler(queue_handler)
+
+    global _log_listener
+    _log_listener = LogDispatchListener(log_queue, root_handlers, root_filters, routes)
+    _log_listener.start()
 
     # 汇总输出日志系统初始化信息
     log_lines = [f"日志系统已初始化 (目录: {log_dir})"]
@@ -291,35 +384,64 @@ def list_log_files() -> List[dict]:
     return files
 
 
-def read_log_file(filename: str, tail: int = 500) -> List[str]:
-    """读取指定日志文件的最后 N 行。"""
-    log_dir = get_log_dir()
+# 倒序读取日志时每次读取的块大小
+_TAIL_BLOCK_SIZE = 64 * 1024
+
+
+def resolve_log_file(filename: str) -> Path:
+    """将日志文件名解析为日志目录下的绝对路径，防止路径穿越。"""
+    log_dir = get_log_dir().resolve()
     file_path = (log_dir / filename).resolve()
 
     # 安全检查：防止路径穿越
-    if not str(file_path).startswith(str(log_dir.resolve())):
+    if file_path.parent != log_dir:
         raise ValueError("非法的文件路径")
+    return file_path
+
+
+def tail_file_lines(file_path: Path, tail: int) -> List[str]:
+    """从文件末尾按块向前读取，返回最后 tail 行，读取量只与 tail 行的大小相关。"""
+    if tail <= 0:
+        return []
+    with open(file_path, 'rb') as f:
+        f.seek(0, 2)
+        pos = f.tell()
+        chunks: List[bytes] = []
+        newlines = 0
+        while pos > 0 and newlines <= tail:
+            read_size = min(_TAIL_BLOCK_SIZE, pos)
+            pos -= read_size
+            f.seek(pos)
+            chunk = f.read(read_size)
+            chunks.append(chunk)
+            newlines += chunk.count(b'\n')
+
+    data = b''.join(reversed(chunks))
+    lines = data.split(b'\n')
+    if lines and lines[-1] == b'':
+        lines.pop()
+    # 未读到文件开头时第一段可能是不完整的行，但此时已读到超过 tail 个换行，切片会将其丢弃
+    return [line.decode('utf-8', errors='replace').rstrip('\r') for line in lines[-tail:]]
+
+
+def read_log_file(filename: str, tail: int = 500) -> List[str]:
+    """读取指定日志文件的最后 N 行。"""
+    file_path = resolve_log_file(filename)
 
     if not file_path.exists() or not file_path.is_file():
         raise FileNotFoundError(f"日志文件不存在: {filename}")
 
-    # 读取最后 tail 行
-    lines = []
     try:
-        with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
-            from collections import deque
-            lines = list(deque(f, maxlen=tail))
+        return tail_file_lines(file_path, tail)
     except Exception as e:
         raise IOError(f"读取日志文件失败: {e}")
 
-    return [line.rstrip('\n').rstrip('\r') for line in lines]
-
 
-def subscribe_to_logs(queue: asyncio.Queue) -> None:
-    """订阅日志更新。"""
-    _log_subscribers.add(queue)
+def subscribe_to_logs(log_queue: asyncio.Queue) -> None:
+    """订阅日志更新。必须在事件循环中调用，日志会投递到调用时所在的事件循环。"""
+    _log_subscribers[log_queue] = asyncio.get_running_loop()
 
 
-def unsubscribe_from_logs(queue: asyncio.Queue) -> None:
+def unsubscribe_from_logs(log_queue: asyncio.Queue) -> None:
     """取消订阅日志更新。"""
-    _log_subscribers.discard(queue)
\ No newline at end of file
+    _log_subscribers.pop(log_queue, None)
\ No newline at end of file
@@ -0,0 +1,275 @@
+"""
+日志检索
+
+在工作线程中跨轮转文件（app.log.N ... app.log）及专用日志流式检索日志条目，
+支持子串/正则、最低级别、时间范围和 logger 名称过滤。
+
+时间范围查询可使用按时间戳建立的稀疏偏移索引：每隔一段字节记录一次
+(时间戳, 行首偏移)，查询时二分定位到起始区域后再顺序扫描，避免从头读取整个文件。
+索引按 (设备号, inode) 缓存在内存中，文件轮转改名后仍然有效，文件增长时增量补建。
+"""
+import asyncio
+import bisect
+import logging
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Pattern, Tuple
+
+from .log_manager import get_log_dir, resolve_log_file
+
+logger = logging.getLogger(__name__)
+
+# 日志条目首行：[时间] 可选 [logger名:行号] 可选 [级别]
+_ENTRY_HEADER_RE = re.compile(
+    rb'^\[(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})\]'
+    rb'(?: \[([^\]\s:]+)(?::\d+)?\])?'
+    rb'(?: \[([A-Z]+)\])?'
+)
+_TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# 稀疏索引的采样间隔（字节）
+INDEX_STRIDE = 256 * 1024
+# 单个条目最多保留的续行数，防止异常的超长条目占用过多内存
+MAX_ENTRY_LINES = 500
+# 每次从工作线程取回的匹配数量
+STREAM_BATCH_SIZE = 200
+
+
+@dataclass
+class _FileIndex:
+    """单个日志文件的稀疏时间戳索引。"""
+    size: int = 0
+    timestamps: List[bytes] = field(default_factory=list)
+    offsets: List[int] = field(default_factory=list)
+    last_timestamp: Optional[bytes] = None
+
+
+_index_cache: Dict[Tuple[int, int], _FileIndex] = {}
+_index_lock = threading.Lock()
+
+
+def _extend_index(f, index: _FileIndex, size: int) -> None:
+    """从上次索引到的位置起，为文件新增部分补建采样点。"""
+    next_sample = index.offsets[-1] + INDEX_STRIDE if index.offsets else 0
+    pos = index.size
+    f.seek(pos)
+    if pos > 0:
+        # 上次可能停在行中间，跳到下一行行首
+        f.seek(pos - 1)
+        if f.read(1) != b'\n':
+            pos += len(f.readline())
+    while pos < size:
+        line = f.readline()
+        if not line:
+            break
+        match = _ENTRY_HEADER_RE.match(line)
+        if match:
+            ts = match.group(1)
+            index.last_timestamp = ts
+            if pos >= next_sample:
+                index.timestamps.append(ts)
+                index.offsets.append(pos)
+                next_sample = pos + INDEX_STRIDE
+            elif index.timestamps and ts < index.timestamps[-1]:
+                # 时间戳轻微乱序时保持索引单调，查询只会多扫描一点
+                index.timestamps[-1] = ts
+        pos += len(line)
+    index.size = pos
+
+
+def _get_file_index(path: Path) -> Optional[_FileIndex]:
+    """获取（必要时建立或增量更新）文件的时间戳索引。"""
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    key = (stat.st_dev, stat.st_ino)
+    with _index_lock:
+        index = _index_cache.get(key)
+        if index is None or stat.st_size < index.size:
+            # 新文件或被截断（例如启动时清空的专用日志），重新建立
+            index = _FileIndex()
+        if stat.st_size > index.size:
+            with open(path, 'rb') as f:
+                _extend_index(f, index, stat.st_size)
+        _index_cache[key] = index
+        # 清理已被删除的文件的索引
+        if len(_index_cache) > 64:
+            _index_cache.clear()
+            _index_cache[key] = index
+    return index
+
+
+def expand_log_files(names: List[str]) -> List[Path]:
+    """将日志基础文件名展开为包含轮转文件的路径列表，按时间从旧到新排列。"""
+    log_dir = get_log_dir()
+    paths: List[Path] = []
+    for name in names:
+        base = resolve_log_file(name)
+        rotations = []
+        if log_dir.exists():
+            pattern = re.compile(re.escape(base.name) + r'\.(\d+)$')
+            for entry in os.scandir(log_dir):
+                match = pattern.match(entry.name)
+                if match and entry.is_file():
+                    rotations.append((int(match.group(1)), Path(entry.path)))
+        # 编号越大越旧
+        paths.extend(p for _, p in sorted(rotations, reverse=True))
+        if base.is_file():
+            paths.append(base)
+    return paths
+
+
+def iter_log_matches(
+    files: List[str],
+    query: Optional[str] = None,
+    use_regex: bool = False,
+    level: Optional[str] = None,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    logger_name: Optional[str] = None,
+    use_index: bool = True,
+) -> Iterator[Dict[str, Any]]:
+    """
+    返回逐条产出匹配日志条目的同步迭代器，应在工作线程中消费。
+
+    - query: 子串（不区分大小写）或正则表达式，匹配整个条目（包括多行续行）
+    - level: 最低日志级别；没有级别字段的日志（如专用日志）在指定级别时不会匹配
+    - start_time / end_time: 闭区间时间范围
+    - logger_name: logger 名称前缀
+
+    参数在调用时立即校验，非法的正则、级别或文件名抛出 ValueError。
+    """
+    pattern: Optional[Pattern[str]] = None
+    if query:
+        try:
+            pattern = re.compile(query if use_regex else re.escape(query), re.IGNORECASE)
+        except re.error as e:
+            raise ValueError(f"无效的正则表达式: {e}")
+    min_levelno = logging.getLevelName(level.upper()) if level else None
+    if min_levelno is not None and not isinstance(min_levelno, int):
+        raise ValueError(f"未知的日志级别: {level}")
+    start_ts = start_time.strftime(_TIMESTAMP_FORMAT).encode() if start_time else None
+    end_ts = end_time.strftime(_TIMESTAMP_FORMAT).encode() if end_time else None
+    logger_prefix = logger_name.encode() if logger_name else None
+    paths = expand_log_files(files)
+
+    def entry_matches(header: re.Match, lines: List[bytes]) -> Optional[Dict[str, Any]]:
+        ts, name, lvl = header.group(1), header.group(2), header.group(3)
+        if start_ts and ts < start_ts:
+            return None
+        if end_ts and ts > end_ts:
+            return None
+        if logger_prefix and not (name and name.startswith(logger_prefix)):
+            return None
+        if min_levelno is not None:
+            levelno = logging.getLevelName(lvl.decode()) if lvl else None
+            if not isinstance(levelno, int) or levelno < min_levelno:
+                return None
+        text = b'\n'.join(lines).decode('utf-8', errors='replace')
+        if pattern and not pattern.search(text):
+            return None
+        return {
+            "timestamp": ts.decode(),
+            "level": lvl.decode() if lvl else None,
+            "logger": name.decode() if name else None,
+            "text": text,
+        }
+
+    return _iter_matches(paths, entry_matches, start_ts, end_ts, use_index)
+
+
+def _iter_matches(paths: List[Path], entry_matches, start_ts: Optional[bytes],
+                  end_ts: Optional[bytes], use_index: bool) -> Iterator[Dict[str, Any]]:
+    for path in paths:
+        start_offset = 0
+        if use_index and (start_ts or end_ts):
+            index = _get_file_index(path)
+            if index is not None and index.timestamps:
+                # 整个文件都不在时间范围内时直接跳过
+                if start_ts and index.last_timestamp and index.last_timestamp < start_ts:
+                    continue
+                if end_ts and index.timestamps[0] > end_ts:
+                    continue
+                if start_ts:
+                    pos = bisect.bisect_left(index.timestamps, start_ts) - 1
+                    if pos >= 0:
+                        start_offset = index.offsets[pos]
+
+        try:
+            f = open(path, 'rb')
+        except OSError as e:
+            logger.warning(f"无法打开日志文件 {path}: {e}")
+            continue
+        with f:
+            f.seek(start_offset)
+            header = None
+            entry_lines: List[bytes] = []
+            for raw_line in f:
+                line = raw_line.rstrip(b'\r\n')
+                match = _ENTRY_HEADER_RE.match(line)
+                if match:
+                    if header is not None:
+                        result = entry_matches(header, entry_lines)
+                        if result is not None:
+                            result["file"] = path.name
+                            yield result
+                        elif end_ts and header.group(1) > end_ts:
+                            # 已越过时间范围，本文件后续条目无需再读
+                            header = None
+                            break
+                    header = match
+                    entry_lines = [line]
+                elif header is not None and len(entry_lines) < MAX_ENTRY_LINES:
+                    entry_lines.append(line)
+            if header is not None:
+                result = entry_matches(header, entry_lines)
+                if result is not None:
+                    result["file"] = path.name
+                    yield result
+
+
+async def stream_log_search(matches: Iterator[Dict[str, Any]], limit: int = 1000) -> AsyncIterator[Dict[str, Any]]:
+    """
+    在工作线程中消费 iter_log_matches 返回的迭代器，按批次异步产出匹配结果，最多 limit 条。
+
+    调用方被取消时工作线程可能仍在 next(matches) 中，此时由线程结束后再关闭迭代器，
+    避免 "generator already executing" 并确保文件句柄被释放。
+    """
+    stop = threading.Event()
+
+    def next_batch(size: int) -> List[Dict[str, Any]]:
+        batch = []
+        for item in matches:
+            batch.append(item)
+            if len(batch) >= size or stop.is_set():
+                break
+        return batch
+
+    def close_when_done(future: asyncio.Future) -> None:
+        if not future.cancelled():
+            future.exception()
+        matches.close()
+
+    remaining = limit
+    pending: Optional[asyncio.Future] = None
+    try:
+        while remaining > 0:
+            pending = asyncio.ensure_future(asyncio.to_thread(next_batch, min(STREAM_BATCH_SIZE, remaining)))
+            batch = await asyncio.shield(pending)
+            pending = None
+            if not batch:
+                break
+            remaining -= len(batch)
+            for item in batch:
+                yield item
+    finally:
+        if pending is not None and not pending.done():
+            stop.set()
+            pending.add_done_callback(close_when_done)
+        else:
+            matches.close()
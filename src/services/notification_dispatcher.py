@@ -0,0 +1,227 @@
+"""
+通知异步分发器
+
+emit_event 不再逐个渠道等待 send_message，而是把消息投递到每个渠道独立的有界队列，
+由该渠道的后台 worker 发送:
+- 一个渠道卡住（企业微信 / Server酱 接口无响应）不会拖慢其它渠道，也不会阻塞发出事件的任务
+- 每个渠道按其平台的发送频率限制（渠道类的 rate_limit）用令牌桶限速
+- 同一事件类型在 digest_window 秒内的多条消息合并为一条摘要消息
+  （例如批量导入时的几十条“导入成功”）
+- 发送失败（send_message 抛出异常或返回 False）时在 worker 中按指数退避重试，不占用调用方
+
+使用方式:
+    dispatcher = NotificationDispatcher()
+    dispatcher.submit(ch_id, channel, title, text, coalesce_key="import_success", image=url)
+    await dispatcher.send_now(ch_id, channel, title, text, edit_message_id=mid)  # 限速后直接发送
+    await dispatcher.stop()
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from src.utils.token_bucket import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# 合并窗口（秒），0 表示不合并
+DEFAULT_DIGEST_WINDOW = 5.0
+# 每个渠道队列的容量，满时丢弃最旧的消息
+DEFAULT_QUEUE_SIZE = 100
+# 单条摘要最多合并的消息数，达到后立即发送
+MAX_DIGEST_ITEMS = 50
+# 摘要正文中最多展开的条目数
+DIGEST_PREVIEW_ITEMS = 20
+# 单次发送超时（秒）
+SEND_TIMEOUT = 30
+# 失败重试次数及首次退避（秒），之后每次翻倍
+MAX_RETRIES = 3
+RETRY_BACKOFF = 2.0
+# 渠道类未声明 rate_limit 时使用的限速: (每秒消息数, 突发容量)
+DEFAULT_RATE_LIMIT = (1.0, 3)
+
+
+class _SendFailed(Exception):
+    """渠道的 send_message 返回 False（渠道内部已记录具体错误）"""
+
+
+@dataclass
+class _Delivery:
+    """一条待发送的消息"""
+    title: str
+    text: str
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+    merged: int = 1
+
+
+class _ChannelWorker:
+    """单个渠道的发送队列、限速器与合并缓冲"""
+
+    def __init__(self, channel_id: int, channel, queue_size: int):
+        self.channel_id = channel_id
+        self.channel = channel
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.bucket = TokenBucket(*self._rate_limit(channel))
+        self.digests: Dict[str, List[_Delivery]] = {}
+        self.digest_timers: Dict[str, asyncio.TimerHandle] = {}
+        self.task: Optional[asyncio.Task] = None
+        self.stats = {"queued": 0, "sent": 0, "merged": 0, "retries": 0, "failed": 0, "dropped": 0}
+
+    @staticmethod
+    def _rate_limit(channel) -> tuple:
+        rate, burst = getattr(channel, "rate_limit", None) or DEFAULT_RATE_LIMIT
+        return float(rate), float(burst)
+
+    def bind(self, channel) -> None:
+        """渠道重载后换成新的实例"""
+        if channel is not self.channel:
+            self.channel = channel
+            self.bucket.reconfigure(*self._rate_limit(channel))
+
+    def enqueue(self, delivery: _Delivery) -> None:
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.queue.task_done()
+            self.stats["dropped"] += 1
+            logger.warning(f"通知渠道 {self.channel_id} 发送队列已满，丢弃最早的一条消息")
+        self.queue.put_nowait(delivery)
+        self.stats["queued"] += 1
+
+
+class NotificationDispatcher:
+    """按渠道排队、限速、合并和重试的通知分发器"""
+
+    def __init__(self, digest_window: float = DEFAULT_DIGEST_WINDOW, queue_size: int = DEFAULT_QUEUE_SIZE):
+        self.digest_window = digest_window
+        self.queue_size = queue_size
+        self._workers: Dict[int, _ChannelWorker] = {}
+
+    def _worker(self, channel_id: int, channel) -> _ChannelWorker:
+        worker = self._workers.get(channel_id)
+        if worker is None:
+            worker = self._workers[channel_id] = _ChannelWorker(channel_id, channel, self.queue_size)
+        else:
+            worker.bind(channel)
+        if worker.task is None or worker.task.done():
+            worker.task = asyncio.create_task(self._run(worker))
+        return worker
+
+    def submit(self, channel_id: int, channel, title: str, text: str,
+               coalesce_key: Optional[str] = None, **kwargs) -> None:
+        """
+        投递一条消息，立即返回
+
+        Args:
+            coalesce_key: 合并键，窗口内同一渠道同一合并键的消息合并为一条摘要；
+                为 None 时单独发送（如需要编辑已有进度消息的完成通知）
+            **kwargs: 透传给 channel.send_message 的参数
+        """
+        worker = self._worker(channel_id, channel)
+        delivery = _Delivery(title=title, text=text, kwargs=kwargs)
+        if not coalesce_key or self.digest_window <= 0:
+            worker.enqueue(delivery)
+            return
+
+        pending = worker.digests.setdefault(coalesce_key, [])
+        pending.append(delivery)
+        if len(pending) >= MAX_DIGEST_ITEMS:
+            self._release_digest(worker, coalesce_key)
+        elif len(pending) == 1:
+            worker.digest_timers[coalesce_key] = asyncio.get_running_loop().call_later(
+                self.digest_window, self._release_digest, worker, coalesce_key
+            )
+
+    def _release_digest(self, worker: _ChannelWorker, key: str) -> None:
+        timer = worker.digest_timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        items = worker.digests.pop(key, None)
+        if not items:
+            return
+        if len(items) == 1:
+            worker.enqueue(items[0])
+            return
+        worker.stats["merged"] += len(items)
+        worker.enqueue(self._build_digest(items))
+
+    @staticmethod
+    def _build_digest(items: List[_Delivery]) -> _Delivery:
+        """把多条消息合并为一条摘要（图片和按钮无法合并，摘要只保留文字）"""
+        lines = []
+        for item in items[:DIGEST_PREVIEW_ITEMS]:
+            lines.append(f"• {item.title}\n{item.text}" if item.title else f"• {item.text}")
+        if len(items) > DIGEST_PREVIEW_ITEMS:
+            lines.append(f"……另有 {len(items) - DIGEST_PREVIEW_ITEMS} 条")
+        title = f"{items[0].title}（共 {len(items)} 条）" if items[0].title else f"共 {len(items)} 条通知"
+        return _Delivery(title=title, text="\n\n".join(lines), merged=len(items))
+
+    async def send_now(self, channel_id: int, channel, title: str, text: str, **kwargs) -> None:
+        """
+        按渠道限速后直接发送（不排队、不合并），用于需要拿到 message_id 的进度消息
+        """
+        worker = self._worker(channel_id, channel)
+        await worker.bucket.acquire()
+        result = await asyncio.wait_for(channel.send_message(title=title, text=text, **kwargs), timeout=SEND_TIMEOUT)
+        worker.stats["failed" if result is False else "sent"] += 1
+
+    async def _run(self, worker: _ChannelWorker) -> None:
+        while True:
+            delivery: _Delivery = await worker.queue.get()
+            try:
+                await self._deliver(worker, delivery)
+            finally:
+                worker.queue.task_done()
+
+    async def _deliver(self, worker: _ChannelWorker, delivery: _Delivery) -> None:
+        for attempt in range(MAX_RETRIES + 1):
+            await worker.bucket.acquire()
+            try:
+                result = await asyncio.wait_for(
+                    worker.channel.send_message(title=delivery.title, text=delivery.text, **delivery.kwargs),
+                    timeout=SEND_TIMEOUT,
+                )
+                if result is False:
+                    raise _SendFailed("渠道返回发送失败")
+                worker.stats["sent"] += 1
+                return
+            except Exception as e:
+                if attempt >= MAX_RETRIES:
+                    worker.stats["failed"] += 1
+                    logger.error(f"渠道 {worker.channel_id} 发送通知失败（已重试 {MAX_RETRIES} 次）: {e!r}")
+                    return
+                worker.stats["retries"] += 1
+                delay = RETRY_BACKOFF * (2 ** attempt)
+                logger.warning(f"渠道 {worker.channel_id} 发送通知失败，{delay:.0f} 秒后重试: {e!r}")
+                await asyncio.sleep(delay)
+
+    async def flush(self, timeout: Optional[float] = None) -> None:
+        """立即释放所有合并缓冲，并等待队列中的消息发送完毕"""
+        for worker in self._workers.values():
+            for key in list(worker.digests):
+                self._release_digest(worker, key)
+        joins = [worker.queue.join() for worker in self._workers.values()]
+        if joins:
+            await asyncio.wait_for(asyncio.gather(*joins), timeout=timeout)
+
+    async def stop(self, timeout: float = 5.0) -> None:
+        """尽量在 timeout 秒内发完剩余消息，然后停止所有 worker"""
+        try:
+            await self.flush(timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning("关闭时仍有通知未发送完成，已放弃")
+        for worker in self._workers.values():
+            if worker.task:
+                worker.task.cancel()
+        await asyncio.gather(*(w.task for w in self._workers.values() if w.task), return_exceptions=True)
+        self._workers.clear()
+
+    def get_stats(self) -> Dict[int, Dict[str, Any]]:
+        return {
+            channel_id: {
+                **worker.stats,
+                "pending": worker.queue.qsize(),
+                "coalescing": sum(len(items) for items in worker.digests.values()),
+            }
+            for channel_id, worker in self._workers.items()
+        }
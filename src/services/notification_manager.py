@@ -23,6 +23,27 @@ class NotificationManager:
         self.channels: Dict[int, BaseNotificationChannel] = {}  # channel_id -> instance
         self._channel_classes: Dict[str, type] = {}  # channel_type -> class
         self._discover_channel_classes()
+        # 多工作进程时只有领导者启动渠道（Bot 轮询等），跟随者只加载配置并转发通知
+        self._channels_started = False
+        self._coordinator = None
+        # 其它进程修改渠道后、本进程重载完成时的回调（用于重新评估隧道）
+        self.after_peer_reload: Optional[Callable[[], Any]] = None
+
+    def attach_coordinator(self, coordinator):
+        """多工作进程时，任一进程修改渠道后通知其它进程重载"""
+        if not coordinator.multi_worker:
+            return
+        self._coordinator = coordinator
+        coordinator.subscribe("notification-channels", self._on_peer_change)
+
+    async def _on_peer_change(self, message: Dict[str, Any]):
+        channel_id = message.get("channelId")
+        if message.get("op") == "remove":
+            await self.remove_channel(channel_id, notify_peers=False)
+        else:
+            await self.reload_channel(channel_id, notify_peers=False)
+        if self.after_peer_reload is not None:
+            await self.after_peer_reload()
 
     def _discover_channel_classes(self):
         """自动发现 src/notification/ 下的渠道实现"""
@@ -134,6 +155,7 @@ class NotificationManager:
 
     async def start_channels(self):
         """启动所有已加载的渠道"""
+        self._channels_started = True
         for ch_id, channel in self.channels.items():
             try:
                 await channel.start()
@@ -142,14 +164,17 @@ class NotificationManager:
 
     async def stop_channels(self):
         """停止所有渠道"""
+        self._channels_started = False
         for ch_id, channel in list(self.channels.items()):
             try:
                 await channel.stop()
             except Exception as e:
                 logger.error(f"停止渠道失败: {channel.name} (id={ch_id}) - {e}", exc_info=True)
 
-    async def reload_channel(self, channel_id: int):
+    async def reload_channel(self, channel_id: int, notify_peers: bool = True):
         """重载单个渠道（配置变更后调用）"""
+        if notify_peers and self._coordinator is not None:
+            self._coordinator.publish("notification-channels", {"op": "reload", "channelId": channel_id})
         # 先停止旧实例
         old = self.channels.pop(channel_id, None)
         if old:
@@ -170,14 +195,16 @@ class NotificationManager:
         webhook_api_key = await self._get_webhook_api_key()
         await self._load_channel(ch_data, proxy_url=proxy_url, webhook_api_key=webhook_api_key)
         new_instance = self.channels.get(channel_id)
-        if new_instance:
+        if new_instance and self._channels_started:
             try:
                 await new_instance.start()
             except Exception as e:
                 logger.error(f"重载后启动渠道失败: {e}", exc_info=True)
 
-    async def remove_channel(self, channel_id: int):
+    async def remove_channel(self, channel_id: int, notify_peers: bool = True):
         """移除渠道实例"""
+        if notify_peers and self._coordinator is not None:
+            self._coordinator.publish("notification-channels", {"op": "remove", "channelId": channel_id})
         old = self.channels.pop(channel_id, None)
         if old:
             try:
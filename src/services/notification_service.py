@@ -22,6 +22,7 @@ from src.notification.menus import (
     TasksMenuMixin,
     CacheMenuMixin,
 )
+from .notification_dispatcher import NotificationDispatcher
 
 logger = logging.getLogger(__name__)
 
@@ -61,6 +62,32 @@ class NotificationService(
         # 用于 TG edit_message 功能（发新消息后记录 message_id，后续进度更新时 edit）
         # 同时覆盖 fallback 和普通下载任务
         self._task_progress_tg_msg: Dict[str, Dict[str, int]] = {}
+        # 出站通知分发器：每个渠道独立排队、限速、合并与重试
+        self.dispatcher = NotificationDispatcher()
+        # 多工作进程协调器：跟随者没有启动渠道，通知转发给领导者发送
+        self._coordinator = None
+
+    def attach_coordinator(self, coordinator):
+        if not coordinator.multi_worker:
+            return
+        self._coordinator = coordinator
+        coordinator.subscribe("notifications", self._on_peer_notification)
+
+    def _forward_to_leader(self, op: str, **kwargs) -> bool:
+        """跟随者把通知交给领导者发送，返回是否已转发"""
+        if self._coordinator is None or self._coordinator.is_leader:
+            return False
+        self._coordinator.publish("notifications", {"op": op, "args": kwargs})
+        return True
+
+    async def _on_peer_notification(self, message: Dict[str, Any]):
+        if not self._coordinator.is_leader:
+            return
+        op, args = message.get("op"), message.get("args") or {}
+        if op == "emit_event":
+            await self.emit_event(**args)
+        elif op == "emit_task_progress":
+            await self.emit_task_progress(**args)
 
     def cleanup_task_progress(self, task_id: str):
         """清理指定任务的进度消息缓存（任务结束但无需发通知时调用）"""
@@ -329,19 +356,29 @@ class NotificationService(
     }
 
     async def emit_event(self, event_type: str, data: Dict[str, Any]):
-        """向所有订阅了该事件的渠道发送通知"""
+        """向所有订阅了该事件的渠道投递通知（不等待发送完成）"""
+        if self._forward_to_leader("emit_event", event_type=event_type, data=data):
+            return
         if not self.notification_manager:
             return
         channels = self.notification_manager.get_all_channels()
+        if not channels:
+            return
+        if self.config_manager:
+            try:
+                self.dispatcher.digest_window = float(await self.config_manager.get("notificationDigestSeconds", "5"))
+            except (TypeError, ValueError):
+                pass
         is_any_complete = event_type in self._COMPLETE_EVENT_TYPES
         task_id: str = data.get("task_id", "")
+        # 检查订阅：fallback 事件从映射表取对应的订阅 key，否则直接用 event_type
+        check_key = self._FALLBACK_COMPLETE_EVENTS.get(event_type, event_type)
+        fmt_result = None
         for ch_id, channel_instance in channels.items():
             try:
                 events_cfg = channel_instance.config.get("__events_config", {})
-                # 检查订阅：fallback 事件从映射表取对应的订阅 key，否则直接用 event_type
-                check_key = self._FALLBACK_COMPLETE_EVENTS.get(event_type, event_type)
                 subscribed = events_cfg.get(check_key)
-                logger.info(f"[通知] event={event_type} ch={ch_id} check_key={check_key} subscribed={subscribed}")
+                logger.debug(f"[通知] event={event_type} ch={ch_id} check_key={check_key} subscribed={subscribed}")
 
                 # 完成事件 + 有缓存的进度消息 → 即使没订阅完成事件也要编辑进度消息
                 has_cached_progress = (
@@ -352,28 +389,30 @@ class NotificationService(
                 if not subscribed and not has_cached_progress:
                     continue
 
-                fmt_result = self._format_event_message(event_type, data)
+                if fmt_result is None:
+                    fmt_result = self._format_event_message(event_type, data)
                 title, text = fmt_result[0], fmt_result[1]
                 reply_markup = fmt_result[2] if len(fmt_result) == 3 else None
                 image_url: str = data.get("image_url", "") or ""
-                # 任务完成时：若 TG 有已发进度消息，则 edit；否则发新消息
+                # 任务完成时：若 TG 有已发进度消息，则 edit（单独发送，不参与合并）；否则发新消息
+                edit_mid = None
                 if is_any_complete and task_id:
-                    edit_mid = self._task_progress_tg_msg.get(task_id, {}).get(ch_id)
-                    msg_id_out: List[int] = []
-                    await channel_instance.send_message(
-                        title=title, text=text, image=image_url,
-                        edit_message_id=edit_mid, _msg_id_out=msg_id_out,
-                        reply_markup=reply_markup,
-                    )
+                    edit_mid = self._task_progress_tg_msg.get(task_id, {}).pop(ch_id, None)
                     # 任务完成后清理该渠道的缓存
-                    if task_id in self._task_progress_tg_msg:
-                        self._task_progress_tg_msg[task_id].pop(ch_id, None)
-                        if not self._task_progress_tg_msg[task_id]:
-                            self._task_progress_tg_msg.pop(task_id, None)
+                    if task_id in self._task_progress_tg_msg and not self._task_progress_tg_msg[task_id]:
+                        self._task_progress_tg_msg.pop(task_id, None)
+                if edit_mid:
+                    self.dispatcher.submit(
+                        ch_id, channel_instance, title, text, image=image_url,
+                        edit_message_id=edit_mid, _msg_id_out=[], reply_markup=reply_markup,
+                    )
                 else:
-                    await channel_instance.send_message(title=title, text=text, image=image_url, reply_markup=reply_markup)
+                    self.dispatcher.submit(
+                        ch_id, channel_instance, title, text, coalesce_key=event_type,
+                        image=image_url, reply_markup=reply_markup,
+                    )
             except Exception as e:
-                logger.error(f"渠道 {ch_id} 发送事件 {event_type} 失败: {e}")
+                logger.error(f"渠道 {ch_id} 投递事件 {event_type} 失败: {e}")
 
     async def emit_task_progress(self, task_id: str, task_title: str, progress: int,
                                   description: str, check_event_key: str = "task_progress"):
@@ -384,6 +423,10 @@ class NotificationService(
                 - fallback 任务传 "download_fallback_complete"
                 - 普通下载任务传 "task_progress"
         """
+        if self._forward_to_leader("emit_task_progress", task_id=task_id, task_title=task_title,
+                                   progress=progress, description=description,
+                                   check_event_key=check_event_key):
+            return
         if not self.notification_manager:
             return
         channels = self.notification_manager.get_all_channels()
@@ -399,8 +442,9 @@ class NotificationService(
                 edit_mid = self._task_progress_tg_msg.get(task_id, {}).get(ch_id)
                 msg_id_out: List[int] = []
                 logger.debug(f"[进度通知] task_id={task_id[:8]} ch={ch_id} edit_mid={edit_mid} progress={progress}%")
-                await channel_instance.send_message(
-                    title=title, text=text,
+                # 进度消息需要拿到 message_id，按渠道限速后直接发送，不进入合并队列
+                await self.dispatcher.send_now(
+                    ch_id, channel_instance, title, text,
                     edit_message_id=edit_mid, _msg_id_out=msg_id_out
                 )
                 # 记录新发出的 message_id（首次 send 或 edit 失败降级后均更新缓存）
@@ -61,6 +61,30 @@ class SchedulerManager:
         self.title_recognition_manager = title_recognition_manager
         self.scheduler = AsyncIOScheduler(timezone=str(get_app_timezone()))
         self._job_classes: Dict[str, Type[BaseJob]] = {}
+        # 多工作进程协调器，通过 attach_coordinator 注入
+        self._coordinator = None
+
+    def attach_coordinator(self, coordinator):
+        """
+        多工作进程时所有进程都维护同一份任务表（便于接口返回下次运行时间），
+        但只有领导者的调度器在运行；任一进程修改定时任务后通知其它进程从数据库重新加载。
+        """
+        if not coordinator.multi_worker:
+            return
+        self._coordinator = coordinator
+        coordinator.subscribe("scheduler", self._on_peer_change)
+
+    def _notify_peers(self):
+        if self._coordinator is not None:
+            self._coordinator.publish("scheduler", {"op": "reload"})
+
+    async def _on_peer_change(self, message: Dict[str, Any]):
+        await self.load_jobs_from_db()
+        async with self._session_factory() as session:
+            task_ids = {task['taskId'] for task in await crud.get_scheduled_tasks(session)}
+        for job in self.scheduler.get_jobs():
+            if job.id not in task_ids:
+                self.scheduler.remove_job(job.id)
 
     def _load_jobs(self):
         """
@@ -193,16 +217,31 @@ class SchedulerManager:
                 await crud.update_scheduled_task_run_times(session, job.id, last_run_time, next_run_time)
             logger.info(f"已更新定时任务 '{job.name}' (ID: {job.id}) 的运行时间。")
 
-    async def start(self):
+    async def start(self, paused: bool = False):
+        """启动调度器；paused=True 时只加载任务不执行（多工作进程的跟随者）"""
         self._load_jobs()
         # 修正：使用同步的包装器作为监听器
         self.scheduler.add_listener(self._event_handler_wrapper, EVENT_JOB_EXECUTED | EVENT_JOB_ERROR)
-        self.scheduler.start()
+        self.scheduler.start(paused=paused)
         await self.load_jobs_from_db()
-        logger.info("定时任务调度器已启动。")
+        logger.info("定时任务调度器已启动（暂停中，由领导者进程执行）。" if paused else "定时任务调度器已启动。")
+
+    async def resume(self):
+        """跟随者成为领导者时开始执行定时任务"""
+        await self.load_jobs_from_db()
+        self.scheduler.resume()
+        logger.info("定时任务调度器已恢复执行。")
+
+    async def pause(self):
+        """失去领导者身份时暂停执行定时任务（任务仍保留，由新领导者执行）"""
+        if self.scheduler.running:
+            self.scheduler.pause()
+            logger.info("定时任务调度器已暂停（已由其它进程接替领导者）。")
 
     async def stop(self):
-        self.scheduler.shutdown()
+        # 启动后台初始化完成前关闭时调度器可能尚未启动
+        if self.scheduler.running:
+            self.scheduler.shutdown()
 
     async def load_jobs_from_db(self):
         async with self._session_factory() as session:
@@ -265,6 +304,7 @@ class SchedulerManager:
             if not is_enabled: job.pause()
             next_run_time = job.next_run_time.replace(tzinfo=None) if job.next_run_time else None
             await crud.update_scheduled_task_run_times(session, task_id, None, next_run_time)
+            self._notify_peers()
             return await crud.get_scheduled_task(session, task_id)
 
     async def update_task(self, task_id: str, name: str, cron: str, is_enabled: bool, task_config: dict = None) -> Optional[Dict[str, Any]]:
@@ -291,6 +331,7 @@ class SchedulerManager:
 
             await crud.update_scheduled_task(session, task_id, name, cron, is_enabled, task_config)
             await crud.update_scheduled_task_run_times(session, task_id, task_info['lastRunAt'], next_run_time)
+            self._notify_peers()
             return await crud.get_scheduled_task(session, task_id)
 
     async def delete_task(self, task_id: str) -> bool:
@@ -300,6 +341,7 @@ class SchedulerManager:
 
             if self.scheduler.get_job(task_id): self.scheduler.remove_job(task_id)
             await crud.delete_scheduled_task(session, task_id)
+            self._notify_peers()
             return True
 
     async def run_task_now(self, task_id: str):
@@ -4,6 +4,7 @@ import traceback
 from enum import Enum
 import time
 import json
+from datetime import timedelta
 from typing import Any, Callable, Coroutine, Dict, List, Tuple, Optional # Add HTTPException, status
 from uuid import uuid4, UUID
 
@@ -11,9 +12,20 @@ from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from fastapi import HTTPException, status
 
 from src.db import models, crud, ConfigManager
+from src.db.query_metrics import query_metrics
+from .task_progress_hub import TaskProgressHub
 
 logger = logging.getLogger(__name__)
 
+# 可由 _rebuild_coro_factory 重建的任务类型；多工作进程时跟随者把这些任务转发给领导者执行
+RECOVERABLE_TASK_TYPES = frozenset({
+    "generic_import", "webhook_search", "full_refresh", "incremental_refresh", "auto_import",
+})
+# 跟随者轮询已转发任务状态的间隔（秒）
+FORWARDED_TASK_POLL_INTERVAL = 2.0
+# 任务历史中的终态（包括恢复时写入的"已取消"）
+_FINISHED_STATUSES = frozenset({"已完成", "失败", "已取消"})
+
 class TaskStatus(str, Enum):
     PENDING = "排队中"
     RUNNING = "运行中"
@@ -71,6 +83,8 @@ class TaskManager:
         self._lock = asyncio.Lock()
         self.config_manager = config_manager
         self.logger = logging.getLogger(self.__class__.__name__)
+        # 运行中任务的实时进度：内存保存、SSE 推送、批量落库
+        self.progress_hub = TaskProgressHub(session_factory)
 
         # 受限源集合：记录因配额满而暂停的源
         # {provider_name: expire_time} - expire_time 用于自动清除过期的受限记录
@@ -82,6 +96,23 @@ class TaskManager:
         self._notification_service = None
         # 关闭标志位：优雅关闭时设为 True，区分「程序关闭」和「用户主动取消」
         self._is_shutting_down: bool = False
+        # 多工作进程协调器，通过 attach_coordinator 注入；为 None 时按单进程处理
+        self._coordinator = None
+        # 跟随者上已转发给领导者的任务的状态轮询
+        self._forward_watchers: set[asyncio.Task] = set()
+
+    def attach_coordinator(self, coordinator):
+        """
+        多工作进程时:
+        - unique_key 在所有进程间互斥
+        - 跟随者把可恢复类型的排队任务转发给领导者执行
+        - 暂停/恢复/终止/取消在本进程找不到任务时转发给其它进程
+        """
+        if not coordinator.multi_worker:
+            return
+        self._coordinator = coordinator
+        coordinator.subscribe("tasks", self._on_peer_message)
+        self.progress_hub.attach_coordinator(coordinator)
 
     def set_recovery_dependencies(self, dependencies: Dict[str, Any]):
         """设置任务恢复所需的依赖
@@ -231,6 +262,7 @@ class TaskManager:
         避免在 except/finally 清理路径中引发二次异常。
         """
         try:
+            await self.progress_hub.finish(task_id, status, message)
             async with self._session_factory() as session:
                 await crud.finalize_task_in_history(session, task_id, status, message)
         except Exception as e:
@@ -247,6 +279,9 @@ class TaskManager:
         try:
             async with self._session_factory() as session:
                 await crud.update_task_progress_in_history(session, task_id, status, progress, message)
+            live = self.progress_hub.get_live(task_id)
+            if live:
+                self.progress_hub.update(task_id, live["title"], progress, message, status=status, persist=False)
         except Exception as e:
             self.logger.warning(
                 f"⚠️ 任务 {task_id} 进度状态（{status}）未能写入DB"
@@ -279,17 +314,27 @@ class TaskManager:
         self.logger.debug(f"update_task_parameters: 任务 {task_id} 参数已更新: {list(params.keys())}")
         return True
 
-    def start(self):
-        """启动后台工作协程来处理任务队列。"""
+    def start(self, recover_interrupted: bool = True):
+        """启动后台工作协程来处理任务队列。
+
+        Args:
+            recover_interrupted: 是否处理上次关闭时中断的任务；多工作进程时只由领导者处理
+        """
         if self._download_worker_task is None:
             self._download_worker_task = asyncio.create_task(self._download_worker())
             self._management_worker_task = asyncio.create_task(self._management_worker())
             self._fallback_worker_task = asyncio.create_task(self._fallback_worker())
             self._paused_tasks_monitor_task = asyncio.create_task(self._paused_tasks_monitor())
+            self.progress_hub.start()
             # 启动时处理中断的任务
-            asyncio.create_task(self._handle_interrupted_tasks())
+            if recover_interrupted:
+                asyncio.create_task(self._handle_interrupted_tasks())
             self.logger.info("任务管理器已启动 (下载队列 + 管理队列 + 后备队列 + 暂停任务监控)。")
 
+    async def recover_interrupted_tasks(self):
+        """处理中断的任务（跟随者成为领导者时调用）"""
+        await self._handle_interrupted_tasks()
+
     async def _run_task_wrapper(self, task: Task, queue_type: str = "download"):
         """
         一个独立的包装器，用于在后台安全地执行单个任务。
@@ -302,6 +347,8 @@ class TaskManager:
         self.logger.info(f"开始执行任务 '{task.title}' (ID: {task.task_id}) [队列: {queue_type}]")
         # 延迟导入避免循环依赖（rate_limiter → src.services → task_manager）
         from src.rate_limiter import RateLimitExceededError
+        # 按任务类型统计数据库查询（未开启 database.query_metrics 时为 None）
+        metrics_token = query_metrics.begin_scope("task", task.task_type or f"{queue_type}:untyped")
         try:
             # This task is now running, remove it from pending titles
             # This is now the single point of responsibility for this cleanup.
@@ -312,6 +359,9 @@ class TaskManager:
                 await crud.update_task_progress_in_history(
                     session, task.task_id, TaskStatus.RUNNING, 0, "正在初始化..."
                 )
+                self.progress_hub.update(
+                    task.task_id, task.title, 0, "正在初始化...", status=TaskStatus.RUNNING, persist=False
+                )
 
                 # 保存任务状态到缓存表（如果有任务类型和参数）
                 if task.task_type and task.task_parameters:
@@ -326,6 +376,7 @@ class TaskManager:
                 task.running_coro_task = running_task
                 await running_task
 
+                await self.progress_hub.finish(task.task_id, TaskStatus.COMPLETED, "任务成功完成")
                 await crud.finalize_task_in_history(
                     session, task.task_id, TaskStatus.COMPLETED, "任务成功完成"
                 )
@@ -403,7 +454,10 @@ class TaskManager:
                     self._active_unique_keys.discard(task.unique_key)
                 # Also remove from pending_titles again just in case of race conditions.
                 self._pending_titles.discard(task.title)
+            if task.unique_key:
+                await self._release_unique_key(task.unique_key)
             task.done_event.set()
+            query_metrics.end_scope(metrics_token)
 
     async def stop(self):
         """停止任务管理器。"""
@@ -411,6 +465,9 @@ class TaskManager:
         # 这样重启后 _handle_interrupted_tasks 能找到这些任务并恢复
         self._is_shutting_down = True
 
+        for watcher in list(self._forward_watchers):
+            watcher.cancel()
+
         if self._download_worker_task:
             self._download_worker_task.cancel()
             try:
@@ -435,6 +492,9 @@ class TaskManager:
                 pass
             self._fallback_worker_task = None
 
+        # 写入尚未落库的任务进度
+        await self.progress_hub.stop()
+
         self.logger.info("任务管理器已停止。")
 
     async def _check_task_provider_limited(self, task: Task) -> tuple[bool, float]:
@@ -620,7 +680,7 @@ class TaskManager:
             # 新增：检查唯一键，防止同一资源的多个任务同时进行
             # unique_key 是精确的去重机制，优先于 title 去重
             if unique_key:
-                if unique_key in self._active_unique_keys:
+                if unique_key in self._active_unique_keys or not await self._claim_unique_key(unique_key):
                     # 根据unique_key的前缀提供更友好的错误消息
                     if unique_key.startswith("scan-media-server-"):
                         error_msg = "该媒体服务器的扫描任务正在进行中，请等待当前任务完成后再试。"
@@ -661,6 +721,10 @@ class TaskManager:
                 task_type=task_type, task_parameters=task_parameters_json
             )
 
+        if not run_immediately and self._should_forward(task_type):
+            self._forward_to_leader(task)
+            return task_id, task.done_event
+
         if run_immediately:
             self.logger.info(f"立即执行任务 '{title}' (ID: {task_id})，绕过队列 [{queue_type}]。")
             # 注册到 _immediate_tasks，使 pause/abort/resume 能找到该任务
@@ -691,20 +755,119 @@ class TaskManager:
 
             asyncio.create_task(_run_and_cleanup())
         else:
-            # 根据队列类型选择队列
-            if queue_type == "download":
-                target_queue = self._download_queue
-            elif queue_type == "management":
-                target_queue = self._management_queue
-            elif queue_type == "fallback":
-                target_queue = self._fallback_queue
-            else:
-                raise ValueError(f"无效的队列类型: {queue_type}")
-
-            await target_queue.put(task)
+            await self._get_queue(queue_type).put(task)
             self.logger.info(f"任务 '{title}' 已提交到 {queue_type} 队列，ID: {task_id}")
         return task_id, task.done_event
 
+    def _get_queue(self, queue_type: str) -> asyncio.Queue:
+        """根据队列类型选择队列"""
+        if queue_type == "download":
+            return self._download_queue
+        if queue_type == "management":
+            return self._management_queue
+        if queue_type == "fallback":
+            return self._fallback_queue
+        raise ValueError(f"无效的队列类型: {queue_type}")
+
+    # ---------- 多工作进程 ----------
+
+    async def _claim_unique_key(self, unique_key: str) -> bool:
+        """在所有工作进程间认领唯一键（单进程时总是成功）"""
+        if self._coordinator is None:
+            return True
+        return await self._coordinator.claim(f"task:{unique_key}")
+
+    async def _release_unique_key(self, unique_key: str):
+        if self._coordinator is not None:
+            await self._coordinator.release(f"task:{unique_key}")
+
+    def _should_forward(self, task_type: Optional[str]) -> bool:
+        return (self._coordinator is not None and not self._coordinator.is_leader
+                and task_type in RECOVERABLE_TASK_TYPES)
+
+    def _forward_to_leader(self, task: Task):
+        """
+        把排队任务交给领导者执行: 任务记录已写入 task_history，领导者按 taskId 读取并重建。
+        本进程轮询任务状态，结束后释放唯一键并设置 done_event。
+        领导者切换期间未被接收的任务会在新领导者处理中断任务时从 task_history 恢复。
+        """
+        self._coordinator.publish("tasks", {"op": "submit", "taskId": task.task_id})
+        self.logger.info(f"任务 '{task.title}' (ID: {task.task_id}) 已转发给领导者进程 [{task.queue_type}]")
+        watcher = asyncio.create_task(self._watch_forwarded_task(task))
+        self._forward_watchers.add(watcher)
+        watcher.add_done_callback(self._forward_watchers.discard)
+
+    async def _watch_forwarded_task(self, task: Task):
+        try:
+            while True:
+                await asyncio.sleep(FORWARDED_TASK_POLL_INTERVAL)
+                try:
+                    async with self._session_factory() as session:
+                        info = await crud.get_task_from_history_by_id(session, task.task_id)
+                except Exception as e:
+                    self.logger.debug(f"查询已转发任务 {task.task_id} 的状态失败: {e}")
+                    continue
+                if info is None or info["status"] in _FINISHED_STATUSES:
+                    break
+        finally:
+            async with self._lock:
+                self._pending_titles.discard(task.title)
+                if task.unique_key:
+                    self._active_unique_keys.discard(task.unique_key)
+            if task.unique_key:
+                await self._release_unique_key(task.unique_key)
+            task.done_event.set()
+
+    async def _forward_control(self, op: str, task_id: str) -> bool:
+        """本进程找不到任务时，把暂停/恢复/终止/取消转发给其它进程；任务不在进行中时返回 False"""
+        if self._coordinator is None:
+            return False
+        async with self._session_factory() as session:
+            info = await crud.get_task_from_history_by_id(session, task_id)
+        if info is None or info["status"] in _FINISHED_STATUSES:
+            return False
+        self._coordinator.publish("tasks", {"op": op, "taskId": task_id})
+        self.logger.info(f"任务 {task_id} 不在本进程，已将 {op} 操作转发给其它工作进程")
+        return True
+
+    async def _on_peer_message(self, message: Dict[str, Any]):
+        op, task_id = message.get("op"), message.get("taskId")
+        if op == "submit":
+            if self._coordinator.is_leader:
+                await self._accept_forwarded_task(task_id)
+        elif op == "pause":
+            await self.pause_task(task_id, forward=False)
+        elif op == "resume":
+            await self.resume_task(task_id, forward=False)
+        elif op == "abort":
+            await self.abort_current_task(task_id, forward=False)
+        elif op == "cancel":
+            await self.cancel_pending_task(task_id, forward=False)
+
+    async def _accept_forwarded_task(self, task_id: str):
+        """领导者: 按 taskId 从 task_history 重建跟随者转发的任务并放入本进程队列"""
+        async with self._session_factory() as session:
+            info = await crud.get_task_for_retry(session, task_id)
+        if not info or info["status"] != TaskStatus.PENDING:
+            return
+        try:
+            task_parameters = json.loads(info["taskParameters"]) if isinstance(info["taskParameters"], str) \
+                else (info["taskParameters"] or {})
+        except (json.JSONDecodeError, TypeError):
+            task_parameters = None
+        coro_factory = await self._rebuild_coro_factory(info["taskType"], task_parameters) \
+            if task_parameters is not None else None
+        if coro_factory is None:
+            self.logger.error(f"无法重建转发的任务 '{info['title']}' (ID: {task_id})，已标记为失败")
+            await self._safe_finalize_task(task_id, TaskStatus.FAILED, "无法在领导者进程重建任务")
+            return
+        queue_type = info.get("queueType") or "download"
+        # 唯一键由提交任务的跟随者持有，任务结束后由它释放
+        task = Task(task_id, info["title"], coro_factory, unique_key=info.get("uniqueKey"),
+                    task_type=info["taskType"], task_parameters=task_parameters, queue_type=queue_type)
+        await self._get_queue(queue_type).put(task)
+        self.logger.info(f"已接收跟随者转发的任务 '{task.title}' (ID: {task_id}) [{queue_type}]")
+
     def _get_progress_callback(self, task: Task) -> Callable:
         """为特定任务创建一个可暂停的回调闭包。"""
         queue_type = getattr(task, "queue_type", "download")
@@ -730,7 +893,7 @@ class TaskManager:
             await task.pause_event.wait()
 
             now = time.time()
-            # 只在状态改变、首次、完成或距离上次更新超过0.5秒时才更新数据库
+            # 状态改变、开始和完成时立即推送并尽快落库，其余更新至多每0.5秒推送一次
             is_status_change = status is not None
             force_update = progress == 0 or progress >= 100 or is_status_change
 
@@ -740,41 +903,33 @@ class TaskManager:
                     return
                 task.last_update_time = now
 
-            # 数据库更新现在是同步的（在回调的协程内），但由于此逻辑，它不会频繁发生。
-            # 这避免了创建大量并发任务，从而保护了数据库连接池。
-            try:
-                async with self._session_factory() as session:
-                    await crud.update_task_progress_in_history(
-                        session, task.task_id, status or TaskStatus.RUNNING, int(progress), description
-                    )
-            except Exception as e:
-                self.logger.error(f"任务进度更新失败 (ID: {task.task_id}): {e}", exc_info=False)
+            # 只更新内存中的实时进度，task_history 由进度中心按周期合并批量写入
+            self.progress_hub.update(
+                task.task_id, task.title, int(progress), description,
+                status=status, force=force_update,
+            )
 
             # 进度未完成时触发 TG 进度通知（TG 会 edit 已有消息，其他渠道跳过进度推送）
-            # 加超时保护：通知推送不应阻塞任务执行（TG 代理不可达时可能卡住）
+            # 通知在后台发送且只保留最新一条，TG 代理不可达时不会阻塞任务执行
             if self._notification_service and progress < 100:
-                try:
-                    await asyncio.wait_for(
-                        self._notification_service.emit_task_progress(
-                            task_id=task.task_id,
-                            task_title=task.title,
-                            progress=int(progress),
-                            description=description,
-                            check_event_key=progress_check_key,
-                        ),
-                        timeout=10  # 最多等10秒，超时则跳过本次通知
-                    )
-                except asyncio.TimeoutError:
-                    self.logger.warning(f"任务进度通知超时 (ID: {task.task_id})，跳过本次推送")
-                except Exception as e:
-                    self.logger.debug(f"任务进度通知失败 (ID: {task.task_id}): {e}")
+                notification_service = self._notification_service
+                self.progress_hub.notify(task.task_id, lambda: notification_service.emit_task_progress(
+                    task_id=task.task_id,
+                    task_title=task.title,
+                    progress=int(progress),
+                    description=description,
+                    check_event_key=progress_check_key,
+                ))
 
         return pausable_callback
 
-    async def cancel_pending_task(self, task_id: str) -> bool:
+    async def cancel_pending_task(self, task_id: str, forward: bool = True) -> bool:
         """
         从队列中移除一个待处理的任务。
         注意：此操作不是线程安全的，但对于单工作线程模型是可接受的。
+
+        Args:
+            forward: 本进程找不到任务时是否转发给其它工作进程
         """
         found_and_removed = False
         task_to_remove: Optional[Task] = None
@@ -843,11 +998,15 @@ class TaskManager:
                 if task_to_remove.unique_key:
                     self._active_unique_keys.discard(task_to_remove.unique_key)
                     self.logger.info(f"已为已取消的待处理任务释放唯一键: {task_to_remove.unique_key}")
+            if task_to_remove.unique_key:
+                await self._release_unique_key(task_to_remove.unique_key)
 
+        if not found_and_removed and forward:
+            return await self._forward_control("cancel", task_id)
         return found_and_removed
 
-    async def abort_current_task(self, task_id: str) -> bool:
-        """如果ID匹配，则中止当前正在运行或暂停的任务。"""
+    async def abort_current_task(self, task_id: str, forward: bool = True) -> bool:
+        """如果ID匹配，则中止当前正在运行或暂停的任务。forward: 本进程找不到任务时是否转发给其它工作进程"""
         # 检查下载队列的当前任务
         if self._current_download_task and self._current_download_task.task_id == task_id and self._current_download_task.running_coro_task:
             self.logger.info(f"正在中止下载队列任务 '{self._current_download_task.title}' (ID: {task_id})")
@@ -883,11 +1042,13 @@ class TaskManager:
             imm_task.running_coro_task.cancel()
             return True
 
+        if forward and await self._forward_control("abort", task_id):
+            return True
         self.logger.warning(f"尝试中止任务 {task_id} 失败，因为它不是当前任务或未在运行。")
         return False
 
-    async def pause_task(self, task_id: str) -> bool:
-        """如果ID匹配，则暂停当前正在运行的任务。"""
+    async def pause_task(self, task_id: str, forward: bool = True) -> bool:
+        """如果ID匹配，则暂停当前正在运行的任务。forward: 本进程找不到任务时是否转发给其它工作进程"""
         # 检查下载队列的当前任务
         if self._current_download_task and self._current_download_task.task_id == task_id:
             async with self._session_factory() as session:
@@ -921,11 +1082,13 @@ class TaskManager:
                 self.logger.info(f"已暂停立即执行任务 '{imm_task.title}' (ID: {task_id})。")
                 return True
 
+        if forward and await self._forward_control("pause", task_id):
+            return True
         self.logger.warning(f"尝试暂停任务 {task_id} 失败，因为它不是当前正在运行的任务。")
         return False
 
-    async def resume_task(self, task_id: str) -> bool:
-        """如果ID匹配，则恢复当前已暂停的任务。"""
+    async def resume_task(self, task_id: str, forward: bool = True) -> bool:
+        """如果ID匹配，则恢复当前已暂停的任务。forward: 本进程找不到任务时是否转发给其它工作进程"""
         # 检查下载队列的当前任务
         if self._current_download_task and self._current_download_task.task_id == task_id:
             async with self._session_factory() as session:
@@ -959,6 +1122,8 @@ class TaskManager:
                 self.logger.info(f"已恢复立即执行任务 '{imm_task.title}' (ID: {task_id})。")
                 return True
 
+        if forward and await self._forward_control("resume", task_id):
+            return True
         self.logger.warning(f"尝试恢复任务 {task_id} 失败，因为它不是当前已暂停的任务。")
         return False
 
@@ -1074,6 +1239,9 @@ class TaskManager:
                 if unrecoverable_count > 0:
                     self.logger.info(f"已将 {unrecoverable_count} 个无法恢复的排队中任务标记为失败（缺少任务类型信息）")
 
+                # 4. 放回认领后未处理完的 Webhook 任务（认领进程在处理中途退出）
+                await crud.release_stale_webhook_claims(session, lease=timedelta(0))
+
                 if not active_tasks and not pending_tasks and not unrecoverable_count:
                     self.logger.info("没有发现需要处理的中断任务")
 
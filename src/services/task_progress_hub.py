@@ -0,0 +1,282 @@
+"""
+任务进度中心 (Task Progress Hub)
+
+在进程内保存运行中任务的实时进度，替代进度回调中的逐次写库和同步通知:
+- 进度更新只修改内存状态并推送给 SSE 订阅者（/api/ui/tasks/stream）
+- task_history 的进度按 flush_interval 合并后一次事务批量写入，
+  同一任务在一个周期内的多次更新只落库最后一次；状态变化、开始和完成时立即刷新
+- 进度通知（如 Telegram 编辑消息）交给后台发送，每个任务只保留最新一条待发送的进度，
+  慢速通知渠道不会拖慢任务本身
+- 多工作进程时每个刷新周期把变化的进度广播给其它进程，任一进程的 SSE 订阅者都能看到所有任务
+
+使用方式:
+    hub = TaskProgressHub(session_factory)
+    hub.start()
+    hub.update(task_id, title, 42, "正在下载...")
+    hub.notify(task_id, lambda: notification_service.emit_task_progress(...))
+    await hub.finish(task_id, TaskStatus.COMPLETED, "任务成功完成")  # 写最终状态、发完成通知前调用
+    await hub.stop()
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.db import crud
+
+logger = logging.getLogger(__name__)
+
+# 进度落库周期（秒）
+DEFAULT_FLUSH_INTERVAL = 2.0
+# 单条进度通知的超时（秒）
+NOTIFY_TIMEOUT = 10
+# 其它进程的任务超过这么久（秒）没有进度更新时从实时列表中移除（进程可能已退出）
+REMOTE_STALE_SECONDS = 1800
+
+
+class _Subscriber:
+    """单个 SSE 连接的待推送队列，同一任务只保留最新状态，消费慢时不会堆积"""
+
+    def __init__(self):
+        self.pending: Dict[str, Dict[str, Any]] = {}
+        self.event = asyncio.Event()
+
+    def offer(self, state: Dict[str, Any]) -> None:
+        self.pending[state["taskId"]] = state
+        self.event.set()
+
+    async def get(self, timeout: float) -> List[Dict[str, Any]]:
+        """等待并取出所有待推送的状态，超时返回空列表"""
+        try:
+            await asyncio.wait_for(self.event.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return []
+        self.event.clear()
+        items = list(self.pending.values())
+        self.pending.clear()
+        return items
+
+
+class TaskProgressHub:
+    """进程内任务进度中心"""
+
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession],
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL):
+        self._session_factory = session_factory
+        self.flush_interval = flush_interval
+        self._live: Dict[str, Dict[str, Any]] = {}
+        self._dirty: Dict[str, Dict[str, Any]] = {}
+        self._subscribers: Set[_Subscriber] = set()
+        self._flush_lock = asyncio.Lock()
+        self._flush_now = asyncio.Event()
+        self._flush_task: Optional[asyncio.Task] = None
+        # 进度通知: 每个任务最新一条待发送 + 正在发送的任务集合
+        self._notify_pending: Dict[str, Callable[[], Awaitable[Any]]] = {}
+        self._notify_running: Dict[str, asyncio.Task] = {}
+        self._stats = {"updates": 0, "flushes": 0, "rowsWritten": 0, "notifySent": 0, "notifyDropped": 0}
+        # 多工作进程: 自上次广播以来变化的本进程任务状态、其它进程的运行中任务
+        self._coordinator = None
+        self._changed: Dict[str, Dict[str, Any]] = {}
+        self._remote_live: Dict[str, Dict[str, Any]] = {}
+
+    def attach_coordinator(self, coordinator) -> None:
+        """多工作进程时与其它进程交换运行中任务的进度"""
+        if not coordinator.multi_worker:
+            return
+        self._coordinator = coordinator
+        coordinator.subscribe("task-progress", self._on_peer_progress)
+
+    # ---------- 生命周期 ----------
+
+    def start(self) -> None:
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        """停止后台刷新，并把剩余进度写入数据库"""
+        if self._flush_task:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        for task in list(self._notify_running.values()):
+            task.cancel()
+        self._notify_pending.clear()
+        await self.flush()
+
+    # ---------- 进度 ----------
+
+    def update(self, task_id: str, title: str, progress: Optional[int], description: str,
+               status: Optional[str] = None, persist: bool = True, force: bool = False) -> None:
+        """
+        记录任务的最新进度并推送给订阅者
+
+        Args:
+            progress: 进度，为 None 时保持当前进度
+            status: 显式的状态变化；为 None 时落库不修改状态，
+                避免覆盖期间由暂停/终止等操作直接写入的状态
+            persist: 是否需要写入 task_history（调用方已自行写库时传 False）
+            force: 是否立即触发一次落库，而不是等到下一个周期
+        """
+        state = self._live.get(task_id) or {"taskId": task_id, "title": title, "progress": 0, "status": None}
+        if progress is not None:
+            state["progress"] = int(progress)
+        state["description"] = description
+        if status is not None:
+            state["status"] = status
+        state["title"] = title or state.get("title")
+        state["updatedAt"] = time.time()
+        self._live[task_id] = state
+        self._stats["updates"] += 1
+        if self._coordinator is not None:
+            self._changed[task_id] = state
+
+        if persist:
+            entry = self._dirty.setdefault(task_id, {"taskId": task_id, "status": None})
+            entry["progress"] = state["progress"]
+            entry["description"] = description
+            if status is not None:
+                entry["status"] = status
+            if force:
+                self._flush_now.set()
+        self._publish(state)
+
+    async def finish(self, task_id: str, status: str, description: str) -> None:
+        """
+        任务结束前调用: 丢弃尚未落库的进度，保证之后写入的最终状态不会被周期刷新覆盖；
+        丢弃尚未发送的进度通知并等待正在发送的一条结束，保证之后发出的完成通知不会被进度编辑覆盖
+        """
+        async with self._flush_lock:
+            self._dirty.pop(task_id, None)
+        self._notify_pending.pop(task_id, None)
+        running = self._notify_running.get(task_id)
+        if running is not None:
+            # 发送受 NOTIFY_TIMEOUT 限制；用 wait 而不是直接 await，调用方被取消时不会连带取消发送
+            await asyncio.wait({running})
+        state = self._live.pop(task_id, None) or {"taskId": task_id, "title": None}
+        state.update(status=status, description=description, progress=100, updatedAt=time.time())
+        if self._coordinator is not None:
+            self._changed[task_id] = dict(state, finished=True)
+        self._publish(state)
+
+    def get_live(self, task_id: str) -> Optional[Dict[str, Any]]:
+        return self._live.get(task_id) or self._remote_live.get(task_id)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """所有运行中任务的实时状态（包括其它工作进程的任务）"""
+        return [dict(state) for state in self._live.values()] + [dict(state) for state in self._remote_live.values()]
+
+    async def flush(self) -> int:
+        """把合并后的进度一次性写入数据库，返回写入的任务数"""
+        async with self._flush_lock:
+            if not self._dirty:
+                return 0
+            batch, self._dirty = self._dirty, {}
+            try:
+                async with self._session_factory() as session:
+                    written = await crud.bulk_update_task_progress(session, list(batch.values()))
+            except Exception as e:
+                logger.error(f"批量写入任务进度失败 ({len(batch)} 个任务): {e}")
+                # 放回未写入的条目，下个周期重试；写库期间产生的新进度优先
+                for task_id, entry in batch.items():
+                    newer = self._dirty.setdefault(task_id, entry)
+                    if newer.get("status") is None:
+                        newer["status"] = entry.get("status")
+                return 0
+            self._stats["flushes"] += 1
+            self._stats["rowsWritten"] += written
+            return written
+
+    async def _flush_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_now.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_now.clear()
+            await self.flush()
+            self._broadcast()
+
+    # ---------- 多工作进程 ----------
+
+    def _broadcast(self) -> None:
+        if self._coordinator is None:
+            return
+        if self._changed:
+            states = [dict(state) for state in self._changed.values()]
+            self._changed.clear()
+            self._coordinator.publish("task-progress", {"states": states})
+        if self._remote_live:
+            expire_before = time.time() - REMOTE_STALE_SECONDS
+            for task_id in [k for k, s in self._remote_live.items() if s.get("updatedAt", 0) < expire_before]:
+                del self._remote_live[task_id]
+
+    async def _on_peer_progress(self, message: Dict[str, Any]) -> None:
+        for state in message.get("states") or []:
+            if state.pop("finished", False):
+                self._remote_live.pop(state["taskId"], None)
+            else:
+                self._remote_live[state["taskId"]] = state
+            self._publish(state)
+
+    # ---------- 通知 ----------
+
+    def notify(self, task_id: str, send: Callable[[], Awaitable[Any]]) -> None:
+        """
+        提交一条进度通知，不等待发送结果
+
+        同一任务上一条还在发送时，只保留最新的一条，发送完成后再发。
+        """
+        if task_id in self._notify_pending:
+            self._stats["notifyDropped"] += 1
+        self._notify_pending[task_id] = send
+        if task_id not in self._notify_running:
+            self._notify_running[task_id] = asyncio.create_task(self._notify_worker(task_id))
+
+    async def _notify_worker(self, task_id: str) -> None:
+        try:
+            while True:
+                send = self._notify_pending.pop(task_id, None)
+                if send is None:
+                    return
+                try:
+                    await asyncio.wait_for(send(), timeout=NOTIFY_TIMEOUT)
+                    self._stats["notifySent"] += 1
+                except asyncio.TimeoutError:
+                    logger.warning(f"任务进度通知超时 (ID: {task_id})，跳过本次推送")
+                except Exception as e:
+                    logger.debug(f"任务进度通知失败 (ID: {task_id}): {e}")
+        finally:
+            self._notify_running.pop(task_id, None)
+
+    # ---------- 订阅 ----------
+
+    def subscribe(self) -> _Subscriber:
+        subscriber = _Subscriber()
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: _Subscriber) -> None:
+        self._subscribers.discard(subscriber)
+
+    def _publish(self, state: Dict[str, Any]) -> None:
+        if not self._subscribers:
+            return
+        message = dict(state)
+        for subscriber in self._subscribers:
+            subscriber.offer(message)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "live": len(self._live),
+            "remoteLive": len(self._remote_live),
+            "dirty": len(self._dirty),
+            "subscribers": len(self._subscribers),
+            "notifyInFlight": len(self._notify_running),
+        }
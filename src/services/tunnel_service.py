@@ -4,16 +4,26 @@ TunnelService — 弹幕库侧 WebSocket 反向隧道客户端
 使用 aiohttp（已在 requirements.txt 中），无需额外依赖。
 
 工作流程：
-  1. 连接 VPS 控制 WebSocket:  ws://VPS/ws/ctrl/{key}
-  2. 收到 new_conn 消息（含完整 HTTP 请求信息）后：
+  1. 连接 VPS 控制 WebSocket:  ws://VPS/ws/ctrl/{key}?proto=2
+  2. relay 支持多路复用时先回复 {"type": "hello", "proto": 2}，之后所有请求都在
+     控制 WS 上以二进制帧多路复用传输（见下方帧格式），请求体与响应体均分块流式转发
+  3. 旧版 relay 不回复 hello，仍按 new_conn 消息处理：
      - 建立数据 WebSocket:  ws://VPS/ws/data/{key}/{id}
      - 用 aiohttp 向本地 :7768 发起 HTTP 请求
      - 把响应序列化为 JSON 通过数据 WS 发回给 relay
+
+二进制帧格式（proto 2）：
+  [1 字节类型][4 字节流 ID，大端][负载]
+  relay → 本地: REQ_HEAD(JSON: method/path/headers) / REQ_BODY(原始字节) / REQ_END / CANCEL
+  本地 → relay: RESP_HEAD(JSON: status/headers) / RESP_BODY(原始字节) / RESP_END
 """
 import asyncio
 import json
 import logging
-from typing import Optional
+import struct
+import time
+from collections import deque
+from typing import AsyncIterator, Dict, Optional
 
 import aiohttp
 
@@ -21,6 +31,115 @@ log = logging.getLogger(__name__)
 
 _CONNECT_RETRY_DELAYS = [5, 10, 20, 40, 60, 120, 300]  # 秒，指数退避
 
+PROTOCOL_VERSION = 2
+
+# 帧类型
+FRAME_REQ_HEAD = 0x01
+FRAME_REQ_BODY = 0x02
+FRAME_REQ_END = 0x03
+FRAME_CANCEL = 0x04
+FRAME_RESP_HEAD = 0x11
+FRAME_RESP_BODY = 0x12
+FRAME_RESP_END = 0x13
+
+_FRAME_HEADER = struct.Struct(">BI")
+
+# 响应体分块大小
+_BODY_CHUNK_SIZE = 64 * 1024
+# 单个流缓存的请求体字节上限。控制 WS 的读取循环从不等待单个流（避免一个慢流阻塞其它流和控制帧），
+# 本地服务读取过慢导致超过上限时重置该流，向 relay 返回 503
+_REQ_BODY_BUFFER_LIMIT = 8 * 1024 * 1024
+
+# 过滤掉不适合转发的 hop-by-hop 及 host 类 header
+# content-length 必须过滤：aiohttp 发送请求体时会自动计算（或使用分块编码），不能重复设置
+_SKIP_REQUEST_HEADERS = {"host", "connection", "transfer-encoding", "content-encoding",
+                         "content-length", "upgrade", "te", "trailers", "proxy-connection"}
+# 响应体按分块转发，长度与分块编码由 relay 重新决定
+_SKIP_RESPONSE_HEADERS = {"connection", "transfer-encoding", "keep-alive", "proxy-connection",
+                          "upgrade", "te", "trailers"}
+
+
+def encode_frame(frame_type: int, stream_id: int, payload: bytes = b"") -> bytes:
+    """编码一个多路复用帧"""
+    return _FRAME_HEADER.pack(frame_type, stream_id) + payload
+
+
+def decode_frame(data: bytes):
+    """解码一个多路复用帧，返回 (类型, 流 ID, 负载)"""
+    frame_type, stream_id = _FRAME_HEADER.unpack_from(data)
+    return frame_type, stream_id, data[_FRAME_HEADER.size:]
+
+
+class TunnelStats:
+    """隧道吞吐与延迟计数器"""
+
+    def __init__(self, window: int = 200) -> None:
+        self.requests_total = 0
+        self.requests_failed = 0
+        self.active_streams = 0
+        self.bytes_in = 0    # 转发给本地的请求体字节数
+        self.bytes_out = 0   # 发回 relay 的响应体字节数
+        self._first_byte_ms: deque = deque(maxlen=window)
+        self._total_ms: deque = deque(maxlen=window)
+
+    def record(self, first_byte_ms: Optional[float], total_ms: float, ok: bool) -> None:
+        self.requests_total += 1
+        if not ok:
+            self.requests_failed += 1
+        if first_byte_ms is not None:
+            self._first_byte_ms.append(first_byte_ms)
+        self._total_ms.append(total_ms)
+
+    @staticmethod
+    def _summary(samples: deque) -> Dict[str, float]:
+        if not samples:
+            return {"avg": 0.0, "p95": 0.0, "max": 0.0}
+        ordered = sorted(samples)
+        return {
+            "avg": round(sum(ordered) / len(ordered), 2),
+            "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 2),
+            "max": round(ordered[-1], 2),
+        }
+
+    def snapshot(self) -> Dict:
+        return {
+            "requestsTotal": self.requests_total,
+            "requestsFailed": self.requests_failed,
+            "activeStreams": self.active_streams,
+            "bytesIn": self.bytes_in,
+            "bytesOut": self.bytes_out,
+            "firstByteMs": self._summary(self._first_byte_ms),
+            "totalMs": self._summary(self._total_ms),
+        }
+
+
+class _MuxStream:
+    """一个多路复用请求流的状态"""
+
+    def __init__(self, stream_id: int) -> None:
+        self.stream_id = stream_id
+        self.body_queue: asyncio.Queue = asyncio.Queue()
+        self.buffered = 0
+        self.overflowed = False
+        self.task: Optional[asyncio.Task] = None
+
+    def feed(self, chunk: Optional[bytes]) -> bool:
+        """缓存一个请求体分块（None 表示结束），超过上限时返回 False，不阻塞"""
+        if chunk is not None:
+            if self.buffered + len(chunk) > _REQ_BODY_BUFFER_LIMIT:
+                return False
+            self.buffered += len(chunk)
+        self.body_queue.put_nowait(chunk)
+        return True
+
+    async def iter_body(self) -> AsyncIterator[bytes]:
+        while True:
+            chunk = await self.body_queue.get()
+            if chunk is None:
+                return
+            self.buffered -= len(chunk)
+            yield chunk
+
 
 class TunnelService:
     """WebSocket 反向隧道客户端服务"""
@@ -33,6 +152,11 @@ class TunnelService:
 
         self._task: Optional[asyncio.Task] = None
         self._status: str = "disabled"
+        self._protocol: int = 1
+
+        # 复用的本地 HTTP 会话（keep-alive 连接池）
+        self._local_session: Optional[aiohttp.ClientSession] = None
+        self.stats = TunnelStats()
 
     # ──────────────────────────────────────────────────────────
     # 公开 API
@@ -85,13 +209,17 @@ class TunnelService:
     def status(self) -> str:
         return self._status
 
+    def get_stats(self) -> Dict:
+        """返回隧道状态及吞吐/延迟统计"""
+        return {"status": self._status, "protocol": self._protocol, **self.stats.snapshot()}
+
     # ──────────────────────────────────────────────────────────
     # 内部：控制循环（带自动重连）
     # ──────────────────────────────────────────────────────────
 
     async def _ctrl_loop(self) -> None:
         retry_idx = 0
-        ctrl_url = f"{self._vps_ws_url}ctrl/{self._webhook_key}"
+        ctrl_url = f"{self._vps_ws_url}ctrl/{self._webhook_key}?proto={PROTOCOL_VERSION}"
 
         while True:
             self._status = "connecting"
@@ -103,11 +231,13 @@ class TunnelService:
                         ctrl_url,
                         heartbeat=30,
                         receive_timeout=None,
+                        max_msg_size=0,
                     ) as ws:
                         self._status = "connected"
+                        self._protocol = 1
                         retry_idx = 0
                         log.info("[Tunnel] 控制连接已建立，等待新连接通知...")
-                        await self._handle_ctrl(ws)
+                        await self._handle_ctrl(ws, session)
 
             except asyncio.CancelledError:
                 return
@@ -121,30 +251,160 @@ class TunnelService:
                 except asyncio.CancelledError:
                     return
 
-    async def _handle_ctrl(self, ws: aiohttp.ClientWebSocketResponse) -> None:
+    async def _handle_ctrl(self, ws: aiohttp.ClientWebSocketResponse, session: aiohttp.ClientSession) -> None:
         """处理控制 WebSocket 消息"""
-        async for msg in ws:
-            if msg.type == aiohttp.WSMsgType.TEXT:
+        streams: Dict[int, _MuxStream] = {}
+        send_lock = asyncio.Lock()
+        try:
+            async for msg in ws:
+                if msg.type == aiohttp.WSMsgType.BINARY:
+                    await self._handle_mux_frame(ws, send_lock, streams, msg.data)
+                elif msg.type == aiohttp.WSMsgType.TEXT:
+                    try:
+                        data = json.loads(msg.data)
+                    except json.JSONDecodeError:
+                        continue
+                    msg_type = data.get("type")
+                    if msg_type == "hello":
+                        self._protocol = min(int(data.get("proto", 1)), PROTOCOL_VERSION)
+                        log.info("[Tunnel] relay 协议版本: %d", self._protocol)
+                    elif msg_type == "new_conn":
+                        conn_id = data.get("id", "")
+                        if conn_id:
+                            asyncio.create_task(self._handle_data_conn(data, session))
+                elif msg.type in (aiohttp.WSMsgType.CLOSE, aiohttp.WSMsgType.ERROR):
+                    break
+        finally:
+            # 控制连接断开后，其上的多路复用流都无法再回复
+            for stream in streams.values():
+                if stream.task and not stream.task.done():
+                    stream.task.cancel()
+
+    # ──────────────────────────────────────────────────────────
+    # 内部：多路复用流（proto 2，全部复用控制 WS）
+    # ──────────────────────────────────────────────────────────
+
+    async def _handle_mux_frame(
+        self,
+        ws: aiohttp.ClientWebSocketResponse,
+        send_lock: asyncio.Lock,
+        streams: Dict[int, _MuxStream],
+        data: bytes,
+    ) -> None:
+        try:
+            frame_type, stream_id, payload = decode_frame(data)
+        except struct.error:
+            log.debug("[Tunnel] 忽略无效的二进制帧 (%d B)", len(data))
+            return
+
+        if frame_type == FRAME_REQ_HEAD:
+            try:
+                req_info = json.loads(payload)
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                log.warning("[Tunnel] [#%d] 请求头解析失败", stream_id)
+                return
+            stream = _MuxStream(stream_id)
+            streams[stream_id] = stream
+            stream.task = asyncio.create_task(
+                self._run_mux_stream(ws, send_lock, streams, stream, req_info)
+            )
+            return
+
+        stream = streams.get(stream_id)
+        if stream is None or stream.task.done() or stream.overflowed:
+            return
+        if frame_type == FRAME_REQ_BODY:
+            self.stats.bytes_in += len(payload)
+            if not stream.feed(payload):
+                log.warning("[Tunnel] [#%d] 请求体缓存超过 %d B（本地服务读取过慢），重置该流",
+                            stream_id, _REQ_BODY_BUFFER_LIMIT)
+                stream.overflowed = True
+                stream.task.cancel()
+        elif frame_type == FRAME_REQ_END:
+            stream.feed(None)
+        elif frame_type == FRAME_CANCEL:
+            if stream.task and not stream.task.done():
+                stream.task.cancel()
+
+    async def _run_mux_stream(
+        self,
+        ws: aiohttp.ClientWebSocketResponse,
+        send_lock: asyncio.Lock,
+        streams: Dict[int, _MuxStream],
+        stream: _MuxStream,
+        req_info: dict,
+    ) -> None:
+        """转发一个多路复用请求，把响应头和响应体分块写回控制 WS"""
+        stream_id = stream.stream_id
+
+        async def send(frame_type: int, payload: bytes = b"") -> None:
+            async with send_lock:
+                await ws.send_bytes(encode_frame(frame_type, stream_id, payload))
+
+        method: str = req_info.get("method", "GET")
+        path: str = req_info.get("path", "/")
+        has_body = bool(req_info.get("hasBody", True))
+        started = time.perf_counter()
+        first_byte_ms: Optional[float] = None
+        ok = False
+        head_sent = False
+        self.stats.active_streams += 1
+        log.debug("[Tunnel] [#%d] %s %s", stream_id, method, path)
+        try:
+            async with self._local_request(
+                method, path, req_info.get("headers", {}),
+                stream.iter_body() if has_body else None,
+            ) as resp:
+                first_byte_ms = (time.perf_counter() - started) * 1000
+                await send(FRAME_RESP_HEAD, json.dumps({
+                    "status": resp.status,
+                    "headers": self._response_headers(resp),
+                }).encode("utf-8"))
+                head_sent = True
+                size = 0
+                async for chunk in resp.content.iter_chunked(_BODY_CHUNK_SIZE):
+                    size += len(chunk)
+                    self.stats.bytes_out += len(chunk)
+                    await send(FRAME_RESP_BODY, chunk)
+                await send(FRAME_RESP_END)
+                ok = True
+                log.debug("[Tunnel] [#%d] 本地响应 %d，%d B", stream_id, resp.status, size)
+        except asyncio.CancelledError:
+            log.debug("[Tunnel] [#%d] 请求已取消", stream_id)
+            if stream.overflowed:
+                # relay 仍在等待响应，告知该流已被重置
                 try:
-                    data = json.loads(msg.data)
-                except json.JSONDecodeError:
-                    continue
-                if data.get("type") == "new_conn":
-                    conn_id = data.get("id", "")
-                    if conn_id:
-                        asyncio.create_task(self._handle_data_conn(data))
-            elif msg.type in (aiohttp.WSMsgType.CLOSE, aiohttp.WSMsgType.ERROR):
-                break
+                    if not head_sent:
+                        await send(FRAME_RESP_HEAD, json.dumps({"status": 503, "headers": {}}).encode("utf-8"))
+                    await send(FRAME_RESP_END)
+                except Exception:
+                    pass
+        except Exception as e:
+            log.error("[Tunnel] [#%d] 本地请求失败: %s", stream_id, e)
+            try:
+                if not head_sent:
+                    await send(FRAME_RESP_HEAD, json.dumps({"status": 502, "headers": {}}).encode("utf-8"))
+                await send(FRAME_RESP_END)
+            except Exception:
+                pass
+        finally:
+            streams.pop(stream_id, None)
+            # 本地服务未读完请求体就返回时，释放缓存的请求体
+            while not stream.body_queue.empty():
+                stream.body_queue.get_nowait()
+            stream.buffered = 0
+            self.stats.active_streams -= 1
+            self.stats.record(first_byte_ms, (time.perf_counter() - started) * 1000, ok)
 
     # ──────────────────────────────────────────────────────────
-    # 内部：数据连接（每个回调请求一个，HTTP over WebSocket）
+    # 内部：数据连接（旧版 relay，每个回调请求一个，HTTP over WebSocket）
     # ──────────────────────────────────────────────────────────
 
-    async def _handle_data_conn(self, req_info: dict) -> None:
+    async def _handle_data_conn(self, req_info: dict, session: aiohttp.ClientSession) -> None:
         """
         处理一次回调请求：
-          1. 建立数据 WS（让 relay 知道通道就绪）
-          2. 用 aiohttp 向本地发起 HTTP 请求
+          1. 建立数据 WS（让 relay 知道通道就绪，复用控制连接的会话）
+          2. 用共享的本地会话向本地发起 HTTP 请求
           3. 把 HTTP 响应序列化后通过数据 WS 发回
         """
         conn_id: str = req_info.get("id", "")
@@ -158,62 +418,81 @@ class TunnelService:
         log.debug("[Tunnel] [%s] %s %s — 建立数据 WS", conn_id[:8], method, path)
 
         try:
-            timeout = aiohttp.ClientTimeout(total=None, connect=5)
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.ws_connect(data_url) as ws:
-                    log.debug("[Tunnel] [%s] 数据 WS 就绪，转发至本地 %d",
-                              conn_id[:8], self._local_port)
-                    await self._forward_http(
-                        ws, session, method, path, headers, body_bytes, conn_id
-                    )
+            async with session.ws_connect(data_url) as ws:
+                log.debug("[Tunnel] [%s] 数据 WS 就绪，转发至本地 %d",
+                          conn_id[:8], self._local_port)
+                await self._forward_http(ws, method, path, headers, body_bytes, conn_id)
         except Exception as e:
             log.warning("[Tunnel] [%s] 数据连接异常: %s", conn_id[:8], e)
 
     async def _forward_http(
         self,
         ws: aiohttp.ClientWebSocketResponse,
-        session: aiohttp.ClientSession,
         method: str,
         path: str,
         req_headers: dict,
         body: bytes,
         conn_id: str,
     ) -> None:
-        """向本地发 HTTP 请求，把响应序列化后发回数据 WS"""
-        local_url = f"http://127.0.0.1:{self._local_port}{path}"
-
-        # 过滤掉不适合转发的 hop-by-hop 及 host 类 header
-        # content-length 必须过滤：aiohttp 发 data=body 时会自动计算，不能重复设置
-        skip = {"host", "connection", "transfer-encoding", "content-encoding",
-                "content-length", "upgrade", "te", "trailers", "proxy-connection"}
-        forward_headers = {k: v for k, v in req_headers.items() if k.lower() not in skip}
-        # 强制 Host 指向本地
-        forward_headers["Host"] = f"127.0.0.1:{self._local_port}"
-
+        """向本地发 HTTP 请求，把响应序列化后发回数据 WS（旧版 relay 只支持十六进制 JSON）"""
+        started = time.perf_counter()
+        first_byte_ms: Optional[float] = None
+        ok = False
+        self.stats.active_streams += 1
+        self.stats.bytes_in += len(body)
         try:
-            req_timeout = aiohttp.ClientTimeout(total=30, connect=5)
-            async with session.request(
-                method, local_url,
-                headers=forward_headers,
-                data=body,
-                timeout=req_timeout,
-                allow_redirects=False,
-            ) as resp:
+            async with self._local_request(method, path, req_headers, body) as resp:
+                first_byte_ms = (time.perf_counter() - started) * 1000
                 resp_body = await resp.read()
-                resp_headers = dict(resp.headers)
-
                 resp_info = {
                     "status": resp.status,
-                    "headers": resp_headers,
+                    "headers": dict(resp.headers),
                     "body": resp_body.hex(),
                 }
                 await ws.send_str(json.dumps(resp_info))
+                self.stats.bytes_out += len(resp_body)
+                ok = True
                 log.debug("[Tunnel] [%s] 本地响应 %d，%d B",
                           conn_id[:8], resp.status, len(resp_body))
         except Exception as e:
             log.error("[Tunnel] [%s] 本地请求失败: %s", conn_id[:8], e)
-            err_resp = {"status": 502, "headers": {}, "body": b"".hex()}
+            err_resp = {"status": 502, "headers": {}, "body": ""}
             await ws.send_str(json.dumps(err_resp))
+        finally:
+            self.stats.active_streams -= 1
+            self.stats.record(first_byte_ms, (time.perf_counter() - started) * 1000, ok)
+
+    # ──────────────────────────────────────────────────────────
+    # 内部：本地 HTTP
+    # ──────────────────────────────────────────────────────────
+
+    def _get_local_session(self) -> aiohttp.ClientSession:
+        """获取复用的本地 HTTP 会话，连接保持 keep-alive"""
+        if self._local_session is None or self._local_session.closed:
+            self._local_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=32, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=None, connect=5),
+                auto_decompress=False,
+            )
+        return self._local_session
+
+    def _local_request(self, method: str, path: str, req_headers: dict, data):
+        """构造转发到本地的请求（返回 aiohttp 的请求上下文管理器）"""
+        local_url = f"http://127.0.0.1:{self._local_port}{path}"
+        forward_headers = {k: v for k, v in req_headers.items() if k.lower() not in _SKIP_REQUEST_HEADERS}
+        # 强制 Host 指向本地
+        forward_headers["Host"] = f"127.0.0.1:{self._local_port}"
+        return self._get_local_session().request(
+            method, local_url,
+            headers=forward_headers,
+            data=data,
+            timeout=aiohttp.ClientTimeout(total=30, connect=5),
+            allow_redirects=False,
+        )
+
+    @staticmethod
+    def _response_headers(resp: aiohttp.ClientResponse) -> Dict[str, str]:
+        return {k: v for k, v in resp.headers.items() if k.lower() not in _SKIP_RESPONSE_HEADERS}
 
     # ──────────────────────────────────────────────────────────
     # 内部：工具方法
@@ -237,6 +516,9 @@ class TunnelService:
             except asyncio.CancelledError:
                 pass
         self._task = None
+        if self._local_session is not None and not self._local_session.closed:
+            await self._local_session.close()
+        self._local_session = None
 
 
 async def apply_tunnel_from_notification_manager(
@@ -2,6 +2,7 @@
 import logging
 import asyncio
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from typing import Callable, List, Optional, Set
 from pathlib import Path
 from sqlalchemy import select
@@ -136,7 +137,24 @@ def delete_danmaku_file(danmaku_file_path_str: Optional[str], cleanup_empty_dirs
     return None
 
 
-def delete_danmaku_files_batch(file_paths: List[Optional[str]]):
+def _unlink_danmaku_file(file_path_str: Optional[str]) -> Optional[Path]:
+    """删除单个弹幕文件，返回其父目录（未删除时返回 None）"""
+    if not file_path_str:
+        return None
+    try:
+        fs_path = _get_fs_path_from_web_path(file_path_str)
+        if fs_path and fs_path.is_file():
+            fs_path.unlink(missing_ok=True)
+            logger.debug(f"已删除弹幕文件: {fs_path}")
+            return fs_path.parent
+    except (ValueError, FileNotFoundError):
+        pass
+    except Exception as e:
+        logger.error(f"删除弹幕文件 '{file_path_str}' 时出错: {e}", exc_info=True)
+    return None
+
+
+def delete_danmaku_files_batch(file_paths: List[Optional[str]], max_workers: int = 1):
     """
     批量删除弹幕文件，并在最后统一清理空目录。
 
@@ -144,26 +162,18 @@ def delete_danmaku_files_batch(file_paths: List[Optional[str]]):
 
     Args:
         file_paths: 数据库中存储的Web路径列表
+        max_workers: 并行删除文件的线程数，大于 1 时使用线程池（空目录清理始终串行）
     """
     if not file_paths:
         return
 
     # 收集所有被删除文件的父目录
-    affected_dirs: Set[Path] = set()
-
-    for file_path_str in file_paths:
-        if not file_path_str:
-            continue
-        try:
-            fs_path = _get_fs_path_from_web_path(file_path_str)
-            if fs_path and fs_path.is_file():
-                affected_dirs.add(fs_path.parent)
-                fs_path.unlink(missing_ok=True)
-                logger.debug(f"已删除弹幕文件: {fs_path}")
-        except (ValueError, FileNotFoundError):
-            pass
-        except Exception as e:
-            logger.error(f"删除弹幕文件 '{file_path_str}' 时出错: {e}", exc_info=True)
+    if max_workers > 1 and len(file_paths) > 1:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            parents = list(executor.map(_unlink_danmaku_file, file_paths))
+    else:
+        parents = [_unlink_danmaku_file(p) for p in file_paths]
+    affected_dirs: Set[Path] = {p for p in parents if p is not None}
 
     # 统一清理空目录（从最深的目录开始）
     # 按路径深度排序，先处理深层目录
@@ -244,6 +254,9 @@ async def delete_anime_task(animeId: int, session: AsyncSession, progress_callba
                     shutil.rmtree(anime_danmaku_dir)
                     logger.info(f"已删除作品的弹幕目录: {anime_danmaku_dir}")
 
+                # 合并输出视图由源文件派生，随源文件一起删除
+                crud.remove_merged_views(animeId)
+
             # 2. 删除作品本身 (数据库将通过级联删除所有关联记录)
             await progress_callback(90, "正在删除数据库记录...")
             await session.delete(anime_exists)
@@ -302,6 +315,8 @@ async def delete_source_task(sourceId: int, session: AsyncSession, progress_call
             file_paths = [fp for fp in episodes_to_delete_res.scalars().all() if fp]
             # 使用批量删除，统一清理空目录
             delete_danmaku_files_batch(file_paths)
+            # 合并输出视图包含该源的弹幕，删除后由剩余源按需重建
+            crud.remove_merged_views(anime_id)
 
         # 删除源记录，数据库将级联删除其下的所有分集记录
         await progress_callback(70, "正在删除数据库记录...")
@@ -9,6 +9,7 @@ from src.db import crud, orm_models
 from src.rate_limiter import RateLimiter, RateLimitExceededError
 from src.services import TaskStatus
 from src.services.import_existence_checker import check_episode_existence
+from src.utils import get_download_concurrency
 from .utils import extract_short_error_message
 
 logger = logging.getLogger(__name__)
@@ -38,9 +39,14 @@ async def _download_episode_comments_concurrent(
     Returns:
         List[Tuple[episode_index, comments]]: 分集索引和对应的弹幕列表
     """
-    logger.info(f"开始并发下载 {len(episodes)} 个分集的弹幕（三线程模式）{'[后备任务]' if is_fallback else ''}")
-
-    async def download_single_episode(episode_info):
+    registry = get_download_concurrency()
+    concurrency = await registry.get(scraper)
+    logger.info(
+        f"开始并发下载 {len(episodes)} 个分集的弹幕（自适应并发，当前 {concurrency.current}，"
+        f"范围 {concurrency.min_limit}-{concurrency.max_limit}）{'[后备任务]' if is_fallback else ''}"
+    )
+
+    async def download_single_episode(episode_info, slot):
         episode_index, episode = episode_info
         try:
             # 如果是第一集且已有预获取的弹幕，直接使用
@@ -63,8 +69,9 @@ async def _download_episode_comments_concurrent(
                     f"[线程{episode_index+1}] {msg}"
                 )
 
-            # 下载弹幕
+            # 下载弹幕；失败或空结果视为源过载的信号，收缩并发窗口
             comments = await scraper.get_comments(episode.episodeId, progress_callback=sub_progress_callback)
+            slot.report(ok=bool(comments))
 
             # 增加速率限制计数（根据是否为后备任务选择不同的方法）
             if comments is not None:
@@ -79,24 +86,25 @@ async def _download_episode_comments_concurrent(
             return (episode.episodeIndex, comments)
 
         except Exception as e:
+            slot.report_error(e)
             logger.error(f"[并发下载] 分集 '{episode.title}' 下载失败: {e}")
             return (episode.episodeIndex, None)
 
-    # 使用 asyncio.Semaphore 限制并发数为3
-    semaphore = asyncio.Semaphore(3)
-
-    async def download_with_semaphore(episode_info):
-        async with semaphore:
-            return await download_single_episode(episode_info)
+    async def download_with_slot(episode_info):
+        async with concurrency.slot() as slot:
+            return await download_single_episode(episode_info, slot)
 
-    # 创建所有下载任务
+    # 创建所有下载任务，并发数由该源的自适应窗口控制
     download_tasks = [
-        download_with_semaphore((i, episode))
+        download_with_slot((i, episode))
         for i, episode in enumerate(episodes)
     ]
 
     # 并发执行所有下载任务
-    results = await asyncio.gather(*download_tasks, return_exceptions=True)
+    try:
+        results = await asyncio.gather(*download_tasks, return_exceptions=True)
+    finally:
+        await registry.persist(scraper)
 
     # 处理结果，过滤异常
     valid_results = []
@@ -110,6 +118,87 @@ async def _download_episode_comments_concurrent(
     return valid_results
 
 
+async def _stream_episode_comments(
+    session,
+    scraper,
+    episode,
+    progress_callback: Callable,
+    anime_id: int,
+    source_id: int,
+    config_manager=None,
+    title_recognition_manager=None,
+    anime_title: Optional[str] = None,
+) -> Tuple[Optional[int], int]:
+    """
+    以流水线方式下载并写入单个分集的弹幕（用于覆盖了 iter_comments 的分段源）。
+
+    拉取到第一批非空弹幕后才创建分集记录，之后每拉到一批就交给
+    crud.save_danmaku_stream_for_episode 处理并写入临时文件。
+
+    Returns:
+        (存储使用的集数, 写入条数)；源没有任何弹幕时集数为 None
+    """
+    batches = scraper.iter_comments(episode.episodeId, progress_callback=progress_callback)
+    try:
+        first_batch = None
+        while not first_batch:
+            try:
+                first_batch = await batches.__anext__()
+            except StopAsyncIteration:
+                return None, 0
+
+        # 应用部分集数偏移（partial_offset 规则）
+        stored_episode_index = episode.episodeIndex
+        if title_recognition_manager and anime_title:
+            _, _, _, _, converted_ep = await title_recognition_manager.apply_storage_postprocessing(
+                anime_title, episode=episode.episodeIndex
+            )
+            if converted_ep is not None and converted_ep != episode.episodeIndex:
+                logger.info(f"部分集数偏移: '{anime_title}' 第{episode.episodeIndex}集 => 第{converted_ep}集")
+                stored_episode_index = converted_ep
+
+        # 统一分集判重：新弹幕数量要拉取完才知道，这里只用 check_episode_existence 定位已有分集
+        # （按 provider_episode_id 优先，其次集数），写入已有分集而不是按集数再建一条；
+        # 是否替换由写入端按"新数量多于旧数量"决定，与非流式路径的 update/skip 规则一致
+        ep_check = await check_episode_existence(
+            session,
+            source_id=source_id,
+            provider_episode_id=episode.episodeId,
+            episode_index=stored_episode_index,
+            new_comment_count=0,
+        )
+        if ep_check["episode_id"] is not None:
+            episode_db_id = ep_check["episode_id"]
+            if ep_check["existing_count"]:
+                logger.info(f"分集 '{episode.title}' (DB ID: {episode_db_id}) 已有 {ep_check['existing_count']} 条弹幕，"
+                            f"拉取完成后按数量决定是否更新")
+        else:
+            episode_db_id = await crud.create_episode_if_not_exists(
+                session, anime_id, source_id, stored_episode_index,
+                episode.title, episode.url, episode.episodeId
+            )
+
+        async def all_batches():
+            yield first_batch
+            async for batch in batches:
+                yield batch
+
+        try:
+            added_count = await crud.save_danmaku_stream_for_episode(session, episode_db_id, all_batches(), config_manager)
+        except BaseException:
+            # 拉取中途失败：回滚提前创建的分集记录，避免之后的提交留下没有弹幕的分集
+            await session.rollback()
+            raise
+        if added_count == 0 and ep_check["episode_id"] is None:
+            # 去重后没有写入任何弹幕，同样不保留新建的分集记录
+            await session.rollback()
+            return stored_episode_index, 0
+        await session.commit()
+        return stored_episode_index, added_count
+    finally:
+        await batches.aclose()
+
+
 async def _import_episodes_iteratively(
     session,
     scraper,
@@ -287,6 +376,29 @@ async def _import_episodes_iteratively(
                             base_progress + int(p * 0.6 / len(episodes)), msg
                         )
 
+                    if scraper.supports_comment_streaming:
+                        # 分段源：边拉取边写文件，不在内存中保留整集弹幕
+                        stored_episode_index, added_count = await _stream_episode_comments(
+                            session, scraper, episode, sub_progress_callback, anime_id, source_id,
+                            config_manager, title_recognition_manager, anime_title
+                        )
+                        if is_fallback:
+                            await rate_limiter.increment_fallback(fallback_type, scraper.provider_name)
+                        else:
+                            await rate_limiter.increment(scraper.provider_name)
+                        if stored_episode_index is None:
+                            failed_episodes_count += 1
+                            failed_episodes_details[episode.episodeIndex] = "获取弹幕为空"
+                            logger.warning(f"分集 '{episode.title}' 获取弹幕为空（0条），不创建分集记录。")
+                        elif added_count > 0:
+                            total_comments_added += added_count
+                            successful_episodes_indices.append(stored_episode_index)
+                            logger.info(f"分集 '{episode.title}' 流式写入 {added_count} 条弹幕并已提交。")
+                        else:
+                            skipped_episodes_indices.append(stored_episode_index)
+                            logger.info(f"分集 '{episode.title}' 弹幕数量未增加，跳过。")
+                        continue
+
                     comments = await scraper.get_comments(episode.episodeId, progress_callback=sub_progress_callback)
 
                     # 只有在实际进行了网络请求时才增加计数
@@ -122,24 +122,20 @@ async def full_refresh_task(sourceId: int, session: AsyncSession, scraper_manage
                         skipped_indices.append(episode_index)
                         break  # 跳出 while，进入下一集
 
-                    # 智能刷新：比较弹幕数量，只有新弹幕更多才覆盖
+                    # 增量刷新：与已存储的弹幕合并，只追加新增部分
                     existing_count = episode.commentCount or 0
-                    new_count = len(comments)
+                    added_count = await crud.merge_danmaku_for_episode(
+                        session, episode_id, comments, config_manager,
+                        fire_threshold=scraper.likes_fire_threshold
+                    )
 
-                    if new_count > existing_count:
-                        # 新弹幕更多，保存
-                        added_count = await crud.save_danmaku_for_episode(
-                            session, episode_id, comments, config_manager,
-                            fire_threshold=scraper.likes_fire_threshold
-                        )
+                    if added_count > 0:
                         total_comments_added += added_count
                         successful_indices.append(episode_index)
-                        logger.info(f"分集 {episode_id} (第{episode_index}集) 刷新成功: {existing_count} -> {new_count} 条弹幕")
+                        logger.info(f"分集 {episode_id} (第{episode_index}集) 刷新成功: 新增 {added_count} 条弹幕 (原 {existing_count} 条)")
                     else:
-                        # 新弹幕不比旧的多，跳过
-                        await crud.update_episode_fetch_time(session, episode_id)
                         skipped_indices.append(episode_index)
-                        logger.info(f"分集 {episode_id} (第{episode_index}集) 跳过: 新弹幕({new_count}) <= 旧弹幕({existing_count})")
+                        logger.info(f"分集 {episode_id} (第{episode_index}集) 跳过: 没有新增弹幕")
 
                     await session.commit()
 
@@ -315,11 +311,9 @@ async def refresh_episode_task(episodeId: int, session: AsyncSession, manager: S
             raise TaskSuccess("未找到任何弹幕。")
 
 
-        await progress_callback(96, f"正在写入 {len(all_comments_from_source)} 条新弹幕...")
+        await progress_callback(96, f"正在合并 {len(all_comments_from_source)} 条弹幕...")
 
-        # 获取 animeId 用于文件路径
-        anime_id = info["animeId"]
-        added_count = await crud.save_danmaku_for_episode(
+        added_count = await crud.merge_danmaku_for_episode(
             session, episodeId, all_comments_from_source, config_manager,
             fire_threshold=scraper.likes_fire_threshold
         )
@@ -469,8 +463,8 @@ async def refresh_bulk_episodes_task(episodeIds: List[int], session: AsyncSessio
 
                 await rate_limiter.increment(provider_name)
 
-                # 4. 保存弹幕
-                added_count = await crud.save_danmaku_for_episode(
+                # 4. 增量合并弹幕
+                added_count = await crud.merge_danmaku_for_episode(
                     session, episode_id, all_comments_from_source, config_manager,
                     fire_threshold=scraper.likes_fire_threshold
                 )
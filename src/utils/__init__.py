@@ -12,6 +12,7 @@
 
 # 通用工具
 from .common import sample_comments_evenly, clean_xml_string, handle_danmaku_likes, strip_danmaku_likes
+from .common import danmaku_dedup_key
 from .common import restyle_danmaku_likes
 
 # 文件名解析 (统一模块)
@@ -71,6 +72,15 @@ from .proxy_middleware import init_proxy_middleware
 # HTTP Transport 管理
 from .transport_manager import TransportManager
 
+# 出站请求限速
+from .token_bucket import TokenBucket, OutboundRateLimiter, get_outbound_limiter, rate_limited_event_hooks
+
+# 下载并发自适应
+from .adaptive_concurrency import AdaptiveConcurrency, get_download_concurrency
+
+# 同键并发调用合并
+from .shared_call import SharedCalls
+
 __all__ = [
     # 文件名解析
     'ParseResult',
@@ -90,6 +100,7 @@ __all__ = [
     'sample_comments_evenly',
     'clean_xml_string',
     'handle_danmaku_likes',
+    'danmaku_dedup_key',
     'strip_danmaku_likes',
     'restyle_danmaku_likes',
     # 搜索计时器
@@ -118,5 +129,15 @@ __all__ = [
     'init_proxy_middleware',
     # HTTP Transport 管理
     'TransportManager',
+    # 出站请求限速
+    'TokenBucket',
+    'OutboundRateLimiter',
+    'get_outbound_limiter',
+    'rate_limited_event_hooks',
+    # 下载并发自适应
+    'AdaptiveConcurrency',
+    'get_download_concurrency',
+    # 同键并发调用合并
+    'SharedCalls',
 ]
 
@@ -0,0 +1,244 @@
+"""
+文件名解析器的样本语料、黄金结果校验与基准测试
+
+_filename_parser_golden.json 保存了语料中每个输入在 parse_filename /
+parse_search_keyword / extract_season_episode 下的解析结果。修改 filename_parser
+的正则或缓存后运行:
+
+    python -m src.utils._filename_parser_corpus            # 校验 + 基准
+    python -m src.utils._filename_parser_corpus --update   # 确认结果变化是预期的之后重新生成
+
+校验会列出所有与黄金结果不一致的输入；基准分别给出冷启动（清空缓存）
+与缓存命中两种情况下每次调用的平均耗时。
+此文件以 `_` 开头，不会被任何模块自动导入。
+"""
+
+import dataclasses
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+GOLDEN_PATH = Path(__file__).with_name("_filename_parser_golden.json")
+
+# 手工整理的真实风格文件名（覆盖字幕组方括号、★ 分隔、SxxExx、纯集数、电影、多语种标题等分支）
+_HANDWRITTEN_FILENAMES = [
+    "[Nekomoe kissaten][Sousou no Frieren][01][1080p][JPSC].mp4",
+    "[Lilith-Raws] 葬送的芙莉莲 / Sousou no Frieren - 28 [Baha][WEB-DL][1080p][AVC AAC][CHT][MP4].mp4",
+    "[ANi] 葬送的芙莉蓮 - 01 [1080P][Baha][WEB-DL][AAC AVC][CHT].mp4",
+    "[Sakurato] Kusuriya no Hitorigoto [12][AVC-8bit 1080p AAC][CHS].mp4",
+    "[喵萌奶茶屋&LoliHouse] 金牌得主 第二季 Medalist 2 - 03 [WebRip 1080p HEVC-10bit AAC][简繁日内封字幕].mkv",
+    "[桜都字幕组] 药屋少女的呢喃 第2季 [13][1080p][简繁内封].mkv",
+    "[北宇治字幕组] 败犬女主太多了！ / Make Heroine ga Oosugiru! [01-12][WebRip][HEVC_AAC][简日内嵌]",
+    "[Up to 21°C] 我推的孩子 第二季 / Oshi no Ko 2nd Season - 14 (ABEMA 1920x1080 AVC AAC MP4) [A4E7B1E2].mp4",
+    "[SweetSub][间谍过家家][SPY×FAMILY][25][WebRip][1080P][AVC 8bit][简日双语].mp4",
+    "[DMG&SumiSora&VCB-Studio] Bocchi the Rock! [01][Ma10p_1080p][x265_flac].mkv",
+    "[VCB-Studio] Kimetsu no Yaiba [S02E05][Ma10p_1080p][x265_flac_aac].mkv",
+    "[Airota][Yuru Camp Movie][Movie][BDRip 1080p AVC AAC][CHS].mp4",
+    "星际牛仔★Cowboy Bebop★05★1080P★HEVC★简日双语.mkv",
+    "喵萌奶茶屋★葬送的芙莉莲★12★1080P★AVC★简体.mp4",
+    "动漫国字幕组★吹响吧！上低音号★第三季★01★1080P★MP4★简体",
+    "The.Last.of.Us.S01E03.Long.Long.Time.2160p.HMAX.WEB-DL.DDP5.1.Atmos.DV.HDR.H.265-FLUX.mkv",
+    "Breaking.Bad.S05E14.Ozymandias.1080p.BluRay.x264-DEMAND.mkv",
+    "Stranger.Things.S04E01.1080p.NF.WEB-DL.DDP5.1.Atmos.HDR.HEVC-TEPES.mkv",
+    "House.of.the.Dragon.S02E08.2160p.WEB-DLHDR.DDP5.1.Atmos.H.265-ADWeb.mkv",
+    "The.Mandalorian.S03E01.2160p.DSNP.WEB-DL.DDP5.1.Atmos.DV.HDR10.HEVCHDR-PTerWEB.mkv",
+    "Shogun.2024.S01E01.Anjin.1080p.DSNP.WEB-DL.DDP5.1.H.264-NTb.mkv",
+    "Arcane.S02.1080p.NF.WEB-DL.DDP5.1.Atmos.H.264-FLUX",
+    "Chernobyl Season 1 2160p UHD BluRay REMUX HDR HEVC Atmos-TRiToN",
+    "Frieren - S01 - 05.mkv",
+    "Frieren S1 05.mkv",
+    "Dune.Part.Two.2024.2160p.UHD.BluRay.REMUX.DV.HDR.HEVC.TrueHD.7.1.Atmos-FGT.mkv",
+    "Oppenheimer (2023) 1080p BluRay x264 DTS-HD MA 5.1-SWTYBLZ.mkv",
+    "你的名字 Your Name 2016 1080p BluRay x265 10bit AAC 5.1.mkv",
+    "千与千寻.Spirited.Away.2001.BluRay.1080p.x265.10bit.FLAC.mkv",
+    "剧场版 紫罗兰永恒花园 (2020) [BDRip 1080p HEVC FLAC].mkv",
+    "劇場版 呪術廻戦 0 [1080p].mkv",
+    "进击的巨人 最终季 第4季 - 28 [1080p].mp4",
+    "鬼灭之刃 - 01.mkv",
+    "鬼灭之刃_01.mkv",
+    "鬼灭之刃 01 [1080p].mp4",
+    "Re：从零开始的异世界生活 第三季 - 05 [WebRip 1080p].mkv",
+    "无职转生 第二季 Part 2 - 13.mkv",
+    "Overlord IV - 07.mkv",
+    "Overlord Ⅳ - 08.mkv",
+    "暴风之铳2 - 03.mp4",
+    "BLEACH 死神 千年血战篇 - 14 [1080p].mkv",
+    "Attack on Titan 进击的巨人 - 87.mkv",
+    "进击的巨人 Attack on Titan The Final Season - 88.mkv",
+    "One.Piece.1089.1080p.CR.WEB-DL.AAC2.0.H.264-VARYG.mkv",
+    "One Piece - 1100 (1080p) [CR WEB-DL AAC2.0 H264].mkv",
+    "[SubsPlease] Dandadan - 12 (1080p) [ABCDEF12].mkv",
+    "[Erai-raws] Chainsaw Man - 05 [1080p][Multiple Subtitle][3A2B1C0D].mkv",
+    "[Moozzi2] Violet Evergarden [BD 1920x1080 x264 FLAC].mkv",
+    "[检索用: 孤独摇滚] Bocchi the Rock - 03 [1080p].mkv",
+    "【幻樱字幕组】【4月新番】【间谍过家家 SPY×FAMILY】【02】【GB_MP4】【1920X1080】.mp4",
+    "[Nekomoe kissaten&LoliHouse] Kimi no Koto ga Daidaidaidaidaisuki na 100-nin no Kanojo - 08 [WebRip 1080p HEVC-10bit AAC ASSx2].mkv",
+    "Doctor Who 2005 - 13 [1080p].mkv",
+    "The Office US - 2019.mkv",
+    "夏目友人帐 第七季 - 01 [1080p][简繁内封].mkv",
+    "Fate Zero 2nd Season 05.mkv",
+    "Mushoku Tensei II - 12 [1080p].mkv",
+    "Gintama° - 51 [BDRip 1080p].mkv",
+    "CLANNAD AFTER STORY - 18 [Hi10p 1080p].mkv",
+    "K-On!! - 20.mkv",
+    "Steins;Gate 0 - 23.mkv",
+    "86 - Eighty Six - 11.mkv",
+    "No Game No Life Zero 2017 1080p BluRay.mkv",
+    "Sword.Art.Online.Alicization.S03E24.1080p.BluRay.FLAC.2.0.x264-ANiHLS.mkv",
+    "Cyberpunk.Edgerunners.S01E10.1080p.NF.WEB-DL.DDP5.1.H.264-SMURF.mkv",
+    "Neon Genesis Evangelion - 26 [DVD 480p DD 2.0 XviD].avi",
+    "Akira.1988.2160p.UHD.BluRay.x265.10bit.HDR.TrueHD.7.1.Atmos-DON.mkv",
+    "[Kamigami] Code Geass R2 - 25 [1920x1080 x264 FLAC Sub(GB,BIG5,JP)].mkv",
+    "Made.in.Abyss.Dawn.of.the.Deep.Soul.2020.JAPANESE.1080p.BluRay.x264.DTS-WiKi.mkv",
+    "[云光字幕组] 魔法使的新娘 第二季 [12][简体双语][1080p]招募翻译.mp4",
+    "[Haruhana] Oshi no Ko - 11 [WebRip][HEVC-10bit 1080p][CHI_JPN].mkv",
+    "The Apothecary Diaries S01E24 1080p CR WEB-DL AAC2.0 H 264-VARYG.mkv",
+    "Solo Leveling S01 E12 1080p.mkv",
+    "Solo.Leveling.S1.12.1080p.mkv",
+    "Solo Leveling Season 2 - 03.mkv",
+    "Dan Da Dan 2024 - 07.mkv",
+    "四月是你的谎言 1080p.mp4",
+    "[Baha] 迷宫饭 - 24 [WEB-DL][1080p][AVC AAC][CHT].mp4",
+    "DV.HDR10+.HLG.Test.Clip.2160p.mkv",
+    "Disney+.Loki.S02E01.2160p.WEB-DL.DDP5.1.Atmos.DV.mkv",
+    "Something.AppleTV+.Ted.Lasso.S03E12.1080p.ATVP.WEB-DL.DDP5.1.H.264-NTb.mkv",
+    "title_without_extension",
+    "2024.mkv",
+    "[]",
+    "",
+    "...",
+    "★★★",
+]
+
+# 组合生成的文件名：标题 × 发布格式
+_GENERATED_TITLES = [
+    "葬送的芙莉莲", "Sousou no Frieren", "我推的孩子 Oshi no Ko", "Re：从零开始的异世界生活 第三季",
+    "间谍过家家 SPY×FAMILY", "Mushoku Tensei II", "Overlord Ⅳ", "鬼灭之刃 刀匠村篇", "Medalist 2",
+]
+_GENERATED_FORMATS = [
+    "[LoliHouse] {title} - {ep:02d} [WebRip 1080p HEVC-10bit AAC][简繁内封字幕].mkv",
+    "{title}.S02E{ep:02d}.1080p.WEB-DL.AAC2.0.H.264.mkv",
+    "{title} S2 {ep:02d} [1080p].mp4",
+    "{title} - {ep:02d} [BDRip 1920x1080 x265 10bit FLAC 5.1].mkv",
+    "{title} 第{ep}集 [1080P][AVC AAC].mp4",
+    "[ANi] {title} - {ep:02d} [1080P][Baha][WEB-DL][AAC AVC][CHT].mp4",
+    "字幕组★{title}★{ep:02d}★1080P★HEVC★简日双语.mkv",
+    "{title} ({year}) [2160p HDR10 DV].mkv",
+]
+
+# 搜索关键词
+KEYWORDS = [
+    "葬送的芙莉莲", "葬送的芙莉莲 S01E05", "Sousou no Frieren S1E5", "Frieren s01e28",
+    "我推的孩子 S2", "我推的孩子 Season 2", "我推的孩子 Season2", "Oshi no Ko S02",
+    "药屋少女的呢喃 第二季", "药屋少女的呢喃 第2季", "药屋少女的呢喃第 三 季", "某科学的超电磁炮 第三部",
+    "Overlord Ⅳ", "Overlord Ⅲ", "Overlord IV", "Overlord iii", "Mushoku Tensei II",
+    "暴风之铳 2", "Doctor Who 2005", "Doctor Who 2005 2", "Blade Runner 2049", "1917",
+    "86", "86 2", "Steins;Gate 0", "K-On!!", "Fate Zero 2nd Season", "Gintama°",
+    "  前后有空格  ", "", "S01E01", "Title S1", "Title Season 12", "Title 第十季",
+    "BLEACH 死神 千年血战篇", "Re：从零开始的异世界生活 第三季", "无职转生 第二季 Part 2",
+    "Title MMXXIV", "Title CD", "One Piece 1100", "名侦探柯南 S1E1089",
+]
+
+# extract_season_episode 的输入
+SEASON_EPISODE_TEXTS = [
+    "Show.S01E02.mkv", "show s2e10.mp4", "Show 第1季第3集.mkv", "Show 第一季第三集.mkv",
+    "Show 1x05.mkv", "Show 10x100", "Show E07.mkv", "Show EP12.mkv", "Show ep3",
+    "Show - 05.mkv", "Episode 5", "Season1 Episode 5", "Show.1080p.mkv", "", "no numbers here",
+    "[VCB-Studio] Kimetsu no Yaiba [S02E05][Ma10p_1080p].mkv", "Frieren 1920x1080 E05.mkv",
+]
+
+
+def _generated_filenames() -> List[str]:
+    names = []
+    for i, title in enumerate(_GENERATED_TITLES):
+        for j, fmt in enumerate(_GENERATED_FORMATS):
+            names.append(fmt.format(title=title, ep=(i * 7 + j * 3) % 26 + 1, year=2010 + i))
+    return names
+
+
+FILENAMES = _HANDWRITTEN_FILENAMES + _generated_filenames()
+
+
+def _to_jsonable(value: Any) -> Any:
+    if dataclasses.is_dataclass(value):
+        return dataclasses.asdict(value)
+    if isinstance(value, tuple):
+        return list(value)
+    return value
+
+
+def compute_results() -> Dict[str, Dict[str, Any]]:
+    """对语料计算当前实现的解析结果"""
+    from src.utils.filename_parser import extract_season_episode, parse_filename, parse_search_keyword
+    return {
+        "parse_filename": {name: _to_jsonable(parse_filename(name)) for name in FILENAMES},
+        "parse_search_keyword": {kw: _to_jsonable(parse_search_keyword(kw)) for kw in KEYWORDS},
+        "extract_season_episode": {text: _to_jsonable(extract_season_episode(text)) for text in SEASON_EPISODE_TEXTS},
+    }
+
+
+def check_golden() -> List[str]:
+    """与黄金结果比较，返回不一致项的描述（空列表表示全部一致）"""
+    golden = json.loads(GOLDEN_PATH.read_text(encoding="utf-8"))
+    current = compute_results()
+    mismatches = []
+    for func, expected in golden.items():
+        for raw, value in expected.items():
+            actual = current.get(func, {}).get(raw)
+            if actual != value:
+                mismatches.append(f"{func}({raw!r}):\n  期望 {value}\n  实际 {actual}")
+    return mismatches
+
+
+def update_golden() -> None:
+    GOLDEN_PATH.write_text(json.dumps(compute_results(), ensure_ascii=False, indent=1, sort_keys=True) + "\n",
+                           encoding="utf-8")
+
+
+def _time_per_call(func: Callable[[str], Any], inputs: List[str], rounds: int,
+                   clear: Callable[[], None] = None) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        if clear:
+            clear()
+        for raw in inputs:
+            func(raw)
+    return (time.perf_counter() - start) / (rounds * len(inputs)) * 1e6
+
+
+def benchmark(rounds: int = 20) -> Dict[str, Dict[str, float]]:
+    """
+    基准测试，返回每个函数每次调用的平均耗时（微秒）
+
+    cold: 每轮开始前清空缓存，衡量正则本身的开销；warm: 缓存命中
+    """
+    from src.utils import filename_parser as fp
+    cases = [
+        ("parse_filename", fp.parse_filename, FILENAMES),
+        ("parse_search_keyword", fp.parse_search_keyword, KEYWORDS),
+        ("extract_season_episode", fp.extract_season_episode, SEASON_EPISODE_TEXTS),
+    ]
+    clear = getattr(fp, "clear_parse_caches", None)
+    results = {}
+    for name, func, inputs in cases:
+        results[name] = {
+            "cold": _time_per_call(func, inputs, rounds, clear or (lambda: None)),
+            "warm": _time_per_call(func, inputs, rounds),
+        }
+    return results
+
+
+if __name__ == "__main__":
+    if "--update" in sys.argv:
+        update_golden()
+        print(f"已更新 {GOLDEN_PATH}")
+        sys.exit(0)
+    problems = check_golden()
+    for problem in problems:
+        print(problem)
+    print(f"黄金结果校验: {'全部一致' if not problems else f'{len(problems)} 处不一致'}")
+    for name, timing in benchmark().items():
+        print(f"{name:<24} cold {timing['cold']:8.1f} µs/次   warm {timing['warm']:8.1f} µs/次")
+    sys.exit(1 if problems else 0)
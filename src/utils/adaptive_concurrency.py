@@ -0,0 +1,221 @@
+"""
+按弹幕源自适应的下载并发控制（AIMD）
+
+每个弹幕源维护一个并发窗口:
+- 每成功完成一个请求，窗口增加 1/窗口，即每轮请求全部成功后并发数 +1
+- 遇到 429/412、超时、获取失败或空结果时，窗口减半
+- 同一轮（窗口调整之后才发出的请求）内的多个失败只触发一次减半，
+  避免并发中的请求同时失败把窗口一次压到最小值
+- 窗口限制在配置项 downloadConcurrencyMin / downloadConcurrencyMax 之间
+
+学到的并发数保存在 scrapers 表的 download_concurrency 列，重启后继续使用，
+并在搜索源设置页面展示。
+
+使用方式:
+    from src.utils import get_download_concurrency
+
+    controller = await get_download_concurrency().get(scraper)
+    async with controller.slot() as slot:
+        comments = await scraper.get_comments(...)
+        slot.report(ok=bool(comments))
+    await get_download_concurrency().persist(scraper)
+"""
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+import httpx
+
+from src.db import crud
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 3
+DEFAULT_MIN = 1
+DEFAULT_MAX = 8
+# 视为被源限流的 HTTP 状态码（B站风控返回 412）
+THROTTLE_STATUS_CODES = {412, 429}
+
+
+class _Slot:
+    """单个请求占用的并发槽位，用于回报请求结果"""
+
+    def __init__(self, controller: "AdaptiveConcurrency"):
+        self._controller = controller
+        self._generation = controller._generation
+        self._throttle_mark = controller._throttle_events
+        self._reported = False
+
+    def report(self, ok: bool) -> None:
+        """回报请求结果，ok=False 表示遇到限流、超时、失败或空结果"""
+        if self._reported:
+            return
+        self._reported = True
+        # 请求期间该源出现过 429/412 响应，即使最终拿到了数据也视为拥塞
+        throttled = self._controller._throttle_events != self._throttle_mark
+        if ok and not throttled:
+            self._controller._on_success()
+        else:
+            self._controller._on_congestion(self._generation)
+
+    def report_error(self, exc: BaseException) -> None:
+        """回报请求异常，仅超时和 429/412 视为拥塞，其它异常不影响窗口"""
+        if isinstance(exc, (httpx.TimeoutException, asyncio.TimeoutError)):
+            self.report(ok=False)
+        elif isinstance(exc, httpx.HTTPStatusError) and exc.response.status_code in THROTTLE_STATUS_CODES:
+            self.report(ok=False)
+
+
+class AdaptiveConcurrency:
+    """单个弹幕源的 AIMD 并发窗口"""
+
+    def __init__(self, name: str, initial: float, min_limit: int, max_limit: int):
+        self.name = name
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self.in_flight = 0
+        self.persisted: Optional[int] = None
+        self._generation = 0
+        self._throttle_events = 0
+        self._condition = asyncio.Condition()
+        self._stats = {"success": 0, "congestion": 0, "decreases": 0}
+
+    @property
+    def current(self) -> int:
+        """当前允许的并发数"""
+        return int(self.limit)
+
+    def configure(self, min_limit: int, max_limit: int) -> None:
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(max(self.limit, self.min_limit), self.max_limit))
+
+    def note_throttled(self) -> None:
+        """记录一次来自源的限流响应"""
+        self._throttle_events += 1
+
+    def _on_success(self) -> None:
+        self._stats["success"] += 1
+        if self.limit < self.max_limit:
+            # 窗口扩大后，释放槽位时的 notify_all 会唤醒等待者重新判断
+            self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+
+    def _on_congestion(self, generation: int) -> None:
+        self._stats["congestion"] += 1
+        if generation != self._generation:
+            # 窗口已为本轮失败减半过
+            return
+        self._generation += 1
+        self._stats["decreases"] += 1
+        old = self.limit
+        self.limit = max(float(self.min_limit), self.limit / 2)
+        logger.info(f"[自适应并发] {self.name} 检测到限流/失败，并发 {old:.1f} -> {self.limit:.1f}")
+
+    @asynccontextmanager
+    async def slot(self):
+        """占用一个并发槽位，窗口已满时等待"""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < self.current)
+            self.in_flight += 1
+        slot = _Slot(self)
+        try:
+            yield slot
+        except Exception as e:
+            slot.report_error(e)
+            raise
+        finally:
+            async with self._condition:
+                self.in_flight -= 1
+                self._condition.notify_all()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "limit": round(self.limit, 2),
+            "inFlight": self.in_flight,
+            "min": self.min_limit,
+            "max": self.max_limit,
+            **self._stats,
+        }
+
+
+class DownloadConcurrencyRegistry:
+    """按弹幕源名称管理自适应并发窗口"""
+
+    def __init__(self):
+        self._controllers: Dict[str, AdaptiveConcurrency] = {}
+        self._lock = asyncio.Lock()
+
+    def peek(self, name: str) -> Optional[AdaptiveConcurrency]:
+        return self._controllers.get(name)
+
+    def note_throttled(self, name: str) -> None:
+        controller = self._controllers.get(name)
+        if controller is not None:
+            controller.note_throttled()
+
+    @staticmethod
+    async def _read_bounds(config_manager) -> tuple:
+        min_limit, max_limit = DEFAULT_MIN, DEFAULT_MAX
+        if config_manager is None:
+            return min_limit, max_limit
+        try:
+            min_limit = int(await config_manager.get("downloadConcurrencyMin", DEFAULT_MIN))
+            max_limit = int(await config_manager.get("downloadConcurrencyMax", DEFAULT_MAX))
+        except (TypeError, ValueError):
+            pass
+        return min_limit, max_limit
+
+    async def get(self, scraper) -> AdaptiveConcurrency:
+        """获取弹幕源的并发窗口，首次使用时从数据库加载上次学到的并发数"""
+        name = scraper.provider_name
+        min_limit, max_limit = await self._read_bounds(getattr(scraper, "config_manager", None))
+        controller = self._controllers.get(name)
+        if controller is not None:
+            controller.configure(min_limit, max_limit)
+            return controller
+
+        async with self._lock:
+            controller = self._controllers.get(name)
+            if controller is None:
+                learned = None
+                session_factory = getattr(scraper, "_session_factory", None)
+                if session_factory is not None:
+                    try:
+                        async with session_factory() as session:
+                            setting = await crud.get_scraper_setting_by_name(session, name)
+                        learned = (setting or {}).get("downloadConcurrency")
+                    except Exception as e:
+                        logger.debug(f"读取 {name} 的下载并发数失败，使用默认值: {e}")
+                controller = AdaptiveConcurrency(name, learned or DEFAULT_CONCURRENCY, min_limit, max_limit)
+                controller.persisted = learned
+                self._controllers[name] = controller
+        return controller
+
+    async def persist(self, scraper) -> None:
+        """学到的并发数有变化时写回数据库"""
+        controller = self._controllers.get(scraper.provider_name)
+        session_factory = getattr(scraper, "_session_factory", None)
+        if controller is None or session_factory is None or controller.current == controller.persisted:
+            return
+        value = controller.current
+        try:
+            async with session_factory() as session:
+                await crud.update_scraper_download_concurrency(session, scraper.provider_name, value)
+                await session.commit()
+            controller.persisted = value
+        except Exception as e:
+            logger.debug(f"保存 {scraper.provider_name} 的下载并发数失败: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {name: c.get_stats() for name, c in self._controllers.items()}
+
+
+_registry = DownloadConcurrencyRegistry()
+
+
+def get_download_concurrency() -> DownloadConcurrencyRegistry:
+    """获取进程内共享的下载并发控制器"""
+    return _registry
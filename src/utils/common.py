@@ -115,6 +115,26 @@ def strip_danmaku_likes(comments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     return comments
 
 
+_CONTROL_CHAR_RE = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def danmaku_dedup_key(comment: Dict[str, Any]) -> tuple:
+    """
+    生成弹幕的去重键：(时间, 规范化文本)。
+
+    时间取自 p 属性的第一个字段并保留两位小数；文本会去除点赞后缀与控制字符，
+    因此同一条弹幕在点赞数变化或经过 XML 往返后仍得到相同的键。
+    """
+    p_attr = str(comment.get('p', ''))
+    time_part = p_attr.split(',', 1)[0]
+    try:
+        time_key = round(float(time_part), 2)
+    except ValueError:
+        time_key = 0.0
+    text = _LIKES_SUFFIX_RE.sub('', str(comment.get('m', '') or ''))
+    return time_key, _CONTROL_CHAR_RE.sub('', text).strip()
+
+
 # 匹配存量 XML 中写入的默认样式后缀，用于重新格式化
 # 格式：空格 + (🤍/🔥) + 空格 + 数字[wk]?
 _LEGACY_LIKES_RE = re.compile(
@@ -5,11 +5,16 @@
 提供统一的接口和更全面的正则模式。
 
 参考: https://github.com/pipi20xx/anime-matcher 的正则模式设计
+
+所有正则在导入时预编译；parse_filename / parse_search_keyword / extract_season_episode
+的结果按原始字符串缓存在有界 LRU 中（同一批文件名会被 webhook、匹配、自动映射反复解析）。
+修改正则后请运行 `python -m src.utils._filename_parser_corpus` 校验黄金结果并对比耗时。
 """
 
 import re
 import logging
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
+from functools import lru_cache
 from typing import Any, Dict, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
@@ -249,6 +254,103 @@ SEASON_SUFFIX_PATTERNS = [
 ]
 
 
+# ============================================================================
+# 预编译模式 (函数内使用的所有正则在导入时编译一次)
+# ============================================================================
+
+# 解析结果 LRU 缓存容量 (按原始字符串)
+PARSE_CACHE_SIZE = 4096
+
+# 技术规格合并模式：PIX/VIDEO/AUDIO/SOURCE/DYNAMIC_RANGE/EFFECT/PLATFORM 的单次扫描版本。
+# 各模式两端都有非字母数字边界断言且彼此不重叠，分支按原顺序排列，一次替换与逐个替换结果相同；
+# 唯一的例外是以 '+' 结尾的标签 (DD+、HDR10+) 紧接其它标签时 (如 HDR10+AC-3)，
+# 逐个替换会先删掉后面的标签再让 '+' 标签通过边界断言，这种情况仍逐个替换。
+_TECH_SPEC_RES = [PIX_RE, VIDEO_RE, AUDIO_RE, SOURCE_RE, DYNAMIC_RANGE_RE, EFFECT_RE, PLATFORM_RE]
+_TECH_SPEC_RE = re.compile('|'.join(f'(?:{p.pattern})' for p in _TECH_SPEC_RES), re.IGNORECASE)
+
+# 连写元数据拆分 (WEB-DLHDR → WEB-DL.HDR, HEVCHDR → HEVC.HDR)
+_GLUED_HDR_RE = re.compile(r'(WEB-DL|HEVC|AVC|H\.?265|H\.?264|x\.?265|x\.?264)(HDR)', re.IGNORECASE)
+
+_NOISE_WORD_RES = [re.compile(nw, re.IGNORECASE) for nw in NOISE_WORDS]
+_NOT_GROUPS_RE = re.compile(rf'^({NOT_GROUPS})$', re.IGNORECASE)
+_SEASON_SUFFIX_RES = [re.compile(sp, re.IGNORECASE) for sp in SEASON_SUFFIX_PATTERNS]
+
+_BRACKETS_RE = re.compile(r'\[.*?\]|\(.*?\)|【.*?】|（.*?）')
+_YEAR_PAREN_RE = re.compile(r'\(\s*(19|20)\d{2}\s*\)')
+_YEAR_FULLWIDTH_PAREN_RE = re.compile(r'（\s*(19|20)\d{2}\s*）')
+_YEAR_WORD_RE = re.compile(r'\b(19|20)\d{2}\b')
+_YEAR_ANY_PAREN_RE = re.compile(r'[\(\（]\s*(19|20)\d{2}\s*[\)\）]')
+_YEAR_SEARCH_RE = re.compile(r'[\(\[（]?((?:19|20)\d{2})[\)\]）]?')
+_WHITESPACE_RE = re.compile(r'\s+')
+_CJK_RE = re.compile(r'[\u4e00-\u9fff\u3400-\u4dbf\u3040-\u309f\u30a0-\u30ff\uf900-\ufaff]')
+_LATIN_WORD_RE = re.compile(r'^[a-zA-Z][a-zA-Z\'-]*$')
+_LATIN_RUN_RE = re.compile(r'[a-zA-Z]{2,}')
+_CHANNEL_RE = re.compile(r'(?<![a-zA-Z0-9])([0-9]\.[0-9])(?:ch)?(?![a-zA-Z0-9])')
+_TAIL_TAG_RE = re.compile(r'[-@][A-Za-z][A-Za-z0-9]{1,15}$')
+_EMPTY_BRACKETS_RE = re.compile(r'[\[\(\{（【][\s\-\._/&+\*]*[\]\)\}）】]')
+_DECORATION_RE = re.compile(r'[★☆■□◆◇●○•]')
+_SEPARATOR_RUN_RE = re.compile(r'[\s\-\._/]{3,}')
+_FILE_EXT_RE = re.compile(r'\.[a-zA-Z0-9]+$')
+_TAIL_GROUP_RE = re.compile(r'-([A-Za-z][A-Za-z0-9]{1,15})$')
+_LEADING_TEAM_RE = re.compile(r'^\[([^\]]+)\]')
+_STAR_EPISODE_RE = re.compile(r'^\d{1,4}$')
+_STAR_LANGUAGE_RE = re.compile(r'^[简繁中日英双雙多]+[体文语語]', re.IGNORECASE)
+_TRAILING_PUNCT_RE = re.compile(r'[\s\-_：:]+$')
+
+# parse_filename 阶段1.5: 原始文件名上的季集模式
+_SXXEXX_RE = re.compile(r'(?P<title>.+?)[\s._-]*[Ss](?P<season>\d{1,2})[Ee](?P<episode>\d{1,4})\b')
+_SXX_EPISODE_RE = re.compile(r'(?P<title>.+?)[\s._-]+[Ss](?P<season>\d{1,2})[\s._-]+(?P<episode>\d{1,4})\b')
+_SEASON_ONLY_RES = [
+    re.compile(r'^(?P<title>.+?)[\s._-]+[Ss](?P<season>\d{1,2})(?:\s|$)', re.IGNORECASE),
+    re.compile(r'^(?P<title>.+?)[\s._-]+Season[\s._-]*(?P<season>\d{1,2})(?:\s|$)', re.IGNORECASE),
+]
+# parse_filename 阶段3: 干净字符串上的集数模式
+_EPISODE_ONLY_RES = [
+    re.compile(r'^(?P<title>.+?)\s*[-_]\s*(?P<episode>\d{1,4})\s*$'),
+    re.compile(r'^(?P<title>.+?)\s+(?P<episode>\d{1,4})\s*$'),
+]
+
+# parse_search_keyword
+_KEYWORD_SXXEXX_RE = re.compile(r'^(?P<title>.+?)\s*S(?P<season>\d{1,2})E(?P<episode>\d{1,4})$', re.IGNORECASE)
+_KEYWORD_SEASON_PATTERNS = [
+    (re.compile(r'^(.*?)\s*(?:S|Season)\s*(\d{1,2})$', re.I), lambda m: int(m.group(2))),
+    (re.compile(r'^(.*?)\s*第\s*([一二三四五六七八九十\d]+)\s*[季部]$', re.I),
+     lambda m: _chinese_num_to_int(m.group(2))),
+    (re.compile(r'^(.*?)\s*([Ⅰ-Ⅻ])$'),
+     lambda m: FULLWIDTH_ROMAN_MAP.get(m.group(2).upper())),
+    (re.compile(r'^(.*?)\s+([IVXLCDM]+)$', re.I),
+     lambda m: _roman_to_int(m.group(2))),
+    (re.compile(r'^(.*?)\s+(\d{1,2})$'),
+     lambda m: int(m.group(2))),
+]
+
+# extract_season_episode
+_SE_SXXEXX_RE = re.compile(r'[Ss](\d+)[Ee](\d+)')
+_SE_CHINESE_RE = re.compile(r'第(\d+)季第(\d+)集')
+_SE_CROSS_RE = re.compile(r'(\d+)x(\d+)')
+_SE_EPISODE_RE = re.compile(r'[Ee][Pp]?(\d+)')
+
+# extract_season_from_title
+_TITLE_SEASON_CHINESE_RE = re.compile(r'第([一二三四五六七八九十]+|\d+)季')
+_TITLE_SEASON_WORD_RE = re.compile(r'Season\s*(\d+)', re.IGNORECASE)
+_TITLE_SEASON_SHORT_RE = re.compile(r'(?:^|\s)S(\d+)(?:\s|$)', re.IGNORECASE)
+_TITLE_SEASON_ROMAN_RE = re.compile(r'\s+(I{1,3}|IV|VI{0,3}|IX|X|[ⅰⅱⅲⅳⅴⅵⅶⅷⅸⅹ])\s*$', re.IGNORECASE)
+_TITLE_SEASON_TRAILING_NUM_RE = re.compile(r'[^\d](\d{1,2})\s*$')
+
+# clean_title / clean_movie_title / is_chinese_title
+_EXTERNAL_ID_RES = [
+    re.compile(r'[（(]TMDBID=\d+[）)]', re.IGNORECASE),
+    re.compile(r'[（(]TVDBID=\d+[）)]', re.IGNORECASE),
+    re.compile(r'[（(]IMDBID=tt\d+[）)]', re.IGNORECASE),
+]
+_YEAR_TAG_RE = re.compile(r'\s*[（(]\d{4}[）)]\s*')
+_MOVIE_PHRASE_RES = [re.compile(r'\s*' + re.escape(phrase) + r'\s*:?', re.IGNORECASE)
+                     for phrase in ("劇場版", "the movie")]
+_MULTI_SPACE_RE = re.compile(r'\s{2,}')
+_KANA_RE = re.compile(r'[\u3040-\u309f\u30a0-\u30ff]')
+_HANZI_RE = re.compile(r'[\u4e00-\u9fff\u3400-\u4dbf\uf900-\ufaff]')
+
+
 # ============================================================================
 # 辅助函数
 # ============================================================================
@@ -287,34 +389,34 @@ def _strip_video_extension(filename: str) -> str:
 
 def _clean_brackets_and_metadata(title: str) -> str:
     """移除方括号、圆括号内容及元数据关键词"""
-    title = re.sub(r'\[.*?\]|\(.*?\)|【.*?】|\（.*?\）', '', title)
+    title = _BRACKETS_RE.sub('', title)
     title = METADATA_PATTERN.sub('', title)
     return title.strip()
 
 
 def _clean_year_from_title(title: str) -> str:
     """移除标题中的年份"""
-    title = re.sub(r'\(\s*(19|20)\d{2}\s*\)', '', title)
-    title = re.sub(r'（\s*(19|20)\d{2}\s*）', '', title)
-    title = re.sub(r'\b(19|20)\d{2}\b', '', title)
+    title = _YEAR_PAREN_RE.sub('', title)
+    title = _YEAR_FULLWIDTH_PAREN_RE.sub('', title)
+    title = _YEAR_WORD_RE.sub('', title)
     return title.strip()
 
 
 def _normalize_separators(title: str) -> str:
     """将点号和下划线替换为空格，并清理多余空格"""
     title = title.replace('.', ' ').replace('_', ' ')
-    title = re.sub(r'\s+', ' ', title)
+    title = _WHITESPACE_RE.sub(' ', title)
     return title.strip(' -')
 
 
 def _has_cjk(text: str) -> bool:
     """检查文本是否包含 CJK 字符（中日韩统一表意文字、平假名、片假名）"""
-    return bool(re.search(r'[\u4e00-\u9fff\u3400-\u4dbf\u3040-\u309f\u30a0-\u30ff\uf900-\ufaff]', text))
+    return bool(_CJK_RE.search(text))
 
 
 def _is_latin_word(word: str) -> bool:
     """检查一个词是否为纯 Latin 字母组成"""
-    return bool(re.match(r'^[a-zA-Z][a-zA-Z\'-]*$', word))
+    return bool(_LATIN_WORD_RE.match(word))
 
 
 def _split_multilang_title(title: str) -> Tuple[str, Optional[str]]:
@@ -336,7 +438,7 @@ def _split_multilang_title(title: str) -> Tuple[str, Optional[str]]:
         return title, None
 
     # 快速检查：必须同时包含 CJK 和 Latin
-    if not _has_cjk(title) or not re.search(r'[a-zA-Z]{2,}', title):
+    if not _has_cjk(title) or not _LATIN_RUN_RE.search(title):
         return title, None
 
     words = title.split()
@@ -391,41 +493,42 @@ def _strip_all_metadata(name: str) -> str:
     temp = name
 
     # 0. 预处理：拆分常见连写元数据 (如 WEB-DLHDR → WEB-DL.HDR)
-    temp = re.sub(r'(?i)(WEB-DL)(HDR)', r'\1.\2', temp)
-    temp = re.sub(r'(?i)(HEVC|AVC|H\.?265|H\.?264|x\.?265|x\.?264)(HDR)', r'\1.\2', temp)
+    temp = _GLUED_HDR_RE.sub(r'\1.\2', temp)
 
     # 1. 剥离字幕标签括号块和别名括号块
     temp = SUBTITLE_RE.sub(' ', temp)
     temp = ALIAS_RE.sub(' ', temp)
 
-    # 2. 剥离技术规格（按优先级顺序，长模式优先）
-    for pattern in [PIX_RE, VIDEO_RE, AUDIO_RE, SOURCE_RE,
-                    DYNAMIC_RANGE_RE, EFFECT_RE, PLATFORM_RE]:
-        temp = pattern.sub(' ', temp)
+    # 2. 剥离技术规格（按优先级顺序，长模式优先；不含 '+' 时单次扫描即可）
+    if '+' in temp:
+        for pattern in _TECH_SPEC_RES:
+            temp = pattern.sub(' ', temp)
+    else:
+        temp = _TECH_SPEC_RE.sub(' ', temp)
 
     # 3. 剥离所有方括号/圆括号内容 (元数据值已在阶段1提取，此处可安全移除)
-    temp = re.sub(r'\[.*?\]|\(.*?\)|【.*?】|（.*?）', ' ', temp)
+    temp = _BRACKETS_RE.sub(' ', temp)
 
-    # 4. 剥离噪音词 (NOISE_WORDS 不含内联 (?i)，统一传 re.IGNORECASE)
-    for nw in NOISE_WORDS:
-        temp = re.sub(nw, ' ', temp, flags=re.IGNORECASE)
+    # 4. 剥离噪音词 (各模式之间没有边界断言，替换顺序会影响结果，保持逐个替换)
+    for pattern in _NOISE_WORD_RES:
+        temp = pattern.sub(' ', temp)
 
     # 5. 剥离声道信息残留 (如 5.1, 7.1)
-    temp = re.sub(r'(?<![a-zA-Z0-9])([0-9]\.[0-9])(?:ch)?(?![a-zA-Z0-9])', ' ', temp)
+    temp = _CHANNEL_RE.sub(' ', temp)
 
     # 6. 剥离尾部发布组标签 (如 -PTerWEB, -ADE, @ADWeb)
-    temp = re.sub(r'[-@][A-Za-z][A-Za-z0-9]{1,15}$', ' ', temp)
+    temp = _TAIL_TAG_RE.sub(' ', temp)
 
     # 7. 清理空壳括号和孤儿括号
     for _ in range(3):
-        temp = re.sub(r'[\[\(\{（【][\s\-\._/&+\*]*[\]\)\}）】]', ' ', temp)
+        temp = _EMPTY_BRACKETS_RE.sub(' ', temp)
 
     # 8. 清理装饰性符号
-    temp = re.sub(r'[★☆■□◆◇●○•]', ' ', temp)
+    temp = _DECORATION_RE.sub(' ', temp)
 
     # 9. 压缩连续分隔符和空格
-    temp = re.sub(r'[\s\-\._/]{3,}', ' ', temp)
-    temp = re.sub(r'\s+', ' ', temp).strip(' -._')
+    temp = _SEPARATOR_RUN_RE.sub(' ', temp)
+    temp = _WHITESPACE_RE.sub(' ', temp).strip(' -._')
 
     return temp
 
@@ -435,12 +538,12 @@ def _extract_tail_group(name: str) -> Optional[str]:
     提取尾部发布组标签 (如 -PTerWEB, -ADE)。
     参考上游 anime-matcher TagExtractor.extract_release_group 的尾部逻辑。
     """
-    base = re.sub(r'\.[a-zA-Z0-9]+$', '', name)
-    m = re.search(r'-([A-Za-z][A-Za-z0-9]{1,15})$', base)
+    base = _FILE_EXT_RE.sub('', name)
+    m = _TAIL_GROUP_RE.search(base)
     if m:
         candidate = m.group(1)
         # 排除已知的技术词
-        if re.match(rf'^({NOT_GROUPS})$', candidate, re.IGNORECASE):
+        if _NOT_GROUPS_RE.match(candidate):
             return None
         return candidate
     return None
@@ -459,13 +562,20 @@ def parse_filename(filename: str) -> Optional[ParseResult]:
     1. 从原始文件名中提取元数据值（分辨率、编码等）
     2. 剥离所有元数据标签，得到干净的标题+集数字符串
     3. 在干净字符串上做标题/季集模式匹配
+
+    结果按文件名缓存，返回的是缓存结果的副本，调用方可以放心修改。
     """
+    result = _parse_filename_cached(filename)
+    return replace(result) if result is not None else None
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_filename_cached(filename: str) -> Optional[ParseResult]:
     name = _strip_video_extension(filename)
 
     # ── 阶段1: 从原始文件名提取元数据值 ──
     # 预处理：拆分常见连写元数据 (如 WEB-DLHDR → WEB-DL.HDR) 以便正确提取
-    name_for_meta = re.sub(r'(?i)(WEB-DL)(HDR)', r'\1.\2', name)
-    name_for_meta = re.sub(r'(?i)(HEVC|AVC|H\.?265|H\.?264|x\.?265|x\.?264)(HDR)', r'\1.\2', name_for_meta)
+    name_for_meta = _GLUED_HDR_RE.sub(r'\1.\2', name)
 
     resolution = PIX_RE.search(name_for_meta)
     video_codec = VIDEO_RE.search(name_for_meta)
@@ -476,7 +586,7 @@ def parse_filename(filename: str) -> Optional[ParseResult]:
     effect = EFFECT_RE.search(name_for_meta)
 
     # 提取字幕组 (首部方括号)
-    team_match = re.match(r'^\[([^\]]+)\]', name)
+    team_match = _LEADING_TEAM_RE.match(name)
     team = team_match.group(1) if team_match else None
 
     # 新增：处理 ★ 分隔的文件名格式
@@ -495,18 +605,16 @@ def parse_filename(filename: str) -> Optional[ParseResult]:
             episode_from_star = None
             for seg in star_segments:
                 # 纯数字段 → 可能是集数（取第一个遇到的）
-                if re.match(r'^\d{1,4}$', seg) and episode_from_star is None:
+                if _STAR_EPISODE_RE.match(seg) and episode_from_star is None:
                     episode_from_star = int(seg)
                 # 技术规格段（分辨率、编码、格式、语言等）→ 跳过
-                elif PIX_RE.search(seg) or VIDEO_RE.search(seg) or AUDIO_RE.search(seg) \
-                        or SOURCE_RE.search(seg) or DYNAMIC_RANGE_RE.search(seg) \
-                        or PLATFORM_RE.search(seg) or EFFECT_RE.search(seg):
+                elif any(pattern.search(seg) for pattern in _TECH_SPEC_RES):
                     continue
                 # 视频容器/格式（复用 VIDEO_EXTENSIONS 常量）→ 跳过
                 elif seg.lower() in VIDEO_EXTENSIONS:
                     continue
                 # 语言/字幕标记（复用 NOISE_WORDS 中的语言模式）→ 跳过
-                elif re.match(r'(?i)^[简繁中日英双雙多]+[体文语語]', seg):
+                elif _STAR_LANGUAGE_RE.match(seg):
                     continue
                 else:
                     title_parts.append(seg)
@@ -524,7 +632,7 @@ def parse_filename(filename: str) -> Optional[ParseResult]:
         team = _extract_tail_group(name)
 
     # 提取年份
-    year_match = re.search(r'[\(\[（]?((?:19|20)\d{2})[\)\]）]?', name)
+    year_match = _YEAR_SEARCH_RE.search(name)
     year = year_match.group(1) if year_match else None
 
     # 构建元数据结果 (提前准备，避免重复代码)
@@ -541,49 +649,40 @@ def parse_filename(filename: str) -> Optional[ParseResult]:
     )
 
     # ── 阶段1.5: 在原始文件名上先尝试 SxxExx (最可靠的模式) ──
-    m = re.search(
-        r'(?P<title>.+?)[\s._-]*[Ss](?P<season>\d{1,2})[Ee](?P<episode>\d{1,4})\b',
-        name
-    )
+    m = _SXXEXX_RE.search(name)
     if m:
         title = m.group('title')
         title = _clean_brackets_and_metadata(title)
         title = _normalize_separators(title)
         title = _clean_year_from_title(title)
-        title = re.sub(r'\s+', ' ', title).strip(' -')
+        title = _WHITESPACE_RE.sub(' ', title).strip(' -')
         full_title = title
         title, en_name = _split_multilang_title(title)
         return ParseResult(title=title, season=int(m.group('season')),
                            episode=int(m.group('episode')),
                            original_title=full_title if en_name else None,
                            en_name=en_name, **meta)
-    m = re.search(
-        r'(?P<title>.+?)[\s._-]+[Ss](?P<season>\d{1,2})[\s._-]+(?P<episode>\d{1,4})\b',
-        name
-    )
+    m = _SXX_EPISODE_RE.search(name)
     if m:
         title = m.group('title')
         title = _clean_brackets_and_metadata(title)
         title = _normalize_separators(title)
         title = _clean_year_from_title(title)
-        title = re.sub(r'\s+', ' ', title).strip(' -')
+        title = _WHITESPACE_RE.sub(' ', title).strip(' -')
         full_title = title
         title, en_name = _split_multilang_title(title)
         return ParseResult(title=title, season=int(m.group('season')),
                            episode=int(m.group('episode')),
                            original_title=full_title if en_name else None,
                            en_name=en_name, **meta)
-    for pattern in [
-        re.compile(r'^(?P<title>.+?)[\s._-]+[Ss](?P<season>\d{1,2})(?:\s|$)', re.IGNORECASE),
-        re.compile(r'^(?P<title>.+?)[\s._-]+Season[\s._-]*(?P<season>\d{1,2})(?:\s|$)', re.IGNORECASE),
-    ]:
+    for pattern in _SEASON_ONLY_RES:
         m = pattern.search(name)
         if m:
             title = m.group('title')
             title = _clean_brackets_and_metadata(title)
             title = _normalize_separators(title)
             title = _clean_year_from_title(title)
-            title = re.sub(r'\s+', ' ', title).strip(' -')
+            title = _WHITESPACE_RE.sub(' ', title).strip(' -')
             full_title = title
             title, en_name = _split_multilang_title(title)
             return ParseResult(title=title, season=int(m.group('season')),
@@ -591,20 +690,17 @@ def parse_filename(filename: str) -> Optional[ParseResult]:
                                en_name=en_name, **meta)
     cleaned = _strip_all_metadata(name)
     # 移除年份括号 (如 "(2024)")
-    cleaned = re.sub(r'[\(\（]\s*(19|20)\d{2}\s*[\)\）]', ' ', cleaned)
+    cleaned = _YEAR_ANY_PAREN_RE.sub(' ', cleaned)
     # 移除首部字幕组括号
-    cleaned = re.sub(r'^\[[^\]]+\]', '', cleaned).strip()
+    cleaned = _LEADING_TEAM_RE.sub('', cleaned).strip()
     # 规范化分隔符
     cleaned = cleaned.replace('.', ' ').replace('_', ' ')
-    cleaned = re.sub(r'\s+', ' ', cleaned).strip(' -')
+    cleaned = _WHITESPACE_RE.sub(' ', cleaned).strip(' -')
 
     # ── 阶段3: 在干净字符串上做 Episode / Movie 匹配 ──
 
     # 模式3: Episode only ("Title - 02", "Title 02")
-    for pattern in [
-        re.compile(r'^(?P<title>.+?)\s*[-_]\s*(?P<episode>\d{1,4})\s*$'),
-        re.compile(r'^(?P<title>.+?)\s+(?P<episode>\d{1,4})\s*$'),
-    ]:
+    for pattern in _EPISODE_ONLY_RES:
         m = pattern.search(cleaned)
         if m:
             ep = int(m.group('episode'))
@@ -613,17 +709,17 @@ def parse_filename(filename: str) -> Optional[ParseResult]:
                 continue
             title = m.group('title')
             title = _clean_year_from_title(title)
-            title = re.sub(r'\s+', ' ', title).strip(' -')
+            title = _WHITESPACE_RE.sub(' ', title).strip(' -')
             # 尝试从标题中提取季度信息（如 "金牌得主 第二季 Medalist 2" → season=2）
             season_from_title = extract_season_from_title(title)
             if season_from_title is not None:
                 # 移除标题中的季度后缀以清理标题
-                for sp in SEASON_SUFFIX_PATTERNS:
-                    cleaned_title = re.sub(sp, '', title, flags=re.IGNORECASE).strip()
+                for sp in _SEASON_SUFFIX_RES:
+                    cleaned_title = sp.sub('', title).strip()
                     if cleaned_title and cleaned_title != title:
                         title = cleaned_title
                         break
-                title = re.sub(r'[\s\-_：:]+$', '', title).strip()
+                title = _TRAILING_PUNCT_RE.sub('', title).strip()
             full_title = title
             title, en_name = _split_multilang_title(title)
             if title:
@@ -631,7 +727,7 @@ def parse_filename(filename: str) -> Optional[ParseResult]:
                                    original_title=full_title if en_name else None,
                                    en_name=en_name, **meta)
     title = _clean_year_from_title(cleaned)
-    title = re.sub(r'\s+', ' ', title).strip(' -')
+    title = _WHITESPACE_RE.sub(' ', title).strip(' -')
     full_title = title
     title, en_name = _split_multilang_title(title)
 
@@ -653,11 +749,17 @@ def parse_search_keyword(keyword: str) -> Dict[str, Any]:
     替代 src/utils/common.py 中的 parse_search_keyword()。
 
     支持: "Title S01E01", "Title S01", "Title 第二季", "Title Ⅲ", "Title 2"
+    结果按关键词缓存，返回的是缓存结果的副本。
     """
+    return dict(_parse_search_keyword_cached(keyword))
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_search_keyword_cached(keyword: str) -> Dict[str, Any]:
     keyword = keyword.strip()
 
     # 1. 优先匹配 SxxExx
-    m = re.match(r'^(?P<title>.+?)\s*S(?P<season>\d{1,2})E(?P<episode>\d{1,4})$', keyword, re.IGNORECASE)
+    m = _KEYWORD_SXXEXX_RE.match(keyword)
     if m:
         return {
             "title": m.group('title').strip(),
@@ -666,19 +768,7 @@ def parse_search_keyword(keyword: str) -> Dict[str, Any]:
         }
 
     # 2. 匹配季度信息
-    season_patterns = [
-        (re.compile(r'^(.*?)\s*(?:S|Season)\s*(\d{1,2})$', re.I), lambda m: int(m.group(2))),
-        (re.compile(r'^(.*?)\s*第\s*([一二三四五六七八九十\d]+)\s*[季部]$', re.I),
-         lambda m: _chinese_num_to_int(m.group(2))),
-        (re.compile(r'^(.*?)\s*([Ⅰ-Ⅻ])$'),
-         lambda m: FULLWIDTH_ROMAN_MAP.get(m.group(2).upper())),
-        (re.compile(r'^(.*?)\s+([IVXLCDM]+)$', re.I),
-         lambda m: _roman_to_int(m.group(2))),
-        (re.compile(r'^(.*?)\s+(\d{1,2})$'),
-         lambda m: int(m.group(2))),
-    ]
-
-    for pattern, handler in season_patterns:
+    for pattern, handler in _KEYWORD_SEASON_PATTERNS:
         m = pattern.match(keyword)
         if m:
             try:
@@ -698,6 +788,7 @@ def parse_search_keyword(keyword: str) -> Dict[str, Any]:
 # 核心函数 3: extract_season_episode — 从文件名提取季集
 # ============================================================================
 
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
 def extract_season_episode(text: str) -> Tuple[Optional[int], Optional[int]]:
     """
     从文件名/文本中提取季集信息。
@@ -706,28 +797,35 @@ def extract_season_episode(text: str) -> Tuple[Optional[int], Optional[int]]:
     支持: S01E01, 第1季第1集, 1x01, E01/EP01
     """
     # SxxExx
-    m = re.search(r'[Ss](\d+)[Ee](\d+)', text)
+    m = _SE_SXXEXX_RE.search(text)
     if m:
         return int(m.group(1)), int(m.group(2))
 
     # 中文: 第1季第1集
-    m = re.search(r'第(\d+)季第(\d+)集', text)
+    m = _SE_CHINESE_RE.search(text)
     if m:
         return int(m.group(1)), int(m.group(2))
 
     # 1x01
-    m = re.search(r'(\d+)x(\d+)', text)
+    m = _SE_CROSS_RE.search(text)
     if m:
         return int(m.group(1)), int(m.group(2))
 
     # E01, EP01
-    m = re.search(r'[Ee][Pp]?(\d+)', text)
+    m = _SE_EPISODE_RE.search(text)
     if m:
         return 1, int(m.group(1))
 
     return None, None
 
 
+def clear_parse_caches() -> None:
+    """清空 parse_filename / parse_search_keyword / extract_season_episode 的结果缓存"""
+    _parse_filename_cached.cache_clear()
+    _parse_search_keyword_cached.cache_clear()
+    extract_season_episode.cache_clear()
+
+
 # ============================================================================
 # 核心函数 4: extract_season_from_title — 从标题提取季度
 # ============================================================================
@@ -745,29 +843,29 @@ def extract_season_from_title(title: str) -> Optional[int]:
     title_clean = title.strip()
 
     # 模式1: 中文 "第N季"
-    m = re.search(r'第([一二三四五六七八九十]+|\d+)季', title_clean)
+    m = _TITLE_SEASON_CHINESE_RE.search(title_clean)
     if m:
         return _chinese_num_to_int(m.group(1))
 
     # 模式2: "Season N"
-    m = re.search(r'Season\s*(\d+)', title_clean, re.IGNORECASE)
+    m = _TITLE_SEASON_WORD_RE.search(title_clean)
     if m:
         return int(m.group(1))
 
     # 模式3: "S2" (空格后或末尾)
-    m = re.search(r'(?:^|\s)S(\d+)(?:\s|$)', title_clean, re.IGNORECASE)
+    m = _TITLE_SEASON_SHORT_RE.search(title_clean)
     if m:
         return int(m.group(1))
 
     # 模式4: 罗马数字 (末尾)
-    m = re.search(r'\s+(I{1,3}|IV|VI{0,3}|IX|X|[ⅰⅱⅲⅳⅴⅵⅶⅷⅸⅹ])\s*$', title_clean, re.IGNORECASE)
+    m = _TITLE_SEASON_ROMAN_RE.search(title_clean)
     if m:
         roman = m.group(1).lower()
         if roman in ROMAN_NUM_MAP:
             return ROMAN_NUM_MAP[roman]
 
     # 模式5: 末尾阿拉伯数字 (排除年份和分辨率)
-    m = re.search(r'[^\d](\d{1,2})\s*$', title_clean)
+    m = _TITLE_SEASON_TRAILING_NUM_RE.search(title_clean)
     if m:
         num = int(m.group(1))
         if 1 <= num <= 20:
@@ -789,15 +887,14 @@ def clean_title(title: str) -> str:
         return title
 
     # 移除 TMDBID/TVDBID/IMDBID 标记
-    title = re.sub(r'[（(]TMDBID=\d+[）)]', '', title, flags=re.IGNORECASE)
-    title = re.sub(r'[（(]TVDBID=\d+[）)]', '', title, flags=re.IGNORECASE)
-    title = re.sub(r'[（(]IMDBID=tt\d+[）)]', '', title, flags=re.IGNORECASE)
+    for pattern in _EXTERNAL_ID_RES:
+        title = pattern.sub('', title)
 
     # 移除年份
-    title = re.sub(r'\s*[（(]\d{4}[）)]\s*', ' ', title)
+    title = _YEAR_TAG_RE.sub(' ', title)
 
     # 移除多余空格
-    title = re.sub(r'\s+', ' ', title).strip()
+    title = _WHITESPACE_RE.sub(' ', title).strip()
     return title
 
 
@@ -808,11 +905,10 @@ def clean_movie_title(title: Optional[str]) -> Optional[str]:
     """
     if not title:
         return None
-    phrases_to_remove = ["劇場版", "the movie"]
     cleaned = title
-    for phrase in phrases_to_remove:
-        cleaned = re.sub(r'\s*' + re.escape(phrase) + r'\s*:?', '', cleaned, flags=re.IGNORECASE)
-    cleaned = re.sub(r'\s{2,}', ' ', cleaned).strip().strip(':- ')
+    for pattern in _MOVIE_PHRASE_RES:
+        cleaned = pattern.sub('', cleaned)
+    cleaned = _MULTI_SPACE_RE.sub(' ', cleaned).strip().strip(':- ')
     return cleaned
 
 
@@ -831,11 +927,11 @@ def normalize_title(title: str) -> str:
 
     result = title.strip()
 
-    for pattern in SEASON_SUFFIX_PATTERNS:
-        result = re.sub(pattern, '', result, flags=re.IGNORECASE)
+    for pattern in _SEASON_SUFFIX_RES:
+        result = pattern.sub('', result)
 
     # 清理末尾标点和空格
-    result = re.sub(r'[\s\-_：:]+$', '', result)
+    result = _TRAILING_PUNCT_RE.sub('', result)
 
     # 处理后为空则返回原标题
     if not result.strip():
@@ -867,10 +963,10 @@ def is_chinese_title(title: str) -> bool:
     if not title:
         return False
     # 包含日文假名则不是中文
-    if re.search(r'[\u3040-\u309f\u30a0-\u30ff]', title):
+    if _KANA_RE.search(title):
         return False
     # 包含中文字符
-    return bool(re.search(r'[\u4e00-\u9fff\u3400-\u4dbf\uf900-\ufaff]', title))
+    return bool(_HANZI_RE.search(title))
 
 
 # ============================================================================
@@ -1,6 +1,7 @@
 """
 本地弹幕文件扫描器
 """
+import asyncio
 import os
 import re
 import logging
@@ -17,20 +18,30 @@ from src.db.crud import local_danmaku as local_danmaku_crud
 logger = logging.getLogger(__name__)
 
 
+# 每批写入数据库的条目数
+UPSERT_BATCH_SIZE = 500
+
+
 class LocalDanmakuScanner:
     """本地弹幕文件扫描器"""
 
     def __init__(self, session_factory: async_sessionmaker[AsyncSession]):
         self.session_factory = session_factory
         self.logger = logging.getLogger(self.__class__.__name__)
+        # 单次扫描内的nfo缓存: 同一剧集目录下的分集共享解析结果
+        self._nfo_cache: Dict[str, Dict[str, Any]] = {}
+        self._dir_nfo_cache: Dict[str, List[Path]] = {}
 
-    async def scan_directory(self, scan_path: str) -> Dict[str, Any]:
+    async def scan_directory(self, scan_path: str, incremental: bool = True) -> Dict[str, Any]:
         """
         扫描指定目录下的所有.xml弹幕文件
-        
+
         Args:
             scan_path: 扫描根目录
-            
+            incremental: 增量模式。根据已记录的 (路径, mtime, 大小) 只处理新增、
+                变更和已删除的文件,保留未变更条目及其导入状态;
+                为 False 时清空所有扫描结果后全量重建
+
         Returns:
             扫描结果统计
         """
@@ -40,43 +51,131 @@ class LocalDanmakuScanner:
         if not os.path.isdir(scan_path):
             raise ValueError(f"扫描路径不是目录: {scan_path}")
 
-        self.logger.info(f"开始扫描目录: {scan_path}")
-
-        # 清空之前的扫描结果
-        async with self.session_factory() as session:
-            await local_danmaku_crud.clear_all_local_items(session)
+        self.logger.info(f"开始扫描目录: {scan_path} (增量: {incremental})")
+        self._nfo_cache.clear()
+        self._dir_nfo_cache.clear()
 
-        # 递归扫描.xml文件
-        xml_files = []
-        for root, dirs, files in os.walk(scan_path):
-            for file in files:
-                if file.lower().endswith('.xml'):
-                    xml_files.append(os.path.join(root, file))
+        # 递归扫描.xml文件(在线程中执行,避免阻塞事件循环)
+        disk_files = await asyncio.to_thread(self._walk_xml_files, scan_path)
+        self.logger.info(f"找到 {len(disk_files)} 个.xml文件")
 
-        self.logger.info(f"找到 {len(xml_files)} 个.xml文件")
+        async with self.session_factory() as session:
+            if incremental:
+                # 以分隔符结尾,避免 /media/a 误匹配到 /media/ab 下的条目
+                prefix = scan_path if scan_path.endswith(os.sep) else scan_path + os.sep
+                known = await local_danmaku_crud.get_local_file_states(session, prefix)
+            else:
+                # 清空之前的扫描结果
+                await local_danmaku_crud.clear_all_local_items(session)
+                known = {}
+
+        # 对比差异
+        pending: List[Tuple[str, int, int, Optional[int]]] = []  # (path, mtime_ns, size, 已有id)
+        unchanged_count = 0
+        for path, (mtime_ns, size) in disk_files.items():
+            state = known.get(path)
+            if state is None:
+                pending.append((path, mtime_ns, size, None))
+            elif state[1] != mtime_ns or state[2] != size:
+                pending.append((path, mtime_ns, size, state[0]))
+            else:
+                unchanged_count += 1
+        removed_ids = [state[0] for path, state in known.items() if path not in disk_files]
 
-        # 解析每个文件
+        # 分批解析并写入
         success_count = 0
         error_count = 0
+        added_count = 0
+        updated_count = 0
+        for i in range(0, len(pending), UPSERT_BATCH_SIZE):
+            batch = pending[i:i + UPSERT_BATCH_SIZE]
+            new_items, changed_items, errors = await asyncio.to_thread(
+                self._build_items, batch, scan_path
+            )
+            error_count += errors
+            async with self.session_factory() as session:
+                added, updated = await local_danmaku_crud.bulk_upsert_local_items(
+                    session, new_items, changed_items
+                )
+            added_count += added
+            updated_count += updated
+            success_count += added + updated
+
+        removed_count = 0
+        if removed_ids:
+            async with self.session_factory() as session:
+                for i in range(0, len(removed_ids), UPSERT_BATCH_SIZE):
+                    removed_count += await local_danmaku_crud.batch_delete_local_items(
+                        session, removed_ids[i:i + UPSERT_BATCH_SIZE]
+                    )
+
+        self.logger.info(
+            f"扫描完成: 新增 {added_count}, 更新 {updated_count}, 未变更 {unchanged_count}, "
+            f"移除 {removed_count}, 失败 {error_count}"
+        )
+
+        return {
+            "total": len(disk_files),
+            "success": success_count + unchanged_count,
+            "error": error_count,
+            "added": added_count,
+            "updated": updated_count,
+            "unchanged": unchanged_count,
+            "removed": removed_count
+        }
 
-        for xml_file in xml_files:
+    def _walk_xml_files(self, scan_path: str) -> Dict[str, Tuple[int, int]]:
+        """
+        使用 os.scandir 递归收集.xml文件及其 (mtime_ns, size)
+
+        scandir 的目录项自带类型信息,省去了 os.walk + 逐个 stat 的额外系统调用
+        """
+        results: Dict[str, Tuple[int, int]] = {}
+        stack = [scan_path]
+        while stack:
+            current = stack.pop()
+            try:
+                with os.scandir(current) as it:
+                    for entry in it:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                stack.append(entry.path)
+                            elif entry.name.lower().endswith('.xml') and entry.is_file():
+                                st = entry.stat()
+                                results[entry.path] = (st.st_mtime_ns, st.st_size)
+                        except OSError as e:
+                            self.logger.warning(f"读取文件信息失败 {entry.path}: {e}")
+            except OSError as e:
+                self.logger.warning(f"无法访问目录 {current}: {e}")
+        return results
+
+    def _build_items(
+        self,
+        batch: List[Tuple[str, int, int, Optional[int]]],
+        scan_root: str
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], int]:
+        """解析一批文件的元数据(在工作线程中执行),返回 (新增项, 更新项, 失败数)"""
+        new_items: List[Dict[str, Any]] = []
+        changed_items: List[Dict[str, Any]] = []
+        errors = 0
+        for xml_file, mtime_ns, size, item_id in batch:
             try:
-                await self._process_xml_file(xml_file, scan_path)
-                success_count += 1
+                values = self._extract_item_values(xml_file, scan_root)
             except Exception as e:
                 self.logger.error(f"处理文件失败 {xml_file}: {e}")
-                error_count += 1
-
-        self.logger.info(f"扫描完成: 成功 {success_count}, 失败 {error_count}")
-
-        return {
-            "total": len(xml_files),
-            "success": success_count,
-            "error": error_count
-        }
+                errors += 1
+                continue
+            values["fileMtime"] = mtime_ns
+            values["fileSize"] = size
+            if item_id is None:
+                new_items.append(values)
+            else:
+                values["id"] = item_id
+                changed_items.append(values)
+        return new_items, changed_items, errors
 
-    async def _process_xml_file(self, xml_file: str, scan_root: str):
-        """处理单个.xml文件"""
+    def _extract_item_values(self, xml_file: str, scan_root: str) -> Dict[str, Any]:
+        """解析单个.xml文件对应的条目字段"""
         file_path = Path(xml_file)
         parent_dir = file_path.parent
         file_name = file_path.stem  # 不含扩展名的文件名
@@ -101,31 +200,25 @@ class LocalDanmakuScanner:
         # 从nfo提取其他元数据
         year_str = nfo_data.get('year') if nfo_data else None
         year = int(year_str) if year_str and str(year_str).isdigit() else None
-        tmdb_id = nfo_data.get('tmdbid') if nfo_data else None
-        tvdb_id = nfo_data.get('tvdbid') if nfo_data else None
-        imdb_id = nfo_data.get('imdbid') if nfo_data else None
 
         # 查找海报文件(从nfo所在目录)
         poster_url = self._find_poster(file_path, nfo_path, media_type, season, scan_root)
 
-        # 存入数据库
-        async with self.session_factory() as session:
-            await local_danmaku_crud.create_local_item(
-                session,
-                file_path=str(xml_file),
-                title=title,
-                media_type=media_type,
-                season=season,
-                episode=episode,
-                year=year,
-                tmdb_id=tmdb_id,
-                tvdb_id=tvdb_id,
-                imdb_id=imdb_id,
-                poster_url=poster_url,
-                nfo_path=nfo_path
-            )
+        self.logger.debug(f"已解析: {title} (S{season}E{episode})" if season and episode else f"已解析: {title}")
 
-        self.logger.debug(f"已添加: {title} (S{season}E{episode})" if season and episode else f"已添加: {title}")
+        return {
+            "filePath": str(xml_file),
+            "title": title,
+            "mediaType": media_type,
+            "season": season,
+            "episode": episode,
+            "year": year,
+            "tmdbId": nfo_data.get('tmdbid') if nfo_data else None,
+            "tvdbId": nfo_data.get('tvdbid') if nfo_data else None,
+            "imdbId": nfo_data.get('imdbid') if nfo_data else None,
+            "posterUrl": poster_url,
+            "nfoPath": nfo_path,
+        }
 
     def _find_poster(
         self,
@@ -228,14 +321,27 @@ class LocalDanmakuScanner:
 
         # 策略3: 查找父目录下唯一的nfo文件(电影)
         # 电影文件夹通常只有一个nfo文件,可能是任意名称
-        parent_nfo_files = list(xml_file.parent.glob('*.nfo'))
+        dir_key = str(xml_file.parent)
+        parent_nfo_files = self._dir_nfo_cache.get(dir_key)
+        if parent_nfo_files is None:
+            parent_nfo_files = list(xml_file.parent.glob('*.nfo'))
+            self._dir_nfo_cache[dir_key] = parent_nfo_files
         if len(parent_nfo_files) == 1:
             return str(parent_nfo_files[0]), self._parse_nfo(parent_nfo_files[0])
 
         return None, None
 
     def _parse_nfo(self, nfo_file: Path) -> Dict[str, Any]:
-        """解析nfo文件"""
+        """解析nfo文件(同一次扫描内按路径缓存)"""
+        cache_key = str(nfo_file)
+        cached = self._nfo_cache.get(cache_key)
+        if cached is None:
+            cached = self._parse_nfo_file(nfo_file)
+            self._nfo_cache[cache_key] = cached
+        return cached
+
+    def _parse_nfo_file(self, nfo_file: Path) -> Dict[str, Any]:
+        """读取并解析nfo文件内容"""
         try:
             tree = ET.parse(nfo_file)
             root = tree.getroot()
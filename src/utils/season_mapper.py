@@ -2,12 +2,15 @@
 import hashlib
 import logging
 import re
-from typing import Optional, List, Any, Dict
+import time
+from collections import OrderedDict
+from typing import Optional, List, Any, Awaitable, Callable, Dict, Tuple
 from difflib import SequenceMatcher
 
 from pydantic import Field
 from src.db import models, crud
 from src.core.cache import get_cache_backend
+from src.utils.shared_call import SharedCalls
 
 logger = logging.getLogger(__name__)
 
@@ -179,18 +182,129 @@ def title_contains_season_name(title: str, season_number: int, season_name: str,
     return max_similarity if max_similarity >= threshold else 0.0
 
 
+# ============================================================================
+# 进程内季度解析缓存
+# ============================================================================
+
+# 批量导入同一部剧时，每一集都会重复同样的元数据搜索、季度查询和别名映射。
+# 共享缓存后端/数据库缓存之上再加一层进程内缓存:
+# - 按标题 / 元数据源ID 缓存，命中时不再访问缓存后端或数据库；标题与下层缓存一样按原样参与键，
+#   不做大小写等规范化，避免与下层缓存的结果不一致
+# - 空结果（未找到、源请求失败）短时间负缓存，避免每一集都重新请求元数据源
+# - 相同键的并发查询只执行一次，其余等待共享结果（SharedCalls，单个调用方取消不影响其它调用方）
+
+SEASON_CACHE_TTL = 3600
+SEASON_CACHE_NEGATIVE_TTL = 600
+SEASON_CACHE_MAX_ENTRIES = 1024
+
+
+def _ai_matcher_identity(ai_matcher: Optional[Any]) -> Optional[str]:
+    """AI 匹配器配置的指纹（参与缓存键），不同 AI 配置选出的结果不共用"""
+    if ai_matcher is None:
+        return None
+    config = getattr(ai_matcher, "config", None)
+    if not isinstance(config, dict):
+        return f"{type(ai_matcher).__name__}:{id(ai_matcher)}"
+    items = sorted((k, repr(v)) for k, v in config.items() if k != "ai_match_api_key")
+    return hashlib.sha1(repr(items).encode("utf-8")).hexdigest()
+
+
+class SeasonResolutionCache:
+    """带 TTL 和负缓存的 LRU，相同键的并发加载合并为一次"""
+
+    def __init__(self, ttl: float = SEASON_CACHE_TTL, negative_ttl: float = SEASON_CACHE_NEGATIVE_TTL,
+                 max_entries: int = SEASON_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple, Tuple[Any, float]]" = OrderedDict()
+        self._inflight = SharedCalls()
+        self._stats = {"hits": 0, "negativeHits": 0, "coalesced": 0, "misses": 0}
+
+    def _lookup(self, key: Tuple) -> Tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def _store(self, key: Tuple, value: Any, negative: bool) -> None:
+        self._entries[key] = (value, time.monotonic() + (self.negative_ttl if negative else self.ttl))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_or_load(self, key: Tuple, loader: Callable[[], Awaitable[Any]],
+                          is_negative: Callable[[Any], bool] = lambda v: not v) -> Any:
+        """
+        查询缓存，未命中时调用 loader 加载
+
+        Args:
+            key: 缓存键（元组）
+            loader: 加载函数，抛出的异常会传给所有等待者且不缓存
+            is_negative: 判断结果是否为"未找到"，这类结果使用 negative_ttl
+        """
+        found, value = self._lookup(key)
+        if found:
+            self._stats["negativeHits" if is_negative(value) else "hits"] += 1
+            return value
+
+        async def load_and_store() -> Any:
+            value = await loader()
+            self._store(key, value, is_negative(value))
+            return value
+
+        if key in self._inflight:
+            self._stats["coalesced"] += 1
+        else:
+            self._stats["misses"] += 1
+        value, _ = await self._inflight.run(key, load_and_store)
+        return value
+
+    def invalidate(self, kind: Optional[str] = None) -> None:
+        """清空缓存；指定 kind 时只清除该类条目（键的第一个元素）"""
+        if kind is None:
+            self._entries.clear()
+            return
+        for key in [k for k in self._entries if k[0] == kind]:
+            del self._entries[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self._stats, "entries": len(self._entries), "inflight": len(self._inflight)}
+
+
+# 进程内共享实例（SeasonMapper 与模块级函数共用）
+season_resolution_cache = SeasonResolutionCache()
+
+
 # ============================================================================
 # 辅助函数
 # ============================================================================
 
-def _build_title_alias_equivalence_map(tv_results: List, seasons_info: List, log) -> Dict[str, Dict]:
+# 季度别名索引缓存: 季度信息指纹 -> {规范化别名: {'season', 'name'}}
+_alias_index_cache: "OrderedDict[Tuple, Dict[str, Dict]]" = OrderedDict()
+_ALIAS_INDEX_CACHE_SIZE = 128
+
+
+def _season_alias_index(seasons_info: List) -> Dict[str, Dict]:
     """
-    构建标题别名等价映射表
-    如果搜索结果标题与TMDB季度别名相同，则建立等价关系
+    构建（或复用）一部剧的季度别名索引，同一部剧的每一集共用一份
+    别名同时属于多个季度时取靠前的季度
     """
-    equivalence_map = {}
-
-    # 收集所有TMDB季度的别名
+    fingerprint = tuple(
+        (season.season_number, season.name, tuple(season.aliases or ()))
+        for season in seasons_info
+    )
+    index = _alias_index_cache.get(fingerprint)
+    if index is not None:
+        _alias_index_cache.move_to_end(fingerprint)
+        return index
+
+    # 收集所有TMDB季度的别名（同一季度号出现多次时以最后一次为准）
     tmdb_aliases = {}
     for season in seasons_info:
         aliases = set()
@@ -202,23 +316,35 @@ def _build_title_alias_equivalence_map(tv_results: List, seasons_info: List, log
         # 添加季度编号别名
         aliases.add(f"s{season.season_number}")
         aliases.add(f"第{season.season_number}季")
+        tmdb_aliases[season.season_number] = (
+            {'season': season.season_number, 'name': season.name or f"第{season.season_number}季"},
+            aliases,
+        )
 
-        tmdb_aliases[season.season_number] = {
-            'season': season.season_number,
-            'name': season.name or f"第{season.season_number}季",
-            'aliases': aliases
-        }
+    index = {}
+    for info, aliases in tmdb_aliases.values():
+        for alias in aliases:
+            index.setdefault(alias, info)
+
+    _alias_index_cache[fingerprint] = index
+    while len(_alias_index_cache) > _ALIAS_INDEX_CACHE_SIZE:
+        _alias_index_cache.popitem(last=False)
+    return index
+
+
+def _build_title_alias_equivalence_map(tv_results: List, seasons_info: List, log) -> Dict[str, Dict]:
+    """
+    构建标题别名等价映射表
+    如果搜索结果标题与TMDB季度别名相同，则建立等价关系
+    """
+    alias_index = _season_alias_index(seasons_info)
+    equivalence_map = {}
 
     # 检查每个搜索结果标题是否与TMDB别名等价
     for item in tv_results:
-        title_normalized = item.title.lower().strip()
-        for season_num, info in tmdb_aliases.items():
-            if title_normalized in info['aliases']:
-                equivalence_map[item.title] = {
-                    'season': season_num,
-                    'name': info['name']
-                }
-                break
+        info = alias_index.get(item.title.lower().strip())
+        if info is not None:
+            equivalence_map[item.title] = dict(info)
 
     if equivalence_map:
         log.info(f"📋 别名等价映射: 找到 {len(equivalence_map)} 个直接匹配")
@@ -318,6 +444,24 @@ class SeasonMapper:
         Returns:
             季度名称,如果没有找到则返回None
         """
+        key = ("season_name", title, season_number, year, tuple(sources) if sources else None,
+               _ai_matcher_identity(ai_matcher), custom_prompt)
+        return await season_resolution_cache.get_or_load(
+            key,
+            lambda: self._resolve_season_name(title, season_number, year, sources, ai_matcher, user, custom_prompt),
+        )
+
+    async def _resolve_season_name(
+        self,
+        title: str,
+        season_number: int,
+        year: Optional[int],
+        sources: Optional[List[str]],
+        ai_matcher: Optional[Any],
+        user: Optional[models.User],
+        custom_prompt: Optional[str]
+    ) -> Optional[str]:
+        """get_season_name 的实际查询（进程内缓存未命中时调用）"""
         # 检查缓存
         sources_str = "_".join(sources) if sources else "default"
         cache_key = f"season_name_{title}_{season_number}_{year or 'any'}_{sources_str}"
@@ -490,6 +634,14 @@ class SeasonMapper:
         if media_type != "tv":
             return []
 
+        seasons = await season_resolution_cache.get_or_load(
+            ("seasons", source, str(id)),
+            lambda: self._load_seasons(source, id),
+        )
+        return list(seasons)
+
+    async def _load_seasons(self, source: str, id: str) -> List[SeasonInfo]:
+        """get_seasons_from_source 的实际查询（进程内缓存未命中时调用）"""
         # 检查缓存
         cache_key = f"{source}_seasons_{id}"
         _backend = get_cache_backend()
@@ -1004,7 +1156,20 @@ async def _get_cached_metadata_search(
     Returns:
         List[models.MetadataDetailsResponse]: 元数据搜索结果
     """
+    results = await season_resolution_cache.get_or_load(
+        ("search", source, search_title),
+        lambda: _load_metadata_search(search_title, metadata_manager, logger, source),
+    )
+    return list(results or [])
 
+
+async def _load_metadata_search(
+    search_title: str,
+    metadata_manager,
+    logger,
+    source: str
+) -> List[models.MetadataDetailsResponse]:
+    """_get_cached_metadata_search 的实际查询（进程内缓存未命中时调用）"""
     # 生成缓存键（包含源名称）
     cache_key = f"{source}_search_{hashlib.md5(search_title.encode('utf-8')).hexdigest()}"
 
@@ -0,0 +1,64 @@
+"""
+同键并发调用的合并执行
+
+相同键的并发调用只执行一次计算，其余调用等待并共享结果。
+计算在独立的任务中运行，调用方通过 shield 等待：某个调用方被取消（客户端断开、任务中止）
+只影响它自己，其余调用方照常拿到结果；所有调用方都已取消时才取消计算本身。
+
+使用方式:
+    calls = SharedCalls()
+    result, shared = await calls.run(key, lambda: compute(...))
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class _Inflight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SharedCalls:
+    """按键合并并发调用"""
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, _Inflight] = {}
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._inflight
+
+    async def run(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        执行或加入 key 对应的计算，返回 (结果, 是否加入了已在进行的计算)
+
+        compute 只在没有进行中的同键计算时调用；计算抛出的异常会传给所有调用方。
+        """
+        inflight = self._inflight.get(key)
+        shared = inflight is not None
+        if inflight is None:
+            inflight = _Inflight(asyncio.ensure_future(compute()))
+            self._inflight[key] = inflight
+            inflight.task.add_done_callback(lambda _task: self._discard(key, inflight))
+        inflight.waiters += 1
+        try:
+            return await asyncio.shield(inflight.task), shared
+        finally:
+            inflight.waiters -= 1
+            # 只有调用方被取消时计算才可能尚未结束；最后一个调用方离开后不再需要结果
+            if inflight.waiters == 0 and not inflight.task.done():
+                inflight.task.cancel()
+
+    def _discard(self, key: Hashable, inflight: _Inflight) -> None:
+        if self._inflight.get(key) is inflight:
+            del self._inflight[key]
+        if not inflight.task.cancelled():
+            # 异常由等待者各自取得；这里标记为已取得，避免调用方全部离开后出现
+            # "exception was never retrieved" 警告
+            inflight.task.exception()
@@ -0,0 +1,189 @@
+"""
+出站请求令牌桶限速
+
+按弹幕源 / 元数据源名称维护独立的令牌桶，在进程内节制对外请求速率，
+避免批量导入时被 Bilibili、腾讯等源以 412/429 封禁。
+
+- 每个桶按 rate(每秒补充的令牌数) 匀速补充，最多积攒 burst 个令牌
+- acquire() 在令牌不足时精确休眠到令牌可用的时刻，等待者按先来后到排队
+- 参数来自配置项 outboundRateLimits(JSON)，修改后最多 REFRESH_INTERVAL 秒生效
+
+使用方式:
+    from src.utils import get_outbound_limiter, rate_limited_event_hooks
+
+    await get_outbound_limiter().acquire("bilibili")
+    client = httpx.AsyncClient(event_hooks=rate_limited_event_hooks("tmdb"))
+"""
+
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CONFIG_KEY = "outboundRateLimits"
+# 配置刷新间隔（秒）
+REFRESH_INTERVAL = 30
+
+# 默认参数: {名称: {"rate": 每秒令牌数, "burst": 桶容量}}，rate <= 0 表示不限速
+DEFAULT_LIMITS: Dict[str, Dict[str, float]] = {
+    "default": {"rate": 5, "burst": 10},
+    "bilibili": {"rate": 2, "burst": 6},
+    "tencent": {"rate": 2, "burst": 6},
+    "iqiyi": {"rate": 3, "burst": 6},
+    "youku": {"rate": 3, "burst": 6},
+    "mgtv": {"rate": 3, "burst": 6},
+    "tmdb": {"rate": 20, "burst": 40},
+    "bangumi": {"rate": 5, "burst": 10},
+    "douban": {"rate": 1, "burst": 3},
+}
+
+
+class TokenBucket:
+    """单个令牌桶"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+
+    def reconfigure(self, rate: float, burst: float) -> None:
+        self._refill(time.monotonic())
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self._tokens = min(self._tokens, self.burst)
+
+    def _refill(self, now: float) -> None:
+        if self.rate > 0:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, tokens: float = 1) -> float:
+        """
+        预留令牌并返回需要等待的秒数
+
+        令牌可以透支为负数：后来的调用方看到更大的欠额，因此会等待更久，
+        从而保证先来先得且无需轮询。
+        """
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        self._refill(now)
+        self._tokens -= tokens
+        if self._tokens >= 0:
+            return 0.0
+        return -self._tokens / self.rate
+
+    async def acquire(self, tokens: float = 1) -> float:
+        """获取令牌，不足时休眠到可用为止。返回实际等待的秒数。"""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    @property
+    def available(self) -> float:
+        self._refill(time.monotonic())
+        return self._tokens
+
+
+class OutboundRateLimiter:
+    """按名称管理令牌桶，参数从配置中周期性刷新"""
+
+    def __init__(self, limits: Optional[Dict[str, Dict[str, float]]] = None):
+        self._limits: Dict[str, Dict[str, float]] = dict(limits or DEFAULT_LIMITS)
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._config_manager = None
+        self._last_refresh = 0.0
+        self._refresh_lock = asyncio.Lock()
+
+    def bind_config(self, config_manager) -> None:
+        """绑定配置管理器，之后按 REFRESH_INTERVAL 从 outboundRateLimits 刷新参数"""
+        self._config_manager = config_manager
+        self._last_refresh = 0.0
+
+    def configure(self, limits: Dict[str, Dict[str, float]]) -> None:
+        """替换限速参数（与默认值合并），已有的桶就地更新"""
+        merged = dict(DEFAULT_LIMITS)
+        for name, value in (limits or {}).items():
+            if isinstance(value, dict):
+                merged[name] = {**merged.get(name, merged["default"]), **value}
+        self._limits = merged
+        for name, bucket in self._buckets.items():
+            bucket.reconfigure(*self._params(name))
+
+    def _params(self, name: str) -> Tuple[float, float]:
+        params = self._limits.get(name) or self._limits.get("default") or {}
+        rate = float(params.get("rate", 0) or 0)
+        burst = float(params.get("burst", 0) or max(1.0, rate))
+        return rate, burst
+
+    async def _maybe_refresh(self) -> None:
+        if self._config_manager is None or time.monotonic() - self._last_refresh < REFRESH_INTERVAL:
+            return
+        async with self._refresh_lock:
+            if time.monotonic() - self._last_refresh < REFRESH_INTERVAL:
+                return
+            self._last_refresh = time.monotonic()
+            try:
+                raw = await self._config_manager.get(CONFIG_KEY, "")
+                self.configure(json.loads(raw) if raw else {})
+            except Exception as e:
+                logger.warning(f"解析出站限速配置 {CONFIG_KEY} 失败，继续使用当前参数: {e}")
+
+    def bucket(self, name: str) -> TokenBucket:
+        bucket = self._buckets.get(name)
+        if bucket is None:
+            bucket = self._buckets[name] = TokenBucket(*self._params(name))
+        return bucket
+
+    async def acquire(self, name: str, tokens: float = 1) -> float:
+        """为名为 name 的源获取令牌，必要时休眠。返回等待的秒数。"""
+        await self._maybe_refresh()
+        waited = await self.bucket(name).acquire(tokens)
+        stats = self._stats.setdefault(name, {"requests": 0, "waited": 0, "waitedSeconds": 0.0})
+        stats["requests"] += 1
+        if waited > 0:
+            stats["waited"] += 1
+            stats["waitedSeconds"] += waited
+        return waited
+
+    def get_stats(self) -> Dict[str, Any]:
+        """各桶的参数、当前令牌数和等待统计"""
+        result = {}
+        for name, bucket in self._buckets.items():
+            result[name] = {
+                "rate": bucket.rate,
+                "burst": bucket.burst,
+                "available": round(bucket.available, 2),
+                **self._stats.get(name, {}),
+            }
+        return result
+
+
+_outbound_limiter = OutboundRateLimiter()
+
+
+def get_outbound_limiter() -> OutboundRateLimiter:
+    """获取进程内共享的出站限速器"""
+    return _outbound_limiter
+
+
+def rate_limited_event_hooks(name: str, hooks: Optional[Dict[str, list]] = None) -> Dict[str, list]:
+    """
+    返回 httpx 的 event_hooks，在每个请求发出前从 name 对应的令牌桶获取令牌
+
+    Args:
+        name: 源名称
+        hooks: 调用方已有的 event_hooks，会与限速钩子合并
+    """
+    async def _acquire(request):
+        await _outbound_limiter.acquire(name)
+
+    merged = {key: list(value) for key, value in (hooks or {}).items()}
+    merged.setdefault("request", []).insert(0, _acquire)
+    return merged
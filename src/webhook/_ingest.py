@@ -0,0 +1,172 @@
+"""
+Webhook 事件合并缓冲
+
+媒体服务器重新扫描一季时会在几秒内发来几十个几乎相同的入库事件，
+逐个分发会为同一部剧触发几十次全网搜索。这里把同一来源、同一剧集、同一季
+在 webhookCoalesceSeconds 秒内的事件合并为一个覆盖所有请求集数的搜索任务:
+
+- 单集事件合并为 selectedEpisodes 聚合搜索（与 Emby Series 通知的聚合任务相同）
+- 其中任一事件请求整季时，合并结果为整季任务
+- 电影等其它类型按 unique_key 去重
+
+同一合并逻辑也用于 WebhookProcessorJob 处理到期的延时任务。
+此文件以 `_` 开头，不会被 WebhookManager 当作处理器加载。
+"""
+
+import asyncio
+import logging
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 合并窗口默认值（秒）
+DEFAULT_COALESCE_SECONDS = 10
+
+
+@lru_cache(maxsize=16)
+def compile_webhook_filter(pattern: str) -> Optional[re.Pattern]:
+    """编译并缓存 Webhook 标题过滤正则，无效的正则返回 None"""
+    try:
+        return re.compile(pattern, re.IGNORECASE)
+    except re.error as e:
+        logger.error(f"无效的 Webhook 过滤正则表达式: '{pattern}'。错误: {e}。将忽略此过滤规则。")
+        return None
+
+
+@dataclass
+class WebhookEvent:
+    """一个待分发的 Webhook 搜索请求"""
+    task_title: str
+    unique_key: str
+    payload: Dict[str, Any]
+    webhook_source: str
+
+
+def _coalesce_key(event: WebhookEvent) -> Tuple:
+    payload = event.payload
+    if payload.get("mediaType") == "tv_series" and payload.get("season") is not None:
+        return ("tv", event.webhook_source, payload.get("animeTitle"), payload.get("season"))
+    return ("key", event.unique_key)
+
+
+def _requested_episodes(payload: Dict[str, Any]) -> Optional[Set[int]]:
+    """事件请求的集数；None 表示整季"""
+    if payload.get("currentEpisodeIndex") is not None:
+        return {int(payload["currentEpisodeIndex"])}
+    if payload.get("selectedEpisodes"):
+        return {int(ep) for ep in payload["selectedEpisodes"]}
+    return None
+
+
+def _merge_group(events: List[WebhookEvent]) -> WebhookEvent:
+    if len(events) == 1:
+        return events[0]
+    latest = events[-1]
+    if latest.payload.get("mediaType") != "tv_series":
+        return latest
+
+    episodes: Set[int] = set()
+    for event in events:
+        requested = _requested_episodes(event.payload)
+        if requested is None:
+            # 有整季请求时整季任务已覆盖所有集数
+            return event
+        episodes |= requested
+
+    if len(episodes) == 1:
+        episode = next(iter(episodes))
+        return next(e for e in reversed(events) if _requested_episodes(e.payload) == {episode})
+
+    ordered = sorted(episodes)
+    payload = dict(latest.payload)
+    payload.update(currentEpisodeIndex=None, selectedEpisodes=ordered, mediaServerEpisodeId=None)
+    title = payload.get("animeTitle")
+    season = int(payload.get("season") or 1)
+    ep_range = f"E{ordered[0]:02d}-E{ordered[-1]:02d}"
+    return WebhookEvent(
+        task_title=f"Webhook（{latest.webhook_source}）聚合搜索: {title} - S{season:02d} {ep_range}（{len(ordered)}集）",
+        unique_key=f"webhook-search-{title}-S{season}-{ep_range}-{len(ordered)}",
+        payload=payload,
+        webhook_source=latest.webhook_source,
+    )
+
+
+def coalesce_webhook_events(events: List[WebhookEvent]) -> List[Tuple[WebhookEvent, List[WebhookEvent]]]:
+    """
+    合并同一剧集同一季的事件
+
+    Returns:
+        [(合并后的事件, 被合并的原始事件列表)]，按各组首个事件的先后排序
+    """
+    groups: Dict[Tuple, List[WebhookEvent]] = {}
+    for event in events:
+        groups.setdefault(_coalesce_key(event), []).append(event)
+    return [(_merge_group(group), group) for group in groups.values()]
+
+
+@dataclass
+class _PendingGroup:
+    events: List[WebhookEvent] = field(default_factory=list)
+    handler: Any = None
+    timer: Optional[asyncio.TimerHandle] = None
+
+
+class WebhookIngestBuffer:
+    """进程内的 Webhook 合并缓冲，窗口到期后调用处理器的 dispatch_now 分发合并结果"""
+
+    def __init__(self):
+        self._pending: Dict[Tuple, _PendingGroup] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._stats = {"received": 0, "dispatched": 0}
+
+    def add(self, handler, event: WebhookEvent, window: float) -> None:
+        self._stats["received"] += 1
+        key = _coalesce_key(event)
+        group = self._pending.get(key)
+        if group is None:
+            group = self._pending[key] = _PendingGroup()
+            group.timer = asyncio.get_running_loop().call_later(window, self._release, key)
+        group.events.append(event)
+        # 使用最近一次请求的处理器实例分发（依赖相同）
+        group.handler = handler
+
+    def _release(self, key: Tuple) -> None:
+        group = self._pending.pop(key, None)
+        if group is None:
+            return
+        if group.timer is not None:
+            group.timer.cancel()
+        task = asyncio.create_task(self._dispatch(group))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, group: _PendingGroup) -> None:
+        merged = _merge_group(group.events)
+        if len(group.events) > 1:
+            logger.info(f"Webhook: 合并了 {len(group.events)} 个请求 -> '{merged.task_title}'")
+        self._stats["dispatched"] += 1
+        try:
+            await group.handler.dispatch_now(merged.task_title, merged.unique_key, merged.payload, merged.webhook_source)
+        except Exception as e:
+            logger.error(f"分发合并后的 Webhook 任务 '{merged.task_title}' 失败: {e}", exc_info=True)
+
+    async def flush(self) -> None:
+        """立即分发所有缓冲中的事件（关闭时调用）"""
+        for key in list(self._pending):
+            self._release(key)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self._stats, "pending": sum(len(g.events) for g in self._pending.values())}
+
+
+_ingest_buffer = WebhookIngestBuffer()
+
+
+def get_webhook_ingest_buffer() -> WebhookIngestBuffer:
+    """获取进程内共享的 Webhook 合并缓冲"""
+    return _ingest_buffer
@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+
+from src.ai._fake import FakeAIClient
+from src.ai.ai_batcher import AIBatchDispatcher
+from src.ai.ai_matcher import AIMatcher
+
+
+def _recording_sender(batches):
+    async def send_batch(kind, payloads):
+        batches.append((kind, list(payloads)))
+        return [f"{kind}:{p}" for p in payloads]
+    return send_batch
+
+
+def test_requests_within_window_share_one_batch():
+    batches = []
+
+    async def main():
+        dispatcher = AIBatchDispatcher(_recording_sender(batches), window_ms=20)
+        return await asyncio.gather(*(dispatcher.submit("k", i) for i in range(5)))
+
+    results = asyncio.run(main())
+
+    assert results == [f"k:{i}" for i in range(5)]
+    assert batches == [("k", [0, 1, 2, 3, 4])]
+
+
+def test_kinds_are_batched_separately():
+    batches = []
+
+    async def main():
+        dispatcher = AIBatchDispatcher(_recording_sender(batches), window_ms=20)
+        return await asyncio.gather(dispatcher.submit("a", 1), dispatcher.submit("b", 2), dispatcher.submit("a", 3))
+
+    assert asyncio.run(main()) == ["a:1", "b:2", "a:3"]
+    assert sorted(batches) == [("a", [1, 3]), ("b", [2])]
+
+
+def test_batch_is_split_by_size_and_token_budget():
+    batches = []
+
+    async def main():
+        by_size = AIBatchDispatcher(_recording_sender(batches), window_ms=1000, max_batch_size=2)
+        await asyncio.gather(*(by_size.submit("size", i) for i in range(5)))
+        by_tokens = AIBatchDispatcher(_recording_sender(batches), window_ms=20, max_batch_tokens=10,
+                                      estimate=lambda payload: 4)
+        await asyncio.gather(*(by_tokens.submit("tokens", i) for i in range(5)))
+
+    asyncio.run(main())
+
+    assert [p for k, p in batches if k == "size"] == [[0, 1], [2, 3], [4]]
+    assert [p for k, p in batches if k == "tokens"] == [[0, 1], [2, 3], [4]]
+
+
+def test_send_failure_reaches_every_caller():
+    async def send_batch(kind, payloads):
+        raise RuntimeError("boom")
+
+    async def main():
+        dispatcher = AIBatchDispatcher(send_batch, window_ms=20)
+        results = await asyncio.gather(*(dispatcher.submit("k", i) for i in range(3)), return_exceptions=True)
+        return results, dispatcher.get_stats()
+
+    results, stats = asyncio.run(main())
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert stats["batches"] == 1
+    assert stats["failures"] == 1
+
+
+@pytest.fixture
+def matcher():
+    config = {
+        "ai_match_provider": "openai",
+        "ai_match_api_key": "test",
+        "ai_match_model": "fake",
+        "ai_recognition_prompt": "recognize",
+        "ai_cache_enabled": False,
+        "ai_batch_enabled": True,
+        "ai_batch_window_ms": 20,
+    }
+    return AIMatcher(config, client=FakeAIClient())
+
+
+def test_concurrent_title_recognition_is_sent_as_one_request(matcher):
+    titles = ["葬送的芙莉莲", "迷宫饭", "药屋少女的呢喃"]
+
+    async def main():
+        return await asyncio.gather(*(matcher.recognize_title(t) for t in titles))
+
+    results = asyncio.run(main())
+
+    assert [r["search_title"] for r in results] == titles
+    assert len(matcher.client.calls) == 1
+    assert [item["title"] for item in matcher.client.calls[0]["items"]] == titles
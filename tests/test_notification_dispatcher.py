@@ -0,0 +1,45 @@
+import asyncio
+
+import pytest
+
+from src.notification._fake import FakeNotificationChannel
+from src.services import notification_dispatcher
+from src.services.notification_dispatcher import MAX_RETRIES, NotificationDispatcher
+
+
+@pytest.fixture(autouse=True)
+def _no_backoff(monkeypatch):
+    monkeypatch.setattr(notification_dispatcher, "RETRY_BACKOFF", 0.0)
+
+
+async def _deliver(channel):
+    dispatcher = NotificationDispatcher(digest_window=0)
+    dispatcher.submit(1, channel, "标题", "正文")
+    await dispatcher.flush(timeout=5)
+    stats = dispatcher.get_stats()[1]
+    await dispatcher.stop()
+    return stats
+
+
+@pytest.mark.parametrize("fail_result", [False, True], ids=["raises", "returns-false"])
+def test_failed_send_is_retried(fail_result):
+    channel = FakeNotificationChannel(1, "fake", {}, None, fail_times=2, fail_result=fail_result)
+
+    stats = asyncio.run(_deliver(channel))
+
+    assert channel.attempts == 3
+    assert len(channel.deliveries) == 1
+    assert stats["retries"] == 2
+    assert stats["sent"] == 1
+    assert stats["failed"] == 0
+
+
+def test_send_gives_up_after_max_retries():
+    channel = FakeNotificationChannel(1, "fake", {}, None, fail_times=MAX_RETRIES + 1, fail_result=True)
+
+    stats = asyncio.run(_deliver(channel))
+
+    assert channel.attempts == MAX_RETRIES + 1
+    assert channel.deliveries == []
+    assert stats["retries"] == MAX_RETRIES
+    assert stats["failed"] == 1
@@ -167,6 +167,11 @@ const SortableItem = ({
             {item.version && (
               <Tag color="blue">{item.version}</Tag>
             )}
+            {item.downloadConcurrency != null && (
+              <Tooltip title="自适应的分集弹幕下载并发数，在最小/最大并发配置之间按该源的响应情况自动调整">
+                <Tag color="purple">并发 {item.downloadConcurrency}</Tag>
+              </Tooltip>
+            )}
             <Switch
               checked={item.isEnabled}
               checkedChildren="已启用"